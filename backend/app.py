@@ -1,165 +1,219 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Blueprint, Response, g, request, jsonify, send_file
+from functools import wraps
 from flask_cors import CORS
 from dotenv import load_dotenv
 from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
 import os
 import csv
+import atexit
 import io
-from openpyxl import Workbook
+import time
 
-from database_enhanced import Database
-from youtube_service import YouTubeService
 from models import Video
-from bulk_import import BulkImporter
-from email_service import EmailService
-from music_detector import MusicDetector, analyze_video_for_piracy, get_smart_rules
-from spotify_service import SpotifyService
-from musicbrainz_service import MusicBrainzService
-from keyword_learning import KeywordLearning
-from auto_update_service import AutoUpdateService
-from unified_import_service import UnifiedImportService
-from web_scraper_service import WebScraperService
+from bulk_import import BulkImporter, import_rows, iter_table_rows
+from music_detector import analyze_video_for_piracy, get_smart_rules
+from ingest import IngestSource
+import metrics
+from quota import SOURCE_COSTS
+from services import Services
+from serialization import OrjsonProvider, table_payload
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key')
-
-# Configure CORS to allow frontend access
-allowed_origins = [
-    "http://localhost:5173", 
-    "http://localhost:3000", 
-    "http://127.0.0.1:5173"
-]
-
-# Add production frontend URL from environment variable
-frontend_url = os.getenv('FRONTEND_URL')
-if frontend_url:
-    # Add the URL as-is
-    allowed_origins.append(frontend_url.rstrip('/'))
-    # Also add https version if http is provided
-    if frontend_url.startswith('http://'):
-        allowed_origins.append(frontend_url.replace('http://', 'https://').rstrip('/'))
-    # Also add http version if https is provided
-    elif frontend_url.startswith('https://'):
-        allowed_origins.append(frontend_url.replace('https://', 'http://').rstrip('/'))
-
-print(f"CORS Allowed Origins: {allowed_origins}")
-
-# Use Flask-CORS as baseline
-CORS(app, resources={
-    r"/api/*": {
-        "origins": allowed_origins,
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "supports_credentials": True
-    }
-})
+# Services are built lazily on first use, not at import (see services.py)
+services = Services()
 
-# Manual CORS handler to guarantee OPTIONS preflight works
-# (Flask-CORS sometimes fails to handle OPTIONS, returning 404)
-@app.after_request
-def after_request(response):
-    origin = request.headers.get('Origin', '')
-    if origin in allowed_origins or not origin:
-        response.headers['Access-Control-Allow-Origin'] = origin if origin else '*'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Access-Control-Max-Age'] = '3600'
-    return response
-
-@app.before_request
-def handle_preflight():
-    """Explicitly handle OPTIONS preflight requests so they never 404"""
-    if request.method == 'OPTIONS':
+# All routes live on this blueprint; create_app() builds the Flask app around it
+api = Blueprint('api', __name__)
+
+# Admin password
+ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
+
+def get_allowed_origins():
+    """CORS origins: local dev servers plus FRONTEND_URL (http and https)"""
+    allowed_origins = [
+        "http://localhost:5173", 
+        "http://localhost:3000", 
+        "http://127.0.0.1:5173"
+    ]
+    
+    # Add production frontend URL from environment variable
+    frontend_url = os.getenv('FRONTEND_URL')
+    if frontend_url:
+        # Add the URL as-is
+        allowed_origins.append(frontend_url.rstrip('/'))
+        # Also add https version if http is provided
+        if frontend_url.startswith('http://'):
+            allowed_origins.append(frontend_url.replace('http://', 'https://').rstrip('/'))
+        # Also add http version if https is provided
+        elif frontend_url.startswith('https://'):
+            allowed_origins.append(frontend_url.replace('https://', 'http://').rstrip('/'))
+    
+    return allowed_origins
+
+def create_app():
+    """
+    Build the Flask app
+    
+    Touches no service: the database, scheduler and clients are created on
+    first use. Entry points call start_runtime() for the in-process
+    scheduler and background warm-up; under gunicorn the warm-up starts
+    after fork and the scheduler runs in run_scheduler.py.
+    """
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key')
+    
+    allowed_origins = get_allowed_origins()
+    print(f"CORS Allowed Origins: {allowed_origins}")
+    
+    # Use Flask-CORS as baseline
+    CORS(app, resources={
+        r"/api/*": {
+            "origins": allowed_origins,
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization"],
+            "supports_credentials": True
+        }
+    })
+    
+    # Manual CORS handler to guarantee OPTIONS preflight works
+    # (Flask-CORS sometimes fails to handle OPTIONS, returning 404)
+    @app.after_request
+    def after_request(response):
         origin = request.headers.get('Origin', '')
         if origin in allowed_origins or not origin:
-            response = app.make_default_options_response()
             response.headers['Access-Control-Allow-Origin'] = origin if origin else '*'
             response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
             response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             response.headers['Access-Control-Max-Age'] = '3600'
-            return response
-
-# Initialize database
-db = Database(os.getenv('DATABASE_PATH', 'videos.db'))
-
-# Initialize YouTube service
-try:
-    youtube_service = YouTubeService(os.getenv('YOUTUBE_API_KEY', ''))
-    API_CONFIGURED = True
-except ValueError as e:
-    youtube_service = None
-    API_CONFIGURED = False
-    print(f"WARNING: {str(e)}")
-
-# Initialize email service
-email_service = EmailService()
-
-# Initialize music detector
-music_detector = MusicDetector()
-
-# Initialize Spotify service (optional)
-try:
-    spotify_service = SpotifyService()
-    SPOTIFY_CONFIGURED = spotify_service.test_credentials()
-except:
-    spotify_service = None
-    SPOTIFY_CONFIGURED = False
-
-# Initialize MusicBrainz service (always available, no auth needed)
-musicbrainz_service = MusicBrainzService()
-
-# Initialize web scraper service (Deezer + text parsing, always available)
-web_scraper_service = WebScraperService()
-
-# Initialize keyword learning
-keyword_learner = KeywordLearning(db)
-
-# Initialize auto-update service
-auto_update_service = AutoUpdateService(db, spotify_service, musicbrainz_service)
-
-# Initialize unified import service (Spotify + Deezer + MusicBrainz fallback)
-unified_import = UnifiedImportService(
-    spotify_service=spotify_service if SPOTIFY_CONFIGURED else None,
-    musicbrainz_service=musicbrainz_service,
-    web_scraper_service=web_scraper_service
-)
-
-# Admin password
-ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
-
-# Debug: Print loaded password on startup
-print("=" * 50)
-print(f"ADMIN PASSWORD LOADED: '{ADMIN_PASSWORD}'")
-print(f"EMAIL SERVICE: {'Enabled' if email_service.enabled else 'Disabled'}")
-print("=" * 50)
-
-# Scheduler for automatic searches
-scheduler = BackgroundScheduler()
-scheduler.start()
+        return response
+    
+    @app.before_request
+    def handle_preflight():
+        """Explicitly handle OPTIONS preflight requests so they never 404"""
+        if request.method == 'OPTIONS':
+            origin = request.headers.get('Origin', '')
+            if origin in allowed_origins or not origin:
+                response = app.make_default_options_response()
+                response.headers['Access-Control-Allow-Origin'] = origin if origin else '*'
+                response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+                response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
+                response.headers['Access-Control-Allow-Credentials'] = 'true'
+                response.headers['Access-Control-Max-Age'] = '3600'
+                return response
+    
+    # Compress large JSON bodies (cached responses reuse their compressed copy)
+    @app.after_request
+    def compress_response(response):
+        return services.response_cache.compress_response(response)
+    
+    # Request latency per route (registered last, so it runs first among after_request hooks
+    # and times everything but compression)
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            metrics.HTTP_LATENCY.labels(route, request.method).observe(time.perf_counter() - started)
+            metrics.HTTP_RESPONSES.labels(route, request.method, STATUS_CLASSES[response.status_code // 100]).inc()
+        return response
+    
+    app.register_blueprint(api)
+    metrics.preallocate_routes(app)
+    
+    # Debug: Print loaded password on startup
+    print("=" * 50)
+    print(f"ADMIN PASSWORD LOADED: '{ADMIN_PASSWORD}'")
+    print("=" * 50)
+    
+    return app
+
+def start_runtime():
+    """
+    Start the in-process scheduler and background warm-up (dev server, waitress)
+    Gunicorn does not call this: workers warm up in post_fork and the scheduler
+    runs in its own process (run_scheduler.py). SCHEDULER_ENABLED=0 skips the scheduler.
+    """
+    print(f"EMAIL SERVICE: {'Enabled' if services.email_service.enabled else 'Disabled'}")
+    if os.getenv('SCHEDULER_ENABLED', '1') == '1':
+        services.scheduler.start()
+        atexit.register(services.scheduler.shutdown)
+    services.start_background()
+
+# status_code // 100 -> http_responses_total status label
+STATUS_CLASSES = ('1xx', '1xx', '2xx', '3xx', '4xx', '5xx')
+
+@metrics.REGISTRY.collector
+def service_metrics():
+    """Scrape-time metrics read from the services: statement timings and quota left per key"""
+    families = metrics.query_timing_families(services.db.get_query_timings())
+    families.append(('youtube_quota_remaining_units', 'gauge', 'Quota units left today per API key',
+                     [('', {'key': key_id}, units)
+                      for key_id, units in sorted(services.quota_ledger.remaining_by_key().items())]))
+    return families
 
 # Auth middleware
 def check_auth(password):
     return password == ADMIN_PASSWORD
 
-@app.route('/api/health', methods=['GET'])
+def cached(*tables):
+    """
+    Serve a GET endpoint through the response cache
+    `tables` are the tables the response is built from; a write to any of them
+    changes the ETag (304 for unchanged polls) and invalidates the cached body
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            return services.response_cache.respond(tables, view, *args, **kwargs)
+        return wrapper
+    return decorator
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'ok',
-        'api_configured': API_CONFIGURED,
-        'database_ok': os.path.exists(db.db_path),
-        'email_configured': email_service.enabled,
-        'spotify_configured': SPOTIFY_CONFIGURED,
+        'api_configured': services.api_configured,
+        'database_ok': services.db.dialect != 'sqlite' or os.path.exists(services.config['DATABASE_PATH']),
+        'email_configured': services.email_service.enabled,
+        # None while the background credential check is still running
+        'spotify_configured': services.spotify_status(),
         'musicbrainz_available': True,
-        'deezer_available': True
+        'deezer_available': True,
+        'quota': services.quota_ledger.status()
     })
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape endpoint (text exposition format)"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/quota', methods=['GET'])
+def get_quota():
+    """Quota ledger (today by endpoint/key, daily history) and the plan for the next keyword/song sweep"""
+    days = request.args.get('days', 7, type=int)
+    keyword_plan = services.quota_planner.plan(services.db.get_active_keywords(), SOURCE_COSTS['keyword'])
+    song_plan = services.quota_planner.plan(
+        [f"{song.song_name} - {song.artist_name}" for song in services.db.get_active_songs()],
+        SOURCE_COSTS['song'])
+    
+    # Key rotation state (exhausted keys sit out until the quota day resets)
+    key_pool = services.youtube_service.pool.status() if services.api_configured else []
+    
+    return jsonify(dict(services.quota_ledger.summary(days), key_pool=key_pool, plan={
+        'keywords': {k: keyword_plan[k] for k in ('run', 'deferred', 'estimated_units')},
+        'songs': {k: song_plan[k] for k in ('run', 'deferred', 'estimated_units')},
+        'yields': dict(keyword_plan['yields'], **song_plan['yields'])
+    }))
+
+@api.route('/api/auth/login', methods=['POST'])
 def login():
     data = request.json
     password = data.get('password', '')
@@ -178,12 +232,13 @@ def login():
 # ARTISTS ENDPOINTS
 # ============================================================================
 
-@app.route('/api/artists', methods=['GET'])
+@api.route('/api/artists', methods=['GET'])
+@cached('artists')
 def get_artists():
-    artists = db.get_all_artists()
+    artists = services.db.get_all_artists()
     return jsonify([a.to_dict() for a in artists])
 
-@app.route('/api/artists', methods=['POST'])
+@api.route('/api/artists', methods=['POST'])
 def add_artist():
     data = request.json
     name = data.get('name', '').strip()
@@ -194,25 +249,25 @@ def add_artist():
     if not name:
         return jsonify({'error': 'Artist name is required'}), 400
     
-    artist_id = db.add_artist(name, email, contact_person, notes)
+    artist_id = services.db.add_artist(name, email, contact_person, notes)
     
     if artist_id:
         return jsonify({'success': True, 'id': artist_id, 'message': 'Artist added'})
     else:
         return jsonify({'error': 'Artist already exists'}), 400
 
-@app.route('/api/artists/<int:artist_id>', methods=['GET'])
+@api.route('/api/artists/<int:artist_id>', methods=['GET'])
 def get_artist(artist_id):
-    artist = db.get_artist(artist_id)
+    artist = services.db.get_artist(artist_id)
     if artist:
         return jsonify(artist.to_dict())
     else:
         return jsonify({'error': 'Artist not found'}), 404
 
-@app.route('/api/artists/<int:artist_id>', methods=['PUT'])
+@api.route('/api/artists/<int:artist_id>', methods=['PUT'])
 def update_artist(artist_id):
     data = request.json
-    success = db.update_artist(
+    success = services.db.update_artist(
         artist_id,
         name=data.get('name'),
         email=data.get('email'),
@@ -226,9 +281,9 @@ def update_artist(artist_id):
     else:
         return jsonify({'error': 'Artist not found'}), 404
 
-@app.route('/api/artists/<int:artist_id>', methods=['DELETE'])
+@api.route('/api/artists/<int:artist_id>', methods=['DELETE'])
 def delete_artist(artist_id):
-    success = db.delete_artist(artist_id)
+    success = services.db.delete_artist(artist_id)
     
     if success:
         return jsonify({'success': True, 'message': 'Artist deleted'})
@@ -239,13 +294,15 @@ def delete_artist(artist_id):
 # KEYWORDS ENDPOINTS (Enhanced)
 # ============================================================================
 
-@app.route('/api/keywords', methods=['GET'])
+@api.route('/api/keywords', methods=['GET'])
+@cached('keywords')
 def get_keywords():
     artist_id = request.args.get('artist_id', type=int)
-    keywords = db.get_all_keywords(artist_id)
-    return jsonify([k.to_dict() for k in keywords])
+    columns, rows = services.db.get_keyword_table(artist_id)
+    return jsonify(table_payload(columns, rows, request.args.get('format'),
+                                 bool_columns=('active', 'auto_flag')))
 
-@app.route('/api/keywords', methods=['POST'])
+@api.route('/api/keywords', methods=['POST'])
 def add_keyword():
     data = request.json
     keyword = data.get('keyword', '').strip()
@@ -256,14 +313,14 @@ def add_keyword():
     if not keyword:
         return jsonify({'error': 'Keyword is required'}), 400
     
-    keyword_id = db.add_keyword(keyword, artist_id, auto_flag, priority)
+    keyword_id = services.db.add_keyword(keyword, artist_id, auto_flag, priority)
     
     if keyword_id:
         return jsonify({'success': True, 'id': keyword_id, 'message': 'Keyword added'})
     else:
         return jsonify({'error': 'Keyword already exists'}), 400
 
-@app.route('/api/keywords/bulk-import', methods=['POST'])
+@api.route('/api/keywords/bulk-import', methods=['POST'])
 def bulk_import_keywords():
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -273,47 +330,36 @@ def bulk_import_keywords():
         return jsonify({'error': 'No file selected'}), 400
     
     try:
-        # Read file content
-        if file.filename.endswith('.csv'):
-            content = file.read().decode('utf-8')
-            keywords_data = BulkImporter.parse_csv(content)
-        elif file.filename.endswith('.xlsx'):
-            # Save temporarily
-            temp_path = f"/tmp/{file.filename}"
-            file.save(temp_path)
-            keywords_data = BulkImporter.parse_excel(temp_path)
-            os.remove(temp_path)
-        else:
-            return jsonify({'error': 'Invalid file format. Use CSV or XLSX'}), 400
-        
-        # Get artist mapping
-        artists = db.get_all_artists()
-        artist_map = {a.name: a.id for a in artists}
-        
-        # Prepare for import
-        import_data = []
-        for kw in keywords_data:
-            artist_name = kw.get('artist_name', '').strip()
-            artist_id = artist_map.get(artist_name) if artist_name else None
-            
-            import_data.append({
-                'keyword': kw['keyword'],
-                'artist_id': artist_id,
-                'auto_flag': kw.get('auto_flag', False),
-                'priority': kw.get('priority', 'Medium')
-            })
-        
-        # Bulk import
-        result = db.bulk_add_keywords(import_data)
-        return jsonify(result)
-        
-    except Exception as e:
-        return jsonify({'error': f'Import failed: {str(e)}'}), 500
-
-@app.route('/api/keywords/<int:keyword_id>', methods=['PUT'])
+        # Rows are streamed from the upload and written in chunks, so memory stays
+        # bounded by IMPORT_CHUNK_SIZE whatever the file size
+        rows = iter_table_rows(file.stream, file.filename)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Get artist mapping
+    artist_map = {a.name: a.id for a in services.db.get_all_artists()}
+    
+    def prepare(row):
+        kw = BulkImporter.keyword_from_row(row)
+        if not kw['keyword']:  # Only add if keyword is not empty
+            return None
+        artist_name = kw['artist_name']
+        return {
+            'keyword': kw['keyword'],
+            'artist_id': artist_map.get(artist_name) if artist_name else None,
+            'auto_flag': kw['auto_flag'],
+            'priority': kw['priority']
+        }
+    
+    # Bad rows are listed in errors; if the upload breaks partway, the chunks already
+    # committed are reported with the error rather than a bare failure
+    result = import_rows(rows, prepare, services.db.bulk_add_keywords)
+    return jsonify(result), 500 if result.get('partial') else 200
+
+@api.route('/api/keywords/<int:keyword_id>', methods=['PUT'])
 def update_keyword(keyword_id):
     data = request.json
-    success = db.update_keyword(
+    success = services.db.update_keyword(
         keyword_id,
         active=data.get('active'),
         auto_flag=data.get('auto_flag'),
@@ -325,31 +371,21 @@ def update_keyword(keyword_id):
     else:
         return jsonify({'error': 'Keyword not found'}), 404
 
-@app.route('/api/keywords/<int:keyword_id>', methods=['DELETE'])
+@api.route('/api/keywords/<int:keyword_id>', methods=['DELETE'])
 def delete_keyword(keyword_id):
-    success = db.delete_keyword(keyword_id)
+    success = services.db.delete_keyword(keyword_id)
     
     if success:
         return jsonify({'success': True, 'message': 'Keyword deleted'})
     else:
         return jsonify({'error': 'Keyword not found'}), 404
 
-@app.route('/api/keywords/clear', methods=['DELETE'])
+@api.route('/api/keywords/clear', methods=['DELETE'])
 def clear_all_keywords():
     """Delete all keywords"""
     try:
         artist_id = request.args.get('artist_id', type=int)
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        if artist_id:
-            cursor.execute("DELETE FROM keywords WHERE artist_id = ?", (artist_id,))
-        else:
-            cursor.execute("DELETE FROM keywords")
-        
-        deleted_count = cursor.rowcount
-        conn.commit()
-        conn.close()
+        deleted_count = services.db.clear_keywords(artist_id)
         
         return jsonify({
             'success': True, 
@@ -363,13 +399,15 @@ def clear_all_keywords():
 # SONGS ENDPOINTS (Song + Artist Combinations)
 # ============================================================================
 
-@app.route('/api/songs', methods=['GET'])
+@api.route('/api/songs', methods=['GET'])
+@cached('songs')
 def get_songs():
     artist_id = request.args.get('artist_id', type=int)
-    songs = db.get_all_songs(artist_id)
-    return jsonify([s.to_dict() for s in songs])
+    columns, rows = services.db.get_song_table(artist_id)
+    return jsonify(table_payload(columns, rows, request.args.get('format'),
+                                 bool_columns=('active', 'auto_flag')))
 
-@app.route('/api/songs', methods=['POST'])
+@api.route('/api/songs', methods=['POST'])
 def add_song():
     data = request.json
     song_name = data.get('song_name', '').strip()
@@ -382,17 +420,17 @@ def add_song():
     if not song_name or not artist_name:
         return jsonify({'error': 'Song name and artist name are required'}), 400
     
-    song_id = db.add_song(song_name, artist_name, artist_id, auto_flag, priority, duration_ms)
+    song_id = services.db.add_song(song_name, artist_name, artist_id, auto_flag, priority, duration_ms)
     
     if song_id:
         return jsonify({'success': True, 'id': song_id, 'message': 'Song added'})
     else:
         return jsonify({'error': 'Song already exists'}), 400
 
-@app.route('/api/songs/<int:song_id>', methods=['PUT'])
+@api.route('/api/songs/<int:song_id>', methods=['PUT'])
 def update_song(song_id):
     data = request.json
-    success = db.update_song(
+    success = services.db.update_song(
         song_id,
         active=data.get('active'),
         auto_flag=data.get('auto_flag'),
@@ -404,31 +442,21 @@ def update_song(song_id):
     else:
         return jsonify({'error': 'Song not found'}), 404
 
-@app.route('/api/songs/<int:song_id>', methods=['DELETE'])
+@api.route('/api/songs/<int:song_id>', methods=['DELETE'])
 def delete_song(song_id):
-    success = db.delete_song(song_id)
+    success = services.db.delete_song(song_id)
     
     if success:
         return jsonify({'success': True, 'message': 'Song deleted'})
     else:
         return jsonify({'error': 'Song not found'}), 404
 
-@app.route('/api/songs/clear', methods=['DELETE'])
+@api.route('/api/songs/clear', methods=['DELETE'])
 def clear_all_songs():
     """Delete all songs"""
     try:
         artist_id = request.args.get('artist_id', type=int)
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        if artist_id:
-            cursor.execute("DELETE FROM songs WHERE artist_id = ?", (artist_id,))
-        else:
-            cursor.execute("DELETE FROM songs")
-        
-        deleted_count = cursor.rowcount
-        conn.commit()
-        conn.close()
+        deleted_count = services.db.clear_songs(artist_id)
         
         return jsonify({
             'success': True, 
@@ -438,7 +466,7 @@ def clear_all_songs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/bulk-import', methods=['POST'])
+@api.route('/api/songs/bulk-import', methods=['POST'])
 def bulk_import_songs():
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -448,34 +476,31 @@ def bulk_import_songs():
         return jsonify({'error': 'No file selected'}), 400
     
     try:
-        import csv
-        import io
-        
-        content = file.read().decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(content))
-        
-        songs_to_import = []
-        for row in csv_reader:
-            song_name = row.get('song_name', '').strip()
-            artist_name = row.get('artist_name', '').strip()
-            
-            if song_name and artist_name:
-                songs_to_import.append({
-                    'song_name': song_name,
-                    'artist_name': artist_name,
-                    'active': row.get('active', 'true').lower() == 'true',
-                    'artist_id': int(row['artist_id']) if row.get('artist_id') else None,
-                    'auto_flag': row.get('auto_flag', 'false').lower() == 'true',
-                    'priority': row.get('priority', 'Medium')
-                })
-        
-        result = db.bulk_add_songs(songs_to_import)
-        return jsonify(result)
-        
-    except Exception as e:
-        return jsonify({'error': f'Import failed: {str(e)}'}), 500
-
-@app.route('/api/songs/preview-from-spotify', methods=['POST'])
+        rows = iter_table_rows(file.stream, file.filename)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def prepare(row):
+        song_name = (row.get('song_name') or '').strip()
+        artist_name = (row.get('artist_name') or '').strip()
+        if not song_name or not artist_name:
+            return None
+        artist_id = (row.get('artist_id') or '').strip()
+        if artist_id and not artist_id.isdigit():
+            raise ValueError(f"artist_id '{artist_id}' is not a number")
+        return {
+            'song_name': song_name,
+            'artist_name': artist_name,
+            'active': (row.get('active') or 'true').lower() == 'true',
+            'artist_id': int(artist_id) if artist_id else None,
+            'auto_flag': (row.get('auto_flag') or 'false').lower() == 'true',
+            'priority': row.get('priority') or 'Medium'
+        }
+    
+    result = import_rows(rows, prepare, services.db.bulk_add_songs)
+    return jsonify(result), 500 if result.get('partial') else 200
+
+@api.route('/api/songs/preview-from-spotify', methods=['POST'])
 def preview_from_spotify():
     """Preview artist songs - tries Spotify first, falls back to MusicBrainz"""
     try:
@@ -487,16 +512,16 @@ def preview_from_spotify():
             return jsonify({'error': 'Either a Spotify URL or artist name is required'}), 400
         
         # If we have a URL but no name, try to get name from URL first
-        if spotify_url and not artist_name and spotify_service and SPOTIFY_CONFIGURED:
+        if spotify_url and not artist_name and services.spotify_service and services.spotify_configured:
             try:
-                artist = spotify_service.get_artist_from_url(spotify_url)
+                artist = services.spotify_service.get_artist_from_url(spotify_url)
                 if artist:
                     artist_name = artist['name']
             except:
                 pass
         
         # Use unified import service (Spotify + MusicBrainz fallback)
-        result = unified_import.get_artist_songs(
+        result = services.unified_import.get_artist_songs(
             artist_name=artist_name,
             spotify_url=spotify_url if spotify_url else None
         )
@@ -522,7 +547,7 @@ def preview_from_spotify():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/search-artist', methods=['POST'])
+@api.route('/api/songs/search-artist', methods=['POST'])
 def search_artist_for_import():
     """Search for an artist by name to preview before importing"""
     try:
@@ -533,7 +558,7 @@ def search_artist_for_import():
             return jsonify({'error': 'Artist name is required'}), 400
         
         # Use unified import service
-        result = unified_import.get_artist_songs(artist_name=artist_name)
+        result = services.unified_import.get_artist_songs(artist_name=artist_name)
         
         if not result['success']:
             return jsonify({
@@ -556,7 +581,7 @@ def search_artist_for_import():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/preview-deezer', methods=['POST'])
+@api.route('/api/songs/preview-deezer', methods=['POST'])
 def preview_from_deezer():
     """Preview artist songs from Deezer (free, no auth - bypasses Spotify restrictions)"""
     try:
@@ -567,7 +592,7 @@ def preview_from_deezer():
             return jsonify({'error': 'Artist name is required'}), 400
         
         # Use Deezer directly via web scraper service
-        result = web_scraper_service.get_artist_songs_deezer(artist_name)
+        result = services.web_scraper_service.get_artist_songs_deezer(artist_name)
         
         if not result.get('success'):
             return jsonify({
@@ -590,7 +615,7 @@ def preview_from_deezer():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/parse-text', methods=['POST'])
+@api.route('/api/songs/parse-text', methods=['POST'])
 def parse_text_songs():
     """Parse pasted text into song list for import (no API needed)"""
     try:
@@ -603,7 +628,7 @@ def parse_text_songs():
         if not artist_name:
             return jsonify({'error': 'Artist name is required'}), 400
         
-        result = web_scraper_service.parse_pasted_songs(text, artist_name)
+        result = services.web_scraper_service.parse_pasted_songs(text, artist_name)
         
         if not result.get('success') or len(result.get('songs', [])) == 0:
             return jsonify({
@@ -637,7 +662,7 @@ def parse_text_songs():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/parse-csv-upload', methods=['POST'])
+@api.route('/api/songs/parse-csv-upload', methods=['POST'])
 def parse_csv_upload():
     """Parse uploaded CSV file into song list for import (no API needed)"""
     try:
@@ -653,8 +678,8 @@ def parse_csv_upload():
         if not file.filename.endswith('.csv'):
             return jsonify({'error': 'Only CSV files are supported for this import'}), 400
         
-        content = file.read().decode('utf-8')
-        result = web_scraper_service.parse_csv_songs(content, artist_name if artist_name else None)
+        # Read row by row from the upload stream with csv.reader (encoding sniffed, header resolved once)
+        result = services.web_scraper_service.parse_csv_songs(file.stream, artist_name if artist_name else None)
         
         if not result.get('success') or len(result.get('songs', [])) == 0:
             return jsonify({
@@ -691,7 +716,7 @@ def parse_csv_upload():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/songs/import-from-spotify', methods=['POST'])
+@api.route('/api/songs/import-from-spotify', methods=['POST'])
 def import_from_spotify():
     """Import selected songs from artist (works with both Spotify and MusicBrainz data)"""
     try:
@@ -707,16 +732,16 @@ def import_from_spotify():
         if spotify_url and not artist_info:
             # Try to get artist name from URL
             artist_name = ''
-            if spotify_service and SPOTIFY_CONFIGURED:
+            if services.spotify_service and services.spotify_configured:
                 try:
-                    artist = spotify_service.get_artist_from_url(spotify_url)
+                    artist = services.spotify_service.get_artist_from_url(spotify_url)
                     if artist:
                         artist_name = artist['name']
                 except:
                     pass
             
             # Full lookup with fallback
-            result = unified_import.get_artist_songs(
+            result = services.unified_import.get_artist_songs(
                 artist_name=artist_name,
                 spotify_url=spotify_url
             )
@@ -738,7 +763,7 @@ def import_from_spotify():
         
         # Check if artist already exists in database
         existing_artist = None
-        all_artists = db.get_all_artists()
+        all_artists = services.db.get_all_artists()
         for artist in all_artists:
             if artist.name.lower() == artist_info['name'].lower():
                 existing_artist = artist
@@ -751,7 +776,7 @@ def import_from_spotify():
             source_note = "Imported from Spotify" if artist_info.get('spotify_url') else "Imported from MusicBrainz"
             followers = artist_info.get('followers', 0)
             notes = f"{source_note}. Followers: {followers:,}" if followers else source_note
-            artist_id = db.add_artist(
+            artist_id = services.db.add_artist(
                 name=artist_info['name'],
                 notes=notes
             )
@@ -778,7 +803,7 @@ def import_from_spotify():
                     'duration_ms': duration_ms
                 })
         
-        import_result = db.bulk_add_songs(songs_to_import)
+        import_result = services.db.bulk_add_songs(songs_to_import)
         
         return jsonify({
             'success': True,
@@ -802,33 +827,13 @@ def import_from_spotify():
 # AUTO-FLAG RULES ENDPOINTS
 # ============================================================================
 
-@app.route('/api/auto-flag-rules', methods=['GET'])
+@api.route('/api/auto-flag-rules', methods=['GET'])
+@cached('auto_flag_rules')
 def get_auto_flag_rules():
-    rules = db.get_active_auto_flag_rules()
-    # Also get inactive rules
-    all_rules = []
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM auto_flag_rules ORDER BY created_at DESC")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    from models import AutoFlagRule
-    for row in rows:
-        rule = AutoFlagRule(
-            id=row['id'],
-            name=row['name'],
-            description=row['description'],
-            conditions=row['conditions'],
-            action=row['action'],
-            active=bool(row['active']),
-            created_at=row['created_at']
-        )
-        all_rules.append(rule.to_dict())
-    
-    return jsonify(all_rules)
+    # Active and inactive rules
+    return jsonify([rule.to_dict() for rule in services.db.get_all_auto_flag_rules()])
 
-@app.route('/api/auto-flag-rules', methods=['POST'])
+@api.route('/api/auto-flag-rules', methods=['POST'])
 def add_auto_flag_rule():
     data = request.json
     name = data.get('name', '').strip()
@@ -842,14 +847,14 @@ def add_auto_flag_rule():
     if not conditions:
         return jsonify({'error': 'At least one condition is required'}), 400
     
-    rule_id = db.add_auto_flag_rule(name, conditions, action, description)
+    rule_id = services.db.add_auto_flag_rule(name, conditions, action, description)
     
     if rule_id:
         return jsonify({'success': True, 'id': rule_id, 'message': 'Rule created'})
     else:
         return jsonify({'error': 'Rule with this name already exists'}), 400
 
-@app.route('/api/auto-flag-rules/<int:rule_id>', methods=['PUT'])
+@api.route('/api/auto-flag-rules/<int:rule_id>', methods=['PUT'])
 def update_auto_flag_rule(rule_id):
     data = request.json
     active = data.get('active')
@@ -857,26 +862,16 @@ def update_auto_flag_rule(rule_id):
     if active is None:
         return jsonify({'error': 'Active status is required'}), 400
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE auto_flag_rules SET active = ? WHERE id = ?", (int(active), rule_id))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
+    success = services.db.set_auto_flag_rule_active(rule_id, active)
     
     if success:
         return jsonify({'success': True, 'message': 'Rule updated'})
     else:
         return jsonify({'error': 'Rule not found'}), 404
 
-@app.route('/api/auto-flag-rules/<int:rule_id>', methods=['DELETE'])
+@api.route('/api/auto-flag-rules/<int:rule_id>', methods=['DELETE'])
 def delete_auto_flag_rule(rule_id):
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM auto_flag_rules WHERE id = ?", (rule_id,))
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
+    success = services.db.delete_auto_flag_rule(rule_id)
     
     if success:
         return jsonify({'success': True, 'message': 'Rule deleted'})
@@ -887,7 +882,7 @@ def delete_auto_flag_rule(rule_id):
 # SMART MUSIC DETECTION ENDPOINTS
 # ============================================================================
 
-@app.route('/api/smart-rules', methods=['GET'])
+@api.route('/api/smart-rules', methods=['GET'])
 def get_smart_detection_rules():
     """Get recommended pre-built smart detection rules"""
     try:
@@ -900,7 +895,7 @@ def get_smart_detection_rules():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/smart-rules/install', methods=['POST'])
+@api.route('/api/smart-rules/install', methods=['POST'])
 def install_smart_rules():
     """Install all pre-built smart detection rules"""
     try:
@@ -912,13 +907,13 @@ def install_smart_rules():
         for rule in smart_rules:
             try:
                 # Check if rule already exists
-                existing = db.get_auto_flag_rule_by_name(rule['name'])
+                existing = services.db.get_auto_flag_rule_by_name(rule['name'])
                 if existing:
                     skipped_count += 1
                     continue
                 
                 # Add the rule
-                rule_id = db.add_auto_flag_rule(
+                rule_id = services.db.add_auto_flag_rule(
                     name=rule['name'],
                     description=rule['description'],
                     conditions=rule['conditions'],
@@ -941,7 +936,7 @@ def install_smart_rules():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/analyze-video', methods=['POST'])
+@api.route('/api/analyze-video', methods=['POST'])
 def analyze_video_ai():
     """
     Analyze a specific video using AI-powered music detection
@@ -953,11 +948,11 @@ def analyze_video_ai():
         # Option 1: Analyze existing video by ID
         if 'video_id' in data:
             video_id = data['video_id']
-            video = db.get_video_by_id(video_id)
+            video = services.db.get_video_by_id(video_id)
             if not video:
                 return jsonify({'error': 'Video not found'}), 404
             
-            analysis = music_detector.analyze_video(
+            analysis = services.music_detector.analyze_video(
                 title=video.title,
                 channel_name=video.channel_name,
                 description=getattr(video, 'description', ''),
@@ -974,7 +969,7 @@ def analyze_video_ai():
         
         # Option 2: Analyze provided video data
         elif 'title' in data and 'channel_name' in data:
-            analysis = music_detector.analyze_video(
+            analysis = services.music_detector.analyze_video(
                 title=data['title'],
                 channel_name=data['channel_name'],
                 description=data.get('description', ''),
@@ -993,7 +988,7 @@ def analyze_video_ai():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/smart-scan', methods=['POST'])
+@api.route('/api/smart-scan', methods=['POST'])
 def smart_scan_all_videos():
     """
     Re-scan all videos with AI detection and update flags
@@ -1002,69 +997,60 @@ def smart_scan_all_videos():
     try:
         data = request.json or {}
         artist_id = data.get('artist_id')
-        
-        # Get videos to scan
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        
-        if artist_id:
-            cursor.execute("""
-                SELECT id, title, channel_name, status
-                FROM videos 
-                WHERE artist_id = ?
-            """, (artist_id,))
-        else:
-            cursor.execute("""
-                SELECT id, title, channel_name, status
-                FROM videos
-            """)
-        
-        videos = cursor.fetchall()
-        
-        updated_count = 0
-        flagged_count = 0
-        
-        for video in videos:
-            video_id, title, channel_name, current_status = video
-            
-            # Analyze with AI
-            analysis = music_detector.analyze_video(
-                title=title,
-                channel_name=channel_name
-            )
-            
-            # Update if should flag and not already flagged
-            if analysis['should_flag'] and current_status != 'Flagged for Takedown':
-                cursor.execute("""
-                    UPDATE videos 
-                    SET status = 'Flagged for Takedown',
-                        auto_flagged = 1
-                    WHERE id = ?
-                """, (video_id,))
-                updated_count += 1
-                flagged_count += 1
-        
-        conn.commit()
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'scanned': len(videos),
-            'updated': updated_count,
-            'newly_flagged': flagged_count,
-            'message': f'Smart scan complete: {updated_count} videos updated'
-        })
+        return jsonify(run_profiled('smart_scan', data, lambda: smart_scan(artist_id)))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def smart_scan(artist_id: int = None):
+    """Re-run detection over stored videos and flag the ones that now qualify (timed per stage)"""
+    timings = {}
+    
+    # Get videos to scan
+    started = time.perf_counter()
+    videos = services.db.get_video_scan_rows(artist_id)
+    timings['load'] = {'seconds': round(time.perf_counter() - started, 4), 'items': len(videos)}
+    
+    to_flag = []
+    detect_started = time.perf_counter()
+    
+    for video in videos:
+        video_id, title, channel_name, current_status = video
+        
+        # Analyze with AI
+        started = time.perf_counter()
+        analysis = services.music_detector.analyze_video(
+            title=title,
+            channel_name=channel_name
+        )
+        metrics.DETECTOR_SECONDS.observe(time.perf_counter() - started)
+        
+        # Update if should flag and not already flagged
+        if analysis['should_flag'] and current_status != 'Flagged for Takedown':
+            to_flag.append(video_id)
+    
+    timings['detect'] = {'seconds': round(time.perf_counter() - detect_started, 4), 'items': len(videos)}
+    
+    started = time.perf_counter()
+    updated_count = services.db.batch_update_videos(to_flag, status='Flagged for Takedown', auto_flagged=True)
+    timings['persist'] = {'seconds': round(time.perf_counter() - started, 4), 'items': len(to_flag)}
+    
+    return {
+        'success': True,
+        'scanned': len(videos),
+        'updated': updated_count,
+        'newly_flagged': updated_count,
+        'message': f'Smart scan complete: {updated_count} videos updated',
+        'timings': timings
+    }
+
 # ============================================================================
 # SEARCH ENDPOINT (Enhanced with auto-flagging)
 # ============================================================================
 
-@app.route('/api/search', methods=['POST'])
+@api.route('/api/search', methods=['POST'])
 def run_search():
-    if not API_CONFIGURED or not youtube_service:
+    if not services.api_configured or not services.youtube_service:
         return jsonify({'error': 'YouTube API is not configured'}), 500
     
     data = request.json
@@ -1072,7 +1058,7 @@ def run_search():
     exclude_keywords = data.get('exclude_keywords', [])
     
     if not keywords:
-        keywords = db.get_active_keywords()
+        keywords = services.db.get_active_keywords()
     
     if not keywords:
         return jsonify({'error': 'No keywords to search'}), 400
@@ -1085,217 +1071,95 @@ def run_search():
             # If keywords are objects with a 'keyword' attribute
             keywords = [k for k in keywords if k.keyword not in exclude_keywords]
     
-    results = {
-        'total_found': 0,
-        'total_new': 0,
-        'keywords': []
-    }
-    
-    for keyword in keywords:
-        try:
-            videos = youtube_service.search_videos(keyword)
-            new_count = 0
-            
-            for video in videos:
-                # Apply AI smart detection to EVERY video automatically
-                ai_analysis = music_detector.analyze_video(
-                    title=video.title,
-                    channel_name=video.channel_name,
-                    description=getattr(video, 'description', ''),
-                    view_count=getattr(video, 'view_count', 0),
-                    duration=getattr(video, 'duration', 0)
-                )
-                
-                # Apply auto-flag rules (legacy system)
-                should_flag, priority = db.apply_auto_flag_rules(video)
-                
-                # Use AI decision if it's more strict
-                if ai_analysis['should_flag'] and not should_flag:
-                    should_flag = True
-                    
-                # Set priority based on AI risk level
-                ai_priority_map = {
-                    'critical': 'Critical',
-                    'high': 'High',
-                    'medium': 'Medium',
-                    'low': 'Low'
-                }
-                ai_priority = ai_priority_map.get(ai_analysis['risk_level'], 'Medium')
-                
-                # Use highest priority between AI and rules
-                priority_rank = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
-                if priority_rank.get(ai_priority, 0) > priority_rank.get(priority, 0):
-                    priority = ai_priority
-                
-                video.auto_flagged = should_flag or ai_analysis['should_flag']
-                video.priority = priority
-                if video.auto_flagged:
-                    video.status = 'Flagged for Takedown'
-                
-                # Store AI analysis results
-                video.ai_risk_score = ai_analysis['risk_score']
-                video.ai_risk_level = ai_analysis['risk_level']
-                video.ai_reason = ai_analysis['reason']
-                
-                video_id = db.add_video(video)
-                if video_id:
-                    new_count += 1
-                    
-                    # Send email alert for critical
-                    if priority == 'Critical' and email_service.enabled:
-                        # Get artist email if available
-                        if video.artist_id:
-                            artist = db.get_artist(video.artist_id)
-                            if artist and artist.email:
-                                email_service.send_critical_alert(
-                                    artist.email,
-                                    video.to_dict(),
-                                    "Auto-flagged as Critical priority"
-                                )
-            
-            results['total_found'] += len(videos)
-            results['total_new'] += new_count
-            results['keywords'].append({
-                'keyword': keyword,
-                'found': len(videos),
-                'new': new_count
-            })
-            
-            db.add_search_log(keyword, len(videos), True)
-            
-        except Exception as e:
-            error_msg = str(e)
-            results['keywords'].append({
-                'keyword': keyword,
-                'error': error_msg
-            })
-            db.add_search_log(keyword, 0, False, error_msg)
+    return jsonify(run_profiled('search', data, lambda: search_keywords(keywords)))
+
+def search_keywords(keywords):
+    """
+    Search YouTube for each keyword, analyse and store new videos
+    Shared by /api/search and the scheduled keyword sweep
     
-    return jsonify(results)
+    Keywords that do not fit the remaining daily quota are deferred
+    (lowest historical yield first) instead of failing mid-sweep.
+    """
+    plan = services.quota_planner.plan(keywords, SOURCE_COSTS['keyword'])
+    sources = [
+        IngestSource(
+            label=keyword,
+            fetch=lambda keyword=keyword: services.youtube_service.search_videos(keyword),
+            info={'keyword': keyword}
+        )
+        for keyword in plan['run']
+    ]
+    
+    results = services.ingest_pipeline.run(sources)
+    
+    return {
+        'total_found': results['total_found'],
+        'total_new': results['total_new'],
+        'keywords': results['sources'],
+        'deferred': plan['deferred'],
+        'quota': {'estimated_units': plan['estimated_units'], 'remaining': services.quota_ledger.remaining()},
+        'timings': results['timings']
+    }
 
-@app.route('/api/search/songs', methods=['POST'])
+@api.route('/api/search/songs', methods=['POST'])
 def run_songs_search():
     """Search using song + artist combinations for more accurate results"""
-    if not API_CONFIGURED or not youtube_service:
+    if not services.api_configured or not services.youtube_service:
         return jsonify({'error': 'YouTube API is not configured'}), 500
     
     data = request.json
     songs = data.get('songs', [])
     
     if not songs:
-        songs = db.get_active_songs()
+        songs = services.db.get_active_songs()
     
     if not songs:
         return jsonify({'error': 'No songs to search'}), 400
     
-    results = {
-        'total_found': 0,
-        'total_new': 0,
-        'songs': []
-    }
-    
+    sources = {}
     for song in songs:
-        try:
-            # Extract song_name, artist_name, and duration_ms
-            if isinstance(song, dict):
-                song_name = song.get('song_name')
-                artist_name = song.get('artist_name')
-                duration_ms = song.get('duration_ms')
-            else:
-                song_name = song.song_name
-                artist_name = song.artist_name
-                duration_ms = song.duration_ms
-            
-            videos = youtube_service.search_song(song_name, artist_name, duration_ms=duration_ms)
-            new_count = 0
-            
-            for video in videos:
-                # Apply AI smart detection
-                ai_analysis = music_detector.analyze_video(
-                    title=video.title,
-                    channel_name=video.channel_name,
-                    description=getattr(video, 'description', ''),
-                    view_count=getattr(video, 'view_count', 0),
-                    duration=getattr(video, 'duration', 0)
-                )
-                
-                # Apply auto-flag rules
-                should_flag, priority = db.apply_auto_flag_rules(video)
-                
-                # Use AI decision if it's more strict
-                if ai_analysis['should_flag'] and not should_flag:
-                    should_flag = True
-                    
-                # Set priority based on AI risk level
-                ai_priority_map = {
-                    'critical': 'Critical',
-                    'high': 'High',
-                    'medium': 'Medium',
-                    'low': 'Low'
-                }
-                ai_priority = ai_priority_map.get(ai_analysis['risk_level'], 'Medium')
-                
-                # Use highest priority
-                priority_rank = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
-                if priority_rank.get(ai_priority, 0) > priority_rank.get(priority, 0):
-                    priority = ai_priority
-                
-                video.auto_flagged = should_flag or ai_analysis['should_flag']
-                video.priority = priority
-                if video.auto_flagged:
-                    video.status = 'Flagged for Takedown'
-                
-                # Store AI analysis results
-                video.ai_risk_score = ai_analysis['risk_score']
-                video.ai_risk_level = ai_analysis['risk_level']
-                video.ai_reason = ai_analysis['reason']
-                
-                video_id = db.add_video(video)
-                if video_id:
-                    new_count += 1
-                    
-                    # Send email alert for critical
-                    if priority == 'Critical' and email_service.enabled:
-                        if video.artist_id:
-                            artist = db.get_artist(video.artist_id)
-                            if artist and artist.email:
-                                email_service.send_critical_alert(
-                                    artist.email,
-                                    video.to_dict(),
-                                    "Auto-flagged as Critical priority"
-                                )
-            
-            results['total_found'] += len(videos)
-            results['total_new'] += new_count
-            results['songs'].append({
-                'song_name': song_name,
-                'artist_name': artist_name,
-                'found': len(videos),
-                'new': new_count
-            })
-            
-            # Log search with combined identifier
-            db.add_search_log(f"{song_name} - {artist_name}", len(videos), True)
-            
-        except Exception as e:
-            error_msg = str(e)
-            song_name = song.get('song_name') if isinstance(song, dict) else song.song_name
-            artist_name = song.get('artist_name') if isinstance(song, dict) else song.artist_name
-            results['songs'].append({
-                'song_name': song_name,
-                'artist_name': artist_name,
-                'error': error_msg
-            })
-            db.add_search_log(f"{song_name} - {artist_name}", 0, False, error_msg)
+        # Extract song_name, artist_name, and duration_ms
+        if isinstance(song, dict):
+            song_name = song.get('song_name')
+            artist_name = song.get('artist_name')
+            duration_ms = song.get('duration_ms')
+        else:
+            song_name = song.song_name
+            artist_name = song.artist_name
+            duration_ms = song.duration_ms
+        
+        # Log search with combined identifier
+        label = f"{song_name} - {artist_name}"
+        sources[label] = IngestSource(
+            label=label,
+            fetch=lambda s=song_name, a=artist_name, d=duration_ms: services.youtube_service.search_song(s, a, duration_ms=d),
+            info={'song_name': song_name, 'artist_name': artist_name}
+        )
+    
+    def sweep():
+        # Fit the sweep into the remaining daily quota, best-yielding songs first
+        plan = services.quota_planner.plan(list(sources), SOURCE_COSTS['song'])
+        results = services.ingest_pipeline.run([sources[label] for label in plan['run']])
+        
+        return {
+            'total_found': results['total_found'],
+            'total_new': results['total_new'],
+            'songs': results['sources'],
+            'deferred': plan['deferred'],
+            'quota': {'estimated_units': plan['estimated_units'], 'remaining': services.quota_ledger.remaining()},
+            'timings': results['timings']
+        }
     
-    return jsonify(results)
+    return jsonify(run_profiled('song_search', data, sweep))
 
 # ============================================================================
 # VIDEOS ENDPOINTS (Enhanced)
 # ============================================================================
 
-@app.route('/api/videos', methods=['GET'])
+@api.route('/api/videos', methods=['GET'])
 def get_videos():
+    # Not behind @cached: the unpaginated listing is the largest body the API returns
     filters = {}
     
     if request.args.get('keyword'):
@@ -1312,48 +1176,46 @@ def get_videos():
         filters['date_from'] = request.args.get('date_from')
     if request.args.get('date_to'):
         filters['date_to'] = request.args.get('date_to')
-    
-    videos = db.get_all_videos(filters)
-    return jsonify([v.to_dict() for v in videos])
-
-@app.route('/api/videos/<int:video_id>', methods=['PUT'])
+    if request.args.get('channel_id'):
+        filters['channel_id'] = request.args.get('channel_id')
+    if request.args.get('q'):
+        # Full-text search: words, "phrases" and prefix* terms, ranked by relevance
+        filters['q'] = request.args.get('q')
+    
+    # Rows go straight to JSON (no Video objects); ?format=columns for the columnar shape
+    columns, rows = services.db.get_video_table(filters)
+    return jsonify(table_payload(columns, rows, request.args.get('format'),
+                                 bool_columns=('auto_flagged',)))
+
+@api.route('/api/videos/<int:video_id>', methods=['PUT'])
 def update_video(video_id):
     data = request.json
     status = data.get('status')
     priority = data.get('priority')
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    if status:
-        if status not in ['Pending', 'Reviewed', 'Flagged for Takedown']:
-            return jsonify({'error': 'Invalid status'}), 400
-        cursor.execute("UPDATE videos SET status = ? WHERE id = ?", (status, video_id))
+    if status and status not in ['Pending', 'Reviewed', 'Flagged for Takedown']:
+        return jsonify({'error': 'Invalid status'}), 400
     
-    if priority:
-        if priority not in ['Low', 'Medium', 'High', 'Critical']:
-            return jsonify({'error': 'Invalid priority'}), 400
-        cursor.execute("UPDATE videos SET priority = ? WHERE id = ?", (priority, video_id))
+    if priority and priority not in ['Low', 'Medium', 'High', 'Critical']:
+        return jsonify({'error': 'Invalid priority'}), 400
     
-    conn.commit()
-    success = cursor.rowcount > 0
-    conn.close()
+    success = services.db.batch_update_videos([video_id], status, priority) > 0
     
     if success:
         return jsonify({'success': True, 'message': 'Video updated'})
     else:
         return jsonify({'error': 'Video not found'}), 404
 
-@app.route('/api/videos/<int:video_id>', methods=['DELETE'])
+@api.route('/api/videos/<int:video_id>', methods=['DELETE'])
 def delete_video(video_id):
-    success = db.delete_video(video_id)
+    success = services.db.delete_video(video_id)
     
     if success:
         return jsonify({'success': True, 'message': 'Video deleted'})
     else:
         return jsonify({'error': 'Video not found'}), 404
 
-@app.route('/api/videos/batch-update', methods=['POST'])
+@api.route('/api/videos/batch-update', methods=['POST'])
 def batch_update_videos():
     data = request.json
     video_ids = data.get('video_ids', [])
@@ -1363,7 +1225,7 @@ def batch_update_videos():
     if not video_ids:
         return jsonify({'error': 'No videos selected'}), 400
     
-    count = db.batch_update_videos(video_ids, status, priority)
+    count = services.db.batch_update_videos(video_ids, status, priority)
     
     return jsonify({
         'success': True,
@@ -1371,7 +1233,7 @@ def batch_update_videos():
         'message': f'{count} videos updated'
     })
 
-@app.route('/api/videos/batch-delete', methods=['POST'])
+@api.route('/api/videos/batch-delete', methods=['POST'])
 def batch_delete_videos():
     data = request.json
     video_ids = data.get('video_ids', [])
@@ -1379,14 +1241,7 @@ def batch_delete_videos():
     if not video_ids:
         return jsonify({'error': 'No videos selected'}), 400
     
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    
-    placeholders = ','.join('?' * len(video_ids))
-    cursor.execute(f"DELETE FROM videos WHERE id IN ({placeholders})", video_ids)
-    conn.commit()
-    count = cursor.rowcount
-    conn.close()
+    count = services.db.delete_videos(video_ids)
     
     return jsonify({
         'success': True,
@@ -1394,21 +1249,12 @@ def batch_delete_videos():
         'message': f'{count} videos deleted'
     })
 
-@app.route('/api/videos/clear-all', methods=['POST'])
+@api.route('/api/videos/clear-all', methods=['POST'])
 def clear_all_videos():
     """Clear all videos from database"""
     try:
-        import sqlite3
-        conn = db.get_connection()
-        
-        # Get count before deletion
-        cursor = conn.execute('SELECT COUNT(*) FROM videos')
-        count = cursor.fetchone()[0]
-        
         # Delete all videos and search logs
-        conn.execute('DELETE FROM videos')
-        conn.execute('DELETE FROM search_logs')
-        conn.commit()
+        count = services.db.clear_all_videos()
         
         return jsonify({
             'success': True, 
@@ -1422,28 +1268,139 @@ def clear_all_videos():
 # STATISTICS ENDPOINT (Enhanced)
 # ============================================================================
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
+@cached('videos', 'search_logs')
 def get_stats():
     artist_id = request.args.get('artist_id', type=int)
-    stats = db.get_stats(artist_id)
+    stats = services.db.get_stats(artist_id)
     return jsonify(stats)
 
+# ============================================================================
+# CHANNELS ENDPOINTS
+# ============================================================================
+
+@api.route('/api/channels', methods=['GET'])
+@cached('channels')
+def get_channels():
+    """Repeat offenders: ?order=flagged|total|avg_risk|flagged_ratio|last_seen&limit=&min_videos=&include_trusted="""
+    order = request.args.get('order', 'flagged')
+    if order not in services.channels.ORDERINGS:
+        return jsonify({'error': f"order must be one of {', '.join(services.channels.ORDERINGS)}"}), 400
+    
+    channels = services.channels.top_offenders(
+        limit=min(request.args.get('limit', 50, type=int), 500),
+        order=order,
+        min_videos=request.args.get('min_videos', 1, type=int),
+        include_trusted=request.args.get('include_trusted', 'false').lower() == 'true'
+    )
+    return jsonify(channels)
+
+@api.route('/api/channels/watch-list', methods=['GET'])
+@cached('channels')
+def get_watch_list():
+    """Channels polled through their uploads playlist, least recently polled first"""
+    return jsonify(services.channels.watch_list())
+
+@api.route('/api/channels/watch-list/poll', methods=['POST'])
+def poll_watch_list():
+    """Poll watched channels now (?limit= caps how many, ?profile=1 samples the run)"""
+    if not services.api_configured or not services.youtube_service:
+        return jsonify({'error': 'YouTube API is not configured'}), 500
+    
+    limit = request.args.get('limit', type=int)
+    return jsonify(run_profiled('channel_watch', None, lambda: poll_watched_channels(limit=limit)))
+
+@api.route('/api/channels/<channel_id>/watch', methods=['PUT'])
+def update_channel_watch(channel_id):
+    """{"watched": true|false} forces the channel on/off the watch list; null returns it to the threshold"""
+    data = request.json or {}
+    if 'watched' not in data:
+        return jsonify({'error': 'watched is required (true, false or null)'}), 400
+    
+    watched = data['watched']
+    if not services.channels.set_watch(channel_id, None if watched is None else bool(watched)):
+        return jsonify({'error': 'Channel not found'}), 404
+    return jsonify(services.channels.get_channel(channel_id))
+
+def poll_watched_channels(limit: int = None, min_interval_hours: float = 0):
+    """
+    Poll watched channels' uploads playlists and run new items through the ingest pipeline
+    Shared by /api/channels/watch-list/poll and the scheduled channel watch
+    """
+    channels = services.channels.watch_list(limit=limit, min_interval_hours=min_interval_hours)
+    # Each poll is charged its most pages (CHANNEL_WATCH_MAX_PAGES, 1 for a new channel);
+    # channels that would not fit in the remaining quota wait for the next run
+    max_pages = services.config['CHANNEL_WATCH_MAX_PAGES']
+    budget = services.quota_ledger.remaining() - services.quota_planner.reserve_units
+    channels, deferred = services.channels.fit_quota(channels, budget, max_pages)
+    polls = {}
+    
+    def fetch_uploads(channel):
+        videos, cursor, pages = services.youtube_service.get_channel_uploads(
+            channel['channel_id'],
+            matched_keyword=f"channel watch: {channel['channel_name']}",
+            since_video_id=channel['last_seen_video_id'],
+            since_published=channel['last_seen_published'],
+            # A newly watched channel starts from its latest page, not its whole history
+            max_pages=services.channels.poll_pages(channel, max_pages)
+        )
+        polls[channel['channel_id']] = (cursor, pages)
+        return videos
+    
+    sources = [
+        IngestSource(
+            label=f"channel watch: {channel['channel_name']}",
+            fetch=lambda channel=channel: fetch_uploads(channel),
+            info={'channel_id': channel['channel_id'], 'channel_name': channel['channel_name']}
+        )
+        for channel in channels
+    ]
+    
+    results = services.ingest_pipeline.run(sources)
+    
+    # Cursors only advance for channels whose items made it through the pipeline
+    for channel_id, (cursor, _) in polls.items():
+        services.channels.record_poll(channel_id, cursor)
+    
+    return {
+        'channels_polled': len(polls),
+        'total_found': results['total_found'],
+        'total_new': results['total_new'],
+        'quota_units': sum(pages for _, pages in polls.values()),
+        'deferred': [channel['channel_id'] for channel in deferred],
+        'channels': results['sources'],
+        'timings': results['timings']
+    }
+
+@api.route('/api/channels/<channel_id>', methods=['GET'])
+@cached('channels')
+def get_channel(channel_id):
+    channel = services.channels.get_channel(channel_id)
+    if not channel:
+        return jsonify({'error': 'Channel not found'}), 404
+    return jsonify(channel)
+
 # ============================================================================
 # SEARCH LOGS ENDPOINT
 # ============================================================================
 
-@app.route('/api/logs', methods=['GET'])
+@api.route('/api/logs', methods=['GET'])
+@cached('search_logs')
 def get_logs():
+    """Latest raw logs, or ?view=daily for per-keyword daily stats (rollups included, ?days=30)"""
     limit = request.args.get('limit', 50, type=int)
     artist_id = request.args.get('artist_id', type=int)
-    logs = db.get_search_logs(limit, artist_id)
+    if request.args.get('view') == 'daily':
+        days = request.args.get('days', 30, type=int)
+        return jsonify(services.db.get_search_log_daily(days, artist_id, request.args.get('keyword')))
+    logs = services.db.get_search_logs(limit, artist_id)
     return jsonify([log.to_dict() for log in logs])
 
 # ============================================================================
 # EXPORT ENDPOINTS
 # ============================================================================
 
-@app.route('/api/export/csv', methods=['GET'])
+@api.route('/api/export/csv', methods=['GET'])
 def export_csv():
     filters = {}
     if request.args.get('keyword'):
@@ -1455,7 +1412,7 @@ def export_csv():
     if request.args.get('artist_id'):
         filters['artist_id'] = int(request.args.get('artist_id'))
     
-    videos = db.get_all_videos(filters)
+    videos = services.db.get_all_videos(filters)
     
     output = io.StringIO()
     writer = csv.writer(output)
@@ -1481,7 +1438,7 @@ def export_csv():
         download_name=f'ugc_videos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
     )
 
-@app.route('/api/export/excel', methods=['GET'])
+@api.route('/api/export/excel', methods=['GET'])
 def export_excel():
     filters = {}
     if request.args.get('keyword'):
@@ -1493,8 +1450,9 @@ def export_excel():
     if request.args.get('artist_id'):
         filters['artist_id'] = int(request.args.get('artist_id'))
     
-    videos = db.get_all_videos(filters)
+    videos = services.db.get_all_videos(filters)
     
+    from openpyxl import Workbook
     wb = Workbook()
     ws = wb.active
     ws.title = "UGC Videos"
@@ -1527,52 +1485,193 @@ def export_excel():
 # SCHEDULER ENDPOINT
 # ============================================================================
 
-@app.route('/api/schedule', methods=['POST'])
+def scheduled_keyword_sweep():
+    """Scheduled job: same search pipeline as /api/search over all active keywords"""
+    if not services.api_configured or not services.youtube_service:
+        return {'skipped': 'YouTube API is not configured'}
+    
+    keywords = services.db.get_active_keywords()
+    if not keywords:
+        return {'skipped': 'No active keywords'}
+    
+    results = search_keywords(keywords)
+    
+    return {
+        'total_found': results['total_found'],
+        'total_new': results['total_new'],
+        'keywords_searched': len(results['keywords']),
+        'keywords_deferred': len(results['deferred'])
+    }
+
+def scheduled_channel_watch():
+    """Scheduled job: poll the uploads playlists of watched channels (1 quota unit per page)"""
+    if not services.api_configured or not services.youtube_service:
+        return {'skipped': 'YouTube API is not configured'}
+    
+    # Channels polled by a recent manual run are left until their next turn
+    results = poll_watched_channels(min_interval_hours=0.5)
+    
+    return {
+        'channels_polled': results['channels_polled'],
+        'total_new': results['total_new'],
+        'quota_units': results['quota_units']
+    }
+
+def scheduled_auto_update():
+    """Scheduled job: update every artist whose auto-update is due"""
+    results = services.auto_update_service.update_all_artists()
+    return {
+        'artists_checked': len(results),
+        'total_new_songs': sum(r.get('new_songs', 0) for r in results if r.get('success'))
+    }
+
+def scheduled_log_rollup():
+    """Scheduled job: roll search logs past LOG_RETENTION_DAYS into daily per-keyword rows"""
+    return services.db.rollup_search_logs(services.config['LOG_RETENTION_DAYS'])
+
+def scheduled_db_maintenance():
+    """Scheduled job: integrity check, backup, incremental vacuum and ANALYZE"""
+    run = services.maintenance.run()
+    return {key: run[key] for key in ('status', 'seconds', 'reclaimed_bytes')}
+
+# Handlers of the persisted schedules, with their default interval (hours; none = off
+# until enabled). Plain data: the scheduler service registers them when it is first built
+# and creates the default schedules when it starts
+services.scheduled_jobs.update({
+    'keyword_sweep': {'handler': scheduled_keyword_sweep},
+    # Artists carry their own frequency; the hourly job only picks up due ones
+    'auto_update': {'handler': scheduled_auto_update, 'interval_hours': 1},
+    # Polling known offenders is cheap enough to run hourly by default
+    'channel_watch': {'handler': scheduled_channel_watch, 'interval_hours': 1},
+    'log_rollup': {'handler': scheduled_log_rollup, 'interval_hours': 24},
+    # SQLite file upkeep; PostgreSQL vacuums and analyzes itself
+    'db_maintenance': {'handler': scheduled_db_maintenance, 'interval_hours': 24, 'dialects': ('sqlite',)},
+})
+
+@api.route('/api/schedule', methods=['GET'])
+def get_schedule():
+    """List persisted scheduled jobs and their last run"""
+    return jsonify(services.scheduler.get_jobs())
+
+@api.route('/api/schedule', methods=['POST'])
 def setup_schedule():
     data = request.json
     enabled = data.get('enabled', False)
     interval_hours = data.get('interval_hours', 24)
+    job_id = data.get('job', 'keyword_sweep')
+    
+    if job_id not in services.scheduler.handlers:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 400
     
     if enabled:
-        for job in scheduler.get_jobs():
-            job.remove()
-        
-        def scheduled_search():
-            with app.app_context():
-                keywords = db.get_active_keywords()
-                for keyword in keywords:
-                    try:
-                        videos = youtube_service.search_videos(keyword)
-                        for video in videos:
-                            # Apply auto-flag rules
-                            should_flag, priority = db.apply_auto_flag_rules(video)
-                            video.auto_flagged = should_flag
-                            video.priority = priority
-                            if should_flag:
-                                video.status = 'Flagged for Takedown'
-                            db.add_video(video)
-                        db.add_search_log(keyword, len(videos), True)
-                    except Exception as e:
-                        db.add_search_log(keyword, 0, False, str(e))
-        
-        scheduler.add_job(
-            scheduled_search,
-            'interval',
-            hours=interval_hours,
-            id='auto_search'
-        )
+        services.scheduler.schedule(job_id, interval_hours)
         
         return jsonify({'success': True, 'message': f'Automatic search scheduled every {interval_hours} hours'})
     else:
-        for job in scheduler.get_jobs():
-            job.remove()
+        services.scheduler.disable(job_id)
         return jsonify({'success': True, 'message': 'Automatic search disabled'})
 
+# ============================================================================
+# DATABASE MAINTENANCE ENDPOINTS
+# ============================================================================
+
+def sqlite_only():
+    """Error response for SQLite file maintenance on another backend, else None"""
+    if services.db.dialect != 'sqlite':
+        return jsonify({'error': f'Maintenance applies to the SQLite backend, not {services.db.dialect}'}), 400
+    return None
+
+@api.route('/api/admin/maintenance', methods=['GET'])
+def get_maintenance():
+    """File size/free pages, recent maintenance runs (per-task timings, bytes reclaimed) and backups"""
+    error = sqlite_only()
+    if error:
+        return error
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'database': services.maintenance.file_stats(),
+        'runs': services.maintenance.get_runs(limit),
+        'backups': services.maintenance.list_backups(),
+        'schedule': services.scheduler.get_job('db_maintenance')
+    })
+
+@api.route('/api/admin/maintenance', methods=['POST'])
+def run_maintenance():
+    """
+    Run maintenance now as a background job (optional {"tasks": [...]} subset)
+    {"tasks": ["convert"]} switches an old file to incremental auto_vacuum with a full
+    VACUUM that blocks writers; the scheduled run never does it.
+    Poll /api/jobs/<job_id> for the run report
+    """
+    error = sqlite_only()
+    if error:
+        return error
+    tasks = (request.get_json(silent=True) or {}).get('tasks')
+    unknown = sorted(set(tasks or []) - set(services.maintenance.TASKS))
+    if unknown:
+        return jsonify({'error': f"Unknown tasks: {', '.join(unknown)}"}), 400
+    
+    job, started = services.job_manager.start_unique(
+        'db_maintenance', lambda job: services.maintenance.run(tasks))
+    
+    return jsonify({
+        'success': True,
+        'started': started,
+        'job_id': job.id,
+        'job': job.to_dict(),
+        'message': 'Maintenance started' if started else 'Maintenance already running'
+    }), 202
+
+# ============================================================================
+# PROFILING
+# ============================================================================
+
+def profile_requested(data=None) -> bool:
+    """?profile=1 on the URL or "profile": true in the JSON body"""
+    if request.args.get('profile', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return isinstance(data, dict) and data.get('profile') is True
+
+def run_profiled(name, data, work):
+    """
+    Run work() and return its result dict; when profiling was requested the run is
+    sampled, its stage timings recorded, and result['profile'] points at the download
+    """
+    if not profile_requested(data):
+        return work()
+    
+    with services.profiler(name) as profile:
+        result = work()
+        profile.stages = result.get('timings') or {}
+    result['profile'] = profile.summary()
+    return result
+
+@api.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Recent profiled runs of any worker: wall time, stage breakdown, hottest functions"""
+    return jsonify(services.profiles.list_profiles())
+
+@api.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """
+    Collapsed stacks of one profiled run (flamegraph.pl, speedscope, inferno)
+    ?format=json returns the summary instead
+    """
+    summary = services.profiles.get(profile_id)
+    if not summary:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(summary)
+    
+    filename = f"{summary['name']}_{summary['started_at'][:19].replace(':', '').replace('-', '')}.folded"
+    return Response(services.profiles.collapsed(profile_id), mimetype='text/plain',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 # ============================================================================
 # NOTIFICATIONS ENDPOINTS
 # ============================================================================
 
-@app.route('/api/notifications/test', methods=['POST'])
+@api.route('/api/notifications/test', methods=['POST'])
 def test_notification():
     data = request.json
     email = data.get('email')
@@ -1580,10 +1679,10 @@ def test_notification():
     if not email:
         return jsonify({'error': 'Email is required'}), 400
     
-    if not email_service.enabled:
+    if not services.email_service.enabled:
         return jsonify({'error': 'Email service not configured'}), 500
     
-    success = email_service.send_email(
+    success = services.email_service.send_email(
         email,
         'Test Email from UGC Monitor',
         'This is a test email. Your email notifications are working!'
@@ -1598,20 +1697,20 @@ def test_notification():
 # KEYWORD AUTOMATION ENDPOINTS
 # ============================================================================
 
-@app.route('/api/keywords/fetch-spotify/<int:artist_id>', methods=['POST'])
+@api.route('/api/keywords/fetch-spotify/<int:artist_id>', methods=['POST'])
 def fetch_spotify_songs(artist_id):
     """Fetch all songs for an artist from Spotify"""
-    if not spotify_service or not SPOTIFY_CONFIGURED:
+    if not services.spotify_service or not services.spotify_configured:
         return jsonify({'error': 'Spotify API not configured'}), 500
     
     try:
         # Get artist
-        artist = db.get_artist(artist_id)
+        artist = services.db.get_artist(artist_id)
         if not artist:
             return jsonify({'error': 'Artist not found'}), 404
         
         # Fetch songs from Spotify
-        result = spotify_service.get_artist_all_songs(artist.name)
+        result = services.spotify_service.get_artist_all_songs(artist.name)
         
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
@@ -1623,7 +1722,7 @@ def fetch_spotify_songs(artist_id):
         
         for song in result['songs']:
             try:
-                keyword_id = db.add_keyword(song, artist_id=artist_id, auto_flag=False, priority='Medium')
+                keyword_id = services.db.add_keyword(song, artist_id=artist_id, auto_flag=False, priority='Medium')
                 if keyword_id:
                     added += 1
                 else:
@@ -1645,17 +1744,17 @@ def fetch_spotify_songs(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/keywords/fetch-musicbrainz/<int:artist_id>', methods=['POST'])
+@api.route('/api/keywords/fetch-musicbrainz/<int:artist_id>', methods=['POST'])
 def fetch_musicbrainz_songs(artist_id):
     """Fetch all songs for an artist from MusicBrainz (free, no API key)"""
     try:
         # Get artist
-        artist = db.get_artist(artist_id)
+        artist = services.db.get_artist(artist_id)
         if not artist:
             return jsonify({'error': 'Artist not found'}), 404
         
         # Fetch songs from MusicBrainz
-        result = musicbrainz_service.get_artist_all_songs(artist.name)
+        result = services.musicbrainz_service.get_artist_all_songs(artist.name)
         
         if 'error' in result:
             return jsonify({'error': result['error']}), 500
@@ -1667,7 +1766,7 @@ def fetch_musicbrainz_songs(artist_id):
         
         for song in result['songs']:
             try:
-                keyword_id = db.add_keyword(song, artist_id=artist_id, auto_flag=False, priority='Medium')
+                keyword_id = services.db.add_keyword(song, artist_id=artist_id, auto_flag=False, priority='Medium')
                 if keyword_id:
                     added += 1
                 else:
@@ -1689,11 +1788,12 @@ def fetch_musicbrainz_songs(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/keywords/suggest/<int:artist_id>', methods=['GET'])
+@api.route('/api/keywords/suggest/<int:artist_id>', methods=['GET'])
 def suggest_keywords(artist_id):
-    """Get AI-suggested keywords based on existing video matches"""
+    """Get AI-suggested keywords based on existing video matches (top-K lookup in the n-gram index)"""
     try:
-        suggestions = keyword_learner.suggest_keywords_from_videos(artist_id=artist_id, limit=50)
+        limit = request.args.get('limit', 50, type=int)
+        suggestions = services.keyword_learner.suggest_keywords_from_videos(artist_id=artist_id, limit=limit)
         
         return jsonify({
             'success': True,
@@ -1704,17 +1804,17 @@ def suggest_keywords(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/keywords/generate-patterns/<int:artist_id>', methods=['POST'])
+@api.route('/api/keywords/generate-patterns/<int:artist_id>', methods=['POST'])
 def generate_patterns(artist_id):
     """Generate piracy pattern keywords for an artist"""
     try:
         # Get artist
-        artist = db.get_artist(artist_id)
+        artist = services.db.get_artist(artist_id)
         if not artist:
             return jsonify({'error': 'Artist not found'}), 404
         
         # Generate variations
-        variations = keyword_learner.suggest_artist_variations(artist.name)
+        variations = services.keyword_learner.suggest_artist_variations(artist.name)
         
         # Add as keywords
         added = 0
@@ -1722,7 +1822,7 @@ def generate_patterns(artist_id):
         
         for keyword in variations:
             try:
-                keyword_id = db.add_keyword(keyword, artist_id=artist_id, auto_flag=False, priority='Medium')
+                keyword_id = services.db.add_keyword(keyword, artist_id=artist_id, auto_flag=False, priority='Medium')
                 if keyword_id:
                     added += 1
                 else:
@@ -1742,17 +1842,34 @@ def generate_patterns(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/keywords/performance', methods=['GET'])
+@api.route('/api/keywords/performance', methods=['GET'])
 def keywords_performance():
-    """Get performance stats for all keywords"""
+    """
+    Get performance stats for all keywords
+    Query params: artist_id, sort (flag_rate, total_found, flagged_count, avg_risk_score, keyword),
+                  order (asc/desc), limit, offset
+    """
     try:
         artist_id = request.args.get('artist_id', type=int)
-        performances = keyword_learner.get_all_keywords_performance(artist_id=artist_id)
+        sort_by = request.args.get('sort', 'flag_rate')
+        order = request.args.get('order', 'desc')
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        performances = services.keyword_learner.get_all_keywords_performance(
+            artist_id=artist_id,
+            sort_by=sort_by,
+            order=order,
+            limit=limit,
+            offset=offset
+        )
         
         return jsonify({
             'success': True,
             'keywords': performances,
-            'count': len(performances)
+            'count': len(performances),
+            'total': services.keyword_learner.count_keywords_with_matches(artist_id) if limit is not None else len(performances),
+            'offset': offset
         })
         
     except Exception as e:
@@ -1762,7 +1879,7 @@ def keywords_performance():
 # AUTO-UPDATE ENDPOINTS
 # ============================================================================
 
-@app.route('/api/auto-update/enable/<int:artist_id>', methods=['POST'])
+@api.route('/api/auto-update/enable/<int:artist_id>', methods=['POST'])
 def enable_auto_update(artist_id):
     """Enable automatic song updates for an artist"""
     try:
@@ -1770,7 +1887,7 @@ def enable_auto_update(artist_id):
         frequency = data.get('frequency', 'weekly')  # daily, weekly, monthly
         source = data.get('source', 'spotify')  # spotify or musicbrainz
         
-        success = auto_update_service.enable_auto_update(artist_id, frequency, source)
+        success = services.auto_update_service.enable_auto_update(artist_id, frequency, source)
         
         if success:
             return jsonify({
@@ -1783,11 +1900,11 @@ def enable_auto_update(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auto-update/disable/<int:artist_id>', methods=['POST'])
+@api.route('/api/auto-update/disable/<int:artist_id>', methods=['POST'])
 def disable_auto_update(artist_id):
     """Disable automatic updates for an artist"""
     try:
-        success = auto_update_service.disable_auto_update(artist_id)
+        success = services.auto_update_service.disable_auto_update(artist_id)
         
         if success:
             return jsonify({'success': True, 'message': 'Auto-update disabled'})
@@ -1797,44 +1914,83 @@ def disable_auto_update(artist_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auto-update/status', methods=['GET'])
+@api.route('/api/auto-update/status', methods=['GET'])
 def auto_update_status():
     """Get status of auto-update system"""
     try:
-        status = auto_update_service.get_update_status()
+        status = services.auto_update_service.get_update_status()
         return jsonify(status)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auto-update/run/<int:artist_id>', methods=['POST'])
+@api.route('/api/auto-update/run/<int:artist_id>', methods=['POST'])
 def run_auto_update(artist_id):
     """Manually trigger update for an artist"""
     try:
-        result = auto_update_service.update_artist_songs(artist_id)
+        result = services.auto_update_service.update_artist_songs(artist_id)
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auto-update/run-all', methods=['POST'])
+def run_all_auto_updates_job(job):
+    """Background job target: update every due artist and summarise the results"""
+    results = services.auto_update_service.update_all_artists(progress_callback=job.update_progress)
+    
+    total_new = sum(r.get('new_songs', 0) for r in results if r.get('success'))
+    
+    return {
+        'success': True,
+        'results': results,
+        'updates': results,
+        'total_artists_updated': len([r for r in results if r.get('success')]),
+        'total_new_songs': total_new
+    }
+
+@api.route('/api/auto-update/run-all', methods=['POST'])
 def run_all_auto_updates():
-    """Run updates for all artists that need it"""
+    """
+    Start updates for all artists that need it as a background job
+    Poll /api/jobs/<job_id> for progress and results (?profile=1 attaches a profile)
+    """
     try:
-        results = auto_update_service.update_all_artists()
-        
-        total_new = sum(r.get('new_songs', 0) for r in results if r.get('success'))
+        job, started = services.job_manager.start_unique(
+            'auto_update_all', run_all_auto_updates_job,
+            profile=profile_requested(request.get_json(silent=True)))
         
         return jsonify({
             'success': True,
-            'updates': results,
-            'total_artists_updated': len([r for r in results if r.get('success')]),
-            'total_new_songs': total_new
-        })
+            'started': started,
+            'job_id': job.id,
+            'job': job.to_dict(),
+            'message': 'Auto-update started' if started else 'Auto-update already running'
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# ============================================================================
+# BACKGROUND JOBS ENDPOINTS
+# ============================================================================
+
+@api.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List recent background jobs (optional ?name= filter)"""
+    return jsonify(services.job_manager.list_jobs(request.args.get('name')))
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get progress and result of a background job"""
+    job = services.job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+app = create_app()
+
 if __name__ == '__main__':
+    # Development server only - production uses gunicorn (gunicorn.conf.py) or waitress (wsgi.py)
     port = int(os.getenv('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    start_runtime()
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG', '0') == '1', use_reloader=False)
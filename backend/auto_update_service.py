@@ -3,28 +3,49 @@ Auto-Update Service
 Automatically checks for new releases and updates keywords
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Callable
 import json
+import threading
 
 
 class AutoUpdateService:
     """
     Manages automatic updates for artist releases
     Checks Spotify/MusicBrainz for new songs weekly
+    
+    Due artists are selected with one query on the stored next_check column
+    and updated in a bounded worker pool, with a fixed number of lanes per
+    source so each provider's rate limit is respected.
     """
     
-    def __init__(self, database, spotify_service=None, musicbrainz_service=None):
+    # Days between checks for each frequency
+    FREQUENCY_DAYS = {
+        'daily': 1,
+        'weekly': 7,
+        'monthly': 30
+    }
+    
+    # Concurrent requests allowed per provider
+    # (MusicBrainz allows 1 request/second, its client is not thread-safe)
+    SOURCE_CONCURRENCY = {
+        'spotify': 2,
+        'musicbrainz': 1
+    }
+    
+    def __init__(self, database, spotify_service=None, musicbrainz_service=None, max_workers: int = 4):
         self.db = database
         self.spotify = spotify_service
         self.musicbrainz = musicbrainz_service
+        self.max_workers = max_workers
+        self.ensure_config_table()
     
-    def get_auto_update_config(self, artist_id: int) -> Dict:
-        """Get auto-update configuration for an artist"""
+    def ensure_config_table(self):
+        """Create/migrate the auto_update_config table (once, at startup)"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        # Check if config table exists, create if not
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS auto_update_config (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,10 +56,41 @@ class AutoUpdateService:
                 last_update TEXT,
                 songs_count INTEGER DEFAULT 0,
                 source TEXT DEFAULT 'spotify',
+                next_check TEXT,
                 FOREIGN KEY (artist_id) REFERENCES artists(id)
             )
         """)
         
+        # Older databases: add and backfill next_check
+        columns = self.db.table_columns(cursor, 'auto_update_config')
+        if 'next_check' not in columns:
+            cursor.execute("ALTER TABLE auto_update_config ADD COLUMN next_check TEXT")
+            cursor.execute("SELECT artist_id, frequency, last_check FROM auto_update_config")
+            backfill = [(self.calculate_next_check(row['last_check'], row['frequency']), row['artist_id'])
+                        for row in cursor.fetchall()]
+            cursor.executemany("UPDATE auto_update_config SET next_check = ? WHERE artist_id = ?", backfill)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_auto_update_due
+            ON auto_update_config(enabled, next_check)
+        """)
+        
+        conn.commit()
+        conn.close()
+    
+    def calculate_next_check(self, last_check: str, frequency: str) -> str:
+        """Next check time (ISO string) for a last check + frequency, None if never checked"""
+        if not last_check:
+            return None
+        
+        days = self.FREQUENCY_DAYS.get(frequency, 7)
+        return (datetime.fromisoformat(last_check) + timedelta(days=days)).isoformat()
+    
+    def get_auto_update_config(self, artist_id: int) -> Dict:
+        """Get auto-update configuration for an artist"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
         cursor.execute("SELECT * FROM auto_update_config WHERE artist_id = ?", (artist_id,))
         result = cursor.fetchone()
         conn.close()
@@ -60,27 +112,20 @@ class AutoUpdateService:
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        # Ensure table exists
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS auto_update_config (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                artist_id INTEGER UNIQUE NOT NULL,
-                enabled BOOLEAN DEFAULT 1,
-                frequency TEXT DEFAULT 'weekly',
-                last_check TEXT,
-                last_update TEXT,
-                songs_count INTEGER DEFAULT 0,
-                source TEXT DEFAULT 'spotify',
-                FOREIGN KEY (artist_id) REFERENCES artists(id)
-            )
-        """)
+        now = datetime.now().isoformat()
         
         try:
             cursor.execute("""
-                INSERT OR REPLACE INTO auto_update_config 
-                (artist_id, enabled, frequency, source, last_check)
-                VALUES (?, 1, ?, ?, ?)
-            """, (artist_id, frequency, source, datetime.now().isoformat()))
+                INSERT INTO auto_update_config 
+                (artist_id, enabled, frequency, source, last_check, next_check)
+                VALUES (?, 1, ?, ?, ?, ?)
+                ON CONFLICT(artist_id) DO UPDATE SET
+                    enabled = 1,
+                    frequency = excluded.frequency,
+                    source = excluded.source,
+                    last_check = excluded.last_check,
+                    next_check = excluded.next_check
+            """, (artist_id, frequency, source, now, self.calculate_next_check(now, frequency)))
             
             conn.commit()
             success = True
@@ -118,37 +163,52 @@ class AutoUpdateService:
         if not config or not config['enabled']:
             return False
         
-        if not config['last_check']:
+        if not config['next_check']:
             return True
         
-        last_check = datetime.fromisoformat(config['last_check'])
-        now = datetime.now()
+        return datetime.now().isoformat() >= config['next_check']
+    
+    def get_due_artists(self) -> List[Dict]:
+        """
+        Select every enabled artist whose next check is due (single query)
         
-        # Calculate next check time based on frequency
-        if config['frequency'] == 'daily':
-            next_check = last_check + timedelta(days=1)
-        elif config['frequency'] == 'weekly':
-            next_check = last_check + timedelta(weeks=1)
-        elif config['frequency'] == 'monthly':
-            next_check = last_check + timedelta(days=30)
-        else:
-            next_check = last_check + timedelta(weeks=1)
+        Returns:
+            List of auto_update_config rows as dicts
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * 
+            FROM auto_update_config 
+            WHERE enabled = 1 
+            AND (next_check IS NULL OR next_check <= ?)
+            ORDER BY next_check
+        """, (datetime.now().isoformat(),))
         
-        return now >= next_check
+        due = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return due
     
-    def update_artist_songs(self, artist_id: int) -> Dict:
+    def update_artist_songs(self, artist_id: int, config: Dict = None) -> Dict:
         """
         Fetch latest songs for artist and add new ones as keywords
         
+        Args:
+            artist_id: Artist ID
+            config: auto_update_config row if the caller already loaded it
+        
         Returns:
             dict with keys: success, new_songs, total_songs, error
         """
         # Get artist info
         artist = self.db.get_artist(artist_id)
         if not artist:
-            return {"success": False, "error": "Artist not found"}
+            return {"success": False, "error": "Artist not found", "artist_id": artist_id}
         
-        config = self.get_auto_update_config(artist_id)
+        if config is None:
+            config = self.get_auto_update_config(artist_id)
         source = config['source'] if config else 'spotify'
         
         # Fetch songs from external service
@@ -157,42 +217,49 @@ class AutoUpdateService:
         elif source == 'musicbrainz' and self.musicbrainz:
             result = self.musicbrainz.get_artist_all_songs(artist.name)
         else:
-            return {"success": False, "error": f"Service '{source}' not available"}
+            return {"success": False, "error": f"Service '{source}' not available", "artist": artist.name}
         
         if "error" in result:
-            return {"success": False, "error": result["error"]}
+            return {"success": False, "error": result["error"], "artist": artist.name}
         
         # Get existing keywords for this artist
-        existing_keywords = set()
         conn = self.db.get_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT keyword FROM keywords WHERE artist_id = ?", (artist_id,))
         existing_keywords = {row['keyword'] for row in cursor.fetchall()}
         conn.close()
         
-        # Find new songs
-        new_songs = [song for song in result['songs'] if song not in existing_keywords]
+        # Find new songs (deduplicated, order preserved)
+        new_songs = [song for song in dict.fromkeys(result['songs']) if song not in existing_keywords]
         
-        # Add new songs as keywords
+        # Add new songs as keywords in one bulk insert
         added_count = 0
-        for song in new_songs:
-            try:
-                self.db.add_keyword(song, artist_id=artist_id, auto_flag=False, priority='Medium')
-                added_count += 1
-            except Exception as e:
-                print(f"Error adding keyword '{song}': {e}")
-        
-        # Update config
+        if new_songs:
+            import_result = self.db.bulk_add_keywords([{
+                'keyword': song,
+                'artist_id': artist_id,
+                'auto_flag': False,
+                'priority': 'Medium'
+            } for song in new_songs])
+            added_count = import_result['added']
+            for error in import_result['errors']:
+                print(f"Error adding keyword: {error}")
+        
+        # Update config and schedule the next check
+        now = datetime.now().isoformat()
+        frequency = config['frequency'] if config else 'weekly'
         conn = self.db.get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             UPDATE auto_update_config 
             SET last_check = ?,
+                next_check = ?,
                 last_update = ?,
                 songs_count = ?
             WHERE artist_id = ?
-        """, (datetime.now().isoformat(), 
-              datetime.now().isoformat() if added_count > 0 else config.get('last_update'),
+        """, (now,
+              self.calculate_next_check(now, frequency),
+              now if added_count > 0 else (config.get('last_update') if config else None),
               result['total_songs'],
               artist_id))
         conn.commit()
@@ -206,33 +273,60 @@ class AutoUpdateService:
             "source": source
         }
     
-    def update_all_artists(self) -> List[Dict]:
+    def update_all_artists(self, progress_callback: Callable = None) -> List[Dict]:
         """
         Check and update all artists that have auto-update enabled
         
+        Args:
+            progress_callback: optional callable(done, total) for progress reporting
+        
         Returns:
             List of update results for each artist
         """
-        # Get all artists with auto-update enabled
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        due = self.get_due_artists()
+        total = len(due)
         
-        cursor.execute("""
-            SELECT artist_id 
-            FROM auto_update_config 
-            WHERE enabled = 1
-        """)
+        if progress_callback:
+            progress_callback(0, total)
         
-        artist_ids = [row['artist_id'] for row in cursor.fetchall()]
-        conn.close()
+        if not due:
+            return []
         
-        results = []
+        # Group by source and split each group into rate-limit lanes
+        by_source = {}
+        for config in due:
+            by_source.setdefault(config['source'] or 'spotify', []).append(config)
+        
+        lanes = []
+        for source, configs in by_source.items():
+            lane_count = self.SOURCE_CONCURRENCY.get(source, 1)
+            for lane in range(lane_count):
+                lane_configs = configs[lane::lane_count]
+                if lane_configs:
+                    lanes.append(lane_configs)
         
-        for artist_id in artist_ids:
-            # Check if update is needed
-            if self.check_if_update_needed(artist_id):
-                result = self.update_artist_songs(artist_id)
-                results.append(result)
+        results = []
+        done = [0]
+        done_lock = threading.Lock()
+        
+        def run_lane(lane_configs):
+            lane_results = []
+            for config in lane_configs:
+                try:
+                    result = self.update_artist_songs(config['artist_id'], config)
+                except Exception as e:
+                    result = {"success": False, "error": str(e), "artist_id": config['artist_id']}
+                lane_results.append(result)
+                if progress_callback:
+                    with done_lock:
+                        done[0] += 1
+                        progress_callback(done[0], total)
+            return lane_results
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(lanes)))) as executor:
+            futures = [executor.submit(run_lane, lane) for lane in lanes]
+            for future in as_completed(futures):
+                results.extend(future.result())
         
         return results
     
@@ -260,23 +354,10 @@ class AutoUpdateService:
         for row in cursor.fetchall():
             config_dict = dict(row)
             
-            # Calculate time until next check
-            if config_dict['last_check']:
-                last_check = datetime.fromisoformat(config_dict['last_check'])
-                
-                if config_dict['frequency'] == 'daily':
-                    next_check = last_check + timedelta(days=1)
-                elif config_dict['frequency'] == 'weekly':
-                    next_check = last_check + timedelta(weeks=1)
-                elif config_dict['frequency'] == 'monthly':
-                    next_check = last_check + timedelta(days=30)
-                else:
-                    next_check = last_check + timedelta(weeks=1)
-                
-                config_dict['next_check'] = next_check.isoformat()
-                config_dict['needs_update'] = datetime.now() >= next_check
+            # Time until next check comes from the stored schedule
+            if config_dict['next_check']:
+                config_dict['needs_update'] = datetime.now().isoformat() >= config_dict['next_check']
             else:
-                config_dict['next_check'] = None
                 config_dict['needs_update'] = True
             
             configs.append(config_dict)
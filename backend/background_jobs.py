@@ -0,0 +1,382 @@
+"""
+Background Jobs
+Runs long operations (batch updates, sweeps) on worker threads
+and keeps their progress so the frontend can poll it
+
+Job state (status, progress, result) is written to the background_jobs
+table, so every gunicorn worker can answer /api/jobs/<id> for a job
+started by another one, and start_unique holds across workers: a unique
+index on the active job's name lets only one INSERT win. The process that
+runs a job refreshes its heartbeat; an active job whose heartbeat is older
+than stale_after_seconds (its worker died) is marked failed.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+
+class Job:
+    """A single background job and its progress"""
+
+    def __init__(self, name: str, job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.name = name
+        self.status = 'pending'  # "pending", "running", "completed", "failed"
+        self.done = 0
+        self.total = 0
+        self.message = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.profile = None
+        # Summary of a profile run in another process (read back from the table)
+        self.profile_summary = None
+        self._on_progress = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_row(cls, row) -> 'Job':
+        """Snapshot of a stored job (possibly running in another process)"""
+        job = cls(row['name'], job_id=row['id'])
+        job.status = row['status']
+        job.done = row['done'] or 0
+        job.total = row['total'] or 0
+        job.message = row['message']
+        job.result = json.loads(row['result']) if row['result'] else None
+        job.error = row['error']
+        job.created_at = row['created_at']
+        job.started_at = row['started_at']
+        job.finished_at = row['finished_at']
+        job.profile_summary = json.loads(row['profile']) if row['profile'] else None
+        return job
+
+    def update_progress(self, done: int, total: int = None, message: str = None):
+        """Called by the job target to report progress"""
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+
+        if self._on_progress is not None:
+            self._on_progress(self)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def profile_dict(self) -> Optional[Dict]:
+        if self.profile is not None:
+            return None if self.is_active else self.profile.summary()
+        return self.profile_summary
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'name': self.name,
+                'status': self.status,
+                'progress': {
+                    'done': self.done,
+                    'total': self.total,
+                    'percent': round(self.done / self.total * 100, 1) if self.total else 0
+                },
+                'message': self.message,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'profile': self.profile_dict()
+            }
+
+
+class JobManager:
+    """
+    Starts jobs on daemon threads and records them in the database
+
+    The target is called as target(job, *args, **kwargs); its return value
+    becomes job.result (stored as JSON). With profile=True the run is sampled
+    by `profiler(name)` (see profiling.Profile) and kept as job.profile.
+
+    Progress is written at most every progress_interval seconds; the final
+    state is always written. The newest max_history jobs are kept.
+    """
+
+    def __init__(self, database, max_history: int = 100, profiler: Callable = None,
+                 heartbeat_seconds: float = 15, stale_after_seconds: float = 60,
+                 progress_interval: float = 1.0):
+        self.db = database
+        self.max_history = max_history
+        self.profiler = profiler
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.progress_interval = progress_interval
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}"
+        # Jobs running in this process (fresher progress than the table, live profile)
+        self._jobs = {}
+        self._saved_at = {}
+        self._lock = threading.Lock()
+        self.ensure_table()
+
+    def ensure_table(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                unique_key TEXT,
+                status TEXT NOT NULL,
+                done INTEGER DEFAULT 0,
+                total INTEGER DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                profile TEXT,
+                owner TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                heartbeat_at TEXT
+            )
+        """)
+
+        # At most one active job per unique_key (NULL for jobs started with start())
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_active
+            ON background_jobs(unique_key) WHERE status IN ('pending', 'running')
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_background_jobs_created
+            ON background_jobs(created_at)
+        """)
+
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # STARTING JOBS
+    # =========================================================================
+
+    def start(self, name: str, target: Callable, *args, profile: bool = False, **kwargs) -> Job:
+        job = self._new_job(name, profile)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        self._insert(cursor, job, None)
+        conn.commit()
+        conn.close()
+
+        self._launch(job, target, args, kwargs)
+        return job
+
+    def start_unique(self, name: str, target: Callable, *args, profile: bool = False,
+                     **kwargs) -> Tuple[Job, bool]:
+        """
+        Start a job unless one with the same name is still running (in any process)
+
+        Returns:
+            (job, started) - the running job is returned with started=False
+        """
+        job = self._new_job(name, profile)
+
+        for _ in range(3):
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            self._expire_stale(cursor)
+            try:
+                self._insert(cursor, job, name)
+                conn.commit()
+                conn.close()
+                self._launch(job, target, args, kwargs)
+                return job, True
+            except self.db.IntegrityError:
+                conn.rollback()
+
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM background_jobs
+                WHERE unique_key = ? AND status IN ('pending', 'running')
+            """, (name,))
+            row = cursor.fetchone()
+            conn.close()
+            if row:
+                return self._job_from_row(row), False
+            # The active job finished in between; try again
+
+        raise RuntimeError(f"Could not start job '{name}'")
+
+    def _new_job(self, name: str, profile: bool) -> Job:
+        job = Job(name)
+        if profile and self.profiler is not None:
+            job.profile = self.profiler(name)
+        job._on_progress = self._progress
+        return job
+
+    def _insert(self, cursor, job: Job, unique_key: Optional[str]):
+        cursor.execute("""
+            INSERT INTO background_jobs (id, name, unique_key, status, owner, created_at, heartbeat_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (job.id, job.name, unique_key, job.status, self.owner_id, job.created_at, job.created_at))
+
+        # Drop the oldest finished jobs
+        cursor.execute("""
+            DELETE FROM background_jobs
+            WHERE status NOT IN ('pending', 'running')
+            AND id NOT IN (SELECT id FROM background_jobs ORDER BY created_at DESC LIMIT ?)
+        """, (self.max_history,))
+
+    def _launch(self, job: Job, target: Callable, args, kwargs):
+        with self._lock:
+            self._jobs[job.id] = job
+        thread = threading.Thread(
+            target=self._run,
+            args=(job, target, args, kwargs),
+            name=f"job-{job.name}-{job.id[:8]}",
+            daemon=True
+        )
+        thread.start()
+
+    def _run(self, job: Job, target: Callable, args, kwargs):
+        job.status = 'running'
+        job.started_at = datetime.now().isoformat()
+        self._save(job)
+
+        finished = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job, finished),
+                         name=f"job-heartbeat-{job.id[:8]}", daemon=True).start()
+
+        try:
+            if job.profile is not None:
+                with job.profile:
+                    job.result = target(job, *args, **kwargs)
+                    # Ingest-based jobs return the pipeline's per-stage timings
+                    if isinstance(job.result, dict) and isinstance(job.result.get('timings'), dict):
+                        job.profile.stages = job.result['timings']
+            else:
+                job.result = target(job, *args, **kwargs)
+            job.status = 'completed'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            traceback.print_exc()
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            finished.set()
+            self._save(job)
+            with self._lock:
+                self._jobs.pop(job.id, None)
+                self._saved_at.pop(job.id, None)
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def _progress(self, job: Job):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._saved_at.get(job.id, 0) < self.progress_interval:
+                return
+            self._saved_at[job.id] = now
+        self._save(job)
+
+    def _save(self, job: Job):
+        """Write the job's current state (and heartbeat) to the table"""
+        state = job.to_dict()
+        try:
+            conn = self.db.get_connection()
+            conn.execute("""
+                UPDATE background_jobs
+                SET status = ?, done = ?, total = ?, message = ?, result = ?, error = ?, profile = ?,
+                    started_at = ?, finished_at = ?, heartbeat_at = ?
+                WHERE id = ?
+            """, (state['status'], state['progress']['done'], state['progress']['total'], state['message'],
+                  json.dumps(state['result'], default=str) if state['result'] is not None else None,
+                  state['error'],
+                  json.dumps(state['profile'], default=str) if state['profile'] is not None else None,
+                  state['started_at'], state['finished_at'], datetime.now().isoformat(), job.id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"WARNING: saving job {job.id} failed: {str(e)}")
+
+    def _heartbeat(self, job: Job, finished: threading.Event):
+        while not finished.wait(self.heartbeat_seconds):
+            try:
+                conn = self.db.get_connection()
+                conn.execute("UPDATE background_jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                             (datetime.now().isoformat(), job.id))
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                print(f"WARNING: job {job.id} heartbeat failed: {str(e)}")
+
+    def _stale_cutoff(self) -> str:
+        return (datetime.now() - timedelta(seconds=self.stale_after_seconds)).isoformat()
+
+    def _expire_stale(self, cursor):
+        """Fail active jobs whose process stopped refreshing them"""
+        cursor.execute("""
+            UPDATE background_jobs
+            SET status = 'failed', error = 'Job lost: its worker stopped before it finished', finished_at = ?
+            WHERE status IN ('pending', 'running') AND heartbeat_at < ?
+        """, (datetime.now().isoformat(), self._stale_cutoff()))
+
+    def _fetch(self, sql: str, params) -> List:
+        """Rows of a job query; stale active jobs among them are failed first (reads stay read-only otherwise)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+        cutoff = self._stale_cutoff()
+        if any(row['status'] in ACTIVE_STATUSES and row['heartbeat_at'] < cutoff for row in rows):
+            self._expire_stale(cursor)
+            conn.commit()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        conn.close()
+
+        return rows
+
+    def _job_from_row(self, row) -> Job:
+        with self._lock:
+            local = self._jobs.get(row['id'])
+        return local or Job.from_row(row)
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            local = self._jobs.get(job_id)
+        if local:
+            return local
+
+        rows = self._fetch("SELECT * FROM background_jobs WHERE id = ?", (job_id,))
+        return Job.from_row(rows[0]) if rows else None
+
+    def list_jobs(self, name: str = None) -> List[Dict]:
+        if name:
+            rows = self._fetch("SELECT * FROM background_jobs WHERE name = ? ORDER BY created_at DESC LIMIT ?",
+                               (name, self.max_history))
+        else:
+            rows = self._fetch("SELECT * FROM background_jobs ORDER BY created_at DESC LIMIT ?",
+                               (self.max_history,))
+
+        return [self._job_from_row(row).to_dict() for row in rows]
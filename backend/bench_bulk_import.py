@@ -0,0 +1,72 @@
+"""
+Bulk import benchmark
+Compares the old import (one execute per row, IntegrityError caught per row,
+a timestamp per row) with Database.bulk_add_songs (executemany into a staging
+table, duplicates marked in SQL, one INSERT ... SELECT, one transaction).
+
+Usage:
+    python bench_bulk_import.py [--rows 100000] [--duplicates 0.1]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from database_enhanced import Database
+
+
+def catalogue(count, duplicate_share):
+    songs = [{'song_name': f"Song {i}", 'artist_name': f"Artist {i % 500}", 'duration_ms': 180000 + i % 60000}
+             for i in range(count)]
+    return songs + songs[:int(count * duplicate_share)]
+
+
+def legacy_import(db, songs):
+    """bulk_add_songs as it was: a statement per row"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    added = skipped = 0
+    for song in songs:
+        try:
+            cursor.execute('''
+                INSERT INTO songs (song_name, artist_name, active, artist_id, auto_flag, priority, created_at, duration_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (song.get('song_name'), song.get('artist_name'), int(song.get('active', True)),
+                  song.get('artist_id'), int(song.get('auto_flag', False)), song.get('priority', 'Medium'),
+                  datetime.now().isoformat(), song.get('duration_ms')))
+            added += 1
+        except sqlite3.IntegrityError:
+            skipped += 1
+    conn.commit()
+    conn.close()
+    return {'added': added, 'skipped': skipped}
+
+
+def run(name, fn, songs):
+    db = Database(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    # Half the catalogue is already stored, as when re-importing an updated CSV
+    db.bulk_add_songs(songs[:len(songs) // 2])
+    start = time.perf_counter()
+    result = fn(db, songs)
+    seconds = time.perf_counter() - start
+    print(f"  {name:<24}{seconds * 1000:>10.0f}{result['added']:>10}{result['skipped']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import benchmark')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--duplicates', type=float, default=0.1, help='share of rows repeated in the file')
+    args = parser.parse_args()
+
+    songs = catalogue(args.rows, args.duplicates)
+    print(f"Importing {len(songs)} songs ({args.rows // 2} already stored)")
+    print(f"  {'path':<24}{'time ms':>10}{'added':>10}{'skipped':>10}")
+    run('execute per row', legacy_import, songs)
+    run('staging + executemany', lambda db, rows: db.bulk_add_songs(rows), songs)
+
+
+if __name__ == '__main__':
+    main()
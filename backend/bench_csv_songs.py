@@ -0,0 +1,121 @@
+"""
+Song CSV parsing benchmark
+Compares the old parse_csv_songs (DictReader, every candidate column name
+matched against every key of every row) with header resolution once per file
+plus positional reads. The pandas row (C parser over the two resolved columns,
+same row loop) is there for reference: without pyarrow its object-dtype
+strings cost more than csv.reader, so parse_csv_songs does not use it.
+
+Usage:
+    python bench_csv_songs.py [--rows 1000000] [--columns 12]
+"""
+
+import argparse
+import csv
+import io
+import os
+import tempfile
+import time
+
+from web_scraper_service import WebScraperService
+
+
+def legacy_parse(content: str, artist_name: str = None):
+    """parse_csv_songs as it was"""
+    reader = csv.DictReader(io.StringIO(content))
+    songs = []
+    seen = set()
+    name_columns = ['song_name', 'title', 'song', 'track', 'name', 'track_name', 'song_title']
+    artist_columns = ['artist_name', 'artist', 'performer', 'band']
+
+    for row in reader:
+        song_name = None
+        for col in name_columns:
+            for key in row:
+                if key.lower().strip() == col:
+                    song_name = row[key].strip()
+                    break
+            if song_name:
+                break
+        if not song_name:
+            first_key = list(row.keys())[0] if row else None
+            if first_key:
+                song_name = row[first_key].strip()
+        if not song_name:
+            continue
+        song_artist = artist_name or ''
+        for col in artist_columns:
+            for key in row:
+                if key.lower().strip() == col:
+                    val = row[key].strip()
+                    if val:
+                        song_artist = val
+                    break
+        if song_name.lower() not in seen:
+            seen.add(song_name.lower())
+            songs.append({"name": song_name, "artist_name": song_artist, "duration_ms": None, "release_date": None})
+    return songs
+
+
+def write_catalogue(path, rows, columns):
+    """Spotify-export-like CSV: the title and artist columns sit after a few others"""
+    extra = [f"Column {i}" for i in range(columns - 4)]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Track URI', 'Album', 'Title', 'Artist'] + extra)
+        for i in range(rows):
+            # ~20% repeats (same track on several albums / compilations)
+            track = i if i % 5 else i // 5
+            writer.writerow([f"spotify:track:{i:022d}", f"Album {i % 997}", f"Song {track}",
+                             f"Artist {track % 311}"] + [str(i % 13)] * len(extra))
+
+
+def pandas_parse(path):
+    """Title/Artist columns parsed by pandas, then the same first-occurrence loop"""
+    import pandas as pd
+    frame = pd.read_csv(path, usecols=['Title', 'Artist'], dtype=str, keep_default_na=False).fillna('')
+    songs, seen = [], set()
+    for name, artist in zip(frame['Title'].tolist(), frame['Artist'].tolist()):
+        name = name.strip()
+        key = WebScraperService.song_key(name)
+        if name and key not in seen:
+            seen.add(key)
+            songs.append({"name": name, "artist_name": artist.strip(), "duration_ms": None, "release_date": None})
+    return songs
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Song CSV parsing benchmark')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--columns', type=int, default=12)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'catalogue.csv')
+    write_catalogue(path, args.rows, args.columns)
+    size = os.path.getsize(path)
+    scraper = WebScraperService()
+    print(f"Parsing {args.rows} rows x {args.columns} columns ({size / 1e6:.0f} MB)")
+
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+    with open(path, 'rb') as f:
+        runs = [
+            ('DictReader + name scan', lambda: legacy_parse(content)),
+            ('header map + csv.reader', lambda: scraper._parse_csv_songs_rows(content)),
+            ('header map, from stream', lambda: (f.seek(0), scraper._parse_csv_songs_rows(f))[1]),
+            ('pandas C parser + loop', lambda: pandas_parse(path)),
+        ]
+        print(f"  {'path':<28}{'time ms':>10}{'songs':>10}")
+        for name, fn in runs:
+            seconds, songs = timed(fn)
+            print(f"  {name:<28}{seconds * 1000:>10.0f}{len(songs):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+JSON listing benchmark
+Compares the old /api/videos path (Row -> Video -> to_dict -> stdlib jsonify)
+with the tuple fast path (orjson records and ?format=columns)
+
+Usage:
+    python bench_json.py [--videos 100000] [--runs 3]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from flask import Flask, jsonify
+
+from database_enhanced import Database
+from models import Video
+from serialization import OrjsonProvider, table_payload
+
+
+def seed(db, count):
+    db.add_videos([Video(
+        id=None, video_id=f"bench{i}", title=f"Artist - Song {i} (Official Audio) leaked",
+        channel_name=f"channel {i % 97}", channel_id=f"UC{i % 97:022d}",
+        publish_date='2024-01-01T00:00:00Z', thumbnail_url=f"https://i.ytimg.com/vi/bench{i}/mqdefault.jpg",
+        video_url=f"https://www.youtube.com/watch?v=bench{i}", matched_keyword='artist',
+        status='Pending', priority=('Low', 'Medium', 'High', 'Critical')[i % 4], artist_id=1,
+        auto_flagged=i % 7 == 0, ai_risk_score=i % 100, ai_risk_level='medium',
+        ai_reason='Unofficial upload', created_at='2024-01-01T00:00:00'
+    ) for i in range(count)])
+
+
+def timed(fn, runs):
+    times, size = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        size = len(fn())
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON listing benchmark')
+    parser.add_argument('--videos', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    db = Database(os.path.join(tempfile.mkdtemp(), 'bench_json.db'))
+    seed(db, args.videos)
+
+    stdlib_app = Flask('stdlib')
+    fast_app = Flask('fast')
+    fast_app.json = OrjsonProvider(fast_app)
+
+    def old_path():
+        with stdlib_app.app_context():
+            return jsonify([v.to_dict() for v in db.get_all_videos()]).get_data()
+
+    def fast_records():
+        with fast_app.app_context():
+            columns, rows = db.get_video_table()
+            return jsonify(table_payload(columns, rows, bool_columns=('auto_flagged',))).get_data()
+
+    def fast_columns():
+        with fast_app.app_context():
+            columns, rows = db.get_video_table()
+            return jsonify(table_payload(columns, rows, 'columns', ('auto_flagged',))).get_data()
+
+    print(f"/api/videos serialization, {args.videos} videos (median of {args.runs})")
+    baseline = None
+    for name, fn in (('to_dict + jsonify', old_path),
+                     ('tuples + orjson', fast_records),
+                     ('?format=columns', fast_columns)):
+        seconds, size = timed(fn, args.runs)
+        baseline = baseline or seconds
+        print(f"  {name:<20} {seconds * 1000:8.0f} ms  {size / 1e6:6.1f} MB  x{baseline / seconds:.1f}")
+
+
+if __name__ == '__main__':
+    main()
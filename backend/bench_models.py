@@ -0,0 +1,119 @@
+"""
+Model construction benchmark
+Compares the old bulk-read path (sqlite3.Row + per-column name lookups into a
+regular dataclass) with slotted models built positionally by a tuple row factory.
+Reports construction time and the memory held by the resulting objects.
+
+Usage:
+    python bench_models.py [--rows 1000000]
+"""
+
+import argparse
+import gc
+import sqlite3
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from database_enhanced import Database
+from models import video_row_factory
+
+
+@dataclass
+class LegacyVideo:
+    """Video as it was before slots (instance __dict__ per object)"""
+    id: Optional[int]
+    video_id: str
+    title: str
+    channel_name: str
+    channel_id: str
+    publish_date: str
+    thumbnail_url: str
+    video_url: str
+    matched_keyword: str
+    status: str
+    priority: str
+    artist_id: Optional[int]
+    auto_flagged: bool
+    ai_risk_score: int
+    ai_risk_level: Optional[str]
+    ai_reason: Optional[str]
+    created_at: str
+
+
+def seed(count):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE videos ({', '.join(Database.VIDEO_COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO videos VALUES ({', '.join('?' * len(Database.VIDEO_COLUMNS))})",
+        ((i, f"bench{i}", f"Artist - Song {i} (Official Audio)", f"channel {i % 97}",
+          f"UC{i % 97:022d}", '2024-01-01T00:00:00Z', f"https://i.ytimg.com/vi/bench{i}/mqdefault.jpg",
+          f"https://www.youtube.com/watch?v=bench{i}", 'artist', 'Pending', 'Medium', 1,
+          i % 7 == 0, i % 100, 'medium', 'Unofficial upload', '2024-01-01T00:00:00')
+         for i in range(count)))
+    return conn
+
+
+def legacy_read(conn):
+    conn.row_factory = sqlite3.Row
+    return [LegacyVideo(
+        id=row['id'], video_id=row['video_id'], title=row['title'],
+        channel_name=row['channel_name'], channel_id=row['channel_id'],
+        publish_date=row['publish_date'], thumbnail_url=row['thumbnail_url'],
+        video_url=row['video_url'], matched_keyword=row['matched_keyword'],
+        status=row['status'], priority=row['priority'], artist_id=row['artist_id'],
+        auto_flagged=bool(row['auto_flagged']), ai_risk_score=row['ai_risk_score'],
+        ai_risk_level=row['ai_risk_level'], ai_reason=row['ai_reason'],
+        created_at=row['created_at']
+    ) for row in conn.execute("SELECT * FROM videos").fetchall()]
+
+
+def slotted_read(conn):
+    conn.row_factory = video_row_factory
+    return conn.execute(f"SELECT {', '.join(Database.VIDEO_COLUMNS)} FROM videos").fetchall()
+
+
+def instance_bytes(model):
+    """Size of the object itself (plus its __dict__, if any), excluding field values"""
+    size = sys.getsizeof(model)
+    if hasattr(model, '__dict__'):
+        size += sys.getsizeof(model.__dict__)
+    return size
+
+
+def measure(fn, conn):
+    gc.collect()
+    tracemalloc.start()
+    models = fn(conn)
+    per_object = instance_bytes(models[0])
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Time without tracemalloc overhead
+    del models
+    gc.collect()
+    start = time.perf_counter()
+    models = fn(conn)
+    seconds = time.perf_counter() - start
+    del models
+    return seconds, held, peak, per_object
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Model construction benchmark')
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    conn = seed(args.rows)
+    print(f"Bulk read of {args.rows} videos")
+    print(f"  {'path':<28}{'time ms':>10}{'held MB':>10}{'peak MB':>10}{'B/object':>10}{'instance B':>12}")
+    for name, fn in (('Row lookups + dataclass', legacy_read),
+                     ('tuple factory + __slots__', slotted_read)):
+        seconds, held, peak, per_object = measure(fn, conn)
+        print(f"  {name:<28}{seconds * 1000:>10.0f}{held / 1e6:>10.1f}{peak / 1e6:>10.1f}"
+              f"{held / args.rows:>10.0f}{per_object:>12}")
+
+
+if __name__ == '__main__':
+    main()
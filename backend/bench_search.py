@@ -0,0 +1,86 @@
+"""
+Video search benchmark
+Compares /api/videos?q= served by the videos_fts FTS5 index with the LIKE
+scan used when FTS5 is unavailable.
+
+Usage:
+    python bench_search.py [--videos 200000] [--runs 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from database_enhanced import Database
+from models import Video
+
+WORDS = ['leak', 'leaked', 'snippet', 'unreleased', 'official', 'audio', 'video', 'remix', 'live',
+         'demo', 'session', 'cover', 'lyrics', 'slowed', 'reverb', 'acoustic', 'instrumental']
+ARTISTS = ['drake', 'taylor swift', 'kendrick lamar', 'sza', 'the weeknd', 'bad bunny', 'olivia rodrigo']
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'sol', 'tu', 'vex', 'da', 'nor', 'qui', 'zel', 'bra', 'fen', 'gol']
+
+QUERIES = [
+    ('track name', 'kalomi'),
+    ('artist + track', 'drake kalomi'),
+    ('prefix', 'kalo*'),
+    ('phrase', '"official audio"'),
+    ('common word', 'leaked'),
+]
+
+
+def seed(db, count):
+    rng = random.Random(7)
+    videos = []
+    for i in range(count):
+        artist = rng.choice(ARTISTS)
+        track = ''.join(rng.choice(SYLLABLES) for _ in range(3))
+        title = f"{artist.title()} - {track.title()} ({' '.join(rng.sample(WORDS, 2))})"
+        videos.append(Video(
+            id=None, video_id=f"bench{i}", title=title, channel_name=f"channel {i % 211}",
+            channel_id=f"UC{i % 211:022d}", publish_date='2024-01-01T00:00:00Z',
+            thumbnail_url='', video_url=f"https://www.youtube.com/watch?v=bench{i}",
+            matched_keyword=artist, status='Pending', priority='Medium', artist_id=None,
+            auto_flagged=False, ai_risk_score=0, ai_risk_level=None, ai_reason=None,
+            created_at='2024-01-01T00:00:00'
+        ))
+    db.add_videos(videos)
+
+
+def timed(db, q, runs):
+    times, count = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = len(db.get_video_table({'q': q})[1])
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Video search benchmark')
+    parser.add_argument('--videos', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    db = Database(os.path.join(tempfile.mkdtemp(), 'bench_search.db'))
+    start = time.perf_counter()
+    seed(db, args.videos)
+    print(f"Seeded {args.videos} videos (index maintained by triggers) in {time.perf_counter() - start:.1f}s")
+
+    print(f"/api/videos?q= over {args.videos} videos (median of {args.runs})")
+    print(f"  {'query':<34}{'rows':>8}{'LIKE ms':>10}{'FTS5 ms':>10}{'speedup':>9}")
+    for name, q in QUERIES:
+        db.fts_enabled = False
+        like_seconds, like_count = timed(db, q.strip('*'), args.runs)
+        db.fts_enabled = True
+        fts_seconds, fts_count = timed(db, q, args.runs)
+        label = f"{name}: {q}"
+        print(f"  {label:<34}{fts_count:>8}{like_seconds * 1000:>10.1f}{fts_seconds * 1000:>10.1f}"
+              f"{like_seconds / fts_seconds:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
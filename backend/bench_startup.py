@@ -0,0 +1,81 @@
+"""
+Startup-time benchmark
+Measures cold start of the backend in fresh interpreters:
+  - import: `import app` (builds the Flask app via create_app)
+  - first request: GET /api/health through the test client
+  - eager: building every service up front (what import used to do)
+
+Usage:
+    python bench_startup.py [--runs 5] [--videos 20000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD = r"""
+import json, os, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/health')
+first_request = time.perf_counter()
+app.services.warm_up()
+warmed = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'first_request': first_request - imported,
+    'eager': warmed - first_request,
+    'init_seconds': app.services.init_times
+}))
+"""
+
+
+def seed(db_path, count):
+    """Fill a database so migrations, backfills and the known-videos filter have work to do"""
+    from database_enhanced import Database
+    from models import Video
+
+    db = Database(db_path)
+    db.add_videos([Video(
+        id=None, video_id=f"bench{i}", title=f"Artist Song {i % 500} leaked full album",
+        channel_name=f"channel {i % 97}", channel_id=f"UC{i % 97}", publish_date='2024-01-01',
+        thumbnail_url='', video_url=f"https://www.youtube.com/watch?v=bench{i}",
+        matched_keyword='artist', status='Pending', priority='Medium', artist_id=None,
+        auto_flagged=False, ai_risk_score=i % 100, created_at='2024-01-01'
+    ) for i in range(count)])
+
+
+def run_once(db_path):
+    env = dict(os.environ, DATABASE_PATH=db_path, SPOTIFY_CLIENT_ID='', SPOTIFY_CLIENT_SECRET='')
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, capture_output=True,
+                            text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup-time benchmark')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--videos', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_startup.db')
+    seed(db_path, args.videos)
+    run_once(db_path)  # first run pays the one-off n-gram backfill
+
+    runs = [run_once(db_path) for _ in range(args.runs)]
+
+    print(f"Startup benchmark ({args.runs} runs, {args.videos} videos)")
+    for key in ('import', 'first_request', 'eager'):
+        values = [r[key] * 1000 for r in runs]
+        print(f"  {key:<14} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    print(f"  service init (last run): {runs[-1]['init_seconds']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,32 +1,189 @@
+import codecs
 import csv
 import io
-from typing import List, Dict
-from openpyxl import load_workbook
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+# Rows handed to the bulk DB writer at a time
+IMPORT_CHUNK_SIZE = 5000
+
+# Duplicates/errors listed in an import result (counts stay exact)
+MAX_REPORTED_ROWS = 1000
+
+# (BOM, codec) - the -sig/utf-16 codecs strip the BOM themselves
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """Encoding of an upload from its first bytes: BOM, else UTF-8 if it decodes, else cp1252 (Excel on Windows)"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # final=False: a multi-byte character cut at the end of the sample is fine
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def iter_text_lines(stream: BinaryIO, chunk_size: int = 1 << 16, sample_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Decode a binary upload stream into lines, one chunk at a time
+
+    The encoding is sniffed from the first sample_size bytes. Lines keep their
+    newline, as csv.reader expects (quoted fields may span lines). Bytes that do
+    not decode in the sniffed encoding are replaced, not fatal.
+    """
+    chunk = stream.read(sample_size)
+    decoder = codecs.getincrementaldecoder(sniff_encoding(chunk))(errors='replace')
+    pending = ''
+
+    while chunk:
+        pending += decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+        chunk = stream.read(chunk_size)
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(source: Union[str, BinaryIO, Iterable[str]]) -> Iterator[Dict[str, str]]:
+    """CSV rows as dicts from text, an iterable of lines or a binary stream"""
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    elif hasattr(source, 'read') and not isinstance(source, io.TextIOBase):
+        source = iter_text_lines(source)
+    return csv.DictReader(source)
+
+
+def iter_excel_rows(source) -> Iterator[Dict[str, str]]:
+    """
+    Rows of the active sheet as dicts keyed by the header row (path or binary stream)
+
+    Read-only mode streams the sheet XML instead of building the whole workbook.
+    Empty cells become ''; other values are stringified.
+    """
+    from openpyxl import load_workbook  # heavy import, only needed for Excel uploads
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = [str(value).strip() if value is not None else '' for value in next(rows, ())]
+        for values in rows:
+            # Read-only rows stop at their last non-empty cell
+            values = tuple(values) + (None,) * (len(headers) - len(values))
+            yield {
+                header: ('' if value is None else str(value))
+                for header, value in zip(headers, values) if header
+            }
+    finally:
+        wb.close()
+
+
+def iter_table_rows(stream: BinaryIO, filename: str) -> Iterator[Dict[str, str]]:
+    """CSV or XLSX upload rows by file extension (ValueError for anything else)"""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return iter_csv_rows(stream)
+    if name.endswith('.xlsx'):
+        return iter_excel_rows(stream)
+    raise ValueError('Invalid file format. Use CSV or XLSX')
+
+
+def chunked(items: Iterable, size: int = IMPORT_CHUNK_SIZE) -> Iterator[List]:
+    """Lists of up to `size` items, consuming `items` lazily"""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def merge_import_results(total: Dict, result: Dict) -> Dict:
+    """Add one chunk's bulk_add_* result to the running total (listed rows capped at MAX_REPORTED_ROWS)"""
+    total['added'] = total.get('added', 0) + result['added']
+    total['skipped'] = total.get('skipped', 0) + result['skipped']
+    for key in ('duplicates', 'errors'):
+        listed = total.setdefault(key, [])
+        listed.extend(result.get(key, [])[:MAX_REPORTED_ROWS - len(listed)])
+    return total
+
+
+def import_rows(rows: Iterable[Dict], prepare: Callable[[Dict], Optional[Dict]],
+                write: Callable[[List[Dict]], Dict], size: int = IMPORT_CHUNK_SIZE) -> Dict:
+    """
+    Import upload rows chunk by chunk; each chunk is written (and committed) by write()
+
+    prepare(row) returns the dict to write or None to skip the row; a ValueError
+    (bad number, bad field) lists the row in errors and the import goes on. Rows
+    are numbered as in the spreadsheet (the header is row 1).
+
+    Earlier chunks are committed, so a failure partway (an unreadable row in the
+    upload, a failed write) does not raise: the totals so far come back with
+    'error' set and 'partial': True.
+    """
+    result = {'added': 0, 'skipped': 0, 'duplicates': [], 'errors': []}
+    row_number = 1
+    imported_through = 1
+    try:
+        for chunk in chunked(rows, size):
+            prepared = []
+            for row in chunk:
+                row_number += 1
+                try:
+                    item = prepare(row)
+                except ValueError as e:
+                    merge_import_results(result, {'added': 0, 'skipped': 0, 'errors': [f"row {row_number}: {e}"]})
+                    continue
+                if item is not None:
+                    prepared.append(item)
+            if prepared:
+                merge_import_results(result, write(prepared))
+            imported_through = row_number
+    except Exception as e:
+        result['partial'] = True
+        result['error'] = (f"Import stopped after row {imported_through}: {str(e)}. Rows up to there were "
+                           f"imported ({result['added']} added, {result['skipped']} skipped)")
+    return result
+
 
 class BulkImporter:
     """Utility for bulk importing keywords and artists"""
     
+    @staticmethod
+    def keyword_from_row(row: Dict) -> Dict:
+        """Keyword import fields from a CSV/XLSX row (keyword is '' when missing)"""
+        return {
+            'keyword': (row.get('keyword') or '').strip(),
+            'artist_name': (row.get('artist_name') or '').strip(),
+            'auto_flag': (row.get('auto_flag') or 'false').lower() in ['true', '1', 'yes'],
+            'priority': (row.get('priority') or 'Medium').strip()
+        }
+    
+    @staticmethod
+    def iter_keywords(rows: Iterable[Dict]) -> Iterator[Dict]:
+        """Keywords from CSV/XLSX rows, skipping rows without a keyword"""
+        for row in rows:
+            keyword_data = BulkImporter.keyword_from_row(row)
+            if keyword_data['keyword']:  # Only add if keyword is not empty
+                yield keyword_data
+    
     @staticmethod
     def parse_csv(file_content: str) -> List[Dict]:
         """
         Parse CSV file for keyword import
         Expected format: keyword,artist_name,auto_flag,priority
         """
-        keywords = []
-        reader = csv.DictReader(io.StringIO(file_content))
-        
-        for row in reader:
-            keyword_data = {
-                'keyword': row.get('keyword', '').strip(),
-                'artist_name': row.get('artist_name', '').strip(),
-                'auto_flag': row.get('auto_flag', 'false').lower() in ['true', '1', 'yes'],
-                'priority': row.get('priority', 'Medium').strip()
-            }
-            
-            if keyword_data['keyword']:  # Only add if keyword is not empty
-                keywords.append(keyword_data)
-        
-        return keywords
+        return list(BulkImporter.iter_keywords(iter_csv_rows(file_content)))
     
     @staticmethod
     def parse_excel(file_path: str) -> List[Dict]:
@@ -34,28 +191,7 @@ class BulkImporter:
         Parse Excel file for keyword import
         Expected columns: keyword, artist_name, auto_flag, priority
         """
-        keywords = []
-        wb = load_workbook(file_path)
-        ws = wb.active
-        
-        # Get headers from first row
-        headers = [cell.value for cell in ws[1]]
-        
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            keyword_data = {}
-            for idx, header in enumerate(headers):
-                if idx < len(row):
-                    keyword_data[header] = row[idx]
-            
-            if keyword_data.get('keyword'):
-                keywords.append({
-                    'keyword': str(keyword_data.get('keyword', '')).strip(),
-                    'artist_name': str(keyword_data.get('artist_name', '')).strip(),
-                    'auto_flag': str(keyword_data.get('auto_flag', 'false')).lower() in ['true', '1', 'yes'],
-                    'priority': str(keyword_data.get('priority', 'Medium')).strip()
-                })
-        
-        return keywords
+        return list(BulkImporter.iter_keywords(iter_excel_rows(file_path)))
     
     @staticmethod
     def generate_template_csv() -> str:
@@ -0,0 +1,385 @@
+"""
+Channel Registry
+Per-channel aggregates and cached channel-level detector verdicts
+
+The channels table holds one row per YouTube channel_id with counters
+(total/flagged videos, risk sum, first/last seen) that are updated
+incrementally from Database change events, so repeat-offender rankings are
+an indexed lookup instead of a scan over videos.
+
+It also caches MusicDetector.analyze_channel() per channel (keyed by the
+channel name and the detector's channel_rules_version), so the ingest
+pipeline checks channel trust/suspicion once per channel, not once per video.
+
+Watch list: channels with at least watch_threshold flagged uploads (or a
+manual override) are polled through their uploads playlist, 1 quota unit per
+page instead of 100 per search; last_seen_* is the incremental cursor.
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class ChannelRegistry:
+    """
+    Channel counters + verdict cache (a Database listener)
+
+    Usage:
+        channels = ChannelRegistry(db, detector)
+        db.add_listener(channels)
+        channels.verdicts_for(videos)        # {channel_id: analyze_channel() result}
+        channels.top_offenders(limit=20)
+        channels.watch_list()                # channels due for an uploads poll
+    """
+
+    FLAGGED_STATUS = 'Flagged for Takedown'
+
+    # /api/channels sort keys -> ORDER BY clause
+    ORDERINGS = {
+        'flagged': 'flagged_videos DESC, total_videos DESC',
+        'total': 'total_videos DESC, flagged_videos DESC',
+        'avg_risk': 'risk_sum * 1.0 / total_videos DESC, total_videos DESC',
+        'flagged_ratio': 'flagged_videos * 1.0 / total_videos DESC, flagged_videos DESC',
+        'last_seen': 'last_seen DESC',
+    }
+
+    def __init__(self, database, detector=None, watch_threshold: int = 3):
+        self.db = database
+        self.detector = detector
+        self.watch_threshold = watch_threshold
+        self.backfilled = False
+        self.ensure_counters()
+
+    # =========================================================================
+    # COUNTERS
+    # =========================================================================
+
+    def ensure_counters(self):
+        """Backfill the counters for databases that have videos but no channel rows"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM channels WHERE total_videos > 0 LIMIT 1")
+        counters_empty = cursor.fetchone() is None
+        cursor.execute("SELECT 1 FROM videos LIMIT 1")
+        has_videos = cursor.fetchone() is not None
+        conn.close()
+
+        if counters_empty and has_videos:
+            self.rebuild_counters()
+            self.backfilled = True
+
+    def rebuild_counters(self) -> int:
+        """
+        Recompute every channel's counters from the videos table (cached verdicts are kept)
+
+        Returns:
+            Number of channels
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE channels SET total_videos = 0, flagged_videos = 0, risk_sum = 0")
+        cursor.execute("""
+            INSERT INTO channels (channel_id, channel_name, total_videos, flagged_videos, risk_sum,
+                                  first_seen, last_seen)
+            SELECT channel_id, MAX(channel_name), COUNT(*),
+                   SUM(CASE WHEN status = ? THEN 1 ELSE 0 END),
+                   SUM(COALESCE(ai_risk_score, 0)), MIN(created_at), MAX(created_at)
+            FROM videos GROUP BY channel_id
+            ON CONFLICT(channel_id) DO UPDATE SET
+                channel_name = excluded.channel_name,
+                total_videos = excluded.total_videos,
+                flagged_videos = excluded.flagged_videos,
+                risk_sum = excluded.risk_sum,
+                first_seen = excluded.first_seen,
+                last_seen = excluded.last_seen
+        """, (self.FLAGGED_STATUS,))
+        cursor.execute("DELETE FROM channels WHERE total_videos <= 0 AND watch_override IS NULL")
+        cursor.execute("SELECT COUNT(*) FROM channels")
+        count = cursor.fetchone()[0]
+        conn.commit()
+        conn.close()
+
+        return count
+
+    def count_videos(self, rows: List[Dict], sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) videos from their channels' counters
+
+        Args:
+            rows: dicts with channel_id, channel_name, ai_risk_score, status, created_at
+        """
+        deltas = {}
+        for row in rows:
+            if not row.get('channel_id'):
+                continue
+            delta = deltas.setdefault(row['channel_id'], {
+                'channel_name': row.get('channel_name') or '',
+                'total': 0, 'flagged': 0, 'risk': 0, 'first': None, 'last': None
+            })
+            delta['total'] += 1
+            delta['flagged'] += 1 if row.get('status') == self.FLAGGED_STATUS else 0
+            delta['risk'] += row.get('ai_risk_score') or 0
+            seen = row.get('created_at') or datetime.now().isoformat()
+            delta['first'] = min(delta['first'] or seen, seen)
+            delta['last'] = max(delta['last'] or seen, seen)
+
+        if not deltas:
+            return
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        if sign > 0:
+            cursor.executemany("""
+                INSERT INTO channels (channel_id, channel_name, total_videos, flagged_videos, risk_sum,
+                                      first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(channel_id) DO UPDATE SET
+                    channel_name = excluded.channel_name,
+                    total_videos = channels.total_videos + excluded.total_videos,
+                    flagged_videos = channels.flagged_videos + excluded.flagged_videos,
+                    risk_sum = channels.risk_sum + excluded.risk_sum,
+                    first_seen = CASE WHEN channels.first_seen IS NULL OR excluded.first_seen < channels.first_seen
+                                      THEN excluded.first_seen ELSE channels.first_seen END,
+                    last_seen = CASE WHEN channels.last_seen IS NULL OR excluded.last_seen > channels.last_seen
+                                     THEN excluded.last_seen ELSE channels.last_seen END
+            """, [(channel_id, d['channel_name'], d['total'], d['flagged'], d['risk'], d['first'], d['last'])
+                  for channel_id, d in deltas.items()])
+        else:
+            # first_seen/last_seen are history and are left as they were
+            cursor.executemany("""
+                UPDATE channels
+                SET total_videos = total_videos - ?, flagged_videos = flagged_videos - ?, risk_sum = risk_sum - ?
+                WHERE channel_id = ?
+            """, [(d['total'], d['flagged'], d['risk'], channel_id) for channel_id, d in deltas.items()])
+            cursor.executemany("""
+                DELETE FROM channels WHERE channel_id = ? AND total_videos <= 0 AND watch_override IS NULL
+            """, [(channel_id,) for channel_id in deltas])
+
+        conn.commit()
+        conn.close()
+
+    # Database listener hooks (see Database.add_listener)
+    def on_videos_added(self, rows: List[Dict]):
+        self.count_videos(rows)
+
+    def on_videos_changed(self, before: List[Dict], after: List[Dict]):
+        # Only recount rows whose flagged state or risk score actually changed
+        after_by_id = {row['id']: row for row in after}
+        changed_before = []
+        changed_after = []
+        for row in before:
+            new_row = after_by_id.get(row['id'])
+            if new_row and (new_row['status'] != row['status']
+                            or new_row['ai_risk_score'] != row['ai_risk_score']):
+                changed_before.append(row)
+                changed_after.append(new_row)
+
+        if changed_before:
+            self.count_videos(changed_before, sign=-1)
+            self.count_videos(changed_after)
+
+    def on_videos_removed(self, rows: List[Dict]):
+        self.count_videos(rows, sign=-1)
+
+    def on_videos_cleared(self):
+        conn = self.db.get_connection()
+        conn.execute("DELETE FROM channels")
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # VERDICT CACHE
+    # =========================================================================
+
+    def verdicts_for(self, videos: List) -> Dict[str, Dict]:
+        """
+        Channel verdicts for a batch of videos: {channel_id: analyze_channel() result}
+        One query for the cached verdicts; only new/renamed channels (or a changed
+        detector rule set) run the channel patterns.
+        """
+        if self.detector is None:
+            return {}
+
+        names = {}
+        for video in videos:
+            if video.channel_id:
+                names.setdefault(video.channel_id, video.channel_name or '')
+        if not names:
+            return {}
+
+        version = self.detector.channel_rules_version()
+        verdicts = {}
+        ids = list(names)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"""
+                SELECT channel_id, channel_name, verdict FROM channels
+                WHERE channel_id IN ({placeholders}) AND verdict_version = ?
+            """, chunk + [version])
+            for row in cursor.fetchall():
+                if row['channel_name'] == names[row['channel_id']]:
+                    verdicts[row['channel_id']] = json.loads(row['verdict'])
+
+        missing = [(channel_id, name) for channel_id, name in names.items() if channel_id not in verdicts]
+        for channel_id, name in missing:
+            verdicts[channel_id] = self.detector.analyze_channel(name)
+
+        if missing:
+            cursor.executemany("""
+                INSERT INTO channels (channel_id, channel_name, trusted, channel_risk_score, verdict, verdict_version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(channel_id) DO UPDATE SET
+                    channel_name = excluded.channel_name,
+                    trusted = excluded.trusted,
+                    channel_risk_score = excluded.channel_risk_score,
+                    verdict = excluded.verdict,
+                    verdict_version = excluded.verdict_version
+            """, [(channel_id, name, int(verdicts[channel_id]['trusted']), verdicts[channel_id]['risk_score'],
+                   json.dumps(verdicts[channel_id]), version) for channel_id, name in missing])
+            conn.commit()
+        conn.close()
+
+        return verdicts
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def top_offenders(self, limit: int = 50, order: str = 'flagged', min_videos: int = 1,
+                      include_trusted: bool = False) -> List[Dict]:
+        """Channels ranked by flagged uploads (or another ORDERINGS key)"""
+        query = "SELECT * FROM channels WHERE total_videos >= ?"
+        params = [max(min_videos, 1)]
+        if not include_trusted:
+            query += " AND trusted = 0"
+        query += f" ORDER BY {self.ORDERINGS.get(order, self.ORDERINGS['flagged'])} LIMIT ?"
+        params.append(limit)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [self._to_dict(row) for row in rows]
+
+    def get_channel(self, channel_id: str) -> Optional[Dict]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM channels WHERE channel_id = ?", (channel_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return self._to_dict(row) if row else None
+
+    # =========================================================================
+    # WATCH LIST
+    # =========================================================================
+
+    def _watched_sql(self) -> str:
+        """SQL condition for watched channels (override wins, otherwise the flagged threshold)"""
+        return (f"(watch_override = 1 OR (watch_override IS NULL AND trusted = 0 "
+                f"AND flagged_videos >= {int(self.watch_threshold)}))")
+
+    def watch_list(self, limit: int = None, min_interval_hours: float = 0) -> List[Dict]:
+        """
+        Watched channels, least recently polled first
+        min_interval_hours skips channels polled more recently than that
+        """
+        query = f"SELECT * FROM channels WHERE {self._watched_sql()}"
+        params = []
+        if min_interval_hours:
+            cutoff = datetime.fromtimestamp(datetime.now().timestamp() - min_interval_hours * 3600)
+            query += " AND (last_polled_at IS NULL OR last_polled_at <= ?)"
+            params.append(cutoff.isoformat())
+        query += " ORDER BY last_polled_at IS NOT NULL, last_polled_at, flagged_videos DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def poll_pages(channel: Dict, max_pages: int) -> int:
+        """Pages (1 quota unit each) a poll may read: a newly watched channel only reads its latest page"""
+        return max_pages if channel['last_seen_video_id'] else 1
+
+    @classmethod
+    def fit_quota(cls, channels: List[Dict], budget: int, max_pages: int) -> Tuple[List[Dict], List[Dict]]:
+        """
+        (channels to poll, deferred ones) so that the polled channels' worst case
+        (poll_pages each) stays within budget; watch-list order is kept
+        """
+        polled, deferred = [], []
+        for channel in channels:
+            cost = cls.poll_pages(channel, max_pages)
+            if cost <= budget:
+                polled.append(channel)
+                budget -= cost
+            else:
+                deferred.append(channel)
+        return polled, deferred
+
+    def set_watch(self, channel_id: str, watched: Optional[bool]) -> bool:
+        """Force a channel on (True) or off (False) the watch list; None returns it to the threshold"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE channels SET watch_override = ? WHERE channel_id = ?",
+                       (None if watched is None else int(watched), channel_id))
+        conn.commit()
+        success = cursor.rowcount > 0
+        conn.close()
+
+        return success
+
+    def record_poll(self, channel_id: str, cursor_item: Optional[Dict]):
+        """Store the poll time and, when the poll saw new items, the newest one as the cursor"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        now = datetime.now().isoformat()
+        if cursor_item:
+            cursor.execute("""
+                UPDATE channels SET last_polled_at = ?, last_seen_video_id = ?, last_seen_published = ?
+                WHERE channel_id = ?
+            """, (now, cursor_item['video_id'], cursor_item['published'], channel_id))
+        else:
+            cursor.execute("UPDATE channels SET last_polled_at = ? WHERE channel_id = ?", (now, channel_id))
+        conn.commit()
+        conn.close()
+
+    def _to_dict(self, row) -> Dict:
+        total = row['total_videos'] or 0
+        verdict = json.loads(row['verdict']) if row['verdict'] else None
+        return {
+            'channel_id': row['channel_id'],
+            'channel_name': row['channel_name'],
+            'total_videos': total,
+            'flagged_videos': row['flagged_videos'] or 0,
+            'flagged_ratio': round((row['flagged_videos'] or 0) / total, 3) if total else 0,
+            'avg_risk_score': round((row['risk_sum'] or 0) / total, 1) if total else 0,
+            'first_seen': row['first_seen'],
+            'last_seen': row['last_seen'],
+            'trusted': bool(row['trusted']),
+            'channel_risk_score': row['channel_risk_score'] or 0,
+            'channel_indicators': (verdict['high_risk'] + verdict['medium_risk']
+                                   + (['Suspicious channel name pattern'] if verdict['suspicious'] else []))
+                                  if verdict else [],
+            'watched': bool(row['watch_override']) if row['watch_override'] is not None
+                       else (not row['trusted'] and (row['flagged_videos'] or 0) >= self.watch_threshold),
+            'watch_override': None if row['watch_override'] is None else bool(row['watch_override']),
+            'last_polled_at': row['last_polled_at'],
+            'last_seen_video_id': row['last_seen_video_id'],
+            'last_seen_published': row['last_seen_published']
+        }
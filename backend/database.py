@@ -15,7 +15,12 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
-    
+
+    def table_columns(self, cursor, table: str) -> List[str]:
+        """Column names of `table` (same helper as database_enhanced.Database)"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in cursor.fetchall()]
+
     def init_db(self):
         conn = self.get_connection()
         cursor = conn.cursor()
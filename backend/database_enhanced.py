@@ -1,24 +1,153 @@
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
 from typing import List, Optional
-from models import Video, Keyword, SearchLog, Artist, AutoFlagRule, Song
+from models import (Video, Keyword, SearchLog, Artist, AutoFlagRule, Song,
+                    video_row_factory, keyword_row_factory, song_row_factory)
 import os
 import json
+import re
+
+
+def timed(tag: str):
+    """Method decorator: add each call's wall time to the database's query timings under `tag`"""
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._record_timing(tag, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
 
 class Database:
+    # SQL dialect of get_connection() (see storage.py for the interface other backends implement)
+    dialect = 'sqlite'
+    IntegrityError = sqlite3.IntegrityError
+    
+    # Columns handed to video listeners (enough to maintain derived indexes)
+    VIDEO_LISTENER_COLUMNS = ("id, video_id, title, channel_name, channel_id, artist_id, ai_risk_score, status, "
+                              "created_at")
+    
+    # Listing columns in to_dict() order, for the tuple-based fast path (get_*_table)
+    VIDEO_COLUMNS = ('id', 'video_id', 'title', 'channel_name', 'channel_id', 'publish_date',
+                     'thumbnail_url', 'video_url', 'matched_keyword', 'status', 'priority',
+                     'artist_id', 'auto_flagged', 'ai_risk_score', 'ai_risk_level', 'ai_reason',
+                     'created_at')
+    KEYWORD_COLUMNS = ('id', 'keyword', 'active', 'artist_id', 'auto_flag', 'priority', 'created_at')
+    SONG_COLUMNS = ('id', 'song_name', 'artist_name', 'active', 'artist_id', 'auto_flag',
+                    'priority', 'created_at', 'duration_ms')
+    
+    # Full-text search (videos_fts): indexed columns and their bm25 weights
+    VIDEO_SEARCH_COLUMNS = ('title', 'channel_name', 'matched_keyword')
+    VIDEO_SEARCH_WEIGHTS = (10.0, 2.0, 1.0)
+    
+    # search_logs rows aggregated into search_log_daily rows (rollup and the daily view)
+    SEARCH_LOG_DAILY_COLUMNS = ('day', 'keyword', 'artist_id', 'runs', 'successes', 'errors', 'results',
+                                'measured_runs', 'new_count', 'flagged_count', 'last_timestamp')
+    SEARCH_LOG_DAILY_SELECT = '''
+        SELECT substr(timestamp, 1, 10), keyword, COALESCE(artist_id, 0), COUNT(*),
+               SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END), SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END),
+               SUM(COALESCE(results_count, 0)),
+               SUM(CASE WHEN success = 1 AND flagged_count IS NOT NULL THEN 1 ELSE 0 END),
+               SUM(CASE WHEN success = 1 THEN COALESCE(new_count, 0) ELSE 0 END),
+               SUM(CASE WHEN success = 1 THEN COALESCE(flagged_count, 0) ELSE 0 END),
+               MAX(timestamp)
+        FROM search_logs
+    '''
+    
     def __init__(self, db_path: str = "videos.db"):
         self.db_path = db_path
+        self.listeners = []
+        self.query_timings = {}
+        self._timings_lock = threading.Lock()
+        self.fts_enabled = False
         self.init_db()
         self.migrate_db()
+        self.ensure_video_search_index()
     
-    def get_connection(self):
+    def get_connection(self, row_factory=sqlite3.Row):
+        """New connection; rows are sqlite3.Row unless another factory (or None for tuples) is given"""
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        conn.row_factory = row_factory
         return conn
     
+    def create_trigger(self, cursor, name: str, table: str, event: str, body: str):
+        """
+        Create (if missing) a row trigger running `body` (';'-separated statements,
+        new./old. row references) AFTER `event` ('INSERT', 'UPDATE', 'DELETE') on `table`
+        """
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN {body}; END")
+    
+    def table_columns(self, cursor, table: str) -> List[str]:
+        """Column names of `table` (empty if the table does not exist)"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in cursor.fetchall()]
+    
+    # Change listeners
+    def add_listener(self, listener):
+        """
+        Register an object that keeps derived data in sync with the videos table.
+        
+        Listeners may implement any of:
+            on_videos_added(rows), on_videos_changed(before_rows, after_rows),
+            on_videos_removed(rows), on_videos_cleared()
+        Each row is a dict with the VIDEO_LISTENER_COLUMNS keys.
+        """
+        self.listeners.append(listener)
+    
+    def _notify(self, event: str, *args):
+        """Call `event` on every listener; a failing listener never breaks the write"""
+        for listener in self.listeners:
+            handler = getattr(listener, event, None)
+            if handler is None:
+                continue
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Listener {type(listener).__name__}.{event} failed: {str(e)}")
+    
+    def _record_timing(self, tag: str, seconds: float):
+        with self._timings_lock:
+            entry = self.query_timings.get(tag)
+            if entry is None:
+                entry = self.query_timings[tag] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+    
+    def get_query_timings(self) -> dict:
+        """{tag: {calls, seconds, max_seconds}} for the @timed methods called so far"""
+        with self._timings_lock:
+            return {tag: dict(entry) for tag, entry in self.query_timings.items()}
+    
+    def _fetch_video_rows(self, cursor, video_ids: List[int]) -> List[dict]:
+        """Fetch listener rows for the given video primary keys"""
+        rows = []
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT {self.VIDEO_LISTENER_COLUMNS} FROM videos WHERE id IN ({placeholders})",
+                chunk
+            )
+            rows.extend(dict(row) for row in cursor.fetchall())
+        return rows
+    
     def init_db(self):
         conn = self.get_connection()
         cursor = conn.cursor()
+
+        # Free pages can be handed back with PRAGMA incremental_vacuum. Only takes effect
+        # on a new (empty) file; older files need the maintenance 'convert' task (admin only).
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Readers (and hot backups) see a snapshot and never block writers; persistent in the file
+        cursor.execute("PRAGMA journal_mode = WAL")
         
         # Artists table
         cursor.execute('''
@@ -112,10 +241,52 @@ class Database:
                 success BOOLEAN DEFAULT 1,
                 error_message TEXT,
                 artist_id INTEGER,
+                new_count INTEGER,
+                flagged_count INTEGER,
                 FOREIGN KEY (artist_id) REFERENCES artists(id)
             )
         ''')
         
+        # Channels registry (per-channel counters + cached detector verdict, see channels.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS channels (
+                channel_id TEXT PRIMARY KEY,
+                channel_name TEXT NOT NULL,
+                total_videos INTEGER DEFAULT 0,
+                flagged_videos INTEGER DEFAULT 0,
+                risk_sum INTEGER DEFAULT 0,
+                first_seen TEXT,
+                last_seen TEXT,
+                trusted BOOLEAN DEFAULT 0,
+                channel_risk_score INTEGER DEFAULT 0,
+                verdict TEXT,
+                verdict_version TEXT,
+                watch_override BOOLEAN,
+                last_polled_at TEXT,
+                last_seen_video_id TEXT,
+                last_seen_published TEXT
+            )
+        ''')
+        
+        # Daily per-keyword rollups of search logs past the retention window
+        # (artist_id 0 = not tied to an artist; measured_runs = runs that recorded new/flagged counts)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS search_log_daily (
+                day TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                artist_id INTEGER NOT NULL DEFAULT 0,
+                runs INTEGER NOT NULL DEFAULT 0,
+                successes INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                results INTEGER NOT NULL DEFAULT 0,
+                measured_runs INTEGER NOT NULL DEFAULT 0,
+                new_count INTEGER NOT NULL DEFAULT 0,
+                flagged_count INTEGER NOT NULL DEFAULT 0,
+                last_timestamp TEXT,
+                PRIMARY KEY (day, keyword, artist_id)
+            ) WITHOUT ROWID
+        ''')
+        
         # Email notifications queue
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS email_queue (
@@ -139,8 +310,7 @@ class Database:
         
         try:
             # Check if priority column exists in videos
-            cursor.execute("PRAGMA table_info(videos)")
-            columns = [row[1] for row in cursor.fetchall()]
+            columns = self.table_columns(cursor, 'videos')
             
             if 'priority' not in columns:
                 cursor.execute("ALTER TABLE videos ADD COLUMN priority TEXT DEFAULT 'Medium'")
@@ -156,16 +326,13 @@ class Database:
                 cursor.execute("ALTER TABLE videos ADD COLUMN ai_reason TEXT")
             
             # Check if songs table exists and add duration_ms if needed
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='songs'")
-            if cursor.fetchone():
-                cursor.execute("PRAGMA table_info(songs)")
-                song_columns = [row[1] for row in cursor.fetchall()]
+            song_columns = self.table_columns(cursor, 'songs')
+            if song_columns:
                 if 'duration_ms' not in song_columns:
                     cursor.execute("ALTER TABLE songs ADD COLUMN duration_ms INTEGER")
             
             # Check keywords table
-            cursor.execute("PRAGMA table_info(keywords)")
-            columns = [row[1] for row in cursor.fetchall()]
+            columns = self.table_columns(cursor, 'keywords')
             
             if 'artist_id' not in columns:
                 cursor.execute("ALTER TABLE keywords ADD COLUMN artist_id INTEGER")
@@ -175,11 +342,37 @@ class Database:
                 cursor.execute("ALTER TABLE keywords ADD COLUMN priority TEXT DEFAULT 'Medium'")
             
             # Check search_logs table
-            cursor.execute("PRAGMA table_info(search_logs)")
-            columns = [row[1] for row in cursor.fetchall()]
+            columns = self.table_columns(cursor, 'search_logs')
             
             if 'artist_id' not in columns:
                 cursor.execute("ALTER TABLE search_logs ADD COLUMN artist_id INTEGER")
+            # Outcome of the run (new / auto-flagged videos stored), used for quota planning
+            if 'new_count' not in columns:
+                cursor.execute("ALTER TABLE search_logs ADD COLUMN new_count INTEGER")
+            if 'flagged_count' not in columns:
+                cursor.execute("ALTER TABLE search_logs ADD COLUMN flagged_count INTEGER")
+            
+            # Channel watch-list columns (added after the channels table)
+            columns = self.table_columns(cursor, 'channels')
+            
+            if 'watch_override' not in columns:
+                cursor.execute("ALTER TABLE channels ADD COLUMN watch_override BOOLEAN")
+            if 'last_polled_at' not in columns:
+                cursor.execute("ALTER TABLE channels ADD COLUMN last_polled_at TEXT")
+            if 'last_seen_video_id' not in columns:
+                cursor.execute("ALTER TABLE channels ADD COLUMN last_seen_video_id TEXT")
+            if 'last_seen_published' not in columns:
+                cursor.execute("ALTER TABLE channels ADD COLUMN last_seen_published TEXT")
+            
+            # Indexes for grouped reports (keyword performance, per-artist filters)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_matched_keyword ON videos(matched_keyword)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_artist_keyword ON videos(artist_id, matched_keyword)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_channel_id ON videos(channel_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_channels_flagged ON channels(flagged_videos DESC)")
+            # Latest logs without sorting the table; rollups by keyword
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_logs_timestamp ON search_logs(timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_logs_artist_timestamp ON search_logs(artist_id, timestamp)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_log_daily_keyword ON search_log_daily(keyword, day)")
             
             conn.commit()
         except Exception as e:
@@ -187,6 +380,79 @@ class Database:
         finally:
             conn.close()
     
+    def ensure_video_search_index(self):
+        """
+        Create the videos_fts FTS5 index (external content over videos) and its sync triggers.
+        Existing databases are backfilled once, when the index is first created.
+        Without FTS5 support, q= searches fall back to a LIKE scan.
+        """
+        columns = ', '.join(self.VIDEO_SEARCH_COLUMNS)
+        new_values = ', '.join(f"new.{c}" for c in self.VIDEO_SEARCH_COLUMNS)
+        old_values = ', '.join(f"old.{c}" for c in self.VIDEO_SEARCH_COLUMNS)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos_fts'")
+            exists = cursor.fetchone() is not None
+            
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+                    {columns},
+                    content='videos', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+                    INSERT INTO videos_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE OF {columns} ON videos BEGIN
+                    INSERT INTO videos_fts (videos_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO videos_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                END
+            """)
+            
+            if not exists:
+                # Backfill rows written before the index existed
+                cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+            
+            conn.commit()
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def fts_match_expression(text: str) -> str:
+        """
+        Turn a search box string into a safe FTS5 MATCH expression.
+        Terms are ANDed; "quoted text" is a phrase and a trailing * makes a prefix query
+        (e.g. `drake leak*` or `"official audio" snippet`).
+        """
+        parts = []
+        for phrase, term in re.findall(r'"([^"]*)"|(\S+)', text or ''):
+            if phrase:
+                words = re.findall(r'\w+', phrase)
+                if words:
+                    parts.append('"' + ' '.join(words) + '"')
+            else:
+                words = [f'"{word}"' for word in re.findall(r'\w+', term)]
+                if words and term.endswith('*'):
+                    words[-1] += '*'
+                parts.extend(words)
+        return ' '.join(parts)
+    
     # Artist operations
     def add_artist(self, name: str, email: str = None, contact_person: str = None, notes: str = None) -> Optional[int]:
         conn = self.get_connection()
@@ -200,7 +466,7 @@ class Database:
             
             conn.commit()
             return cursor.lastrowid
-        except sqlite3.IntegrityError:
+        except self.IntegrityError:
             return None
         finally:
             conn.close()
@@ -293,35 +559,97 @@ class Database:
     
     # Enhanced video operations
     def add_video(self, video: Video) -> Optional[int]:
+        stored = self.add_videos([video])
+        return stored[0][1] if stored else None
+    
+    @timed('videos.insert')
+    def add_videos(self, videos: List[Video]) -> List[tuple]:
+        """
+        Insert videos in one transaction, skipping video_ids that already exist.
+        
+        Returns:
+            list of (video, row_id) for the videos actually inserted
+        """
+        if not videos:
+            return []
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        stored = []
         
         try:
-            cursor.execute('''
-                INSERT INTO videos (video_id, title, channel_name, channel_id, 
-                                  publish_date, thumbnail_url, video_url, 
-                                  matched_keyword, status, priority, artist_id, 
-                                  auto_flagged, ai_risk_score, ai_risk_level, ai_reason, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (video.video_id, video.title, video.channel_name, video.channel_id,
-                  video.publish_date, video.thumbnail_url, video.video_url,
-                  video.matched_keyword, video.status, video.priority, video.artist_id,
-                  int(video.auto_flagged), video.ai_risk_score, video.ai_risk_level, 
-                  video.ai_reason, video.created_at))
+            for video in videos:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO videos (video_id, title, channel_name, channel_id, 
+                                      publish_date, thumbnail_url, video_url, 
+                                      matched_keyword, status, priority, artist_id, 
+                                      auto_flagged, ai_risk_score, ai_risk_level, ai_reason, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (video.video_id, video.title, video.channel_name, video.channel_id,
+                      video.publish_date, video.thumbnail_url, video.video_url,
+                      video.matched_keyword, video.status, video.priority, video.artist_id,
+                      int(video.auto_flagged), video.ai_risk_score, video.ai_risk_level, 
+                      video.ai_reason, video.created_at))
+                if cursor.rowcount > 0:
+                    stored.append((video, cursor.lastrowid))
             
             conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            return None
         finally:
             conn.close()
+        
+        if stored:
+            self._notify('on_videos_added', [{
+                'id': row_id,
+                'video_id': video.video_id,
+                'title': video.title,
+                'channel_name': video.channel_name,
+                'channel_id': video.channel_id,
+                'artist_id': video.artist_id,
+                'ai_risk_score': video.ai_risk_score,
+                'status': video.status,
+                'created_at': video.created_at
+            } for video, row_id in stored])
+        return stored
     
-    def get_all_videos(self, filters: dict = None) -> List[Video]:
+    def get_existing_video_ids(self, video_ids: List[str]) -> set:
+        """Return the subset of YouTube video_ids that are already stored"""
+        existing = set()
+        if not video_ids:
+            return existing
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        for start in range(0, len(video_ids), 500):
+            chunk = video_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"SELECT video_id FROM videos WHERE video_id IN ({placeholders})", chunk)
+            existing.update(row['video_id'] for row in cursor.fetchall())
+        conn.close()
         
-        query = "SELECT * FROM videos WHERE 1=1"
+        return existing
+    
+    def _video_list_query(self, columns: str, filters: dict = None) -> tuple:
+        """
+        Build the filtered listing query for videos.
+        Ordered by priority then recency, or by bm25 relevance when filters has a `q` search.
+        """
+        filters = filters or {}
+        query = f"SELECT {columns} FROM videos"
         params = []
+        ranked = False
+        
+        match = self.fts_match_expression(filters.get('q')) if filters.get('q') else ''
+        if match and self.fts_enabled:
+            weights = ', '.join(str(w) for w in self.VIDEO_SEARCH_WEIGHTS)
+            query += f"""
+                JOIN (SELECT rowid AS fts_rowid, bm25(videos_fts, {weights}) AS fts_rank
+                      FROM videos_fts WHERE videos_fts MATCH ?) AS hits
+                ON hits.fts_rowid = videos.id"""
+            params.append(match)
+            ranked = True
+        query += " WHERE 1=1"
+        if match and not self.fts_enabled:
+            query, params = self._like_search_clause(query, params, filters['q'])
         
         if filters:
             if filters.get('keyword'):
@@ -336,6 +664,9 @@ class Database:
             if filters.get('artist_id'):
                 query += " AND artist_id = ?"
                 params.append(filters['artist_id'])
+            if filters.get('channel_id'):
+                query += " AND channel_id = ?"
+                params.append(filters['channel_id'])
             if filters.get('auto_flagged') is not None:
                 query += " AND auto_flagged = ?"
                 params.append(int(filters['auto_flagged']))
@@ -346,6 +677,10 @@ class Database:
                 query += " AND publish_date <= ?"
                 params.append(filters['date_to'])
         
+        if ranked:
+            query += " ORDER BY hits.fts_rank, created_at DESC"
+            return query, params
+        
         # Sort by priority first (Critical/High at top), then by creation date
         query += """ ORDER BY 
             CASE priority
@@ -357,55 +692,71 @@ class Database:
             END DESC,
             created_at DESC
         """
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        videos = []
-        for row in rows:
-            # Handle new AI columns that might not exist in older databases
-            try:
-                ai_risk_score = row['ai_risk_score'] if 'ai_risk_score' in row.keys() else 0
-                ai_risk_level = row['ai_risk_level'] if 'ai_risk_level' in row.keys() else None
-                ai_reason = row['ai_reason'] if 'ai_reason' in row.keys() else None
-            except (KeyError, IndexError):
-                ai_risk_score = 0
-                ai_risk_level = None
-                ai_reason = None
-            
-            videos.append(Video(
-                id=row['id'],
-                video_id=row['video_id'],
-                title=row['title'],
-                channel_name=row['channel_name'],
-                channel_id=row['channel_id'],
-                publish_date=row['publish_date'],
-                thumbnail_url=row['thumbnail_url'],
-                video_url=row['video_url'],
-                matched_keyword=row['matched_keyword'],
-                status=row['status'],
-                priority=row['priority'],
-                artist_id=row['artist_id'],
-                auto_flagged=bool(row['auto_flagged']),
-                ai_risk_score=ai_risk_score,
-                ai_risk_level=ai_risk_level,
-                ai_reason=ai_reason,
-                created_at=row['created_at']
-            ))
-        
-        return videos
+        return query, params
+    
+    def _like_search_clause(self, query: str, params: list, text: str) -> tuple:
+        """LIKE fallback for q= when FTS5 is unavailable (every word must appear in some column)"""
+        for word in re.findall(r'\w+', text):
+            query += " AND (" + " OR ".join(f"{c} LIKE ?" for c in self.VIDEO_SEARCH_COLUMNS) + ")"
+            params.extend([f"%{word}%"] * len(self.VIDEO_SEARCH_COLUMNS))
+        return query, params
+    
+    def _fetch_table(self, query: str, params=()) -> List[tuple]:
+        """Run a query returning plain tuples (no sqlite3.Row / model objects)"""
+        conn = self.get_connection(row_factory=None)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+    
+    def _fetch_models(self, query: str, params, row_factory) -> list:
+        """Run a query selecting *_COLUMNS and build models positionally via row_factory"""
+        conn = self.get_connection(row_factory=row_factory)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+    
+    def get_video_table(self, filters: dict = None) -> tuple:
+        """Videos as (columns, row tuples) for fast serialization; same filters/order as get_all_videos"""
+        query, params = self._video_list_query(', '.join(self.VIDEO_COLUMNS), filters)
+        return self.VIDEO_COLUMNS, self._fetch_table(query, params)
+    
+    def get_keyword_table(self, artist_id: int = None) -> tuple:
+        """Keywords as (columns, row tuples); same order as get_all_keywords"""
+        query = f"SELECT {', '.join(self.KEYWORD_COLUMNS)} FROM keywords"
+        if artist_id:
+            return self.KEYWORD_COLUMNS, self._fetch_table(
+                query + " WHERE artist_id = ? ORDER BY created_at DESC", (artist_id,))
+        return self.KEYWORD_COLUMNS, self._fetch_table(query + " ORDER BY created_at DESC")
+    
+    def get_song_table(self, artist_id: int = None) -> tuple:
+        """Songs as (columns, row tuples); same order as get_all_songs"""
+        query = f"SELECT {', '.join(self.SONG_COLUMNS)} FROM songs"
+        if artist_id:
+            return self.SONG_COLUMNS, self._fetch_table(
+                query + " WHERE artist_id = ? ORDER BY created_at DESC", (artist_id,))
+        return self.SONG_COLUMNS, self._fetch_table(query + " ORDER BY created_at DESC")
+    
+    def get_all_videos(self, filters: dict = None) -> List[Video]:
+        query, params = self._video_list_query(', '.join(self.VIDEO_COLUMNS), filters)
+        return self._fetch_models(query, params, video_row_factory)
+
+    def get_video_by_id(self, video_id: int) -> Optional[Video]:
+        videos = self._fetch_models(f"SELECT {', '.join(self.VIDEO_COLUMNS)} FROM videos WHERE id = ?",
+                                    (video_id,), video_row_factory)
+        return videos[0] if videos else None
+
+    @timed('videos.scan')
+    def get_video_scan_rows(self, artist_id: int = None) -> List[tuple]:
+        """(id, title, channel_name, status) of every video (or one artist's), for re-running detection"""
+        query = "SELECT id, title, channel_name, status FROM videos"
+        if artist_id:
+            return self._fetch_table(query + " WHERE artist_id = ?", (artist_id,))
+        return self._fetch_table(query)
     
     def update_video_status(self, video_id: int, status: str) -> bool:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("UPDATE videos SET status = ? WHERE id = ?", (status, video_id))
-        conn.commit()
-        success = cursor.rowcount > 0
-        conn.close()
-        
-        return success
+        return self.batch_update_videos([video_id], status=status) > 0
     
     def update_video_priority(self, video_id: int, priority: str) -> bool:
         conn = self.get_connection()
@@ -418,40 +769,87 @@ class Database:
         
         return success
     
-    def batch_update_videos(self, video_ids: List[int], status: str = None, priority: str = None) -> int:
+    @timed('videos.update')
+    def batch_update_videos(self, video_ids: List[int], status: str = None, priority: str = None,
+                            auto_flagged: bool = None) -> int:
         """Batch update multiple videos"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         updates = []
+        params = []
         if status:
-            updates.append(f"status = '{status}'")
+            updates.append("status = ?")
+            params.append(status)
         if priority:
-            updates.append(f"priority = '{priority}'")
+            updates.append("priority = ?")
+            params.append(priority)
+        if auto_flagged is not None:
+            updates.append("auto_flagged = ?")
+            params.append(int(auto_flagged))
         
-        if not updates:
+        if not updates or not video_ids:
             return 0
         
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # Status changes affect derived indexes, so capture the rows on both sides
+        before = self._fetch_video_rows(cursor, video_ids) if status else []
+        
         placeholders = ','.join('?' * len(video_ids))
         query = f"UPDATE videos SET {', '.join(updates)} WHERE id IN ({placeholders})"
         
-        cursor.execute(query, video_ids)
+        cursor.execute(query, params + list(video_ids))
         conn.commit()
         count = cursor.rowcount
+        
+        after = self._fetch_video_rows(cursor, video_ids) if status else []
         conn.close()
         
+        if before:
+            self._notify('on_videos_changed', before, after)
+        
         return count
     
     def delete_video(self, video_id: int) -> bool:
+        return self.delete_videos([video_id]) > 0
+    
+    @timed('videos.delete')
+    def delete_videos(self, video_ids: List[int]) -> int:
+        """Delete several videos by primary key"""
+        if not video_ids:
+            return 0
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+        removed = self._fetch_video_rows(cursor, video_ids)
+        placeholders = ','.join('?' * len(video_ids))
+        cursor.execute(f"DELETE FROM videos WHERE id IN ({placeholders})", list(video_ids))
         conn.commit()
-        success = cursor.rowcount > 0
+        count = cursor.rowcount
         conn.close()
         
-        return success
+        if removed:
+            self._notify('on_videos_removed', removed)
+        
+        return count
+    
+    @timed('videos.clear')
+    def clear_all_videos(self) -> int:
+        """Delete all videos and search logs (and their rollups), returns the number of videos deleted"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM videos')
+        count = cursor.fetchone()[0]
+        
+        cursor.execute('DELETE FROM videos')
+        cursor.execute('DELETE FROM search_logs')
+        cursor.execute('DELETE FROM search_log_daily')
+        conn.commit()
+        conn.close()
+        
+        self._notify('on_videos_cleared')
+        return count
     
     # Enhanced keyword operations
     def add_keyword(self, keyword: str, artist_id: int = None, auto_flag: bool = False, 
@@ -467,69 +865,113 @@ class Database:
             
             conn.commit()
             return cursor.lastrowid
-        except sqlite3.IntegrityError:
+        except self.IntegrityError:
             return None
         finally:
             conn.close()
     
-    def bulk_add_keywords(self, keywords: List[dict]) -> dict:
-        """Bulk import keywords from list"""
+    def _bulk_insert(self, table: str, columns: List[str], key_columns: List[str], rows: List[tuple]) -> tuple:
+        """
+        Insert rows in one transaction through a staging table
+        
+        Rows are staged with executemany, rows whose key already exists in the table
+        (or earlier in the batch) are set aside, and the rest are copied with one
+        INSERT ... SELECT. Keys compare like the table's UNIQUE constraint (NULLs never
+        conflict).
+        
+        Returns:
+            (added, duplicate positions in rows)
+        """
+        staged = ', '.join(columns)
+        same_key = ' AND '.join(f"{{alias}}.{column} = s.{column}" for column in key_columns)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"CREATE TEMP TABLE bulk_staging (seq INTEGER PRIMARY KEY, duplicate INTEGER DEFAULT 0, {staged})")
+            cursor.executemany(
+                f"INSERT INTO bulk_staging (seq, {staged}) VALUES ({', '.join('?' * (len(columns) + 1))})",
+                ((seq,) + row for seq, row in enumerate(rows)))
+            # Indexed after loading: one sort instead of a b-tree insert per row
+            cursor.execute(f"CREATE INDEX temp.idx_bulk_staging_key ON bulk_staging ({', '.join(key_columns)})")
+            
+            cursor.execute(f"""
+                UPDATE bulk_staging AS s SET duplicate = 1
+                WHERE EXISTS (SELECT 1 FROM {table} t WHERE {same_key.format(alias='t')})
+                   OR EXISTS (SELECT 1 FROM bulk_staging p WHERE {same_key.format(alias='p')} AND p.seq < s.seq)
+            """)
+            cursor.execute("SELECT seq FROM bulk_staging WHERE duplicate = 1 ORDER BY seq")
+            duplicates = [row[0] for row in cursor.fetchall()]
+            
+            # OR IGNORE only as a safety net: duplicates were marked above under the write lock
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO {table} ({staged})
+                SELECT {staged} FROM bulk_staging WHERE duplicate = 0 ORDER BY seq
+            """)
+            added = cursor.rowcount
+            
+            cursor.execute("DROP TABLE temp.bulk_staging")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         
-        added = 0
-        skipped = 0
+        return added, duplicates
+    
+    @timed('keywords.bulk_insert')
+    def bulk_add_keywords(self, keywords: List[dict]) -> dict:
+        """
+        Bulk import keywords from list (one transaction)
+        
+        Returns:
+            dict with added, skipped (count), duplicates (keywords skipped because they
+            already exist or repeat in the list) and errors (rows that could not be read)
+        """
+        created_at = datetime.now().isoformat()
+        rows = []
+        labels = []
         errors = []
         
         for kw in keywords:
+            keyword = kw.get('keyword')
+            if not keyword:
+                errors.append(f"{keyword}: keyword is required")
+                continue
             try:
-                cursor.execute('''
-                    INSERT INTO keywords (keyword, active, artist_id, auto_flag, priority, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    kw.get('keyword'),
+                rows.append((
+                    keyword,
                     int(kw.get('active', True)),
                     kw.get('artist_id'),
                     int(kw.get('auto_flag', False)),
                     kw.get('priority', 'Medium'),
-                    datetime.now().isoformat()
+                    created_at
                 ))
-                added += 1
-            except sqlite3.IntegrityError:
-                skipped += 1
+                labels.append(keyword)
             except Exception as e:
-                errors.append(f"{kw.get('keyword')}: {str(e)}")
+                errors.append(f"{keyword}: {str(e)}")
         
-        conn.commit()
-        conn.close()
+        added, duplicates = 0, []
+        if rows:
+            added, duplicates = self._bulk_insert(
+                'keywords', ['keyword', 'active', 'artist_id', 'auto_flag', 'priority', 'created_at'],
+                ['keyword', 'artist_id'], rows)
         
         return {
             'added': added,
-            'skipped': skipped,
+            'skipped': len(duplicates),
+            'duplicates': [labels[seq] for seq in duplicates],
             'errors': errors
         }
     
     def get_all_keywords(self, artist_id: int = None) -> List[Keyword]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        query = f"SELECT {', '.join(self.KEYWORD_COLUMNS)} FROM keywords"
         if artist_id:
-            cursor.execute("SELECT * FROM keywords WHERE artist_id = ? ORDER BY created_at DESC", (artist_id,))
-        else:
-            cursor.execute("SELECT * FROM keywords ORDER BY created_at DESC")
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [Keyword(
-            id=row['id'],
-            keyword=row['keyword'],
-            active=bool(row['active']),
-            artist_id=row['artist_id'],
-            auto_flag=bool(row['auto_flag']),
-            priority=row['priority'],
-            created_at=row['created_at']
-        ) for row in rows]
+            return self._fetch_models(query + " WHERE artist_id = ? ORDER BY created_at DESC",
+                                      (artist_id,), keyword_row_factory)
+        return self._fetch_models(query + " ORDER BY created_at DESC", (), keyword_row_factory)
     
     def get_active_keywords(self, artist_id: int = None) -> List[str]:
         conn = self.get_connection()
@@ -587,6 +1029,11 @@ class Database:
         
         return success
     
+    @timed('keywords.clear')
+    def clear_keywords(self, artist_id: int = None) -> int:
+        """Delete all keywords (or one artist's), returns the number deleted"""
+        return self._delete_where('keywords', artist_id)
+    
     # Song operations
     def add_song(self, song_name: str, artist_name: str, artist_id: int = None, 
                 auto_flag: bool = False, priority: str = "Medium", duration_ms: int = None) -> Optional[int]:
@@ -601,58 +1048,23 @@ class Database:
             
             conn.commit()
             return cursor.lastrowid
-        except sqlite3.IntegrityError:
+        except self.IntegrityError:
             return None
         finally:
             conn.close()
     
     def get_all_songs(self, artist_id: int = None) -> List[Song]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        query = f"SELECT {', '.join(self.SONG_COLUMNS)} FROM songs"
         if artist_id:
-            cursor.execute("SELECT * FROM songs WHERE artist_id = ? ORDER BY created_at DESC", (artist_id,))
-        else:
-            cursor.execute("SELECT * FROM songs ORDER BY created_at DESC")
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [Song(
-            id=row['id'],
-            song_name=row['song_name'],
-            artist_name=row['artist_name'],
-            active=bool(row['active']),
-            artist_id=row['artist_id'],
-            auto_flag=bool(row['auto_flag']),
-            priority=row['priority'],
-            created_at=row['created_at'],
-            duration_ms=row['duration_ms'] if 'duration_ms' in row.keys() else None
-        ) for row in rows]
+            return self._fetch_models(query + " WHERE artist_id = ? ORDER BY created_at DESC",
+                                      (artist_id,), song_row_factory)
+        return self._fetch_models(query + " ORDER BY created_at DESC", (), song_row_factory)
     
     def get_active_songs(self, artist_id: int = None) -> List[Song]:
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
+        query = f"SELECT {', '.join(self.SONG_COLUMNS)} FROM songs WHERE active = 1"
         if artist_id:
-            cursor.execute("SELECT * FROM songs WHERE active = 1 AND artist_id = ?", (artist_id,))
-        else:
-            cursor.execute("SELECT * FROM songs WHERE active = 1")
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [Song(
-            id=row['id'],
-            song_name=row['song_name'],
-            artist_name=row['artist_name'],
-            active=bool(row['active']),
-            artist_id=row['artist_id'],
-            auto_flag=bool(row['auto_flag']),
-            priority=row['priority'],
-            created_at=row['created_at'],
-            duration_ms=row['duration_ms'] if 'duration_ms' in row.keys() else None
-        ) for row in rows]
+            return self._fetch_models(query + " AND artist_id = ?", (artist_id,), song_row_factory)
+        return self._fetch_models(query, (), song_row_factory)
     
     def update_song(self, song_id: int, active: bool = None, auto_flag: bool = None, 
                    priority: str = None) -> bool:
@@ -696,42 +1108,67 @@ class Database:
         
         return success
     
-    def bulk_add_songs(self, songs: List[dict]) -> dict:
-        """Bulk import songs from list"""
+    @timed('songs.clear')
+    def clear_songs(self, artist_id: int = None) -> int:
+        """Delete all songs (or one artist's), returns the number deleted"""
+        return self._delete_where('songs', artist_id)
+    
+    def _delete_where(self, table: str, artist_id: int = None) -> int:
         conn = self.get_connection()
         cursor = conn.cursor()
+        try:
+            if artist_id:
+                cursor.execute(f"DELETE FROM {table} WHERE artist_id = ?", (artist_id,))
+            else:
+                cursor.execute(f"DELETE FROM {table}")
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
+    @timed('songs.bulk_insert')
+    def bulk_add_songs(self, songs: List[dict]) -> dict:
+        """
+        Bulk import songs from list (one transaction, see bulk_add_keywords)
         
-        added = 0
-        skipped = 0
+        Duplicates are reported as "song - artist".
+        """
+        created_at = datetime.now().isoformat()
+        rows = []
+        labels = []
         errors = []
         
         for song in songs:
+            label = f"{song.get('song_name')} - {song.get('artist_name')}"
+            if not song.get('song_name') or not song.get('artist_name'):
+                errors.append(f"{label}: song_name and artist_name are required")
+                continue
             try:
-                cursor.execute('''
-                    INSERT INTO songs (song_name, artist_name, active, artist_id, auto_flag, priority, created_at, duration_ms)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     song.get('song_name'),
                     song.get('artist_name'),
                     int(song.get('active', True)),
                     song.get('artist_id'),
                     int(song.get('auto_flag', False)),
                     song.get('priority', 'Medium'),
-                    datetime.now().isoformat(),
+                    created_at,
                     song.get('duration_ms')
                 ))
-                added += 1
-            except sqlite3.IntegrityError:
-                skipped += 1
+                labels.append(label)
             except Exception as e:
-                errors.append(f"{song.get('song_name')} - {song.get('artist_name')}: {str(e)}")
+                errors.append(f"{label}: {str(e)}")
         
-        conn.commit()
-        conn.close()
+        added, duplicates = 0, []
+        if rows:
+            added, duplicates = self._bulk_insert(
+                'songs', ['song_name', 'artist_name', 'active', 'artist_id', 'auto_flag', 'priority',
+                          'created_at', 'duration_ms'],
+                ['song_name', 'artist_name'], rows)
         
         return {
             'added': added,
-            'skipped': skipped,
+            'skipped': len(duplicates),
+            'duplicates': [labels[seq] for seq in duplicates],
             'errors': errors
         }
     
@@ -748,11 +1185,23 @@ class Database:
             
             conn.commit()
             return cursor.lastrowid
-        except sqlite3.IntegrityError:
+        except self.IntegrityError:
             return None
         finally:
             conn.close()
     
+    @staticmethod
+    def _rule_from_row(row) -> AutoFlagRule:
+        return AutoFlagRule(
+            id=row['id'],
+            name=row['name'],
+            description=row['description'],
+            conditions=row['conditions'],
+            action=row['action'],
+            active=bool(row['active']),
+            created_at=row['created_at']
+        )
+    
     def get_active_auto_flag_rules(self) -> List[AutoFlagRule]:
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -761,15 +1210,19 @@ class Database:
         rows = cursor.fetchall()
         conn.close()
         
-        return [AutoFlagRule(
-            id=row['id'],
-            name=row['name'],
-            description=row['description'],
-            conditions=row['conditions'],
-            action=row['action'],
-            active=bool(row['active']),
-            created_at=row['created_at']
-        ) for row in rows]
+        return [self._rule_from_row(row) for row in rows]
+    
+    @timed('auto_flag_rules.list')
+    def get_all_auto_flag_rules(self) -> List[AutoFlagRule]:
+        """Active and inactive rules, newest first"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM auto_flag_rules ORDER BY created_at DESC")
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [self._rule_from_row(row) for row in rows]
     
     def get_auto_flag_rule_by_name(self, name: str) -> Optional[AutoFlagRule]:
         """Get an auto-flag rule by name"""
@@ -780,21 +1233,36 @@ class Database:
         row = cursor.fetchone()
         conn.close()
         
-        if row:
-            return AutoFlagRule(
-                id=row['id'],
-                name=row['name'],
-                description=row['description'],
-                conditions=row['conditions'],
-                action=row['action'],
-                active=bool(row['active']),
-                created_at=row['created_at']
-            )
-        return None
+        return self._rule_from_row(row) if row else None
+    
+    @timed('auto_flag_rules.update')
+    def set_auto_flag_rule_active(self, rule_id: int, active: bool) -> bool:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("UPDATE auto_flag_rules SET active = ? WHERE id = ?", (int(active), rule_id))
+        conn.commit()
+        success = cursor.rowcount > 0
+        conn.close()
+        
+        return success
+    
+    @timed('auto_flag_rules.delete')
+    def delete_auto_flag_rule(self, rule_id: int) -> bool:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM auto_flag_rules WHERE id = ?", (rule_id,))
+        conn.commit()
+        success = cursor.rowcount > 0
+        conn.close()
+        
+        return success
     
-    def apply_auto_flag_rules(self, video: Video) -> tuple:
-        """Check and apply auto-flag rules to a video"""
-        rules = self.get_active_auto_flag_rules()
+    def apply_auto_flag_rules(self, video: Video, rules: List[AutoFlagRule] = None) -> tuple:
+        """Check and apply auto-flag rules to a video (pass `rules` to reuse one load across a batch)"""
+        if rules is None:
+            rules = self.get_active_auto_flag_rules()
         should_flag = False
         priority = video.priority
         
@@ -829,14 +1297,17 @@ class Database:
     
     # Search log operations
     def add_search_log(self, keyword: str, results_count: int, success: bool, 
-                      error_message: Optional[str] = None, artist_id: int = None):
+                      error_message: Optional[str] = None, artist_id: int = None,
+                      new_count: int = None, flagged_count: int = None):
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO search_logs (keyword, results_count, timestamp, success, error_message, artist_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (keyword, results_count, datetime.now().isoformat(), int(success), error_message, artist_id))
+            INSERT INTO search_logs (keyword, results_count, timestamp, success, error_message, artist_id,
+                                     new_count, flagged_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (keyword, results_count, datetime.now().isoformat(), int(success), error_message, artist_id,
+              new_count, flagged_count))
         
         conn.commit()
         conn.close()
@@ -862,6 +1333,87 @@ class Database:
             error_message=row['error_message']
         ) for row in rows]
     
+    def rollup_search_logs(self, retention_days: int = 30, now: datetime = None) -> dict:
+        """
+        Fold search logs older than retention_days into search_log_daily and delete them
+        
+        Incremental: a run only reads raw rows past the cutoff (which it then deletes),
+        and a day split across two runs is added together.
+        
+        Returns:
+            dict with rolled_up (raw rows removed), daily_rows (rollup rows touched) and cutoff
+        """
+        cutoff = ((now or datetime.now()) - timedelta(days=retention_days)).isoformat()
+        columns = ', '.join(self.SEARCH_LOG_DAILY_COLUMNS)
+        counters = [c for c in self.SEARCH_LOG_DAILY_COLUMNS[3:] if c != 'last_timestamp']
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(f"""
+                INSERT INTO search_log_daily ({columns})
+                {self.SEARCH_LOG_DAILY_SELECT}
+                WHERE timestamp < ?
+                GROUP BY 1, 2, 3
+                ON CONFLICT (day, keyword, artist_id) DO UPDATE SET
+                    {', '.join(f"{c} = search_log_daily.{c} + excluded.{c}" for c in counters)},
+                    last_timestamp = CASE WHEN excluded.last_timestamp > search_log_daily.last_timestamp
+                                          THEN excluded.last_timestamp
+                                          ELSE search_log_daily.last_timestamp END
+            """, (cutoff,))
+            daily_rows = cursor.rowcount
+            cursor.execute("DELETE FROM search_logs WHERE timestamp < ?", (cutoff,))
+            rolled_up = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        return {'rolled_up': rolled_up, 'daily_rows': daily_rows, 'cutoff': cutoff}
+    
+    def get_search_log_daily(self, days: int = 30, artist_id: int = None, keyword: str = None) -> List[dict]:
+        """
+        Daily per-keyword search stats for the last `days` days, newest first
+        
+        Rollups plus raw logs still inside the retention window (aggregated on the fly).
+        """
+        since = (datetime.now().date() - timedelta(days=days - 1)).isoformat()
+        columns = ', '.join(self.SEARCH_LOG_DAILY_COLUMNS)
+        daily_filters, raw_filters, params = [], [], []
+        if artist_id:
+            daily_filters.append("artist_id = ?")
+            raw_filters.append("artist_id = ?")
+            params.append(artist_id)
+        if keyword:
+            daily_filters.append("keyword = ?")
+            raw_filters.append("keyword = ?")
+            params.append(keyword)
+        daily_where = ''.join(f" AND {f}" for f in daily_filters)
+        raw_where = ''.join(f" AND {f}" for f in raw_filters)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT day, keyword, artist_id, SUM(runs) AS runs, SUM(successes) AS successes,
+                   SUM(errors) AS errors, SUM(results) AS results, SUM(measured_runs) AS measured_runs,
+                   SUM(new_count) AS new_count, SUM(flagged_count) AS flagged_count,
+                   MAX(last_timestamp) AS last_timestamp
+            FROM (
+                SELECT {columns} FROM search_log_daily WHERE day >= ?{daily_where}
+                UNION ALL
+                {self.SEARCH_LOG_DAILY_SELECT} WHERE timestamp >= ?{raw_where} GROUP BY 1, 2, 3
+            ) AS combined
+            GROUP BY day, keyword, artist_id
+            ORDER BY day DESC, runs DESC
+        """, [since] + params + [since] + params)
+        rows = [dict(row, artist_id=row['artist_id'] or None) for row in cursor.fetchall()]
+        conn.close()
+        
+        return rows
+    
     def get_stats(self, artist_id: int = None) -> dict:
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -885,9 +1437,12 @@ class Database:
         cursor.execute(f"SELECT COUNT(*) as count FROM videos {f'{artist_filter} AND' if artist_filter else 'WHERE'} auto_flagged = 1")
         auto_flagged = cursor.fetchone()['count']
         
-        # Last search time
+        # Last search time (from the rollups once the raw logs have been rolled up)
         cursor.execute(f"SELECT timestamp FROM search_logs {artist_filter} ORDER BY timestamp DESC LIMIT 1")
         last_search_row = cursor.fetchone()
+        if not last_search_row:
+            cursor.execute(f"SELECT MAX(last_timestamp) AS timestamp FROM search_log_daily {artist_filter}")
+            last_search_row = cursor.fetchone()
         last_search = last_search_row['timestamp'] if last_search_row else None
         
         conn.close()
@@ -5,6 +5,11 @@ from typing import List, Optional
 from datetime import datetime
 import os
 
+from metrics import EMAIL_QUEUE_DEPTH, EMAILS_SENT
+
+_SENT = EMAILS_SENT.labels('sent')
+_FAILED = EMAILS_SENT.labels('failed')
+
 class EmailService:
     """Email notification service for UGC monitoring"""
     
@@ -22,6 +27,7 @@ class EmailService:
             print("Email service not configured")
             return False
         
+        EMAIL_QUEUE_DEPTH.inc()
         try:
             msg = MIMEMultipart('alternative')
             msg['From'] = self.from_email
@@ -39,10 +45,14 @@ class EmailService:
             server.send_message(msg)
             server.quit()
             
+            _SENT.inc()
             return True
         except Exception as e:
             print(f"Email send failed: {str(e)}")
+            _FAILED.inc()
             return False
+        finally:
+            EMAIL_QUEUE_DEPTH.dec()
     
     def send_new_findings_alert(self, to_email: str, videos: List[dict], artist_name: str = None) -> bool:
         """Send alert for new findings"""
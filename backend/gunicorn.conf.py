@@ -0,0 +1,51 @@
+"""
+Gunicorn configuration (production)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY / GUNICORN_THREADS set workers and threads per worker.
+The app is preloaded once in the master and forked into workers. Workers
+never run the scheduler; a single scheduler process (run_scheduler.py) is
+started when the server is ready and stopped gracefully on shutdown.
+"""
+
+import os
+import subprocess
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+# Importing the app builds no service, so the preloading master holds no database
+# connection or thread; each worker starts its own warm-up after fork. Should the
+# master touch PostgreSQL anyway, each worker still opens its own pool on first use.
+def post_fork(server, worker):
+    from app import services
+    services.start_background()
+
+
+def when_ready(server):
+    if os.getenv('RUN_SCHEDULER', '1') != '1':
+        return
+    server.scheduler_process = subprocess.Popen(
+        [sys.executable, 'run_scheduler.py'],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    server.log.info(f"Scheduler process started (pid {server.scheduler_process.pid})")
+
+
+def on_exit(server):
+    process = getattr(server, 'scheduler_process', None)
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=graceful_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
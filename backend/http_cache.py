@@ -0,0 +1,237 @@
+"""
+HTTP Response Cache
+Conditional GET, short-lived response caching and compression for read endpoints
+
+Every table that backs a read endpoint has a version counter in
+resource_versions, bumped by database triggers on INSERT/UPDATE/DELETE. Because
+the triggers live in the database, writes from any worker, the scheduler
+process or raw SQL all invalidate. A cached endpoint:
+  1. reads the versions of its tables (one indexed query)
+  2. answers 304 if If-None-Match matches the ETag built from them
+  3. otherwise serves a cached body keyed by (endpoint, query args, versions)
+  4. otherwise runs the view and caches the result
+
+The cache is bounded by entry count and by bytes (bodies plus their
+compressed copies). A body larger than max_entry_bytes is served with its
+ETag but never stored, so one unfiltered listing cannot pin megabytes per
+query string in every worker.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+
+# Tables whose writes invalidate cached responses
+VERSIONED_TABLES = ('artists', 'keywords', 'songs', 'videos', 'auto_flag_rules', 'search_logs', 'channels')
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of JSON responses, validated by table versions
+
+    Usage:
+        cache = ResponseCache(db)
+        cache.respond(('artists',), view)           # inside a request
+        app.after_request(cache.compress_response)
+    """
+
+    def __init__(self, database, ttl_seconds: float = 60, max_entries: int = 256,
+                 min_compress_bytes: int = 1024, max_bytes: int = 32 * 1024 * 1024,
+                 max_entry_bytes: int = 1024 * 1024):
+        self.db = database
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'too_large': 0}
+        self.ensure_tables()
+
+    def ensure_tables(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS resource_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+        for table in VERSIONED_TABLES:
+            cursor.execute("INSERT OR IGNORE INTO resource_versions (name, version) VALUES (?, 0)", (table,))
+            for action in ('INSERT', 'UPDATE', 'DELETE'):
+                self.db.create_trigger(
+                    cursor, f"bump_{table}_{action.lower()}", table, action,
+                    f"UPDATE resource_versions SET version = version + 1 WHERE name = '{table}'")
+
+        conn.commit()
+        conn.close()
+
+    def get_versions(self, tables: Iterable[str]) -> Tuple:
+        tables = tuple(tables)
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(tables))
+        cursor.execute(f"SELECT name, version FROM resource_versions WHERE name IN ({placeholders})", tables)
+        versions = {row['name']: row['version'] for row in cursor.fetchall()}
+        conn.close()
+
+        return tuple(versions.get(table, 0) for table in tables)
+
+    def respond(self, tables: Tuple[str, ...], view, *args, **kwargs):
+        """Serve a GET view through the cache (called from the route wrapper)"""
+        versions = self.get_versions(tables)
+        query = tuple(sorted(request.args.items(multi=True)))
+        key = (request.endpoint, tuple(map(str, args)), tuple(sorted(kwargs.items())), query, versions)
+        etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+
+        if request.if_none_match.contains_weak(etag):
+            self.stats['not_modified'] += 1
+            return self._not_modified(etag)
+
+        entry = self._get(key)
+        if entry is not None:
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            response = view(*args, **kwargs)
+            # Only plain 200 JSON responses are cached; errors pass straight through
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            entry = {
+                'body': response.get_data(),
+                'mimetype': response.mimetype,
+                'encoded': {}
+            }
+            if len(entry['body']) <= self.max_entry_bytes:
+                self._put(key, entry)
+            else:
+                self.stats['too_large'] += 1
+                entry = None
+
+        if entry is None:
+            # Too large to keep: still validated by the ETag, compressed per request
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        response = Response(entry['body'], mimetype=entry['mimetype'])
+        # Weak: the same ETag covers the gzip/brotli/identity variants
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.cache_entry = entry
+        return response
+
+    def _not_modified(self, etag: str):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry['stored_at'] > self.ttl_seconds:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry: Dict):
+        entry['stored_at'] = time.monotonic()
+        entry['size'] = len(entry['body'])
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += entry['size']
+            self._evict()
+
+    def _add_encoded(self, entry: Dict, encoding: str, body: bytes):
+        """Keep a compressed copy on a cached entry, counted against max_bytes"""
+        with self._lock:
+            if encoding in entry['encoded'] or entry.get('evicted'):
+                return
+            entry['encoded'][encoding] = body
+            entry['size'] += len(body)
+            self._bytes += len(body)
+            self._evict()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        entry['evicted'] = True
+        self._bytes -= entry['size']
+
+    def _evict(self):
+        """Drop least recently used entries until both bounds hold (lock held)"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def clear(self):
+        with self._lock:
+            for entry in self._entries.values():
+                entry['evicted'] = True
+            self._entries.clear()
+            self._bytes = 0
+
+    # =========================================================================
+    # COMPRESSION
+    # =========================================================================
+
+    def compress_response(self, response):
+        """after_request hook: gzip/brotli large JSON bodies when the client accepts it"""
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype != 'application/json'):
+            return response
+
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            encoding = 'br'
+        elif accepted['gzip']:
+            encoding = 'gzip'
+        else:
+            return response
+
+        # Cached responses keep their compressed bodies, so a hit never recompresses
+        entry = getattr(response, 'cache_entry', None)
+        body = entry['encoded'].get(encoding) if entry else None
+
+        if body is None:
+            raw = response.get_data()
+            if len(raw) < self.min_compress_bytes:
+                return response
+            if encoding == 'br':
+                body = brotli.compress(raw, quality=5)
+            else:
+                body = gzip.compress(raw, compresslevel=6)
+            if entry is not None:
+                self._add_encoded(entry, encoding, body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(body))
+        response.vary.add('Accept-Encoding')
+        return response
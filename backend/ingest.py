@@ -0,0 +1,345 @@
+"""
+Ingestion Pipeline
+Single path for turning search results into stored, scored videos
+
+Stages (each works on a batch and is timed separately):
+    fetch   -> run the YouTube searches for a group of sources
+    dedupe  -> drop video_ids that are already stored (Bloom filter, SQL on hits)
+    detect  -> MusicDetector analysis (channel verdicts cached per channel)
+    rules   -> auto-flag rules + priority merge
+    persist -> insert new videos in one transaction
+    notify  -> critical alerts for newly stored videos
+
+Used by /api/search, /api/search/songs and the scheduled keyword sweep.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from metrics import (DETECTOR_SECONDS, INGEST_OUTCOMES, INGEST_STAGE_LATENCY, INGEST_SWEEP_VIDEOS,
+                     INGEST_VIDEOS)
+from models import Video
+
+
+STAGES = ('fetch', 'dedupe', 'detect', 'rules', 'persist', 'notify')
+
+# Metric series, looked up once
+_STAGE_LATENCY = {stage: INGEST_STAGE_LATENCY.labels(stage) for stage in STAGES}
+_VIDEOS = {outcome: INGEST_VIDEOS.labels(outcome) for outcome in INGEST_OUTCOMES}
+_SWEEP_VIDEOS = {outcome: INGEST_SWEEP_VIDEOS.labels(outcome) for outcome in INGEST_OUTCOMES}
+
+# AI risk level -> video priority
+AI_PRIORITY_MAP = {
+    'critical': 'Critical',
+    'high': 'High',
+    'medium': 'Medium',
+    'low': 'Low'
+}
+
+PRIORITY_RANK = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+
+
+# =============================================================================
+# EXECUTORS
+# =============================================================================
+
+class InlineExecutor:
+    """Runs every item in the calling thread"""
+    name = 'inline'
+
+    def map(self, fn: Callable, items: List) -> List:
+        return [fn(item) for item in items]
+
+    def shutdown(self):
+        pass
+
+
+class ThreadExecutor:
+    """Thread pool - for I/O bound stages such as fetch"""
+    name = 'thread'
+
+    def __init__(self, workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+
+    def map(self, fn: Callable, items: List) -> List:
+        return list(self._pool.map(fn, items))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+class ProcessExecutor:
+    """Process pool - for CPU bound stages such as detect (fn must be picklable)"""
+    name = 'process'
+
+    def __init__(self, workers: int = 2, chunksize: int = 16):
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self.chunksize = chunksize
+
+    def map(self, fn: Callable, items: List) -> List:
+        return list(self._pool.map(fn, items, chunksize=self.chunksize))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+def make_executor(kind: str = 'inline', workers: int = 4):
+    """Build an executor by name: 'inline', 'thread' or 'process'"""
+    if kind == 'thread':
+        return ThreadExecutor(workers)
+    if kind == 'process':
+        return ProcessExecutor(workers)
+    return InlineExecutor()
+
+
+# =============================================================================
+# SOURCES + STAGE HELPERS
+# =============================================================================
+
+@dataclass
+class IngestSource:
+    """One search to run: label is used for the search log, info is echoed in results"""
+    label: str
+    fetch: Callable[[], List[Video]]
+    info: Dict = field(default_factory=dict)
+
+
+def _fetch_source(source: IngestSource):
+    """Fetch stage worker: never raises, returns (videos, error)"""
+    try:
+        return source.fetch(), None
+    except Exception as e:
+        return [], str(e)
+
+
+def _analyze(detector, fields):
+    """Detect stage worker (top-level so it can run in a process pool)"""
+    title, channel_name, description, view_count, duration, channel_verdict = fields
+    return detector.analyze_video(
+        title=title,
+        channel_name=channel_name,
+        description=description,
+        view_count=view_count,
+        duration=duration,
+        channel_verdict=channel_verdict
+    )
+
+
+# Pool-thread entry points; a profile samples pool threads only while inside one of these
+INGEST_TASKS = (_fetch_source, _analyze)
+
+
+def merge_decision(video: Video, ai_analysis: Dict, should_flag: bool, priority: str):
+    """Combine rule and AI decisions on a video (strictest flag, highest priority)"""
+    # Use AI decision if it's more strict
+    if ai_analysis['should_flag'] and not should_flag:
+        should_flag = True
+
+    # Use highest priority between AI and rules
+    ai_priority = AI_PRIORITY_MAP.get(ai_analysis['risk_level'], 'Medium')
+    if PRIORITY_RANK.get(ai_priority, 0) > PRIORITY_RANK.get(priority, 0):
+        priority = ai_priority
+
+    video.auto_flagged = should_flag
+    video.priority = priority
+    if video.auto_flagged:
+        video.status = 'Flagged for Takedown'
+
+    # Store AI analysis results
+    video.ai_risk_score = ai_analysis['risk_score']
+    video.ai_risk_level = ai_analysis['risk_level']
+    video.ai_reason = ai_analysis['reason']
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+class IngestPipeline:
+    """
+    Batched fetch -> dedupe -> detect -> rules -> persist -> notify pipeline
+
+    Args:
+        database: Database instance
+        detector: MusicDetector instance
+        email_service: EmailService (optional, for critical alerts)
+        executors: optional {'fetch': executor, 'detect': executor}; inline by default
+        fetch_batch_size: number of sources fetched together before processing
+        known_videos: optional KnownVideoFilter; ids it has never seen skip the SQL check
+        channels: optional ChannelRegistry; channel verdicts come from its cache
+    """
+
+    def __init__(self, database, detector, email_service=None, executors: Dict = None,
+                 fetch_batch_size: int = 10, known_videos=None, channels=None):
+        self.db = database
+        self.detector = detector
+        self.email_service = email_service
+        self.executors = executors or {}
+        self.fetch_batch_size = fetch_batch_size
+        self.known_videos = known_videos
+        self.channels = channels
+
+    def _executor(self, stage: str):
+        return self.executors.get(stage) or InlineExecutor()
+
+    def run(self, sources: List[IngestSource]) -> Dict:
+        """
+        Run all sources through the pipeline
+
+        Returns:
+            dict with total_found, total_new, sources (per-source results) and
+            timings (seconds/batches/items per stage)
+        """
+        timings = {stage: {'seconds': 0.0, 'batches': 0, 'items': 0} for stage in STAGES}
+        results = {
+            'total_found': 0,
+            'total_new': 0,
+            'sources': [],
+            'timings': timings
+        }
+        flagged = 0
+
+        # Rules are loaded once per run, not once per video
+        rules = self.db.get_active_auto_flag_rules()
+
+        for start in range(0, len(sources), self.fetch_batch_size):
+            group = sources[start:start + self.fetch_batch_size]
+
+            with self._timed(timings, 'fetch', len(group)):
+                fetched = self._executor('fetch').map(_fetch_source, group)
+
+            for source, (videos, error) in zip(group, fetched):
+                if error:
+                    results['sources'].append(dict(source.info, error=error))
+                    self.db.add_search_log(source.label, 0, False, error)
+                    continue
+
+                stored = self._process(videos, rules, timings)
+                new_count = len(stored)
+                flagged_count = sum(1 for video, _ in stored if video.auto_flagged)
+
+                results['total_found'] += len(videos)
+                results['total_new'] += new_count
+                flagged += flagged_count
+                results['sources'].append(dict(source.info, found=len(videos), new=new_count))
+                # Outcome counts feed the quota planner's yield ranking
+                self.db.add_search_log(source.label, len(videos), True,
+                                       new_count=new_count, flagged_count=flagged_count)
+
+        for stage in timings.values():
+            stage['seconds'] = round(stage['seconds'], 4)
+
+        for outcome, count in (('found', results['total_found']), ('stored', results['total_new']),
+                               ('duplicate', timings['dedupe']['items'] - timings['detect']['items']),
+                               ('flagged', flagged)):
+            _SWEEP_VIDEOS[outcome].observe(count)
+
+        return results
+
+    def process_batch(self, videos: List[Video], rules: List = None, timings: Dict = None) -> int:
+        """Run fetched videos through dedupe -> notify; returns number of new videos stored"""
+        if timings is None:
+            timings = {stage: {'seconds': 0.0, 'batches': 0, 'items': 0} for stage in STAGES}
+        if rules is None:
+            rules = self.db.get_active_auto_flag_rules()
+        return len(self._process(videos, rules, timings))
+
+    def _process(self, videos: List[Video], rules: List, timings: Dict) -> List:
+        """dedupe -> notify for one batch; returns [(video, row_id)] actually stored"""
+        found = len(videos)
+        _VIDEOS['found'].inc(found)
+        with self._timed(timings, 'dedupe', len(videos)):
+            videos = self.dedupe(videos)
+        _VIDEOS['duplicate'].inc(found - len(videos))
+        if not videos:
+            return []
+
+        with self._timed(timings, 'detect', len(videos)) as detect:
+            # Channel checks are a cache lookup; only unseen channels run the channel patterns
+            verdicts = self.channels.verdicts_for(videos) if self.channels is not None else {}
+            analyses = self._executor('detect').map(partial(_analyze, self.detector), [
+                (v.title, v.channel_name, v.description, v.view_count, v.duration,
+                 verdicts.get(v.channel_id))
+                for v in videos
+            ])
+        # Workers may be other processes: the batch average stands for each video
+        DETECTOR_SECONDS.observe(detect.seconds / len(videos), len(videos))
+
+        with self._timed(timings, 'rules', len(videos)):
+            for video, analysis in zip(videos, analyses):
+                should_flag, priority = self.db.apply_auto_flag_rules(video, rules)
+                merge_decision(video, analysis, should_flag, priority)
+
+        with self._timed(timings, 'persist', len(videos)):
+            stored = self.db.add_videos(videos)
+        _VIDEOS['stored'].inc(len(stored))
+        _VIDEOS['flagged'].inc(sum(1 for video, _ in stored if video.auto_flagged))
+
+        with self._timed(timings, 'notify', len(stored)):
+            self.notify(stored)
+
+        return stored
+
+    def dedupe(self, videos: List[Video]) -> List[Video]:
+        """Drop videos already stored (and duplicates within the batch)"""
+        unique = {}
+        for video in videos:
+            unique.setdefault(video.video_id, video)
+
+        candidates = list(unique.keys())
+        if self.known_videos is not None:
+            # Pick up videos other processes stored since the last batch, then
+            # filter misses are definitely new; only possible hits go to SQL
+            self.known_videos.catch_up()
+            candidates = [vid for vid in candidates if vid in self.known_videos]
+
+        existing = self.db.get_existing_video_ids(candidates)
+        return [v for vid, v in unique.items() if vid not in existing]
+
+    def notify(self, stored: List):
+        """Send email alerts for newly stored Critical videos"""
+        if not self.email_service or not self.email_service.enabled:
+            return
+
+        artists = {}
+        for video, _ in stored:
+            if video.priority != 'Critical' or not video.artist_id:
+                continue
+            if video.artist_id not in artists:
+                artists[video.artist_id] = self.db.get_artist(video.artist_id)
+            artist = artists[video.artist_id]
+            if artist and artist.email:
+                self.email_service.send_critical_alert(
+                    artist.email,
+                    video.to_dict(),
+                    "Auto-flagged as Critical priority"
+                )
+
+    def _timed(self, timings: Dict, stage: str, items: int):
+        return _StageTimer(timings[stage], items, _STAGE_LATENCY[stage])
+
+
+class _StageTimer:
+    """Context manager adding elapsed time to a stage's timing entry (and its latency histogram)"""
+
+    def __init__(self, entry: Dict, items: int, latency=None):
+        self.entry = entry
+        self.items = items
+        self.latency = latency
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.start
+        self.entry['seconds'] += self.seconds
+        if self.latency is not None:
+            self.latency.observe(self.seconds)
+        self.entry['batches'] += 1
+        self.entry['items'] += self.items
+        return False
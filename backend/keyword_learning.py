@@ -12,49 +12,264 @@ class KeywordLearning:
     """
     Learns from existing video matches to suggest new keywords
     Analyzes patterns in titles, channels, and matched keywords
+    
+    Title/channel n-grams are kept in a persisted frequency index
+    (keyword_ngrams) that is updated incrementally as videos are inserted,
+    re-flagged or deleted, so suggestions are a top-K lookup.
     """
     
+    # Common words to ignore
+    STOP_WORDS = {
+        'official', 'video', 'audio', 'music', 'hd', 'hq', 'ft', 'feat',
+        'featuring', 'prod', 'by', 'the', 'a', 'an', 'and', 'or', 'but',
+        'in', 'on', 'at', 'to', 'for', 'of', 'with', 'from', 'full',
+        'lyrics', 'lyric', 'version', 'remix', 'cover'
+    }
+    
+    # Flagged videos at or above this AI score count towards flagged_count
+    FLAGGED_MIN_SCORE = 50
+    
+    # Example video ids kept per n-gram
+    MAX_EXAMPLES = 2
+    
     def __init__(self, database):
         self.db = database
+        self.backfilled = False
+        self.ensure_ngram_index()
     
     def extract_patterns_from_title(self, title: str) -> List[str]:
         """
         Extract potential keywords from a video title
         Removes common words, extracts meaningful phrases
-        """
-        # Common words to ignore
-        stop_words = {
-            'official', 'video', 'audio', 'music', 'hd', 'hq', 'ft', 'feat',
-            'featuring', 'prod', 'by', 'the', 'a', 'an', 'and', 'or', 'but',
-            'in', 'on', 'at', 'to', 'for', 'of', 'with', 'from', 'full',
-            'lyrics', 'lyric', 'version', 'remix', 'cover'
-        }
         
+        Each pattern is returned once per title. Bigrams are only kept when
+        both words are meaningful, which keeps the n-gram index compact.
+        """
         # Clean and tokenize title
         title_lower = title.lower()
         
         # Remove special characters but keep hyphens and spaces
         title_clean = re.sub(r'[^\w\s\-]', ' ', title_lower)
         
-        # Split into words
-        words = title_clean.split()
+        # Split into words (dropping stray separators like " - ")
+        words = [w.strip('-') for w in title_clean.split()]
+        words = [w for w in words if w]
         
         # Extract meaningful words/phrases
         keywords = []
         
         # Single words (longer than 3 chars, not stop words)
         for word in words:
-            if len(word) > 3 and word not in stop_words:
+            if len(word) > 3 and word not in self.STOP_WORDS and not word.isdigit():
                 keywords.append(word)
         
-        # Two-word phrases
+        # Two-word phrases (no stop words or bare numbers on either side)
         for i in range(len(words) - 1):
-            if words[i] not in stop_words or words[i+1] not in stop_words:
-                phrase = f"{words[i]} {words[i+1]}"
-                if len(phrase) > 6:
-                    keywords.append(phrase)
+            first, second = words[i], words[i+1]
+            if first in self.STOP_WORDS or second in self.STOP_WORDS:
+                continue
+            if first.isdigit() or second.isdigit():
+                continue
+            phrase = f"{first} {second}"
+            if len(phrase) > 6:
+                keywords.append(phrase)
+        
+        # Count each pattern once per title
+        return list(dict.fromkeys(keywords))
+    
+    def extract_patterns_from_channel(self, channel_name: str) -> List[str]:
+        """Extract channel name words (longer than 3 chars)"""
+        channel_words = re.findall(r'\w+', channel_name.lower())
+        return list(dict.fromkeys(w for w in channel_words if len(w) > 3))
+    
+    # =========================================================================
+    # N-GRAM INDEX
+    # =========================================================================
+    
+    def ensure_ngram_index(self):
+        """Create the n-gram index table and backfill it for existing databases"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
         
-        return keywords
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS keyword_ngrams (
+                artist_id INTEGER NOT NULL DEFAULT 0,
+                source TEXT NOT NULL,
+                ngram TEXT NOT NULL,
+                count INTEGER DEFAULT 0,
+                risk_sum INTEGER DEFAULT 0,
+                flagged_count INTEGER DEFAULT 0,
+                example_ids TEXT,
+                PRIMARY KEY (artist_id, source, ngram)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_keyword_ngrams_rank
+            ON keyword_ngrams(source, artist_id, count DESC)
+        """)
+        conn.commit()
+        
+        cursor.execute("SELECT 1 FROM keyword_ngrams LIMIT 1")
+        index_empty = cursor.fetchone() is None
+        cursor.execute("SELECT 1 FROM videos LIMIT 1")
+        has_videos = cursor.fetchone() is not None
+        conn.close()
+        
+        if index_empty and has_videos:
+            self.rebuild_ngram_index()
+            self.backfilled = True
+    
+    def rebuild_ngram_index(self, batch_size: int = 1000) -> int:
+        """
+        Rebuild the n-gram index from scratch
+        
+        Returns:
+            Number of videos indexed
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM keyword_ngrams")
+        conn.commit()
+        
+        # Page by id and read each page fully, so no read lock is held while
+        # index_videos writes through its own connection
+        indexed = 0
+        last_id = 0
+        while True:
+            cursor.execute("""
+                SELECT id, title, channel_name, artist_id, ai_risk_score, status
+                FROM videos WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            self.index_videos([dict(row) for row in rows])
+            indexed += len(rows)
+            last_id = rows[-1]['id']
+        conn.close()
+        
+        return indexed
+    
+    def index_videos(self, rows: List[Dict], sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) the n-gram contribution of videos
+        
+        Args:
+            rows: dicts with id, title, channel_name, artist_id, ai_risk_score, status
+        """
+        deltas = {}
+        
+        for row in rows:
+            artist_key = row.get('artist_id') or 0
+            risk = row.get('ai_risk_score') or 0
+            flagged = 1 if (row.get('status') == 'Flagged for Takedown'
+                            and risk >= self.FLAGGED_MIN_SCORE) else 0
+            
+            sources = (
+                ('title', self.extract_patterns_from_title(row.get('title') or '')),
+                ('channel', self.extract_patterns_from_channel(row.get('channel_name') or ''))
+            )
+            for source, ngrams in sources:
+                for ngram in ngrams:
+                    delta = deltas.setdefault((artist_key, source, ngram), [0, 0, 0, []])
+                    delta[0] += 1
+                    delta[1] += risk
+                    delta[2] += flagged
+                    if len(delta[3]) < self.MAX_EXAMPLES:
+                        delta[3].append(str(row['id']))
+        
+        if not deltas:
+            return
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        if sign > 0:
+            cursor.executemany("""
+                INSERT INTO keyword_ngrams
+                    (artist_id, source, ngram, count, risk_sum, flagged_count, example_ids)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(artist_id, source, ngram) DO UPDATE SET
+                    count = keyword_ngrams.count + excluded.count,
+                    risk_sum = keyword_ngrams.risk_sum + excluded.risk_sum,
+                    flagged_count = keyword_ngrams.flagged_count + excluded.flagged_count,
+                    -- Top up with one new id at a time, never past MAX_EXAMPLES
+                    example_ids = CASE
+                        WHEN keyword_ngrams.example_ids IS NULL OR keyword_ngrams.example_ids = ''
+                            THEN excluded.example_ids
+                        WHEN length(keyword_ngrams.example_ids)
+                             - length(replace(keyword_ngrams.example_ids, ',', '')) + 1 < ?
+                            THEN keyword_ngrams.example_ids || ',' || ?
+                        ELSE keyword_ngrams.example_ids
+                    END
+            """, [(key[0], key[1], key[2], d[0], d[1], d[2], ','.join(d[3]), self.MAX_EXAMPLES, d[3][0])
+                  for key, d in deltas.items()])
+        else:
+            cursor.executemany("""
+                UPDATE keyword_ngrams
+                SET count = count - ?, risk_sum = risk_sum - ?, flagged_count = flagged_count - ?
+                WHERE artist_id = ? AND source = ? AND ngram = ?
+            """, [(d[0], d[1], d[2], key[0], key[1], key[2]) for key, d in deltas.items()])
+            cursor.executemany("""
+                DELETE FROM keyword_ngrams
+                WHERE artist_id = ? AND source = ? AND ngram = ? AND count <= 0
+            """, list(deltas.keys()))
+        
+        conn.commit()
+        conn.close()
+    
+    # Database listener hooks (see Database.add_listener)
+    def on_videos_added(self, rows: List[Dict]):
+        self.index_videos(rows)
+    
+    def on_videos_changed(self, before: List[Dict], after: List[Dict]):
+        # Only re-index rows whose flagged state or risk score actually changed
+        after_by_id = {row['id']: row for row in after}
+        changed_before = []
+        changed_after = []
+        for row in before:
+            new_row = after_by_id.get(row['id'])
+            if new_row and (new_row['status'] != row['status']
+                            or new_row['ai_risk_score'] != row['ai_risk_score']):
+                changed_before.append(row)
+                changed_after.append(new_row)
+        
+        if changed_before:
+            self.index_videos(changed_before, sign=-1)
+            self.index_videos(changed_after)
+    
+    def on_videos_removed(self, rows: List[Dict]):
+        self.index_videos(rows, sign=-1)
+    
+    def on_videos_cleared(self):
+        conn = self.db.get_connection()
+        conn.execute("DELETE FROM keyword_ngrams")
+        conn.commit()
+        conn.close()
+    
+    def _top_ngrams(self, cursor, source: str, order_column: str, artist_id: int = None,
+                    limit: int = 20) -> List:
+        """Top-K lookup in the n-gram index (all artists when artist_id is None)"""
+        query = f"""
+            SELECT ngram,
+                   SUM(count) as count,
+                   SUM(risk_sum) as risk_sum,
+                   SUM(flagged_count) as flagged_count,
+                   GROUP_CONCAT(example_ids) as example_ids
+            FROM keyword_ngrams
+            WHERE source = ? AND {order_column} > 0
+        """
+        params = [source]
+        
+        if artist_id:
+            query += " AND artist_id = ?"
+            params.append(artist_id)
+        
+        query += f" GROUP BY ngram ORDER BY {order_column} DESC, SUM(risk_sum) * 1.0 / SUM(count) DESC, ngram LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return cursor.fetchall()
     
     def analyze_flagged_videos(self, artist_id: int = None, min_score: int = 50) -> Dict:
         """
@@ -64,12 +279,42 @@ class KeywordLearning:
         Returns:
             dict with common patterns found in flagged videos
         """
+        if min_score != self.FLAGGED_MIN_SCORE:
+            # The index only tracks the default threshold
+            return self._analyze_flagged_videos_scan(artist_id, min_score)
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        query = """
+            SELECT COUNT(*) FROM videos
+            WHERE status = 'Flagged for Takedown' AND ai_risk_score >= ?
+        """
+        params = [min_score]
+        if artist_id:
+            query += " AND artist_id = ?"
+            params.append(artist_id)
+        cursor.execute(query, params)
+        total = cursor.fetchone()[0]
+        
+        title_rows = self._top_ngrams(cursor, 'title', 'flagged_count', artist_id, limit=20)
+        channel_rows = self._top_ngrams(cursor, 'channel', 'flagged_count', artist_id, limit=10)
+        conn.close()
+        
+        return {
+            "total_analyzed": total,
+            "common_title_patterns": [(row['ngram'], row['flagged_count']) for row in title_rows],
+            "common_channel_patterns": [(row['ngram'], row['flagged_count']) for row in channel_rows]
+        }
+    
+    def _analyze_flagged_videos_scan(self, artist_id: int = None, min_score: int = 50) -> Dict:
+        """Full-scan fallback for analyze_flagged_videos with a custom min_score"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         # Query flagged videos with high AI scores
         query = """
-            SELECT title, channel_name, matched_keyword, ai_risk_score, ai_reason
+            SELECT title, channel_name
             FROM videos
             WHERE status = 'Flagged for Takedown' 
             AND ai_risk_score >= ?
@@ -84,24 +329,12 @@ class KeywordLearning:
         videos = cursor.fetchall()
         conn.close()
         
-        # Extract patterns
-        title_patterns = []
-        channel_patterns = []
+        title_counter = Counter()
+        channel_counter = Counter()
         
         for video in videos:
-            title = video['title']
-            channel = video['channel_name']
-            
-            # Extract from titles
-            title_patterns.extend(self.extract_patterns_from_title(title))
-            
-            # Extract from channels
-            channel_words = re.findall(r'\w+', channel.lower())
-            channel_patterns.extend([w for w in channel_words if len(w) > 3])
-        
-        # Count frequency
-        title_counter = Counter(title_patterns)
-        channel_counter = Counter(channel_patterns)
+            title_counter.update(self.extract_patterns_from_title(video['title']))
+            channel_counter.update(self.extract_patterns_from_channel(video['channel_name']))
         
         return {
             "total_analyzed": len(videos),
@@ -119,66 +352,38 @@ class KeywordLearning:
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
-        # Get all videos for artist
-        query = "SELECT title, channel_name, matched_keyword, ai_risk_score FROM videos WHERE 1=1"
-        params = []
-        
-        if artist_id:
-            query += " AND artist_id = ?"
-            params.append(artist_id)
-        
-        cursor.execute(query, params)
-        videos = cursor.fetchall()
+        rows = self._top_ngrams(cursor, 'title', 'count', artist_id, limit=limit)
+        
+        # Resolve example ids to titles in one query
+        examples_by_ngram = {}
+        example_ids = set()
+        for row in rows:
+            ids = list(dict.fromkeys(i for i in (row['example_ids'] or '').split(',') if i))
+            examples_by_ngram[row['ngram']] = ids[:self.MAX_EXAMPLES]
+            example_ids.update(examples_by_ngram[row['ngram']])
+        
+        titles = {}
+        if example_ids:
+            placeholders = ','.join('?' * len(example_ids))
+            cursor.execute(f"SELECT id, title FROM videos WHERE id IN ({placeholders})",
+                           [int(i) for i in example_ids])
+            titles = {str(row['id']): row['title'] for row in cursor.fetchall()}
         conn.close()
         
-        # Extract all potential keywords
-        potential_keywords = []
-        
-        for video in videos:
-            title_keywords = self.extract_patterns_from_title(video['title'])
-            
-            for kw in title_keywords:
-                potential_keywords.append({
-                    "keyword": kw,
-                    "source_title": video['title'],
-                    "ai_risk_score": video['ai_risk_score']
-                })
-        
-        # Count frequency and calculate average risk score
-        keyword_data = {}
-        for item in potential_keywords:
-            kw = item["keyword"]
-            if kw not in keyword_data:
-                keyword_data[kw] = {
-                    "keyword": kw,
-                    "count": 0,
-                    "total_risk": 0,
-                    "examples": []
-                }
-            
-            keyword_data[kw]["count"] += 1
-            keyword_data[kw]["total_risk"] += item["ai_risk_score"]
-            
-            if len(keyword_data[kw]["examples"]) < 2:
-                keyword_data[kw]["examples"].append(item["source_title"])
-        
-        # Calculate average risk and sort
         suggestions = []
-        for kw, data in keyword_data.items():
-            avg_risk = data["total_risk"] / data["count"] if data["count"] > 0 else 0
+        for row in rows:
+            count = row['count']
+            avg_risk = round(row['risk_sum'] / count, 1) if count > 0 else 0
             
             suggestions.append({
-                "keyword": kw,
-                "frequency": data["count"],
-                "avg_risk_score": round(avg_risk, 1),
-                "examples": data["examples"],
-                "reason": f"Found in {data['count']} videos (avg risk: {round(avg_risk, 1)})"
+                "keyword": row['ngram'],
+                "frequency": count,
+                "avg_risk_score": avg_risk,
+                "examples": [titles[i] for i in examples_by_ngram[row['ngram']] if i in titles],
+                "reason": f"Found in {count} videos (avg risk: {avg_risk})"
             })
         
-        # Sort by frequency and risk
-        suggestions.sort(key=lambda x: (x["frequency"], x["avg_risk_score"]), reverse=True)
-        
-        return suggestions[:limit]
+        return suggestions
     
     def suggest_artist_variations(self, artist_name: str) -> List[str]:
         """
@@ -248,39 +453,96 @@ class KeywordLearning:
             "channels": result['channels'].split(',')[:5] if result['channels'] else []
         }
     
-    def get_all_keywords_performance(self, artist_id: int = None) -> List[Dict]:
+    # Sortable columns for the performance report (API name -> SQL expression)
+    PERFORMANCE_SORT_COLUMNS = {
+        'flag_rate': 'flag_rate',
+        'total_found': 'total',
+        'flagged_count': 'flagged',
+        'avg_risk_score': 'avg_risk',
+        'keyword': 'matched_keyword'
+    }
+    
+    def get_all_keywords_performance(self, artist_id: int = None, sort_by: str = 'flag_rate',
+                                     order: str = 'desc', limit: int = None, offset: int = 0) -> List[Dict]:
         """
         Get performance stats for all keywords
         
+        The whole report is computed in a single grouped query instead of
+        one aggregate per keyword.
+        
+        Args:
+            artist_id: Only include videos for this artist
+            sort_by: 'flag_rate', 'total_found', 'flagged_count', 'avg_risk_score' or 'keyword'
+            order: 'asc' or 'desc'
+            limit: Page size (None = all keywords)
+            offset: Number of keywords to skip
+        
         Returns:
             List of keyword performance dicts sorted by effectiveness
         """
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
+        sort_column = self.PERFORMANCE_SORT_COLUMNS.get(sort_by, 'flag_rate')
+        direction = 'ASC' if str(order).lower() == 'asc' else 'DESC'
         
-        # Get unique keywords
-        query = "SELECT DISTINCT matched_keyword FROM videos WHERE 1=1"
+        query = """
+            SELECT 
+                matched_keyword,
+                COUNT(*) as total,
+                SUM(CASE WHEN status = 'Flagged for Takedown' THEN 1 ELSE 0 END) as flagged,
+                AVG(ai_risk_score) as avg_risk,
+                SUM(CASE WHEN status = 'Flagged for Takedown' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) as flag_rate,
+                GROUP_CONCAT(DISTINCT channel_name) as channels
+            FROM videos
+            WHERE 1=1
+        """
         params = []
         
         if artist_id:
             query += " AND artist_id = ?"
             params.append(artist_id)
         
+        # Secondary sort on total keeps the original (flag_rate, total_found) ordering
+        query += f" GROUP BY matched_keyword ORDER BY {sort_column} {direction}, total {direction}, matched_keyword"
+        
+        if limit is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset or 0])
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
         cursor.execute(query, params)
-        keywords = [row['matched_keyword'] for row in cursor.fetchall()]
+        rows = cursor.fetchall()
         conn.close()
         
-        # Get performance for each
-        performances = []
-        for kw in keywords:
-            perf = self.get_keyword_performance(kw)
-            if perf['total_found'] > 0:
-                performances.append(perf)
+        return [self._performance_from_row(row) for row in rows]
+    
+    def count_keywords_with_matches(self, artist_id: int = None) -> int:
+        """Number of distinct keywords that matched at least one video (for pagination)"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        if artist_id:
+            cursor.execute("SELECT COUNT(DISTINCT matched_keyword) FROM videos WHERE artist_id = ?", (artist_id,))
+        else:
+            cursor.execute("SELECT COUNT(DISTINCT matched_keyword) FROM videos")
         
-        # Sort by flag rate (most effective at finding violations)
-        performances.sort(key=lambda x: (x['flag_rate'], x['total_found']), reverse=True)
+        count = cursor.fetchone()[0]
+        conn.close()
         
-        return performances
+        return count
+    
+    def _performance_from_row(self, row) -> Dict:
+        """Build a keyword performance dict from an aggregate row"""
+        total = row['total'] or 0
+        flagged = row['flagged'] or 0
+        
+        return {
+            "keyword": row['matched_keyword'],
+            "total_found": total,
+            "flagged_count": flagged,
+            "avg_risk_score": round(row['avg_risk'] or 0, 1),
+            "flag_rate": round(flagged / (total or 1) * 100, 1),
+            "channels": row['channels'].split(',')[:5] if row['channels'] else []
+        }
 
 
 # Example usage
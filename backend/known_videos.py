@@ -0,0 +1,183 @@
+"""
+Known Videos Filter
+Memory-bounded membership test for stored YouTube video_ids
+
+A Bloom filter warmed from the videos table at startup. A miss means the
+video is definitely new, so the ingest pipeline skips the database entirely;
+a hit is confirmed with one batched SQL lookup (false positives and deleted
+videos fall through to SQL). ~1.2 MB per million videos at a 1% error rate.
+
+Rebuilds (warm, growth past capacity) fill a new bit array off to the side
+and swap it in with one assignment, so lookups never see a half-built
+filter; ids added while a rebuild runs are replayed into the new array.
+
+The filter is per process. Besides its own Database listener it follows a
+high-water mark on videos.id: catch_up() (called by the ingest pipeline
+before each dedupe) adds every row stored since the last scan, so videos
+inserted by other gunicorn workers or the scheduler process are hits here
+too. On PostgreSQL a transaction can commit a lower id after a catch-up has
+passed it; such a video is a miss, is analysed again and then dropped by
+the insert - correct, just detection time spent twice.
+"""
+
+import hashlib
+import math
+import threading
+from typing import Iterable, List
+
+
+class _BloomBits:
+    """One bit array with its geometry; replaced as a whole, never resized"""
+
+    __slots__ = ('num_bits', 'num_hashes', 'bits')
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def positions(self, video_id: str) -> List[int]:
+        digest = hashlib.blake2b(video_id.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def set(self, video_id: str):
+        bits = self.bits
+        for pos in self.positions(video_id):
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def test(self, video_id: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(video_id))
+
+
+class KnownVideoFilter:
+    """
+    Bloom filter over video_ids, kept in sync as a Database listener
+
+    Usage:
+        known_videos = KnownVideoFilter(db)
+        db.add_listener(known_videos)
+        maybe_known = [vid for vid in ids if vid in known_videos]
+    """
+
+    def __init__(self, database, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.db = database
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.count = 0
+        self._filter = _BloomBits(capacity, error_rate)
+        # Highest videos.id read from the table (warm, catch_up)
+        self._max_id = 0
+        self._lock = threading.Lock()
+        self._catch_up_lock = threading.Lock()
+        # Serialises rebuilds; while one runs, new ids are also queued in _pending
+        self._warm_lock = threading.Lock()
+        self._pending = None
+        self.warm()
+
+    def add(self, video_id: str):
+        with self._lock:
+            # Ids seen again (catch_up re-reads this process's own inserts) are not recounted
+            if not self._filter.test(video_id):
+                self._filter.set(video_id)
+                self.count += 1
+            if self._pending is not None:
+                self._pending.append(video_id)
+            full = self.count > self.capacity
+
+        # Past capacity the error rate climbs; grow and re-warm from the table
+        # (unless a rebuild is already under way)
+        if full and self._warm_lock.acquire(blocking=False):
+            try:
+                self._rebuild(self.capacity * 2)
+            finally:
+                self._warm_lock.release()
+
+    def add_many(self, video_ids: Iterable[str]):
+        for video_id in video_ids:
+            self.add(video_id)
+
+    def __contains__(self, video_id: str) -> bool:
+        # One read of the current array: a concurrent swap is either fully seen or not at all
+        return self._filter.test(video_id)
+
+    def catch_up(self) -> int:
+        """Add the ids stored since the last scan, by any process (one range query on id)"""
+        with self._catch_up_lock:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, video_id FROM videos WHERE id > ? ORDER BY id", (self._max_id,))
+            added = 0
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                self.add_many(row[1] for row in rows)
+                added += len(rows)
+                with self._lock:
+                    self._max_id = max(self._max_id, rows[-1][0])
+            conn.close()
+        return added
+
+    def warm(self, capacity: int = None):
+        """(Re)build the filter from every stored video_id, streaming the rows"""
+        with self._warm_lock:
+            self._rebuild(capacity)
+
+    def _rebuild(self, capacity: int = None):
+        with self._lock:
+            self._pending = []
+
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM videos")
+            stored = cursor.fetchone()[0]
+
+            capacity = max(capacity or self.capacity, stored * 2)
+            fresh = _BloomBits(capacity, self.error_rate)
+            count = 0
+            max_id = 0
+
+            cursor.execute("SELECT id, video_id FROM videos")
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                for row in rows:
+                    fresh.set(row[1])
+                    max_id = max(max_id, row[0])
+                count += len(rows)
+            conn.close()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            # Ids added during the scan may have missed the SELECT
+            for video_id in self._pending:
+                fresh.set(video_id)
+            count += len(self._pending)
+            self._pending = None
+            self._filter = fresh
+            self.capacity = capacity
+            self.count = count
+            self._max_id = max(self._max_id, max_id)
+
+    def memory_bytes(self) -> int:
+        return len(self._filter.bits)
+
+    # Database listener hooks (deletes are left in place; SQL confirms hits)
+    def on_videos_added(self, rows):
+        self.add_many(row['video_id'] for row in rows)
+
+    def on_videos_cleared(self):
+        with self._lock:
+            self._filter = _BloomBits(self.capacity, self.error_rate)
+            self.count = 0
+            self._max_id = 0
+            if self._pending is not None:
+                self._pending.clear()
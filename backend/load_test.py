@@ -0,0 +1,107 @@
+"""
+Load test for the dashboard API
+Simulates concurrent dashboard users against a running instance and
+reports requests/sec and latency percentiles per endpoint.
+
+Usage:
+    python load_test.py --url http://localhost:5000 --concurrency 20 --duration 30
+    python load_test.py --revalidate     # send If-None-Match like a browser polling
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+# What the dashboard loads, weighted by how often it is hit
+DASHBOARD_REQUESTS = [
+    ('/api/stats', 4),
+    ('/api/videos', 4),
+    ('/api/artists', 2),
+    ('/api/keywords', 2),
+    ('/api/logs', 1),
+    ('/api/health', 1),
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def worker(base_url, deadline, latencies, errors, lock, revalidate=False):
+    session = requests.Session()
+    paths = [path for path, weight in DASHBOARD_REQUESTS for _ in range(weight)]
+    etags = {}
+
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        headers = {'If-None-Match': etags[path]} if revalidate and path in etags else {}
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, headers=headers, timeout=30)
+            ok = response.status_code < 500
+            if 'ETag' in response.headers:
+                etags[path] = response.headers['ETag']
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with lock:
+            if ok:
+                latencies[path].append(elapsed)
+            else:
+                errors[path] += 1
+
+
+def run(base_url, concurrency, duration, revalidate=False):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, deadline, latencies, errors, lock, revalidate))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [ms for values in latencies.values() for ms in values]
+    total = len(all_latencies) + sum(errors.values())
+
+    print(f"\n{base_url}  concurrency={concurrency}  duration={elapsed:.1f}s")
+    print(f"{'endpoint':<16}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for path, _ in DASHBOARD_REQUESTS:
+        values = latencies[path]
+        print(f"{path:<16}{len(values):>10}{errors[path]:>8}"
+              f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}")
+
+    print(f"\nTotal: {total} requests, {sum(errors.values())} errors, {total / elapsed:.1f} req/s")
+    if all_latencies:
+        print(f"Latency: mean {statistics.mean(all_latencies):.1f} ms, "
+              f"p50 {percentile(all_latencies, 50):.1f} ms, "
+              f"p95 {percentile(all_latencies, 95):.1f} ms, "
+              f"p99 {percentile(all_latencies, 99):.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard load test')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=int, default=30, help='seconds')
+    parser.add_argument('--revalidate', action='store_true', help='send If-None-Match with the last ETag')
+    args = parser.parse_args()
+
+    run(args.url.rstrip('/'), args.concurrency, args.duration, args.revalidate)
@@ -0,0 +1,293 @@
+"""
+Database Maintenance
+Scheduled upkeep of the SQLite file: integrity check, hot backup,
+incremental vacuum and planner statistics
+
+- integrity: PRAGMA quick_check (or the full integrity_check)
+- backup: online copy through the sqlite3 backup API in one step. The file
+  is in WAL mode (init_db), so the copy reads one consistent snapshot while
+  writers carry on; the newest BACKUP_KEEP copies are kept
+- vacuum: PRAGMA incremental_vacuum returns free pages (left by clear-all,
+  batch-delete, keywords/clear, log retention) to the OS. It is skipped on
+  files created before auto_vacuum=INCREMENTAL.
+- convert: the one full VACUUM that switches such a file to incremental.
+  It holds the write lock for the whole rewrite, so it is never part of the
+  scheduled run; an admin asks for it explicitly (see DEFAULT_TASKS).
+- optimize: ANALYZE under analysis_limit (bounded cost), plus an FTS5 merge
+
+Each run is timed per task and stored in maintenance_runs for the admin endpoint.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List
+
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class DatabaseMaintenance:
+    """
+    Runs maintenance tasks against a Database and keeps a history of runs
+
+    Usage:
+        maintenance = DatabaseMaintenance(db, backup_dir='backups', keep_backups=7)
+        maintenance.run()                         # DEFAULT_TASKS
+        maintenance.run(['integrity', 'backup'])  # a subset
+        maintenance.run(['convert'])              # one-off, blocks writers
+        maintenance.get_runs()
+    """
+
+    TASKS = ('integrity', 'backup', 'convert', 'vacuum', 'optimize')
+    # What a run without a task list (the scheduled job) does: no full VACUUM
+    DEFAULT_TASKS = ('integrity', 'backup', 'vacuum', 'optimize')
+
+    def __init__(self, database, backup_dir: str = None, keep_backups: int = 7,
+                 analysis_limit: int = 1000, max_history: int = 100):
+        self.db = database
+        self.backup_dir = backup_dir or os.path.join(
+            os.path.dirname(os.path.abspath(database.db_path)), 'backups')
+        self.keep_backups = keep_backups
+        self.analysis_limit = analysis_limit
+        self.max_history = max_history
+        self.ensure_tables()
+
+    def ensure_tables(self):
+        conn = self.db.get_connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                status TEXT,
+                seconds REAL,
+                reclaimed_bytes INTEGER,
+                report TEXT
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # FILE STATE
+    # =========================================================================
+
+    def file_stats(self) -> Dict:
+        """Page counts and sizes of the database file"""
+        conn = self.db.get_connection()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+
+        return {
+            'page_size': page_size,
+            'page_count': page_count,
+            'freelist_count': freelist_count,
+            'size_bytes': page_size * page_count,
+            'free_bytes': page_size * freelist_count,
+            'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, auto_vacuum),
+            'journal_mode': journal_mode
+        }
+
+    # =========================================================================
+    # TASKS
+    # =========================================================================
+
+    def integrity(self, full: bool = False) -> Dict:
+        """quick_check skips index/table cross-checks; full=True runs integrity_check"""
+        conn = self.db.get_connection()
+        pragma = 'integrity_check' if full else 'quick_check'
+        messages = [row[0] for row in conn.execute(f"PRAGMA {pragma}(100)")]
+        conn.close()
+
+        return {'ok': messages == ['ok'], 'check': pragma, 'messages': [] if messages == ['ok'] else messages}
+
+    def backup(self) -> Dict:
+        """Hot copy to backup_dir/<name>-<timestamp>.db of one snapshot; WAL writers are not blocked"""
+        import sqlite3
+
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        path = os.path.join(self.backup_dir, f"{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db")
+        partial = path + '.partial'
+
+        source = self.db.get_connection()
+        target = sqlite3.connect(partial)
+        try:
+            # One step: a stepped copy restarts whenever another connection writes
+            # between steps, which during a sweep can be forever
+            source.backup(target, pages=-1)
+        finally:
+            target.close()
+            source.close()
+        os.replace(partial, path)
+
+        removed = self._prune_backups(stem)
+        return {'path': path, 'size_bytes': os.path.getsize(path), 'pruned': removed}
+
+    def _prune_backups(self, stem: str) -> List[str]:
+        """Delete all but the newest keep_backups copies of this database"""
+        backups = sorted(
+            name for name in os.listdir(self.backup_dir)
+            if name.startswith(stem + '-') and name.endswith('.db')
+        )
+        removed = backups[:-self.keep_backups] if self.keep_backups > 0 else []
+        for name in removed:
+            os.remove(os.path.join(self.backup_dir, name))
+        return removed
+
+    def list_backups(self) -> List[Dict]:
+        if not os.path.isdir(self.backup_dir):
+            return []
+        stem = os.path.splitext(os.path.basename(self.db.db_path))[0]
+        return [
+            {'name': name, 'size_bytes': os.path.getsize(os.path.join(self.backup_dir, name))}
+            for name in sorted(os.listdir(self.backup_dir), reverse=True)
+            if name.startswith(stem + '-') and name.endswith('.db')
+        ]
+
+    def vacuum(self, max_pages: int = None) -> Dict:
+        """Release free pages with incremental_vacuum; skipped until the file is converted"""
+        before = self.file_stats()
+        if before['auto_vacuum'] != 'incremental':
+            return {
+                'mode': 'skipped',
+                'reason': f"auto_vacuum is {before['auto_vacuum']}; run the 'convert' task to enable it",
+                'free_pages_left': before['freelist_count']
+            }
+
+        conn = self.db.get_connection()
+        # Each statement step frees one page and execute() steps once;
+        # executescript runs the pragma to completion
+        pages = f"({int(max_pages)})" if max_pages else ''
+        conn.executescript(f"PRAGMA incremental_vacuum{pages};")
+        conn.commit()
+        conn.close()
+
+        after = self.file_stats()
+        return {
+            'mode': 'incremental',
+            'size_before': before['size_bytes'],
+            'size_after': after['size_bytes'],
+            'reclaimed_bytes': before['size_bytes'] - after['size_bytes'],
+            'free_pages_left': after['freelist_count']
+        }
+
+    def convert(self) -> Dict:
+        """
+        Switch the file to incremental auto_vacuum with one full VACUUM
+        Takes the write lock for the whole rewrite (writers wait, then fail with
+        "database is locked"); only ever needed once per file.
+        """
+        before = self.file_stats()
+        if before['auto_vacuum'] == 'incremental':
+            return {'converted': False, 'auto_vacuum': 'incremental'}
+
+        conn = self.db.get_connection()
+        conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        conn.execute("VACUUM")
+        conn.commit()
+        conn.close()
+
+        after = self.file_stats()
+        return {
+            'converted': True,
+            'auto_vacuum': after['auto_vacuum'],
+            'size_before': before['size_bytes'],
+            'size_after': after['size_bytes'],
+            'reclaimed_bytes': before['size_bytes'] - after['size_bytes']
+        }
+
+    def optimize(self) -> Dict:
+        """
+        Refresh planner statistics (sqlite_stat1)
+        PRAGMA optimize only considers tables queried on its own connection, and
+        every request here opens a new one, so ANALYZE runs directly; analysis_limit
+        samples each index instead of scanning it, keeping the cost flat as tables grow.
+        """
+        conn = self.db.get_connection()
+        conn.execute(f"PRAGMA analysis_limit = {int(self.analysis_limit)}")
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        fts_merged = False
+        if self.db.fts_enabled:
+            # Merge the full-text index's b-trees (deletes leave tombstones behind)
+            conn.execute("INSERT INTO videos_fts(videos_fts) VALUES('optimize')")
+            fts_merged = True
+        conn.commit()
+        tables = conn.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1").fetchone()[0]
+        conn.close()
+
+        return {'analyzed_tables': tables, 'fts_merged': fts_merged}
+
+    # =========================================================================
+    # RUNS
+    # =========================================================================
+
+    def run(self, tasks: List[str] = None) -> Dict:
+        """
+        Run the given tasks (default: DEFAULT_TASKS, in TASKS order) and record the run
+        A task failure is reported and the rest still run, except that a failed
+        integrity check skips the backup (so good copies are not rotated out).
+        """
+        tasks = [task for task in self.TASKS if task in (tasks or self.DEFAULT_TASKS)]
+        started_at = datetime.now().isoformat()
+        start = time.perf_counter()
+        size_before = self.file_stats()['size_bytes']
+
+        report = {}
+        for task in tasks:
+            if task == 'backup' and report.get('integrity', {}).get('ok') is False:
+                report[task] = {'skipped': 'integrity check failed'}
+                continue
+            task_start = time.perf_counter()
+            try:
+                report[task] = getattr(self, task)()
+            except Exception as e:
+                print(f"Maintenance: '{task}' failed: {str(e)}")
+                report[task] = {'error': str(e)}
+            report[task]['seconds'] = round(time.perf_counter() - task_start, 4)
+
+        failed = any('error' in result or result.get('ok') is False for result in report.values())
+        run = {
+            'started_at': started_at,
+            'finished_at': datetime.now().isoformat(),
+            'status': 'error' if failed else 'success',
+            'seconds': round(time.perf_counter() - start, 4),
+            'reclaimed_bytes': size_before - self.file_stats()['size_bytes'],
+            'tasks': report
+        }
+        self._record(run)
+        return run
+
+    def _record(self, run: Dict):
+        conn = self.db.get_connection()
+        conn.execute("""
+            INSERT INTO maintenance_runs (started_at, finished_at, status, seconds, reclaimed_bytes, report)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (run['started_at'], run['finished_at'], run['status'], run['seconds'],
+              run['reclaimed_bytes'], json.dumps(run['tasks'], default=str)))
+        conn.execute("""
+            DELETE FROM maintenance_runs WHERE id NOT IN (
+                SELECT id FROM maintenance_runs ORDER BY id DESC LIMIT ?
+            )
+        """, (self.max_history,))
+        conn.commit()
+        conn.close()
+
+    def get_runs(self, limit: int = 20) -> List[Dict]:
+        conn = self.db.get_connection()
+        rows = conn.execute("SELECT * FROM maintenance_runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        conn.close()
+
+        runs = []
+        for row in rows:
+            run = dict(row)
+            run['tasks'] = json.loads(run.pop('report') or '{}')
+            runs.append(run)
+        return runs
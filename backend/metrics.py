@@ -0,0 +1,307 @@
+"""
+Metrics
+Process-wide counters, gauges and histograms exposed at /metrics in the
+Prometheus text format (version 0.0.4)
+
+Cheap enough to leave on: every label combination the app knows about is
+allocated when the metric is defined, a hot-path update is a dict lookup,
+a bisect and two increments under a per-series lock, and formatting only
+happens when /metrics is scraped. Values that already live elsewhere (query
+timings, quota left) are read by collectors at scrape time.
+
+Counts are per process: under gunicorn each worker keeps its own numbers,
+and the scheduler process (run_scheduler.py) is not served at all.
+
+Usage:
+    YOUTUBE_API.call(request.execute)              # count, time, errors
+    HTTP_LATENCY.labels('/api/videos', 'GET').observe(0.012)
+    REGISTRY.collector(collect)                     # computed at scrape time
+    REGISTRY.render()                               # text for /metrics
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+
+# Seconds; from a cached GET to a slow YouTube search
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Per-video detector time
+DETECTOR_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+# Videos per sweep
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class CounterSeries:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class GaugeSeries:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+
+class HistogramSeries:
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, count: int = 1):
+        """Record `count` observations of `value` (count > 1 for a batch average)"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += count
+            self.sum += value * count
+
+
+class Metric:
+    """A metric family: one series per label-value tuple"""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 series_factory: Callable = None):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._factory = series_factory
+        self._series = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._series[()] = series_factory()
+
+    def labels(self, *values: str):
+        """Series for these label values (created on first use; preallocate known ones at startup)"""
+        series = self._series.get(values)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(values, self._factory())
+        return series
+
+    def preallocate(self, label_sets: Iterable[Sequence[str]]):
+        for values in label_sets:
+            self.labels(*values)
+        return self
+
+    def samples(self) -> List[Tuple[str, str, object]]:
+        """(name suffix, label text, value) for every series"""
+        with self._lock:
+            series = sorted(self._series.items())
+
+        samples = []
+        for values, s in series:
+            if self.kind != 'histogram':
+                samples.append(('', _label_text(self.labelnames, values), s.value))
+                continue
+            names = self.labelnames + ('le',)
+            with s._lock:
+                counts, total = list(s.counts), s.sum
+            cumulative = 0
+            for bound, count in zip(s.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', _label_text(names, values + (_format_value(float(bound)),)),
+                                cumulative))
+            samples.append(('_sum', _label_text(self.labelnames, values), total))
+            samples.append(('_count', _label_text(self.labelnames, values), cumulative))
+        return samples
+
+
+class Registry:
+    """All metrics of the process, rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._add(Metric('counter', name, documentation, labelnames, CounterSeries))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+        return self._add(Metric('gauge', name, documentation, labelnames, GaugeSeries))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Metric:
+        buckets = tuple(sorted(buckets))
+        return self._add(Metric('histogram', name, documentation, labelnames,
+                                lambda: HistogramSeries(buckets)))
+
+    def _add(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, collect: Callable[[], Iterable[Tuple]]):
+        """
+        Register a scrape-time source of metrics
+
+        `collect()` yields (name, kind, documentation, [(suffix, labels dict, value), ...]);
+        a failing collector is skipped for that scrape.
+        """
+        self._collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                print(f"Metrics collector {getattr(collect, '__name__', collect)} failed: {str(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for suffix, labels, value in samples:
+                    lines.append(f"{name}{suffix}{_label_text(tuple(labels), tuple(labels.values()))} "
+                                 f"{_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class ExternalApi:
+    """Call count, error count and latency of one upstream API, with its series preallocated"""
+
+    __slots__ = ('calls', 'errors', 'latency')
+
+    def __init__(self, name: str):
+        self.calls = EXTERNAL_CALLS.labels(name)
+        self.errors = EXTERNAL_ERRORS.labels(name)
+        self.latency = EXTERNAL_LATENCY.labels(name)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        Run one request: `fn(*args, **kwargs)`, timed
+        An exception or an HTTP response with status >= 400 counts as an error.
+        """
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.observe(time.perf_counter() - start, error=True)
+            raise
+        self.observe(time.perf_counter() - start, error=getattr(result, 'status_code', 200) >= 400)
+        return result
+
+    def observe(self, seconds: float, error: bool = False):
+        self.calls.inc()
+        self.latency.observe(seconds)
+        if error:
+            self.errors.inc()
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Flask request latency by route', ('route', 'method'))
+HTTP_RESPONSES = REGISTRY.counter(
+    'http_responses_total', 'Flask responses by route and status class', ('route', 'method', 'status'))
+
+EXTERNAL_CALLS = REGISTRY.counter(
+    'external_api_requests_total', 'Requests to upstream APIs', ('api',))
+EXTERNAL_ERRORS = REGISTRY.counter(
+    'external_api_errors_total', 'Upstream requests that raised or returned status >= 400', ('api',))
+EXTERNAL_LATENCY = REGISTRY.histogram(
+    'external_api_request_duration_seconds', 'Upstream request latency', ('api',))
+
+YOUTUBE_API = ExternalApi('youtube')
+SPOTIFY_API = ExternalApi('spotify')
+DEEZER_API = ExternalApi('deezer')
+MUSICBRAINZ_API = ExternalApi('musicbrainz')
+
+QUOTA_UNITS = REGISTRY.counter(
+    'youtube_quota_units_total', 'YouTube Data API quota units booked by this process', ('endpoint', 'success'))
+
+DETECTOR_SECONDS = REGISTRY.histogram(
+    'detector_seconds_per_video', 'MusicDetector time per analysed video', buckets=DETECTOR_BUCKETS).labels()
+
+INGEST_STAGE_LATENCY = REGISTRY.histogram(
+    'ingest_stage_duration_seconds', 'Ingest pipeline time per stage and batch', ('stage',))
+INGEST_VIDEOS = REGISTRY.counter(
+    'ingest_videos_total', 'Videos through the ingest pipeline by outcome', ('outcome',))
+INGEST_SWEEP_VIDEOS = REGISTRY.histogram(
+    'ingest_sweep_videos', 'Videos per ingest run by outcome', ('outcome',), buckets=COUNT_BUCKETS)
+# found: returned by searches, duplicate: already stored (or repeated), stored: inserted
+INGEST_OUTCOMES = ('found', 'duplicate', 'stored', 'flagged')
+
+EMAIL_QUEUE_DEPTH = REGISTRY.gauge(
+    'email_queue_depth', 'Emails accepted for sending and not yet handed to SMTP').labels()
+EMAILS_SENT = REGISTRY.counter('emails_total', 'Emails sent by result', ('result',))
+
+INGEST_VIDEOS.preallocate((outcome,) for outcome in INGEST_OUTCOMES)
+INGEST_SWEEP_VIDEOS.preallocate((outcome,) for outcome in INGEST_OUTCOMES)
+EMAILS_SENT.preallocate([('sent',), ('failed',)])
+
+
+def preallocate_routes(app):
+    """Create the HTTP series for every route of the Flask app up front"""
+    for rule in app.url_map.iter_rules():
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            HTTP_LATENCY.labels(rule.rule, method)
+            for status in ('2xx', '3xx', '4xx', '5xx'):
+                HTTP_RESPONSES.labels(rule.rule, method, status)
+
+
+def query_timing_families(timings: Dict[str, Dict]) -> List[Tuple]:
+    """Collector families for Database.get_query_timings() ({tag: {calls, seconds, max_seconds}})"""
+    tags = sorted(timings)
+    return [
+        ('db_query_duration_seconds', 'summary', 'Database method time by statement tag',
+         [('_sum', {'tag': tag}, timings[tag]['seconds']) for tag in tags]
+         + [('_count', {'tag': tag}, timings[tag]['calls']) for tag in tags]),
+        ('db_query_max_seconds', 'gauge', 'Slowest call by statement tag',
+         [('', {'tag': tag}, timings[tag]['max_seconds']) for tag in tags]),
+    ]
@@ -1,8 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 from typing import Optional, List
 
-@dataclass
+@dataclass(slots=True)
 class Artist:
     id: Optional[int]
     name: str
@@ -23,7 +23,7 @@ class Artist:
             'created_at': self.created_at
         }
 
-@dataclass
+@dataclass(slots=True)
 class Video:
     id: Optional[int]
     video_id: str
@@ -42,6 +42,11 @@ class Video:
     ai_risk_level: Optional[str] = None
     ai_reason: Optional[str] = None
     created_at: str = ''
+    # Search-time metadata (not stored): used for detection and ranking
+    description: str = ''
+    view_count: int = 0
+    duration: int = 0  # seconds
+    match_score: Optional[int] = None  # 0-100, song searches only
     
     def to_dict(self):
         return {
@@ -64,7 +69,7 @@ class Video:
             'created_at': self.created_at
         }
 
-@dataclass
+@dataclass(slots=True)
 class Keyword:
     id: Optional[int]
     keyword: str
@@ -85,7 +90,7 @@ class Keyword:
             'created_at': self.created_at
         }
 
-@dataclass
+@dataclass(slots=True)
 class Song:
     id: Optional[int]
     song_name: str
@@ -110,7 +115,7 @@ class Song:
             'duration_ms': self.duration_ms
         }
 
-@dataclass
+@dataclass(slots=True)
 class AutoFlagRule:
     id: Optional[int]
     name: str
@@ -131,7 +136,7 @@ class AutoFlagRule:
             'created_at': self.created_at
         }
 
-@dataclass
+@dataclass(slots=True)
 class SearchLog:
     id: Optional[int]
     keyword: str
@@ -149,3 +154,28 @@ class SearchLog:
             'success': self.success,
             'error_message': self.error_message
         }
+
+
+def positional_row_factory(model, bool_fields: tuple = ()):
+    """
+    sqlite3 row factory that builds `model` positionally
+    The SELECT must list the model's columns in field order (see Database.*_COLUMNS);
+    `bool_fields` are converted from SQLite's 0/1.
+    """
+    names = [f.name for f in fields(model)]
+    bool_positions = [names.index(name) for name in bool_fields]
+    
+    if not bool_positions:
+        return lambda cursor, row: model(*row)
+    
+    def factory(cursor, row):
+        values = list(row)
+        for position in bool_positions:
+            values[position] = bool(values[position])
+        return model(*values)
+    
+    return factory
+
+video_row_factory = positional_row_factory(Video, ('auto_flagged',))
+keyword_row_factory = positional_row_factory(Keyword, ('active', 'auto_flag'))
+song_row_factory = positional_row_factory(Song, ('active', 'auto_flag'))
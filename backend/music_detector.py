@@ -3,6 +3,7 @@ Advanced Music Copyright Detection System
 Uses pattern matching, keyword analysis, and intelligent scoring to detect unauthorized music uploads
 """
 
+import hashlib
 import re
 from typing import Dict, List, Tuple
 
@@ -141,12 +142,58 @@ class MusicDetector:
             for pattern in self.SUSPICIOUS_CHANNEL_PATTERNS
         ]
     
+    @classmethod
+    def channel_rules_version(cls) -> str:
+        """Fingerprint of the channel patterns; cached channel verdicts are stale when it changes"""
+        patterns = (cls.TRUSTED_INDICATORS, cls.HIGH_RISK_PATTERNS['channel'],
+                    cls.MEDIUM_RISK_PATTERNS['channel'], cls.SUSPICIOUS_CHANNEL_PATTERNS)
+        return hashlib.sha1(repr(patterns).encode('utf-8')).hexdigest()[:12]
+    
+    def analyze_channel(self, channel_name: str) -> Dict:
+        """
+        Channel-level part of the analysis (depends only on the channel name)
+        
+        Returns:
+            dict with keys:
+                - trusted (bool): official source, videos score 0
+                - high_risk / medium_risk (list): channel pattern indicators
+                - suspicious (bool): suspicious naming pattern
+                - risk_score (int): what the channel alone adds to a video's score
+        """
+        if self._is_trusted_channel(channel_name):
+            return {'trusted': True, 'high_risk': [], 'medium_risk': [], 'suspicious': False, 'risk_score': 0}
+        
+        high_risk = []
+        for pattern in self.high_risk_compiled['channel']:
+            matches = pattern.findall(channel_name)
+            if matches:
+                high_risk.append(f'High-risk channel: "{matches[0]}"')
+        
+        medium_risk = []
+        for pattern in self.medium_risk_compiled['channel']:
+            matches = pattern.findall(channel_name)
+            if matches:
+                medium_risk.append(f'Medium-risk channel: "{matches[0]}"')
+        
+        suspicious = self._is_suspicious_channel(channel_name)
+        
+        return {
+            'trusted': False,
+            'high_risk': high_risk,
+            'medium_risk': medium_risk,
+            'suspicious': suspicious,
+            'risk_score': 30 * len(high_risk) + 15 * len(medium_risk) + (15 if suspicious else 0)
+        }
+    
     def analyze_video(self, title: str, channel_name: str, 
                      description: str = "", view_count: int = 0,
-                     duration: int = 0) -> Dict:
+                     duration: int = 0, channel_verdict: Dict = None) -> Dict:
         """
         Analyze a video for copyright violation indicators
         
+        channel_verdict is an analyze_channel() result for this channel (e.g. cached
+        in the channels registry); it is computed here when not given.
+        
         Returns:
             dict with keys:
                 - risk_score (0-100): Overall risk score
@@ -159,8 +206,8 @@ class MusicDetector:
         risk_score = 0
         
         # Check if channel is trusted
-        is_trusted = self._is_trusted_channel(channel_name)
-        if is_trusted:
+        channel = channel_verdict or self.analyze_channel(channel_name)
+        if channel['trusted']:
             return {
                 'risk_score': 0,
                 'risk_level': 'low',
@@ -176,12 +223,10 @@ class MusicDetector:
                 risk_score += 25
                 indicators.append(f'High-risk title: "{matches[0]}"')
         
-        # Check high-risk channel patterns
-        for pattern in self.high_risk_compiled['channel']:
-            matches = pattern.findall(channel_name)
-            if matches:
-                risk_score += 30
-                indicators.append(f'High-risk channel: "{matches[0]}"')
+        # High-risk channel patterns
+        for indicator in channel['high_risk']:
+            risk_score += 30
+            indicators.append(indicator)
         
         # Check high-risk description patterns
         if description:
@@ -198,14 +243,12 @@ class MusicDetector:
                 risk_score += 10
                 indicators.append(f'Medium-risk title: "{matches[0]}"')
         
-        for pattern in self.medium_risk_compiled['channel']:
-            matches = pattern.findall(channel_name)
-            if matches:
-                risk_score += 15
-                indicators.append(f'Medium-risk channel: "{matches[0]}"')
+        for indicator in channel['medium_risk']:
+            risk_score += 15
+            indicators.append(indicator)
         
-        # Check for suspicious channel naming patterns
-        if self._is_suspicious_channel(channel_name):
+        # Suspicious channel naming patterns
+        if channel['suspicious']:
             risk_score += 15
             indicators.append('Suspicious channel name pattern')
         
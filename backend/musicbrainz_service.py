@@ -8,6 +8,8 @@ import time
 from typing import List, Dict, Optional
 from urllib.parse import quote
 
+from metrics import MUSICBRAINZ_API
+
 
 class MusicBrainzService:
     """
@@ -38,7 +40,8 @@ class MusicBrainzService:
         """Make request to MusicBrainz API with rate limiting"""
         self._rate_limit()
         
-        response = requests.get(
+        response = MUSICBRAINZ_API.call(
+            requests.get,
             f"{self.base_url}/{endpoint}",
             headers=self.headers,
             params=params
@@ -0,0 +1,260 @@
+"""
+Profiling
+Opt-in sampling profiler for sweeps, scans and background jobs
+
+A daemon thread looks at the profiled thread's stack every few milliseconds
+(sys._current_frames) and counts identical stacks. Unlike cProfile it sees
+wall time - a search blocked on HTTP shows up as socket frames, not as
+nothing - and it costs the profiled code nothing between samples. Threads
+of the ingest fetch/detect pools are sampled too while they run one of the
+`roots` functions, so parallel fetches land in the same profile.
+
+The result is a Profile: collapsed stacks ("a;b;c 42" per line, the input of
+flamegraph.pl, speedscope and inferno), the per-stage wall times of the
+ingest pipeline and a short summary. Finished profiles are written to the
+profiles table (ProfileStore, newest N kept), so any worker can serve the
+download link of a run another worker profiled.
+
+Usage:
+    with Profile('search', store) as profile:
+        results = pipeline.run(sources)
+        profile.stages = results['timings']
+    profile.summary()        # JSON-friendly, includes the download URL
+    profile.collapsed()      # flamegraph-ready text
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame, stop=None, roots=None) -> Optional[str]:
+    """
+    Root-first "file:function;..." for the stack ending at `frame`
+
+    The stack is cut at `stop` (a frame object) or at the outermost frame
+    whose code is in `roots`; with `roots` given and none on the stack,
+    the thread is idle and None is returned.
+    """
+    labels = []
+    found = roots is None
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        if frame is stop:
+            break
+        if roots is not None and frame.f_code in roots:
+            found = True
+            cut = len(labels)
+        frame = frame.f_back
+    if not found:
+        return None
+    if roots is not None:
+        labels = labels[:cut]
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Samples one thread (and busy worker threads) until stopped"""
+
+    def __init__(self, interval: float = 0.005, roots: Sequence[Callable] = ()):
+        self.interval = interval
+        self.root_codes = {getattr(fn, '__code__', fn) for fn in roots}
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = None
+        self._stop_frame = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, stop_frame=None):
+        """Sample the calling thread; its stacks are cut at `stop_frame`"""
+        self._target = threading.get_ident()
+        self._stop_frame = stop_frame
+        self._thread = threading.Thread(target=self._loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own)
+
+    def sample(self, own: int = None):
+        names = None
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if ident == self._target:
+                stack = _collapse(frame, stop=self._stop_frame)
+            elif self.root_codes:
+                stack = _collapse(frame, roots=self.root_codes)
+                if stack is None:
+                    continue
+                if names is None:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                # Pool threads are grouped under their pool name ("ingest_3" -> "ingest")
+                stack = f"[{names.get(ident, 'thread').rstrip('_0123456789')}];{stack}"
+            else:
+                continue
+            self.stacks[stack] += 1
+        self.samples += 1
+
+
+class Profile:
+    """
+    One profiled run: sampled stacks, wall time and ingest stage timings
+
+    Used as a context manager around the work; `stages` is filled in by the
+    caller from the pipeline's timings ({stage: {seconds, batches, items}})
+    before the block ends, since the store saves the profile on exit.
+    """
+
+    def __init__(self, name: str, store: 'ProfileStore' = None, interval: float = 0.005,
+                 roots: Sequence[Callable] = ()):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.store = store
+        self.started_at = None
+        self.seconds = 0.0
+        self.stages = {}
+        self.sampler = StackSampler(interval, roots)
+        self._started = None
+
+    def __enter__(self):
+        self.started_at = datetime.now().isoformat()
+        self._started = time.perf_counter()
+        # Stacks start at the frame that entered the profile, not at the WSGI server
+        self.sampler.start(stop_frame=sys._getframe(1))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sampler.stop()
+        self.seconds = time.perf_counter() - self._started
+        if self.store is not None:
+            self.store.add(self)
+        return False
+
+    @property
+    def samples(self) -> int:
+        return self.sampler.samples
+
+    def collapsed(self) -> str:
+        """Flamegraph input: one "frame;frame;frame count" line per distinct stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common())
+
+    def top_functions(self, limit: int = 10) -> List[Dict]:
+        """Leaf frames by samples (where the time was actually spent)"""
+        leaves = Counter()
+        for stack, count in self.sampler.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [{'function': name, 'samples': count, 'percent': round(count / total * 100, 1)}
+                for name, count in leaves.most_common(limit)]
+
+    def stage_breakdown(self) -> Dict[str, Dict]:
+        """Wall seconds and share of the run per stage, plus time outside the stages"""
+        breakdown = {}
+        for stage, timing in self.stages.items():
+            seconds = timing['seconds'] if isinstance(timing, dict) else timing
+            breakdown[stage] = {'seconds': round(seconds, 4),
+                                'percent': round(seconds / self.seconds * 100, 1) if self.seconds else 0}
+        if breakdown:
+            other = max(self.seconds - sum(s['seconds'] for s in breakdown.values()), 0)
+            breakdown['other'] = {'seconds': round(other, 4),
+                                  'percent': round(other / self.seconds * 100, 1) if self.seconds else 0}
+        return breakdown
+
+    def summary(self) -> Dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'seconds': round(self.seconds, 4),
+            'samples': self.samples,
+            'interval_ms': round(self.sampler.interval * 1000, 3),
+            'stages': self.stage_breakdown(),
+            'top_functions': self.top_functions(),
+            'download': f"/api/admin/profiles/{self.id}"
+        }
+
+
+class ProfileStore:
+    """The most recent finished profiles (summary and collapsed stacks), shared through the database"""
+
+    def __init__(self, database, max_profiles: int = 20):
+        self.db = database
+        self.max_profiles = max_profiles
+        self.ensure_table()
+
+    def ensure_table(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                started_at TEXT,
+                summary TEXT NOT NULL,
+                collapsed TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_profiles_created ON profiles(created_at)")
+
+        conn.commit()
+        conn.close()
+
+    def add(self, profile: Profile):
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO profiles (id, name, started_at, summary, collapsed, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (profile.id, profile.name, profile.started_at, json.dumps(profile.summary()),
+                  profile.collapsed(), datetime.now().isoformat()))
+            cursor.execute("""
+                DELETE FROM profiles
+                WHERE id NOT IN (SELECT id FROM profiles ORDER BY created_at DESC LIMIT ?)
+            """, (self.max_profiles,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"WARNING: saving profile {profile.id} failed: {str(e)}")
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        """Summary of a stored profile"""
+        conn = self.db.get_connection()
+        row = conn.execute("SELECT summary FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+        conn.close()
+        return json.loads(row['summary']) if row else None
+
+    def collapsed(self, profile_id: str) -> Optional[str]:
+        """Flamegraph input of a stored profile"""
+        conn = self.db.get_connection()
+        row = conn.execute("SELECT collapsed FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+        conn.close()
+        return row['collapsed'] if row else None
+
+    def list_profiles(self) -> List[Dict]:
+        conn = self.db.get_connection()
+        rows = conn.execute("SELECT summary FROM profiles ORDER BY created_at DESC LIMIT ?",
+                            (self.max_profiles,)).fetchall()
+        conn.close()
+        return [json.loads(row['summary']) for row in rows]
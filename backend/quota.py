@@ -0,0 +1,280 @@
+"""
+YouTube Quota Accounting
+Ledger of quota units spent per call, endpoint and API key, and a planner
+that fits a sweep into what is left of the daily budget
+
+- QuotaLedger: one row per API call in quota_usage (units, endpoint, key,
+  search label). The quota day follows YouTube's reset at midnight Pacific.
+- QuotaPlanner: ranks keywords/songs by historical yield - flagged videos
+  per 100 units, from search_logs and their daily rollups - and defers what
+  does not fit.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from metrics import QUOTA_UNITS
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:  # no tz database available: Pacific Standard Time
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+# Units per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'playlistItems.list': 1,
+    'channels.list': 1,
+}
+
+# Estimated units per ingest source
+SOURCE_COSTS = {
+    'keyword': 100,       # search.list
+    'song': 101,          # search.list + videos.list (durations)
+    'channel_watch': 1,   # playlistItems.list, first page
+}
+
+DEFAULT_DAILY_QUOTA = 10000
+
+QUOTA_UNITS.preallocate((endpoint, success) for endpoint in QUOTA_COSTS for success in ('true', 'false'))
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-secret id for an API key (the key itself is never stored)"""
+    return 'key-' + hashlib.sha1((api_key or '').encode('utf-8')).hexdigest()[:8]
+
+
+class QuotaLedger:
+    """
+    Quota units spent per call
+
+    Usage:
+        ledger = QuotaLedger(db, daily_limit=10000)
+        ledger.record('search.list', key_id, label='drake leak')
+        ledger.remaining(key_id)
+        ledger.summary()
+
+    daily_limit is per API key; with several keys (track_keys) the budget is
+    the sum of what each configured key has left.
+    """
+
+    def __init__(self, database, daily_limit: int = DEFAULT_DAILY_QUOTA, key_ids: List[str] = None):
+        self.db = database
+        self.daily_limit = daily_limit
+        self.key_ids = []
+        self.track_keys(key_ids or [])
+        self.ensure_tables()
+
+    def track_keys(self, key_ids: List[str]):
+        """Add API keys (fingerprints) whose budgets make up the total"""
+        for key_id in key_ids:
+            if key_id not in self.key_ids:
+                self.key_ids.append(key_id)
+
+    def ensure_tables(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                day TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                key_id TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                units INTEGER NOT NULL,
+                label TEXT,
+                success BOOLEAN DEFAULT 1
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_quota_usage_day_key ON quota_usage(day, key_id)")
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def quota_day(now: datetime = None) -> str:
+        """Quota day (YYYY-MM-DD); YouTube resets quotas at midnight Pacific time"""
+        now = now or datetime.now(timezone.utc)
+        return now.astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+    @staticmethod
+    def resets_at(now: datetime = None) -> str:
+        now = (now or datetime.now(timezone.utc)).astimezone(QUOTA_TIMEZONE)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=QUOTA_TIMEZONE)
+        return midnight.astimezone(timezone.utc).isoformat()
+
+    def record(self, endpoint: str, key_id: str = 'default', units: int = None, label: str = None,
+               success: bool = True):
+        """Record one API call (units default to the endpoint's documented cost)"""
+        units = QUOTA_COSTS.get(endpoint, 1) if units is None else units
+        QUOTA_UNITS.labels(endpoint, 'true' if success else 'false').inc(units)
+        conn = self.db.get_connection()
+        conn.execute("""
+            INSERT INTO quota_usage (day, timestamp, key_id, endpoint, units, label, success)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (self.quota_day(), datetime.now().isoformat(), key_id, endpoint, units, label, int(success)))
+        conn.commit()
+        conn.close()
+
+    def mark_exhausted(self, key_id: str = 'default'):
+        """YouTube answered quotaExceeded: book the rest of today's budget so planners stop"""
+        remaining = self.remaining(key_id)
+        if remaining > 0:
+            self.record('quotaExceeded', key_id, units=remaining, success=False)
+
+    def used(self, key_id: str = None, day: str = None) -> int:
+        query = "SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE day = ?"
+        params = [day or self.quota_day()]
+        if key_id:
+            query += " AND key_id = ?"
+            params.append(key_id)
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        used = cursor.fetchone()[0]
+        conn.close()
+
+        return used
+
+    def remaining_by_key(self) -> Dict[str, int]:
+        """{key_id: units left today} for every tracked key"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key_id, SUM(units) FROM quota_usage WHERE day = ? GROUP BY key_id",
+                       (self.quota_day(),))
+        used = dict(cursor.fetchall())
+        conn.close()
+
+        return {key_id: max(self.daily_limit - used.get(key_id, 0), 0) for key_id in self.key_ids}
+
+    def remaining(self, key_id: str = None) -> int:
+        if key_id:
+            return max(self.daily_limit - self.used(key_id), 0)
+        if self.key_ids:
+            return sum(self.remaining_by_key().values())
+        return max(self.daily_limit - self.used(), 0)
+
+    def status(self) -> Dict:
+        """Today's totals (cheap enough for /api/health)"""
+        keys = self.remaining_by_key()
+        daily_limit = self.daily_limit * max(len(keys), 1)
+        used = self.used()
+        return {
+            'day': self.quota_day(),
+            'daily_limit': daily_limit,
+            'used': used,
+            'remaining': sum(keys.values()) if keys else max(daily_limit - used, 0),
+            'keys': keys,
+            'resets_at': self.resets_at()
+        }
+
+    def summary(self, days: int = 7) -> Dict:
+        """Today's usage by endpoint and key, plus per-day totals for the last `days` days"""
+        today = self.quota_day()
+        since = (datetime.fromisoformat(today) - timedelta(days=days - 1)).date().isoformat()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT endpoint, COUNT(*) AS calls, SUM(units) AS units
+            FROM quota_usage WHERE day = ? GROUP BY endpoint ORDER BY units DESC
+        """, (today,))
+        by_endpoint = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT key_id, COUNT(*) AS calls, SUM(units) AS units
+            FROM quota_usage WHERE day = ? GROUP BY key_id ORDER BY units DESC
+        """, (today,))
+        by_key = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT day, COUNT(*) AS calls, SUM(units) AS units,
+                   SUM(CASE WHEN success = 0 THEN 1 ELSE 0 END) AS failed
+            FROM quota_usage WHERE day >= ? GROUP BY day ORDER BY day DESC
+        """, (since,))
+        history = [dict(row) for row in cursor.fetchall()]
+
+        conn.close()
+
+        return dict(self.status(), by_endpoint=by_endpoint, by_key=by_key, history=history)
+
+
+class QuotaPlanner:
+    """
+    Fits a sweep into the remaining budget, most productive sources first
+
+    Yield is flagged videos per 100 units over past runs (search_logs), with one
+    optimistic pseudo-run so sources that were never searched still get a turn.
+    """
+
+    def __init__(self, database, ledger: QuotaLedger, reserve_units: int = 0):
+        self.db = database
+        self.ledger = ledger
+        self.reserve_units = reserve_units
+
+    def source_yields(self, labels: List[str], unit_cost: int) -> Dict[str, Dict]:
+        """{label: {'runs', 'new', 'flagged', 'yield'}} from search_logs and search_log_daily"""
+        stats = {label: {'runs': 0, 'new': 0, 'flagged': 0} for label in labels}
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        for start in range(0, len(labels), 400):
+            chunk = labels[start:start + 400]
+            placeholders = ','.join('?' * len(chunk))
+            # Only runs that recorded their outcome count (older log rows have no counts);
+            # raw logs plus the daily rollups of logs past the retention window
+            cursor.execute(f"""
+                SELECT keyword, SUM(runs) AS runs, SUM(new) AS new, SUM(flagged) AS flagged
+                FROM (
+                    SELECT keyword, COUNT(flagged_count) AS runs,
+                           COALESCE(SUM(new_count), 0) AS new, COALESCE(SUM(flagged_count), 0) AS flagged
+                    FROM search_logs
+                    WHERE keyword IN ({placeholders}) AND success = 1
+                    GROUP BY keyword
+                    UNION ALL
+                    SELECT keyword, SUM(measured_runs), SUM(new_count), SUM(flagged_count)
+                    FROM search_log_daily
+                    WHERE keyword IN ({placeholders})
+                    GROUP BY keyword
+                )
+                GROUP BY keyword
+            """, chunk + chunk)
+            for row in cursor.fetchall():
+                stats[row['keyword']].update(runs=row['runs'], new=row['new'], flagged=row['flagged'])
+        conn.close()
+
+        for entry in stats.values():
+            entry['yield'] = round(100 * (entry['flagged'] + 1) / ((entry['runs'] + 1) * unit_cost), 3)
+        return stats
+
+    def plan(self, labels: List[str], unit_cost: int, budget: int = None) -> Dict:
+        """
+        Split labels into the ones to run now and the ones deferred
+
+        Returns:
+            dict with run (labels, best yield first), deferred, budget, estimated_units
+            and yields ({label: stats})
+        """
+        labels = list(dict.fromkeys(labels))
+        if budget is None:
+            budget = self.ledger.remaining() - self.reserve_units
+        budget = max(budget, 0)
+
+        yields = self.source_yields(labels, unit_cost)
+        ranked = sorted(labels, key=lambda label: (-yields[label]['yield'], -yields[label]['flagged']))
+        affordable = budget // unit_cost if unit_cost else len(ranked)
+
+        return {
+            'run': ranked[:affordable],
+            'deferred': ranked[affordable:],
+            'budget': budget,
+            'estimated_units': min(len(ranked), affordable) * unit_cost,
+            'yields': yields
+        }
@@ -0,0 +1,36 @@
+"""
+Standalone scheduler process
+Runs the persistent SchedulerService outside the web workers
+
+Started by gunicorn.conf.py; can also be run on its own:
+    python run_scheduler.py
+"""
+
+import signal
+import threading
+
+from app import services
+
+scheduler = services.scheduler
+
+
+def main():
+    stop = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"Scheduler: received signal {signum}, shutting down")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    scheduler.start()
+    print(f"Scheduler: running as {scheduler.owner_id}")
+
+    stop.wait()
+    # Let in-flight sweeps finish so their runs are recorded
+    scheduler.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    main()
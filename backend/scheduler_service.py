@@ -0,0 +1,299 @@
+"""
+Scheduler Service
+Persistent, multi-worker-safe scheduling for recurring sweeps
+
+Schedules live in SQLite (scheduled_jobs), so they survive restarts.
+Every process runs a lightweight APScheduler tick, but only the process
+holding the leader lock (scheduler_locks) executes due jobs, and each run
+is claimed atomically so the same job never runs twice at once.
+"""
+
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+
+class SchedulerService:
+    """
+    Runs registered job handlers on their stored interval
+
+    Usage:
+        scheduler = SchedulerService(db)
+        scheduler.register('keyword_sweep', run_sweep)
+        scheduler.schedule('keyword_sweep', interval_hours=24)
+        scheduler.register('log_rollup', rollup, interval_hours=24)  # default schedule
+        scheduler.start()
+    """
+
+    LEADER_LOCK = 'scheduler_leader'
+
+    def __init__(self, database, tick_seconds: int = 30, lease_seconds: int = 90,
+                 max_runtime_hours: float = 6):
+        self.db = database
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.max_runtime_hours = max_runtime_hours
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers = {}
+        self.default_intervals = {}
+        self._running = {}
+        self._ticker = None
+        self.ensure_tables()
+
+    def ensure_tables(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                id TEXT PRIMARY KEY,
+                enabled BOOLEAN DEFAULT 1,
+                interval_hours REAL NOT NULL,
+                next_run TEXT,
+                last_run TEXT,
+                last_status TEXT,
+                last_result TEXT,
+                running_owner TEXT,
+                running_since TEXT
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scheduler_locks (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at TEXT NOT NULL
+            )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # JOB DEFINITIONS
+    # =========================================================================
+
+    def register(self, job_id: str, handler: Callable, interval_hours: float = None):
+        """
+        Register the callable that runs a job (returns an optional result dict)
+        With interval_hours, start() creates that schedule unless the job is already configured.
+        """
+        self.handlers[job_id] = handler
+        if interval_hours is not None:
+            self.default_intervals[job_id] = interval_hours
+
+    def schedule(self, job_id: str, interval_hours: float, enabled: bool = True) -> Dict:
+        """Create or update a job schedule; the first run is one interval from now"""
+        next_run = (datetime.now() + timedelta(hours=interval_hours)).isoformat()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO scheduled_jobs (id, enabled, interval_hours, next_run)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                enabled = excluded.enabled,
+                interval_hours = excluded.interval_hours,
+                next_run = excluded.next_run
+        """, (job_id, int(enabled), interval_hours, next_run))
+        conn.commit()
+        conn.close()
+
+        return self.get_job(job_id)
+
+    def ensure_scheduled(self, job_id: str, interval_hours: float):
+        """Create a default schedule unless the job is already configured"""
+        if not self.get_job(job_id):
+            self.schedule(job_id, interval_hours)
+
+    def disable(self, job_id: str) -> bool:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("UPDATE scheduled_jobs SET enabled = 0 WHERE id = ?", (job_id,))
+        conn.commit()
+        success = cursor.rowcount > 0
+        conn.close()
+
+        return success
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scheduled_jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return self._job_to_dict(row) if row else None
+
+    def get_jobs(self) -> List[Dict]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scheduled_jobs ORDER BY id")
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [self._job_to_dict(row) for row in rows]
+
+    def _job_to_dict(self, row) -> Dict:
+        job = dict(row)
+        job['enabled'] = bool(job['enabled'])
+        job['running'] = job['running_since'] is not None
+        job['last_result'] = json.loads(job['last_result']) if job['last_result'] else None
+        return job
+
+    # =========================================================================
+    # LEADER LOCK + RUN CLAIMS
+    # =========================================================================
+
+    def acquire_leadership(self) -> bool:
+        """Take or renew the leader lease; only one process holds it at a time"""
+        now = datetime.now()
+        expires_at = (now + timedelta(seconds=self.lease_seconds)).isoformat()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO scheduler_locks (name, owner, expires_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                expires_at = excluded.expires_at
+            WHERE scheduler_locks.owner = excluded.owner
+               OR scheduler_locks.expires_at < ?
+        """, (self.LEADER_LOCK, self.owner_id, expires_at, now.isoformat()))
+        conn.commit()
+        is_leader = cursor.rowcount > 0
+        conn.close()
+
+        return is_leader
+
+    def release_leadership(self):
+        conn = self.db.get_connection()
+        conn.execute("DELETE FROM scheduler_locks WHERE name = ? AND owner = ?",
+                     (self.LEADER_LOCK, self.owner_id))
+        conn.commit()
+        conn.close()
+
+    def _claim_due_jobs(self) -> List[str]:
+        """Atomically mark due jobs as running by this process"""
+        now = datetime.now()
+        stale_before = (now - timedelta(hours=self.max_runtime_hours)).isoformat()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id FROM scheduled_jobs
+            WHERE enabled = 1 AND next_run <= ?
+        """, (now.isoformat(),))
+        due = [row['id'] for row in cursor.fetchall()]
+
+        claimed = []
+        for job_id in due:
+            if job_id not in self.handlers:
+                continue
+            # A run that never finished (crashed worker) is reclaimable after max_runtime
+            cursor.execute("""
+                UPDATE scheduled_jobs
+                SET running_owner = ?, running_since = ?
+                WHERE id = ? AND (running_since IS NULL OR running_since < ?)
+            """, (self.owner_id, now.isoformat(), job_id, stale_before))
+            if cursor.rowcount > 0:
+                claimed.append(job_id)
+
+        conn.commit()
+        conn.close()
+
+        return claimed
+
+    def _finish_run(self, job_id: str, status: str, result):
+        now = datetime.now()
+
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT interval_hours FROM scheduled_jobs WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        interval_hours = row['interval_hours'] if row else 24
+
+        cursor.execute("""
+            UPDATE scheduled_jobs
+            SET running_owner = NULL,
+                running_since = NULL,
+                last_run = ?,
+                next_run = ?,
+                last_status = ?,
+                last_result = ?
+            WHERE id = ? AND running_owner = ?
+        """, (now.isoformat(),
+              (now + timedelta(hours=interval_hours)).isoformat(),
+              status,
+              json.dumps(result, default=str) if result is not None else None,
+              job_id,
+              self.owner_id))
+        conn.commit()
+        conn.close()
+
+    # =========================================================================
+    # EXECUTION
+    # =========================================================================
+
+    def tick(self):
+        """Run every due job if this process is the leader"""
+        if not self.acquire_leadership():
+            return []
+
+        claimed = self._claim_due_jobs()
+        for job_id in claimed:
+            thread = threading.Thread(target=self._run_job, args=(job_id,),
+                                      name=f"scheduled-{job_id}", daemon=True)
+            self._running[job_id] = thread
+            thread.start()
+
+        return claimed
+
+    def _run_job(self, job_id: str):
+        print(f"Scheduler: running '{job_id}'")
+        try:
+            result = self.handlers[job_id]()
+            self._finish_run(job_id, 'success', result)
+        except Exception as e:
+            print(f"Scheduler: '{job_id}' failed: {str(e)}")
+            self._finish_run(job_id, 'error', {'error': str(e)})
+        finally:
+            self._running.pop(job_id, None)
+
+    def start(self):
+        """Create missing default schedules and start the background tick in this process"""
+        if self._ticker:
+            return
+
+        for job_id, interval_hours in self.default_intervals.items():
+            self.ensure_scheduled(job_id, interval_hours)
+
+        self._ticker = BackgroundScheduler()
+        self._ticker.add_job(
+            self.tick,
+            'interval',
+            seconds=self.tick_seconds,
+            id='scheduler_tick',
+            max_instances=1,
+            coalesce=True
+        )
+        self._ticker.start()
+
+    def shutdown(self, wait: bool = False):
+        """Stop ticking and give up the leader lease"""
+        if self._ticker:
+            self._ticker.shutdown(wait=wait)
+            self._ticker = None
+
+        if wait:
+            for thread in list(self._running.values()):
+                thread.join()
+
+        self.release_leadership()
@@ -0,0 +1,63 @@
+"""
+Serialization
+Fast JSON encoding for the API
+
+- OrjsonProvider: Flask JSON provider backed by orjson (falls back to the
+  stdlib provider when orjson is not installed)
+- table_payload: turns (columns, row tuples) straight into a JSON-ready
+  payload without building model objects, either as records (the default
+  list-of-objects shape) or column-oriented (?format=columns)
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed jsonify; keys keep insertion (model field) order"""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # Encode straight to bytes; no str round-trip
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def rows_to_records(columns: Sequence[str], rows: List[Tuple], bool_columns: Sequence[str] = ()) -> List[Dict]:
+    """[{column: value}] - same shape as [model.to_dict() for model in ...]"""
+    records = [dict(zip(columns, row)) for row in rows]
+    for column in bool_columns:
+        for record in records:
+            record[column] = bool(record[column])
+    return records
+
+
+def rows_to_columns(columns: Sequence[str], rows: List[Tuple], bool_columns: Sequence[str] = ()) -> Dict:
+    """{'count': n, 'columns': [...], 'data': {column: [values]}} - compact, one array per column"""
+    transposed = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for column, values in zip(columns, transposed):
+        data[column] = [bool(v) for v in values] if column in bool_columns else list(values)
+    return {'count': len(rows), 'columns': list(columns), 'data': data}
+
+
+def table_payload(columns: Sequence[str], rows: List[Tuple], fmt: str = None, bool_columns: Sequence[str] = ()):
+    """Records by default, column-oriented when fmt == 'columns'"""
+    if fmt == 'columns':
+        return rows_to_columns(columns, rows, bool_columns)
+    return rows_to_records(columns, rows, bool_columns)
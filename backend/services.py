@@ -0,0 +1,345 @@
+"""
+Service Registry
+Lazily constructed, memoised service singletons for the Flask app
+
+Nothing is built at import time. Each service is created on first access
+(thread-safe, once per process), so importing app.py no longer pays for the
+database migrations, the n-gram backfill, the known-videos filter or the
+YouTube client. Spotify's credential check (a network token request) runs
+on a background thread instead of blocking startup.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List
+
+
+class lazy:
+    """Service property built on first access and memoised on the registry"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __get__(self, registry, owner):
+        if registry is None:
+            return self
+
+        instances = registry._instances
+        if self.name in instances:
+            return instances[self.name]
+
+        # One lock per service: dependencies are built under their own locks
+        lock = registry._locks.setdefault(self.name, threading.Lock())
+        with lock:
+            if self.name not in instances:
+                start = time.perf_counter()
+                instances[self.name] = self.factory(registry)
+                registry.init_times[self.name] = round(time.perf_counter() - start, 4)
+            return instances[self.name]
+
+
+class _LazyListener:
+    """
+    Forwards Database change events to a service, building it on the first event
+
+    A service built by the event itself may backfill from the (already committed)
+    tables; it then sets `backfilled` and the triggering event is not applied twice.
+    """
+
+    def __init__(self, registry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __getattr__(self, event):
+        if not event.startswith('on_'):
+            raise AttributeError(event)
+        built = self.name in self.registry._instances
+        service = getattr(self.registry, self.name)
+        if not built and getattr(service, 'backfilled', False):
+            return lambda *args: None
+        return getattr(service, event)
+
+
+class Services:
+    """
+    Holds every backend service; attribute names match the old app.py globals
+
+    Usage:
+        services = Services()
+        services.db.get_all_artists()      # Database built (and migrated) here
+        services.start_background()        # credential checks + warm-up
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = {
+            'DATABASE_PATH': os.getenv('DATABASE_PATH', 'videos.db'),
+            # postgresql://... shares one database between replicas (DATABASE_PATH is then unused)
+            'DATABASE_URL': os.getenv('DATABASE_URL', ''),
+            'DATABASE_POOL_SIZE': int(os.getenv('DATABASE_POOL_SIZE', 10)),
+            'YOUTUBE_API_KEY': os.getenv('YOUTUBE_API_KEY', ''),
+            # Extra keys (comma-separated), rotated with YOUTUBE_API_KEY by quota left
+            'YOUTUBE_API_KEYS': os.getenv('YOUTUBE_API_KEYS', ''),
+            'YOUTUBE_KEY_CONCURRENCY': int(os.getenv('YOUTUBE_KEY_CONCURRENCY', 2)),
+            'KNOWN_VIDEOS_CAPACITY': int(os.getenv('KNOWN_VIDEOS_CAPACITY', 1_000_000)),
+            'INGEST_WORKERS': int(os.getenv('INGEST_WORKERS', 4)),
+            'INGEST_FETCH_EXECUTOR': os.getenv('INGEST_FETCH_EXECUTOR', 'thread'),
+            'INGEST_DETECT_EXECUTOR': os.getenv('INGEST_DETECT_EXECUTOR', 'inline'),
+            'CREDENTIAL_CHECK_TIMEOUT': float(os.getenv('CREDENTIAL_CHECK_TIMEOUT', 15)),
+            'RESPONSE_CACHE_TTL': float(os.getenv('RESPONSE_CACHE_TTL', 60)),
+            'RESPONSE_CACHE_MAX_MB': float(os.getenv('RESPONSE_CACHE_MAX_MB', 32)),
+            'CHANNEL_WATCH_THRESHOLD': int(os.getenv('CHANNEL_WATCH_THRESHOLD', 3)),
+            'CHANNEL_WATCH_MAX_PAGES': int(os.getenv('CHANNEL_WATCH_MAX_PAGES', 4)),
+            'YOUTUBE_DAILY_QUOTA': int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000)),
+            'QUOTA_RESERVE_UNITS': int(os.getenv('QUOTA_RESERVE_UNITS', 0)),
+            # Raw search logs older than this are rolled up into daily per-keyword rows
+            'LOG_RETENTION_DAYS': int(os.getenv('LOG_RETENTION_DAYS', 30)),
+            # Hot backups (default: backups/ next to the database file), newest N kept
+            'BACKUP_DIR': os.getenv('BACKUP_DIR', ''),
+            'BACKUP_KEEP': int(os.getenv('BACKUP_KEEP', 7)),
+            # ?profile=1 runs: stack sampling interval and how many profiles are kept in the profiles table
+            'PROFILE_INTERVAL_MS': float(os.getenv('PROFILE_INTERVAL_MS', 5)),
+            'PROFILE_HISTORY': int(os.getenv('PROFILE_HISTORY', 20)),
+        }
+        self.config.update(config or {})
+        # job_id -> {'handler', 'interval_hours' (default schedule), 'dialects'}; filled by app.py
+        self.scheduled_jobs = {}
+
+        self._instances = {}
+        self._locks = {}
+        self.init_times = {}
+
+        self._spotify_ok = False
+        self._spotify_checked = threading.Event()
+        self._checks_started = False
+        self._checks_lock = threading.Lock()
+
+    def configure(self, **overrides):
+        """Override config before any service has been built"""
+        if self._instances:
+            raise RuntimeError(f"Services already initialised: {sorted(self._instances)}")
+        self.config.update(overrides)
+
+    # =========================================================================
+    # SERVICES
+    # =========================================================================
+
+    @lazy
+    def db(self):
+        """SQLite file, or PostgreSQL when DATABASE_URL is set (see storage.py)"""
+        from storage import create_database
+        database = create_database(self.config['DATABASE_URL'], self.config['DATABASE_PATH'],
+                                   pool_size=self.config['DATABASE_POOL_SIZE'])
+        # Derived indexes must see every write, even before they are first used
+        database.add_listener(_LazyListener(self, 'keyword_learner'))
+        database.add_listener(_LazyListener(self, 'known_videos'))
+        database.add_listener(_LazyListener(self, 'channels'))
+        return database
+
+    @lazy
+    def youtube_service(self):
+        """YouTubeService, or None when no API key is configured"""
+        from youtube_service import YouTubeService
+        try:
+            return YouTubeService(self.api_keys, quota_ledger=self.quota_ledger,
+                                  concurrency=self.config['YOUTUBE_KEY_CONCURRENCY'])
+        except ValueError as e:
+            print(f"WARNING: {str(e)}")
+            return None
+
+    @lazy
+    def quota_ledger(self):
+        """YouTube quota units spent per call, endpoint and key"""
+        from quota import QuotaLedger
+        from quota import key_fingerprint
+        return QuotaLedger(self.db, daily_limit=self.config['YOUTUBE_DAILY_QUOTA'],
+                           key_ids=[key_fingerprint(api_key) for api_key in self.api_keys])
+
+    @lazy
+    def quota_planner(self):
+        """Fits sweeps into the remaining daily quota, best-yielding sources first"""
+        from quota import QuotaPlanner
+        return QuotaPlanner(self.db, self.quota_ledger, reserve_units=self.config['QUOTA_RESERVE_UNITS'])
+
+    @property
+    def api_keys(self) -> List[str]:
+        """YOUTUBE_API_KEY followed by YOUTUBE_API_KEYS, without blanks or duplicates"""
+        keys = [self.config['YOUTUBE_API_KEY']] + self.config['YOUTUBE_API_KEYS'].split(',')
+        return list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+
+    @property
+    def api_configured(self) -> bool:
+        return self.youtube_service is not None
+
+    @lazy
+    def email_service(self):
+        from email_service import EmailService
+        return EmailService()
+
+    @lazy
+    def music_detector(self):
+        from music_detector import MusicDetector
+        return MusicDetector()
+
+    @lazy
+    def known_videos(self):
+        """Membership filter of stored video_ids so duplicates skip detection and inserts"""
+        from known_videos import KnownVideoFilter
+        return KnownVideoFilter(self.db, capacity=self.config['KNOWN_VIDEOS_CAPACITY'])
+
+    @lazy
+    def channels(self):
+        """Channel registry: per-channel counters, cached channel verdicts and the watch list"""
+        from channels import ChannelRegistry
+        return ChannelRegistry(self.db, self.music_detector,
+                               watch_threshold=self.config['CHANNEL_WATCH_THRESHOLD'])
+
+    @lazy
+    def keyword_learner(self):
+        """Keyword learning (keeps its n-gram index in sync with video writes)"""
+        from keyword_learning import KeywordLearning
+        return KeywordLearning(self.db)
+
+    @lazy
+    def ingest_pipeline(self):
+        """Ingestion pipeline shared by keyword search, song search and scheduled sweeps"""
+        from ingest import IngestPipeline, make_executor
+        workers = self.config['INGEST_WORKERS']
+        # Fetches can run in threads: each call borrows its own client from the key pool
+        return IngestPipeline(self.db, self.music_detector, self.email_service, executors={
+            'fetch': make_executor(self.config['INGEST_FETCH_EXECUTOR'], workers),
+            'detect': make_executor(self.config['INGEST_DETECT_EXECUTOR'], workers)
+        }, known_videos=self.known_videos, channels=self.channels)
+
+    @lazy
+    def spotify_service(self):
+        """SpotifyService (no network until used; see spotify_configured)"""
+        from spotify_service import SpotifyService
+        return SpotifyService()
+
+    @property
+    def spotify_configured(self) -> bool:
+        """Result of the background credential check (waits for it if still running)"""
+        self.start_credential_checks()
+        self._spotify_checked.wait(self.config['CREDENTIAL_CHECK_TIMEOUT'])
+        return self._spotify_ok
+
+    def spotify_status(self):
+        """Non-blocking check result: True/False, or None while the check is running"""
+        self.start_credential_checks()
+        return self._spotify_ok if self._spotify_checked.is_set() else None
+
+    @lazy
+    def musicbrainz_service(self):
+        """MusicBrainz (always available, no auth needed)"""
+        from musicbrainz_service import MusicBrainzService
+        return MusicBrainzService()
+
+    @lazy
+    def web_scraper_service(self):
+        """Deezer + text parsing (always available)"""
+        from web_scraper_service import WebScraperService
+        return WebScraperService()
+
+    @lazy
+    def auto_update_service(self):
+        from auto_update_service import AutoUpdateService
+        return AutoUpdateService(self.db, self.spotify_service, self.musicbrainz_service)
+
+    @lazy
+    def job_manager(self):
+        """Background jobs, stored in the database so every worker can report their progress"""
+        from background_jobs import JobManager
+        return JobManager(self.db, profiler=self.profiler)
+
+    @lazy
+    def profiles(self):
+        """Recent ?profile=1 runs (collapsed stacks + stage timings), served by /api/admin/profiles"""
+        from profiling import ProfileStore
+        return ProfileStore(self.db, self.config['PROFILE_HISTORY'])
+
+    def profiler(self, name: str):
+        """A Profile for one run, stored in self.profiles when it finishes; ingest pool threads included"""
+        from ingest import INGEST_TASKS
+        from profiling import Profile
+        return Profile(name, self.profiles, self.config['PROFILE_INTERVAL_MS'] / 1000, roots=INGEST_TASKS)
+
+    @lazy
+    def unified_import(self):
+        """Unified import (Spotify + Deezer + MusicBrainz fallback)"""
+        from unified_import_service import UnifiedImportService
+        return UnifiedImportService(
+            spotify_service=self.spotify_service if self.spotify_configured else None,
+            musicbrainz_service=self.musicbrainz_service,
+            web_scraper_service=self.web_scraper_service
+        )
+
+    @lazy
+    def response_cache(self):
+        """Version-validated cache for read endpoints (ETag/304 + compression)"""
+        from http_cache import ResponseCache
+        return ResponseCache(self.db, ttl_seconds=self.config['RESPONSE_CACHE_TTL'],
+                             max_bytes=int(self.config['RESPONSE_CACHE_MAX_MB'] * 1024 * 1024))
+
+    @lazy
+    def scheduler(self):
+        """Persistent scheduler (one leader across workers) with the handlers in scheduled_jobs"""
+        from scheduler_service import SchedulerService
+        scheduler = SchedulerService(self.db)
+        for job_id, job in self.scheduled_jobs.items():
+            if self.db.dialect in job.get('dialects', (self.db.dialect,)):
+                scheduler.register(job_id, job['handler'], job.get('interval_hours'))
+        return scheduler
+
+    @lazy
+    def maintenance(self):
+        """Database upkeep: integrity check, hot backup, incremental vacuum, ANALYZE"""
+        from maintenance import DatabaseMaintenance
+        return DatabaseMaintenance(self.db, backup_dir=self.config['BACKUP_DIR'] or None,
+                                   keep_backups=self.config['BACKUP_KEEP'])
+
+    # =========================================================================
+    # BACKGROUND STARTUP WORK
+    # =========================================================================
+
+    def start_credential_checks(self):
+        """Check third-party credentials on a background thread (once)"""
+        with self._checks_lock:
+            if self._checks_started:
+                return
+            self._checks_started = True
+
+        threading.Thread(target=self._check_credentials, name='credential-check', daemon=True).start()
+
+    def _check_credentials(self):
+        try:
+            self._spotify_ok = self.spotify_service.test_credentials()
+        except Exception as e:
+            print(f"WARNING: Spotify credential check failed: {str(e)}")
+            self._spotify_ok = False
+        finally:
+            self._spotify_checked.set()
+
+    def warm_up(self):
+        """Build the expensive services ahead of the first request"""
+        for name in ('db', 'response_cache', 'keyword_learner', 'known_videos', 'channels',
+                     'ingest_pipeline', 'youtube_service'):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"WARNING: warming up {name} failed: {str(e)}")
+
+    def start_background(self):
+        """Start credential checks and warm-up without blocking (call after fork)"""
+        self.start_credential_checks()
+        threading.Thread(target=self.warm_up, name='services-warm-up', daemon=True).start()
+
+    def status(self) -> Dict:
+        """Which services are built and how long each took"""
+        return {
+            'initialised': sorted(self._instances),
+            'init_seconds': dict(self.init_times),
+            'spotify_checked': self._spotify_checked.is_set()
+        }
@@ -9,6 +9,8 @@ from typing import List, Dict, Optional
 import os
 from datetime import datetime, timedelta
 
+from metrics import SPOTIFY_API
+
 
 class SpotifyService:
     """
@@ -44,7 +46,7 @@ class SpotifyService:
         }
         data = {"grant_type": "client_credentials"}
         
-        response = requests.post(url, headers=headers, data=data)
+        response = SPOTIFY_API.call(requests.post, url, headers=headers, data=data, timeout=10)
         response.raise_for_status()
         
         result = response.json()
@@ -59,7 +61,7 @@ class SpotifyService:
         token = self._get_access_token()
         headers = {"Authorization": f"Bearer {token}"}
         
-        response = requests.get(f"{self.base_url}/{endpoint}", headers=headers, params=params)
+        response = SPOTIFY_API.call(requests.get, f"{self.base_url}/{endpoint}", headers=headers, params=params)
         response.raise_for_status()
         
         return response.json()
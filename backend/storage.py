@@ -0,0 +1,108 @@
+"""
+Storage Backends
+The interface the app and its services need from a database, and the
+factory that picks a backend from configuration
+
+- Database (database_enhanced.py): SQLite file, one connection per call
+- PostgresDatabase (database_postgres.py): pooled PostgreSQL, for several
+  replicas sharing one database (DATABASE_URL=postgresql://...)
+
+Both pass the same conformance suite (test_storage_conformance.py).
+"""
+
+from typing import Any, List, Optional, Protocol, runtime_checkable
+
+
+@runtime_checkable
+class Storage(Protocol):
+    """
+    Methods used by app.py, KeywordLearning, AutoUpdateService and the other services
+
+    get_connection() returns an object with the sqlite3 connection API
+    (cursor/execute/executemany/commit/rollback/close) that accepts ?
+    placeholders; rows support row['column'] and row[index].
+    """
+
+    dialect: str
+    IntegrityError: type
+
+    # Connections and schema helpers
+    def get_connection(self, row_factory=...) -> Any: ...
+    def create_trigger(self, cursor, name: str, table: str, event: str, body: str): ...
+    def table_columns(self, cursor, table: str) -> List[str]: ...
+    def add_listener(self, listener): ...
+    def get_query_timings(self) -> dict: ...
+
+    # Artists
+    def add_artist(self, name: str, email: str = None, contact_person: str = None,
+                   notes: str = None) -> Optional[int]: ...
+    def get_all_artists(self) -> list: ...
+    def get_artist(self, artist_id: int): ...
+    def update_artist(self, artist_id: int, name: str = None, email: str = None,
+                      contact_person: str = None, notes: str = None, active: bool = None) -> bool: ...
+    def delete_artist(self, artist_id: int) -> bool: ...
+
+    # Videos
+    def add_videos(self, videos: list) -> List[tuple]: ...
+    def get_existing_video_ids(self, video_ids: List[str]) -> set: ...
+    def get_all_videos(self, filters: dict = None) -> list: ...
+    def get_video_table(self, filters: dict = None) -> tuple: ...
+    def get_video_by_id(self, video_id: int): ...
+    def get_video_scan_rows(self, artist_id: int = None) -> List[tuple]: ...
+    def batch_update_videos(self, video_ids: List[int], status: str = None, priority: str = None,
+                            auto_flagged: bool = None) -> int: ...
+    def delete_videos(self, video_ids: List[int]) -> int: ...
+    def clear_all_videos(self) -> int: ...
+
+    # Keywords
+    def add_keyword(self, keyword: str, artist_id: int = None, auto_flag: bool = False,
+                    priority: str = "Medium") -> Optional[int]: ...
+    def bulk_add_keywords(self, keywords: List[dict]) -> dict: ...
+    def get_all_keywords(self, artist_id: int = None) -> list: ...
+    def get_keyword_table(self, artist_id: int = None) -> tuple: ...
+    def get_active_keywords(self, artist_id: int = None) -> List[str]: ...
+    def update_keyword(self, keyword_id: int, active: bool = None, auto_flag: bool = None,
+                       priority: str = None) -> bool: ...
+    def delete_keyword(self, keyword_id: int) -> bool: ...
+    def clear_keywords(self, artist_id: int = None) -> int: ...
+
+    # Songs
+    def add_song(self, song_name: str, artist_name: str, artist_id: int = None,
+                 auto_flag: bool = False, priority: str = "Medium", duration_ms: int = None) -> Optional[int]: ...
+    def bulk_add_songs(self, songs: List[dict]) -> dict: ...
+    def get_all_songs(self, artist_id: int = None) -> list: ...
+    def get_song_table(self, artist_id: int = None) -> tuple: ...
+    def get_active_songs(self, artist_id: int = None) -> list: ...
+    def update_song(self, song_id: int, active: bool = None, auto_flag: bool = None,
+                    priority: str = None) -> bool: ...
+    def delete_song(self, song_id: int) -> bool: ...
+    def clear_songs(self, artist_id: int = None) -> int: ...
+
+    # Auto-flag rules
+    def add_auto_flag_rule(self, name: str, conditions: dict, action: str,
+                           description: str = None) -> Optional[int]: ...
+    def get_active_auto_flag_rules(self) -> list: ...
+    def get_all_auto_flag_rules(self) -> list: ...
+    def get_auto_flag_rule_by_name(self, name: str): ...
+    def set_auto_flag_rule_active(self, rule_id: int, active: bool) -> bool: ...
+    def delete_auto_flag_rule(self, rule_id: int) -> bool: ...
+    def apply_auto_flag_rules(self, video, rules: list = None) -> tuple: ...
+
+    # Search logs and stats
+    def add_search_log(self, keyword: str, results_count: int, success: bool,
+                       error_message: Optional[str] = None, artist_id: int = None,
+                       new_count: int = None, flagged_count: int = None): ...
+    def get_search_logs(self, limit: int = 50, artist_id: int = None) -> list: ...
+    def rollup_search_logs(self, retention_days: int = 30, now=None) -> dict: ...
+    def get_search_log_daily(self, days: int = 30, artist_id: int = None, keyword: str = None) -> List[dict]: ...
+    def get_stats(self, artist_id: int = None) -> dict: ...
+
+
+def create_database(database_url: str = '', database_path: str = 'videos.db', pool_size: int = 10):
+    """PostgresDatabase for a postgres:// or postgresql:// URL, otherwise the SQLite file"""
+    if database_url.startswith(('postgres://', 'postgresql://')):
+        from database_postgres import PostgresDatabase
+        return PostgresDatabase(database_url, pool_size=pool_size)
+
+    from database_enhanced import Database
+    return Database(database_path)
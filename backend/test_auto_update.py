@@ -0,0 +1,119 @@
+"""
+Test AutoUpdateService scheduling: next_check, due-artist selection and
+per-source concurrency lanes in update_all_artists
+"""
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from auto_update_service import AutoUpdateService
+from database_enhanced import Database
+
+
+class FakeSource:
+    """get_artist_all_songs stand-in that records how many calls overlap"""
+
+    def __init__(self, songs, delay=0.05):
+        self.songs = songs
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_artist_all_songs(self, artist_name):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.calls.append(artist_name)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {'songs': self.songs + [self.songs[0]], 'total_songs': len(self.songs)}
+
+
+def set_next_check(db, artist_id, next_check):
+    conn = db.get_connection()
+    conn.execute("UPDATE auto_update_config SET next_check = ? WHERE artist_id = ?", (next_check, artist_id))
+    conn.commit()
+    conn.close()
+
+
+def test_next_check_and_due_artists():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'auto_update.db'))
+    service = AutoUpdateService(db)
+
+    assert service.calculate_next_check(None, 'weekly') is None
+    assert service.calculate_next_check('2024-01-01T00:00:00', 'daily') == '2024-01-02T00:00:00'
+    assert service.calculate_next_check('2024-01-01T00:00:00', 'monthly') == '2024-01-31T00:00:00'
+    assert service.calculate_next_check('2024-01-01T00:00:00', 'unknown') == '2024-01-08T00:00:00'
+
+    past = (datetime.now() - timedelta(hours=1)).isoformat()
+    future = (datetime.now() + timedelta(days=1)).isoformat()
+    ids = {name: db.add_artist(name) for name in ('Due', 'Later', 'Never', 'Off')}
+    for artist_id in ids.values():
+        assert service.enable_auto_update(artist_id, 'weekly')
+
+    # enable_auto_update schedules the first check one interval out
+    assert service.get_due_artists() == []
+    assert service.get_auto_update_config(ids['Due'])['next_check'] > datetime.now().isoformat()
+
+    set_next_check(db, ids['Due'], past)
+    set_next_check(db, ids['Later'], future)
+    set_next_check(db, ids['Never'], None)
+    set_next_check(db, ids['Off'], past)
+    assert service.disable_auto_update(ids['Off'])
+
+    due = [config['artist_id'] for config in service.get_due_artists()]
+    assert sorted(due) == sorted([ids['Due'], ids['Never']])
+    assert service.check_if_update_needed(ids['Due']) and service.check_if_update_needed(ids['Never'])
+    assert not service.check_if_update_needed(ids['Later']) and not service.check_if_update_needed(ids['Off'])
+    print("[PASS] next_check and due artists")
+
+
+def test_update_all_artists_lanes():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'auto_update.db'))
+    spotify = FakeSource(['Song A', 'Song B'])
+    musicbrainz = FakeSource(['Track X'])
+    service = AutoUpdateService(db, spotify, musicbrainz, max_workers=8)
+
+    spotify_ids = [db.add_artist(f'Spotify {i}') for i in range(6)]
+    mb_ids = [db.add_artist(f'MusicBrainz {i}') for i in range(3)]
+    for artist_id in spotify_ids:
+        service.enable_auto_update(artist_id, 'daily', 'spotify')
+        set_next_check(db, artist_id, None)
+    for artist_id in mb_ids:
+        service.enable_auto_update(artist_id, 'weekly', 'musicbrainz')
+        set_next_check(db, artist_id, None)
+    db.add_keyword('Song A', artist_id=spotify_ids[0])
+
+    progress = []
+    results = service.update_all_artists(progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert len(results) == 9 and all(r['success'] for r in results)
+    # Lanes cap in-flight requests per provider; Spotify uses both of its lanes
+    assert spotify.max_active == AutoUpdateService.SOURCE_CONCURRENCY['spotify']
+    assert musicbrainz.max_active == AutoUpdateService.SOURCE_CONCURRENCY['musicbrainz']
+    assert len(spotify.calls) == 6 and len(musicbrainz.calls) == 3
+    assert progress[0] == (0, 9) and progress[-1] == (9, 9)
+    assert sorted(done for done, _ in progress[1:]) == list(range(1, 10))
+
+    # Repeated songs are inserted once; existing keywords are skipped
+    by_artist = {r['artist']: r for r in results}
+    assert by_artist['Spotify 0']['new_songs'] == 1 and by_artist['Spotify 1']['new_songs'] == 2
+    assert sorted(db.get_active_keywords(spotify_ids[1])) == ['Song A', 'Song B']
+
+    # Checked artists are scheduled by their frequency and are no longer due
+    assert service.get_due_artists() == []
+    config = service.get_auto_update_config(spotify_ids[1])
+    assert config['next_check'] == service.calculate_next_check(config['last_check'], 'daily')
+    assert config['songs_count'] == 2
+    assert service.update_all_artists() == []
+    print("[PASS] update_all_artists lanes")
+
+
+if __name__ == "__main__":
+    test_next_check_and_due_artists()
+    test_update_all_artists_lanes()
@@ -0,0 +1,176 @@
+"""
+Test the background JobManager: progress and results, failures,
+one active job per name under concurrent starts (within a process and
+across workers sharing the database), stale jobs, bounded history
+"""
+import os
+import tempfile
+import threading
+import time
+
+from background_jobs import JobManager
+from database_enhanced import Database
+
+
+def make_db():
+    return Database(os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.is_active and time.time() < deadline:
+        time.sleep(0.01)
+    assert not job.is_active, f"job {job.name} still {job.status}"
+
+
+def wait_stored(manager, job_id, timeout=5):
+    """Poll like a client hitting another worker"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job and not job.is_active:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still active")
+
+
+def test_job_lifecycle():
+    manager = JobManager(make_db())
+
+    def count_to(job, n):
+        for i in range(n):
+            job.update_progress(i + 1, n, f"step {i + 1}")
+        return {'counted': n}
+
+    def explode(job):
+        raise RuntimeError("boom")
+
+    ok = manager.start('count', count_to, 4)
+    failed = manager.start('explode', explode)
+    wait_for(ok)
+    wait_for(failed)
+
+    state = manager.get(ok.id).to_dict()
+    assert state['status'] == 'completed' and state['result'] == {'counted': 4}
+    assert state['progress'] == {'done': 4, 'total': 4, 'percent': 100.0}
+    assert state['message'] == 'step 4' and state['finished_at']
+    assert failed.status == 'failed' and failed.error == 'boom'
+    assert [j['name'] for j in manager.list_jobs()] == ['explode', 'count']
+    assert [j['id'] for j in manager.list_jobs('count')] == [ok.id]
+    assert manager.get('missing') is None
+    print("[PASS] Job lifecycle")
+
+
+def test_start_unique_under_concurrency():
+    manager = JobManager(make_db())
+    release = threading.Event()
+    runs = []
+
+    def sweep(job):
+        runs.append(job.id)
+        release.wait(5)
+        return 'done'
+
+    barrier = threading.Barrier(16)
+    outcomes = []
+
+    def request():
+        barrier.wait()
+        outcomes.append(manager.start_unique('sweep', sweep))
+
+    threads = [threading.Thread(target=request) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    started = [job for job, was_started in outcomes if was_started]
+    assert len(started) == 1
+    assert {job.id for job, _ in outcomes} == {started[0].id}
+
+    release.set()
+    wait_for(started[0])
+    assert runs == [started[0].id]
+
+    # Finished: the next call starts a new run
+    job, was_started = manager.start_unique('sweep', sweep)
+    assert was_started and job.id != started[0].id
+    wait_for(job)
+    print("[PASS] start_unique under concurrency")
+
+
+def test_jobs_shared_across_workers():
+    db = make_db()
+    # Two managers on one database stand in for two gunicorn workers
+    worker_a = JobManager(db, progress_interval=0)
+    worker_b = JobManager(db)
+    release = threading.Event()
+
+    def run_all(job):
+        job.update_progress(1, 3, 'first artist')
+        release.wait(5)
+        job.update_progress(3, 3)
+        return {'total_new_songs': 7}
+
+    job, started = worker_a.start_unique('auto_update_all', run_all)
+    assert started
+
+    # The other worker sees the running job and will not start a second one
+    deadline = time.time() + 5
+    while worker_b.get(job.id).to_dict()['progress']['done'] != 1 and time.time() < deadline:
+        time.sleep(0.01)
+    polled = worker_b.get(job.id).to_dict()
+    assert polled['status'] == 'running' and polled['message'] == 'first artist'
+    same, started = worker_b.start_unique('auto_update_all', run_all)
+    assert not started and same.id == job.id
+
+    release.set()
+    done = wait_stored(worker_b, job.id)
+    assert done.result == {'total_new_songs': 7} and done.to_dict()['progress']['percent'] == 100.0
+    assert [j['id'] for j in worker_b.list_jobs('auto_update_all')] == [job.id]
+    print("[PASS] Jobs shared across workers")
+
+
+def test_stale_job_expires():
+    db = make_db()
+    crashed = JobManager(db, heartbeat_seconds=60)
+    job, _ = crashed.start_unique('maintenance', lambda job: time.sleep(0.2))
+    # Wait for the final save, not just the in-memory status, before faking the crash
+    wait_stored(JobManager(db), job.id)
+
+    # A worker that died mid-run: active row, heartbeat long gone
+    conn = db.get_connection()
+    conn.execute("UPDATE background_jobs SET status = 'running', finished_at = NULL, heartbeat_at = ?",
+                 ('2000-01-01T00:00:00',))
+    conn.commit()
+    conn.close()
+
+    other = JobManager(db, stale_after_seconds=60)
+    lost = other.get(job.id)
+    assert lost.status == 'failed' and 'worker stopped' in lost.error
+
+    fresh, started = other.start_unique('maintenance', lambda job: 'ok')
+    assert started and fresh.id != job.id
+    assert wait_stored(other, fresh.id).result == 'ok'
+    print("[PASS] Stale job expires")
+
+
+def test_history_bounded():
+    manager = JobManager(make_db(), max_history=3)
+    jobs = []
+    for i in range(4):
+        jobs.append(manager.start(f'job{i}', lambda job: None))
+        wait_for(jobs[-1])
+        time.sleep(0.01)
+
+    assert [j['name'] for j in manager.list_jobs()] == ['job3', 'job2', 'job1']
+    assert manager.get(jobs[0].id) is None
+    print("[PASS] History bounded")
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_start_unique_under_concurrency()
+    test_jobs_shared_across_workers()
+    test_stale_job_expires()
+    test_history_bounded()
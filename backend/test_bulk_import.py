@@ -0,0 +1,57 @@
+"""
+Test bulk keyword/song import: one transaction, duplicates (already stored or
+repeated in the batch) reported by name, unreadable rows reported as errors
+"""
+import os
+import tempfile
+
+from database_enhanced import Database
+
+
+def test_bulk_import():
+    db_path = os.path.join(tempfile.mkdtemp(), 'bulk.db')
+    db = Database(db_path)
+    artist_id = db.add_artist('Drake')
+
+    db.add_song('Hotline Bling', 'Drake', artist_id=artist_id)
+    result = db.bulk_add_songs([
+        {'song_name': 'One Dance', 'artist_name': 'Drake', 'artist_id': artist_id, 'duration_ms': 173000},
+        {'song_name': 'Hotline Bling', 'artist_name': 'Drake'},            # already stored
+        {'song_name': 'Passionfruit', 'artist_name': 'Drake', 'priority': 'High'},
+        {'song_name': 'One Dance', 'artist_name': 'Drake'},                # repeated in the batch
+        {'song_name': '', 'artist_name': 'Drake'},                         # unreadable
+        {'song_name': 'Controlla', 'artist_name': 'Drake', 'active': 'maybe'},
+    ])
+    assert result['added'] == 2
+    assert result['skipped'] == 2
+    assert result['duplicates'] == ['Hotline Bling - Drake', 'One Dance - Drake']
+    assert len(result['errors']) == 2
+
+    songs = {song.song_name: song for song in db.get_all_songs()}
+    assert set(songs) == {'Hotline Bling', 'One Dance', 'Passionfruit'}
+    assert songs['One Dance'].duration_ms == 173000 and songs['One Dance'].artist_id == artist_id
+    assert songs['Passionfruit'].priority == 'High'
+
+    # Keywords follow the UNIQUE(keyword, artist_id) constraint
+    db.add_keyword('drake leak', artist_id=artist_id)
+    result = db.bulk_add_keywords([
+        {'keyword': 'drake leak', 'artist_id': artist_id},
+        {'keyword': 'drake leak', 'artist_id': None},
+        {'keyword': 'drake snippet', 'artist_id': artist_id, 'auto_flag': True},
+        {'keyword': 'drake snippet', 'artist_id': artist_id},
+    ])
+    assert result == {'added': 2, 'skipped': 2, 'duplicates': ['drake leak', 'drake snippet'], 'errors': []}
+    keywords = {(k.keyword, k.artist_id): k for k in db.get_all_keywords()}
+    assert keywords[('drake snippet', artist_id)].auto_flag
+
+    # Large imports stay in one transaction and report every duplicate
+    catalogue = [{'song_name': f"Song {i}", 'artist_name': f"Artist {i % 50}"} for i in range(20000)]
+    result = db.bulk_add_songs(catalogue + catalogue[:500])
+    assert result['added'] == 20000 and result['skipped'] == 500
+    assert len(db.get_all_songs()) == 20003
+
+    print("[PASS] Bulk import")
+
+
+if __name__ == "__main__":
+    test_bulk_import()
@@ -0,0 +1,152 @@
+"""
+Test the channel watch list: threshold/overrides, incremental uploads-playlist polling
+and feeding new uploads through the ingest pipeline
+The YouTube client is faked so no API key is needed
+"""
+import os
+import tempfile
+
+from channels import ChannelRegistry
+from database_enhanced import Database
+from ingest import IngestPipeline
+from music_detector import MusicDetector
+from test_channels import channel_video
+from youtube_service import YouTubeService
+
+
+class FakePlaylistItems:
+    """playlistItems().list(...).execute() over an in-memory uploads playlist (newest first)"""
+
+    def __init__(self, uploads, page_size=2):
+        self.uploads = uploads
+        self.page_size = page_size
+        self.calls = 0
+
+    def playlistItems(self):
+        return self
+
+    def list(self, playlistId, part, maxResults, pageToken=None):
+        self.request = (playlistId, pageToken)
+        return self
+
+    def execute(self):
+        self.calls += 1
+        playlist_id, token = self.request
+        items = self.uploads.get(playlist_id, [])
+        start = int(token or 0)
+        page = items[start:start + self.page_size]
+        response = {'items': [{
+            'snippet': {
+                'title': title, 'channelTitle': 'Leaks Hub', 'publishedAt': published,
+                'resourceId': {'videoId': video_id},
+                'thumbnails': {'medium': {'url': f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"}},
+                'videoOwnerChannelTitle': 'Leaks Hub', 'videoOwnerChannelId': 'UC_leaks'
+            },
+            'contentDetails': {'videoId': video_id, 'videoPublishedAt': published}
+        } for video_id, title, published in page]}
+        if start + self.page_size < len(items):
+            response['nextPageToken'] = str(start + self.page_size)
+        return response
+
+
+def poll(registry, youtube, pipeline, max_pages=4):
+    """Same flow as app.poll_watched_channels"""
+    found = {}
+    for channel in registry.watch_list():
+        videos, cursor, pages = youtube.get_channel_uploads(
+            channel['channel_id'], matched_keyword=f"channel watch: {channel['channel_name']}",
+            since_video_id=channel['last_seen_video_id'], since_published=channel['last_seen_published'],
+            max_pages=registry.poll_pages(channel, max_pages))
+        pipeline.process_batch(videos)
+        registry.record_poll(channel['channel_id'], cursor)
+        found[channel['channel_id']] = [v.video_id for v in videos]
+    return found
+
+
+def test_channel_watch():
+    db_path = os.path.join(tempfile.mkdtemp(), 'watch.db')
+    db = Database(db_path)
+    registry = ChannelRegistry(db, MusicDetector(), watch_threshold=2)
+    db.add_listener(registry)
+    pipeline = IngestPipeline(db, MusicDetector(), channels=registry)
+
+    db.add_videos([
+        channel_video('a1', 'Drake leak', 'UC_leaks', 'Leaks Hub', 'Flagged for Takedown', 80),
+        channel_video('b1', 'Drake audio', 'UC_fan', 'Fan Page', 'Flagged for Takedown', 60),
+    ])
+
+    # Threshold: one flagged upload is not enough
+    assert registry.watch_list() == []
+    db.add_videos([channel_video('a2', 'Drake snippet', 'UC_leaks', 'Leaks Hub', 'Flagged for Takedown', 70)])
+    assert [c['channel_id'] for c in registry.watch_list()] == ['UC_leaks']
+
+    # Overrides win over the threshold, and can be cleared
+    assert registry.set_watch('UC_fan', True)
+    assert {c['channel_id'] for c in registry.watch_list()} == {'UC_leaks', 'UC_fan'}
+    registry.set_watch('UC_fan', None)
+    registry.set_watch('UC_leaks', False)
+    assert registry.watch_list() == []
+    registry.set_watch('UC_leaks', None)
+    assert not registry.set_watch('UC_missing', True)
+
+    youtube = YouTubeService.from_clients({'key-test': [FakePlaylistItems({'UU_leaks': [
+        ('n3', 'Drake unreleased full album', '2024-03-03T00:00:00Z'),
+        ('n2', 'Drake leaked snippet', '2024-03-02T00:00:00Z'),
+        ('a2', 'Drake snippet', '2024-03-01T00:00:00Z'),
+        ('a1', 'Drake leak', '2024-02-01T00:00:00Z'),
+    ]})]})
+
+    # First poll: one page only, new uploads are detected and stored, the cursor is the newest item
+    assert poll(registry, youtube, pipeline) == {'UC_leaks': ['n3', 'n2']}
+    assert youtube.youtube.calls == 1
+    channel = registry.get_channel('UC_leaks')
+    assert channel['last_seen_video_id'] == 'n3' and channel['last_polled_at']
+    stored = {v.video_id: v for v in db.get_all_videos({'channel_id': 'UC_leaks'})}
+    assert stored['n3'].matched_keyword == 'channel watch: Leaks Hub'
+    assert stored['n3'].ai_risk_score > 0
+
+    # Nothing new: stops on the first item
+    assert poll(registry, youtube, pipeline) == {'UC_leaks': []}
+    assert registry.get_channel('UC_leaks')['last_seen_video_id'] == 'n3'
+
+    # New uploads: paged until the cursor is reached
+    youtube.youtube.uploads['UU_leaks'][:0] = [
+        ('n6', 'Drake remix', '2024-03-06T00:00:00Z'),
+        ('n5', 'Drake demo', '2024-03-05T00:00:00Z'),
+        ('n4', 'Drake live', '2024-03-04T00:00:00Z'),
+    ]
+    youtube.youtube.calls = 0
+    assert poll(registry, youtube, pipeline) == {'UC_leaks': ['n6', 'n5', 'n4']}
+    assert youtube.youtube.calls == 2
+    assert registry.get_channel('UC_leaks')['last_seen_video_id'] == 'n6'
+
+    # A deleted cursor item: the publish time still stops the scan
+    del youtube.youtube.uploads['UU_leaks'][0]
+    assert poll(registry, youtube, pipeline) == {'UC_leaks': []}
+
+    print("[PASS] Channel watch list")
+
+
+def test_poll_budget_counts_pages():
+    polled_before = {'channel_id': 'UC_old', 'last_seen_video_id': 'v9'}
+    fresh = {'channel_id': 'UC_new', 'last_seen_video_id': None}
+    watch = [dict(polled_before), dict(fresh), dict(polled_before, channel_id='UC_old2')]
+
+    # Channels with a cursor may page up to max_pages; a new one reads a single page
+    assert ChannelRegistry.poll_pages(polled_before, 4) == 4
+    assert ChannelRegistry.poll_pages(fresh, 4) == 1
+
+    # 6 units left: the first old channel (4) and the new one (1) fit, the next old one waits
+    polled, deferred = ChannelRegistry.fit_quota(watch, 6, 4)
+    assert [c['channel_id'] for c in polled] == ['UC_old', 'UC_new']
+    assert [c['channel_id'] for c in deferred] == ['UC_old2']
+    # Near the end of the quota day: never more than what is left
+    polled, deferred = ChannelRegistry.fit_quota(watch, 3, 4)
+    assert [c['channel_id'] for c in polled] == ['UC_new'] and len(deferred) == 2
+    assert ChannelRegistry.fit_quota(watch, -5, 4) == ([], watch)
+    print("[PASS] Poll budget counts pages")
+
+
+if __name__ == "__main__":
+    test_channel_watch()
+    test_poll_budget_counts_pages()
@@ -0,0 +1,110 @@
+"""
+Test the channel registry: incremental counters, backfill, verdict cache and pipeline use
+"""
+import os
+import tempfile
+
+from channels import ChannelRegistry
+from database_enhanced import Database
+from ingest import IngestPipeline
+from music_detector import MusicDetector
+from test_ingest_pipeline import make_video
+
+
+class CountingDetector(MusicDetector):
+    def __init__(self):
+        super().__init__()
+        self.channel_calls = 0
+
+    def analyze_channel(self, channel_name):
+        self.channel_calls += 1
+        return super().analyze_channel(channel_name)
+
+
+def channel_video(video_id, title, channel_id, channel_name, status='Pending', risk=0):
+    video = make_video(video_id, title, 'drake', channel_name)
+    video.channel_id = channel_id
+    video.status = status
+    video.ai_risk_score = risk
+    return video
+
+
+def counters(registry):
+    return {c['channel_id']: (c['total_videos'], c['flagged_videos'], c['avg_risk_score'])
+            for c in registry.top_offenders(limit=100, include_trusted=True)}
+
+
+def test_channel_registry():
+    db_path = os.path.join(tempfile.mkdtemp(), 'channels.db')
+    db = Database(db_path)
+    detector = CountingDetector()
+    registry = ChannelRegistry(db, detector)
+    db.add_listener(registry)
+
+    db.add_videos([
+        channel_video('a1', 'Drake leak', 'UC_leaks', 'Leaks Hub', 'Flagged for Takedown', 80),
+        channel_video('a2', 'Drake snippet', 'UC_leaks', 'Leaks Hub', 'Flagged for Takedown', 60),
+        channel_video('a3', 'Drake remix', 'UC_leaks', 'Leaks Hub', 'Pending', 10),
+        channel_video('b1', 'Drake audio', 'UC_fan', 'Fan Page', 'Pending', 20),
+    ])
+    assert counters(registry) == {'UC_leaks': (3, 2, 50.0), 'UC_fan': (1, 0, 20.0)}
+    assert registry.top_offenders()[0]['channel_id'] == 'UC_leaks'
+
+    # Status changes and deletes adjust the counters
+    fan_video = db.get_all_videos({'channel_id': 'UC_fan'})[0]
+    db.batch_update_videos([fan_video.id], status='Flagged for Takedown')
+    assert counters(registry)['UC_fan'] == (1, 1, 20.0)
+    pending = [v.id for v in db.get_all_videos({'channel_id': 'UC_leaks', 'status': 'Pending'})]
+    db.delete_videos(pending)
+    assert counters(registry)['UC_leaks'] == (2, 2, 70.0)
+    assert registry.top_offenders(order='flagged_ratio')[0]['flagged_ratio'] == 1.0
+
+    # Incremental counters match a full rebuild
+    incremental = counters(registry)
+    registry.rebuild_counters()
+    assert counters(registry) == incremental
+
+    # Backfill for an existing database
+    conn = db.get_connection()
+    conn.execute("DELETE FROM channels")
+    conn.commit()
+    conn.close()
+    assert counters(ChannelRegistry(db, detector)) == incremental
+
+    # Verdicts: computed once per channel, then served from the table
+    videos = [channel_video(f"c{i}", 'Drake full album', 'UC_free', 'Free Music 4U') for i in range(5)]
+    videos.append(channel_video('d1', 'Drake - Song', 'UC_label', 'Republic Records'))
+    verdicts = registry.verdicts_for(videos)
+    assert detector.channel_calls == 2
+    assert verdicts['UC_label']['trusted']
+    assert verdicts['UC_free']['high_risk']
+    assert registry.verdicts_for(videos) == verdicts
+    assert detector.channel_calls == 2
+
+    # A renamed channel is re-evaluated
+    videos[0].channel_name = 'Drake Topic'
+    assert registry.verdicts_for(videos[:1])['UC_free']['trusted']
+    assert detector.channel_calls == 3
+
+    # The pipeline uses cached verdicts and scores exactly like the uncached detector
+    pipeline = IngestPipeline(db, detector, channels=registry)
+    detector.channel_calls = 0
+    batch = [channel_video(f"p{i}", 'Drake unreleased full album', 'UC_bootleg', 'Bootleg Central')
+             for i in range(4)]
+    assert pipeline.process_batch(batch) == 4
+    assert detector.channel_calls == 1
+    expected = MusicDetector().analyze_video('Drake unreleased full album', 'Bootleg Central')
+    stored = db.get_all_videos({'channel_id': 'UC_bootleg'})
+    assert {v.ai_risk_score for v in stored} == {expected['risk_score']}
+    channel = registry.get_channel('UC_bootleg')
+    assert channel['total_videos'] == 4 and channel['channel_indicators']
+
+    # Clearing videos clears the registry
+    db.clear_all_videos()
+    assert registry.top_offenders(include_trusted=True) == []
+
+    print("[PASS] Channel registry")
+
+
+if __name__ == "__main__":
+    test_channel_registry()
@@ -0,0 +1,52 @@
+"""
+Test song CSV parsing: header resolution (preferred columns, first-column
+fallback), normalised dedup, and text/line/stream inputs agreeing
+"""
+import io
+
+from web_scraper_service import WebScraperService
+
+
+CSV = (
+    '\ufeffTrack #, Title ,Artist,Album\n'   # BOM left in by the caller
+    '1,One Dance,Drake,Views\n'
+    '2,one  dance ,,Views\n'                 # same song once normalised
+    '3,,Drake,Views\n'                       # no title: first column is the fallback
+    '4,"Hotline\nBling",,Views\n'            # quoted newline
+    '5,Controlla,"PARTYNEXTDOOR, Drake"\n'   # short row
+    '\n'
+    '6,Passionfruit,Drake,More Life\n'
+)
+
+
+def test_csv_songs():
+    scraper = WebScraperService()
+
+    assert scraper.resolve_song_columns(['Track #', ' Title ', 'Artist']) == ([1, 0], [2])
+    assert scraper.resolve_song_columns(['name', 'song_name', 'band', 'artist_name']) == ([1, 0, 0], [3, 2])
+
+    result = scraper.parse_csv_songs(CSV, artist_name='Default Artist')
+    assert result['success']
+    songs = [(song['name'], song['artist_name']) for song in result['songs']]
+    assert songs == [
+        ('One Dance', 'Drake'),
+        ('3', 'Drake'),
+        ('Hotline\nBling', 'Default Artist'),
+        ('Controlla', 'PARTYNEXTDOOR, Drake'),
+        ('Passionfruit', 'Drake'),
+    ]
+
+    # Lines and binary streams (any encoding) give the same result
+    assert scraper.parse_csv_songs(io.StringIO(CSV), 'Default Artist')['songs'] == result['songs']
+    for encoding in ('utf-8', 'utf-16', 'cp1252'):
+        stream = io.BytesIO(CSV.lstrip('\ufeff').replace('Controlla', 'Controllà').encode(encoding))
+        parsed = scraper.parse_csv_songs(stream, 'Default Artist')['songs']
+        assert [song['name'] for song in parsed][3] == 'Controllà', encoding
+
+    assert scraper.parse_csv_songs('')['songs'] == []
+
+    print("[PASS] CSV song parsing")
+
+
+if __name__ == "__main__":
+    test_csv_songs()
@@ -0,0 +1,124 @@
+"""
+Test database maintenance: space reclaimed after mass deletes, legacy files
+converted to incremental auto_vacuum, hot backups (pruned, readable) and run history
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+
+from database_enhanced import Database
+from maintenance import DatabaseMaintenance
+
+
+def fill_logs(db, count):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO search_logs (keyword, results_count, success, timestamp) VALUES (?, 10, 1, ?)",
+        [(f"keyword {i} " + 'x' * 200, f"2026-01-01T00:00:{i % 60:02d}") for i in range(count)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_db_maintenance():
+    tmp = tempfile.mkdtemp()
+    db = Database(os.path.join(tmp, 'videos.db'))
+    maintenance = DatabaseMaintenance(db, backup_dir=os.path.join(tmp, 'backups'), keep_backups=2)
+    assert maintenance.file_stats()['auto_vacuum'] == 'incremental'
+    assert maintenance.file_stats()['journal_mode'] == 'wal'
+
+    # Mass delete leaves free pages; the run hands them back
+    fill_logs(db, 20000)
+    conn = db.get_connection()
+    conn.execute("DELETE FROM search_logs")
+    conn.commit()
+    conn.close()
+    fill_logs(db, 100)
+    before = maintenance.file_stats()
+    assert before['freelist_count'] > 500
+
+    run = maintenance.run()
+    assert run['status'] == 'success', run
+    assert list(run['tasks']) == ['integrity', 'backup', 'vacuum', 'optimize']
+    assert run['tasks']['integrity']['ok']
+    assert run['tasks']['vacuum']['mode'] == 'incremental'
+    assert run['reclaimed_bytes'] > 0 and run['tasks']['vacuum']['reclaimed_bytes'] >= run['reclaimed_bytes']
+    assert maintenance.file_stats()['freelist_count'] == 0
+    assert run['tasks']['optimize']['analyzed_tables'] > 0
+    assert all(result['seconds'] >= 0 for result in run['tasks'].values())
+
+    # The backup is a consistent, readable copy taken before the vacuum
+    backup = sqlite3.connect(run['tasks']['backup']['path'])
+    assert backup.execute("SELECT COUNT(*) FROM search_logs").fetchone()[0] == 100
+    assert backup.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+    backup.close()
+
+    # Hot backup while another connection keeps writing: the writer is never
+    # locked out and the copy is one consistent snapshot
+    stop = threading.Event()
+    started = threading.Event()
+    written = []
+    errors = []
+
+    def writer():
+        while not stop.is_set():
+            try:
+                db.add_search_log('live', 1, True)
+                written.append(1)
+                started.set()
+            except Exception as e:
+                errors.append(e)
+
+    fill_logs(db, 20000)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        started.wait(5)
+        results = [maintenance.backup() for _ in range(3)]
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors and len(written) > 1
+    for result in results:
+        copy = sqlite3.connect(result['path'])
+        assert copy.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+        assert copy.execute("SELECT COUNT(*) FROM search_logs WHERE keyword != 'live'").fetchone()[0] == 20100
+        copy.close()
+
+    # Only the newest copies are kept (file names carry the second they were taken)
+    for name in ('videos-20200101-000000.db', 'videos-20200102-000000.db'):
+        open(os.path.join(maintenance.backup_dir, name), 'wb').close()
+    pruned = maintenance.backup()['pruned']
+    assert 'videos-20200101-000000.db' in pruned and len(maintenance.list_backups()) == 2
+
+    # Subset runs, history newest first
+    subset = maintenance.run(['optimize', 'integrity'])
+    assert list(subset['tasks']) == ['integrity', 'optimize']
+    runs = maintenance.get_runs()
+    assert len(runs) == 2 and runs[0]['tasks'].keys() == {'integrity', 'optimize'}
+
+    # A file created before incremental auto_vacuum: the default run leaves it alone
+    # (no full VACUUM holding the write lock); the explicit convert task switches it once
+    legacy_path = os.path.join(tmp, 'legacy.db')
+    conn = sqlite3.connect(legacy_path)
+    conn.execute("CREATE TABLE artists (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+    conn.commit()
+    conn.close()
+    legacy = DatabaseMaintenance(Database(legacy_path), backup_dir=os.path.join(tmp, 'backups'))
+    assert legacy.file_stats()['auto_vacuum'] == 'none'
+    scheduled = legacy.run()
+    assert 'convert' not in scheduled['tasks'] and scheduled['tasks']['vacuum']['mode'] == 'skipped'
+    assert legacy.file_stats()['auto_vacuum'] == 'none'
+    converted = legacy.run(['convert'])
+    assert list(converted['tasks']) == ['convert'] and converted['tasks']['convert']['converted']
+    assert legacy.file_stats()['auto_vacuum'] == 'incremental'
+    assert not legacy.convert()['converted']
+    assert legacy.vacuum()['mode'] == 'incremental'
+
+    print(f"Reclaimed {run['reclaimed_bytes']} bytes; in {run['seconds']}s: {run['tasks']['vacuum']}")
+    print("[PASS] Database maintenance")
+
+
+if __name__ == "__main__":
+    test_db_maintenance()
@@ -0,0 +1,116 @@
+"""
+Test conditional GET, the version-keyed response cache and compression
+"""
+import gzip
+import os
+import tempfile
+
+from flask import Flask, jsonify
+
+from database_enhanced import Database
+from http_cache import ResponseCache
+
+
+def make_app(db, cache):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/artists')
+    def artists():
+        return cache.respond(('artists',), list_artists)
+
+    def list_artists():
+        calls.append(1)
+        return jsonify([a.to_dict() for a in db.get_all_artists()])
+
+    app.after_request(cache.compress_response)
+    return app, calls
+
+
+def test_etag_and_cache_follow_table_versions():
+    db_path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    db = Database(db_path)
+    cache = ResponseCache(db, min_compress_bytes=200)
+    app, calls = make_app(db, cache)
+    client = app.test_client()
+
+    db.add_artist('Drake')
+    first = client.get('/artists')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and len(calls) == 1
+
+    # Unchanged poll: 304, the view does not run
+    again = client.get('/artists', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert len(calls) == 1
+
+    # Same request without the validator: served from the cache
+    assert client.get('/artists').get_json() == first.get_json()
+    assert len(calls) == 1
+
+    # Any write to the table - including raw SQL - changes the ETag
+    conn = db.get_connection()
+    conn.execute("UPDATE artists SET notes = 'signed' WHERE name = 'Drake'")
+    conn.commit()
+    conn.close()
+    changed = client.get('/artists', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()[0]['notes'] == 'signed'
+    assert len(calls) == 2
+
+    # Large bodies are compressed when the client accepts gzip
+    for i in range(20):
+        db.add_artist(f"Artist {i}", notes='x' * 50)
+    compressed = client.get('/artists', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(compressed.get_data())) > len(compressed.get_data())
+
+    print(f"Cache stats: {cache.stats}")
+    print("[PASS] ETag, cache and compression")
+
+
+def test_cache_bounded_by_bytes():
+    db_path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    db = Database(db_path)
+    cache = ResponseCache(db, min_compress_bytes=200, max_bytes=4000, max_entry_bytes=2500)
+    app, calls = make_app(db, cache)
+    client = app.test_client()
+
+    for i in range(10):
+        db.add_artist(f"Artist {i}", notes='x' * 20)
+
+    # Each query string is its own entry; the byte budget evicts before max_entries
+    sizes = []
+    for i in range(5):
+        sizes.append(len(client.get(f'/artists?page={i}').get_data()))
+    assert 4 * sizes[0] > cache.max_bytes
+    assert cache.size_bytes <= cache.max_bytes
+    assert len(cache._entries) < 5
+    assert client.get('/artists?page=0').status_code == 200 and len(calls) == 6
+
+    # Compressed copies count against the budget too
+    before = cache.size_bytes
+    client.get('/artists?page=4', headers={'Accept-Encoding': 'gzip'})
+    assert before < cache.size_bytes <= cache.max_bytes
+
+    # A body above max_entry_bytes is served (with its ETag) but never stored
+    for i in range(20):
+        db.add_artist(f"Big {i}", notes='y' * 100)
+    cache.clear()
+    big = client.get('/artists', headers={'Accept-Encoding': 'gzip'})
+    assert len(gzip.decompress(big.get_data())) > cache.max_entry_bytes
+    assert big.headers['Content-Encoding'] == 'gzip'
+    assert cache.size_bytes == 0 and cache.stats['too_large'] == 1
+    assert client.get('/artists', headers={'If-None-Match': big.headers['ETag']}).status_code == 304
+    calls_before = len(calls)
+    client.get('/artists')
+    assert len(calls) == calls_before + 1
+
+    print(f"Cache stats: {cache.stats}, {cache.size_bytes} bytes")
+    print("[PASS] Cache bounded by bytes")
+
+
+if __name__ == "__main__":
+    test_etag_and_cache_follow_table_versions()
+    test_cache_bounded_by_bytes()
@@ -0,0 +1,99 @@
+"""
+Test the ingestion pipeline shared by keyword search, song search and sweeps
+Fetch is faked so no YouTube API key is needed
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from database_enhanced import Database
+from ingest import IngestPipeline, IngestSource, STAGES, make_executor
+from music_detector import MusicDetector
+from models import Video
+
+
+def make_video(video_id, title, keyword, channel='Some Channel'):
+    return Video(
+        id=None,
+        video_id=video_id,
+        title=title,
+        channel_name=channel,
+        channel_id=f"UC_{video_id}",
+        publish_date=datetime.now().isoformat(),
+        thumbnail_url='',
+        video_url=f"https://www.youtube.com/watch?v={video_id}",
+        matched_keyword=keyword,
+        status='Pending',
+        priority='Medium',
+        artist_id=None,
+        auto_flagged=False,
+        ai_risk_score=0,
+        created_at=datetime.now().isoformat()
+    )
+
+
+def failing_fetch():
+    raise RuntimeError("quota exceeded")
+
+
+def run_pipeline(detect_executor):
+    db_path = os.path.join(tempfile.mkdtemp(), 'ingest.db')
+    db = Database(db_path)
+    db.add_auto_flag_rule('Leak channels', {'channel_name_contains': 'leaks'}, 'critical')
+
+    pipeline = IngestPipeline(db, MusicDetector(), executors={'detect': detect_executor})
+
+    batch = [
+        make_video('a1', 'Drake - Take Care (Official Audio)', 'drake', 'Drake Leaks'),
+        make_video('a2', 'Drake Take Care reaction', 'drake'),
+        make_video('a2', 'Drake Take Care reaction', 'drake'),  # duplicate within the batch
+    ]
+    sources = [
+        IngestSource('drake', lambda: batch, {'keyword': 'drake'}),
+        IngestSource('adele', failing_fetch, {'keyword': 'adele'}),
+    ]
+
+    results = pipeline.run(sources)
+    print(f"Results: {results['sources']}")
+    print(f"Timings: {results['timings']}")
+
+    assert results['total_found'] == 3
+    assert results['total_new'] == 2
+    assert results['sources'][1] == {'keyword': 'adele', 'error': 'quota exceeded'}
+    assert set(results['timings']) == set(STAGES)
+    assert results['timings']['persist']['items'] == 2
+
+    # Rules and AI decisions are applied before persisting
+    leak = [v for v in db.get_all_videos() if v.video_id == 'a1'][0]
+    assert leak.priority == 'Critical'
+    assert leak.status == 'Flagged for Takedown'
+
+    # Already stored videos are dropped before detection on the next run
+    again = pipeline.run(sources[:1])
+    assert again['total_new'] == 0
+    assert again['timings']['detect']['items'] == 0
+
+    logs = db.get_search_logs()
+    assert len(logs) == 3
+    assert sum(1 for log in logs if not log.success) == 1
+
+    return db
+
+
+def test_ingest_pipeline_inline():
+    run_pipeline(make_executor('inline'))
+    print("[PASS] Inline ingestion pipeline")
+
+
+def test_ingest_pipeline_process_pool():
+    executor = make_executor('process', workers=2)
+    try:
+        run_pipeline(executor)
+    finally:
+        executor.shutdown()
+    print("[PASS] Process pool detection")
+
+
+if __name__ == "__main__":
+    test_ingest_pipeline_inline()
+    test_ingest_pipeline_process_pool()
@@ -0,0 +1,70 @@
+"""
+Test the grouped keyword performance report
+Verifies the single-query report matches the per-keyword aggregate
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from database_enhanced import Database
+from keyword_learning import KeywordLearning
+from models import Video
+
+
+def make_video(video_id, keyword, channel, status='Pending', risk=0, artist_id=None):
+    return Video(
+        id=None,
+        video_id=video_id,
+        title=f"{keyword} full album {video_id}",
+        channel_name=channel,
+        channel_id=f"UC_{channel}",
+        publish_date=datetime.now().isoformat(),
+        thumbnail_url='',
+        video_url=f"https://www.youtube.com/watch?v={video_id}",
+        matched_keyword=keyword,
+        status=status,
+        priority='Medium',
+        artist_id=artist_id,
+        auto_flagged=status == 'Flagged for Takedown',
+        ai_risk_score=risk,
+        created_at=datetime.now().isoformat()
+    )
+
+
+def test_keyword_performance_report():
+    db_path = os.path.join(tempfile.mkdtemp(), 'perf.db')
+    db = Database(db_path)
+    learner = KeywordLearning(db)
+
+    db.add_video(make_video('a1', 'drake leak', 'freemusic1', 'Flagged for Takedown', 80, artist_id=1))
+    db.add_video(make_video('a2', 'drake leak', 'freemusic2', 'Pending', 20, artist_id=1))
+    db.add_video(make_video('a3', 'drake mp3', 'uploads99', 'Flagged for Takedown', 90, artist_id=1))
+    db.add_video(make_video('b1', 'adele live', 'concerts', 'Reviewed', 10, artist_id=2))
+
+    report = learner.get_all_keywords_performance()
+    print(f"Report: {[(p['keyword'], p['flag_rate']) for p in report]}")
+
+    # Same numbers as the single-keyword aggregate
+    for perf in report:
+        single = learner.get_keyword_performance(perf['keyword'])
+        assert perf['total_found'] == single['total_found']
+        assert perf['flagged_count'] == single['flagged_count']
+        assert perf['avg_risk_score'] == single['avg_risk_score']
+        assert perf['flag_rate'] == single['flag_rate']
+
+    # Default ordering: flag rate first, then total found
+    assert [p['keyword'] for p in report] == ['drake mp3', 'drake leak', 'adele live']
+
+    # Artist filter, sorting and pagination
+    artist_report = learner.get_all_keywords_performance(artist_id=1, sort_by='total_found')
+    assert [p['keyword'] for p in artist_report] == ['drake leak', 'drake mp3']
+
+    page = learner.get_all_keywords_performance(sort_by='keyword', order='asc', limit=1, offset=1)
+    assert [p['keyword'] for p in page] == ['drake leak']
+    assert learner.count_keywords_with_matches() == 3
+
+    print("[PASS] Grouped keyword performance report")
+
+
+if __name__ == "__main__":
+    test_keyword_performance_report()
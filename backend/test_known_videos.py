@@ -0,0 +1,135 @@
+"""
+Test the Bloom filter of known video_ids used by the ingest dedupe stage
+"""
+import os
+import tempfile
+import threading
+
+from database_enhanced import Database
+from ingest import IngestPipeline, IngestSource
+from known_videos import KnownVideoFilter
+from music_detector import MusicDetector
+from test_ingest_pipeline import make_video
+
+
+def test_known_video_filter():
+    db_path = os.path.join(tempfile.mkdtemp(), 'known.db')
+    db = Database(db_path)
+    db.add_videos([make_video(f"stored{i}", f"Song {i}", 'drake') for i in range(300)])
+
+    # Warmed from the table at startup, no false negatives
+    known = KnownVideoFilter(db, capacity=1000)
+    db.add_listener(known)
+    assert all(f"stored{i}" in known for i in range(300))
+
+    false_positives = sum(1 for i in range(5000) if f"new{i}" in known)
+    print(f"False positives: {false_positives}/5000, {known.memory_bytes()} bytes")
+    assert false_positives < 150
+
+    # New inserts are added through the listener hook
+    db.add_video(make_video('fresh1', 'Fresh upload', 'drake'))
+    assert 'fresh1' in known
+
+    # Growing past capacity re-allocates instead of degrading
+    known.add_many(f"bulk{i}" for i in range(1200))
+    assert known.capacity >= 2000
+
+    db.clear_all_videos()
+    assert 'fresh1' not in known
+
+    print("[PASS] Known video filter")
+
+
+def test_rebuild_keeps_answers():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'known_rebuild.db'))
+    db.add_videos([make_video(f"stored{i}", f"Song {i}", 'drake') for i in range(20000)])
+    known = KnownVideoFilter(db, capacity=1000)
+    db.add_listener(known)
+
+    done = threading.Event()
+
+    def rebuild():
+        for _ in range(3):
+            known.warm()
+        done.set()
+
+    thread = threading.Thread(target=rebuild)
+    thread.start()
+    misses = 0
+    added = []
+    while not done.is_set():
+        # Stored ids never read as "definitely new", even mid-rebuild
+        misses += sum(1 for i in range(0, 20000, 997) if f"stored{i}" not in known)
+        video_id = f"during{len(added)}"
+        db.add_video(make_video(video_id, 'Inserted mid-rebuild', 'drake'))
+        added.append(video_id)
+    thread.join()
+
+    assert misses == 0
+    # Videos inserted while a rebuild scanned the table survive the swap
+    assert added and all(video_id in known for video_id in added)
+    print(f"Rebuilds with {len(added)} concurrent adds: no false negatives")
+    print("[PASS] Rebuild keeps answers")
+
+
+def test_pipeline_skips_known_videos():
+    db_path = os.path.join(tempfile.mkdtemp(), 'known_pipeline.db')
+    db = Database(db_path)
+    known = KnownVideoFilter(db)
+    db.add_listener(known)
+    pipeline = IngestPipeline(db, MusicDetector(), known_videos=known)
+
+    batch = [make_video(f"v{i}", f"Drake Song {i} leaked", 'drake') for i in range(20)]
+    source = [IngestSource('drake', lambda: batch, {'keyword': 'drake'})]
+
+    assert pipeline.run(source)['total_new'] == 20
+
+    # Second sweep: everything is known, nothing reaches detection
+    again = pipeline.run(source)
+    assert again['total_new'] == 0
+    assert again['timings']['detect']['items'] == 0
+
+    # A deleted video is a filter hit but SQL says it is gone, so it comes back
+    stored = {v.video_id: v.id for v in db.get_all_videos()}
+    db.delete_video(stored['v3'])
+    assert pipeline.run(source)['total_new'] == 1
+
+    print("[PASS] Pipeline skips known videos")
+
+
+def test_catches_up_with_other_processes():
+    db_path = os.path.join(tempfile.mkdtemp(), 'known_shared.db')
+    db = Database(db_path)
+    known = KnownVideoFilter(db)
+    db.add_listener(known)
+    pipeline = IngestPipeline(db, MusicDetector(), known_videos=known)
+
+    # Another worker / the scheduler process: same file, its own Database, no listener here
+    other = Database(db_path)
+    batch = [make_video(f"s{i}", f"Drake Song {i} leaked", 'drake') for i in range(30)]
+    other.add_videos(batch[:20])
+    assert 's0' not in known
+
+    # The sweep here catches up first: the 20 stored elsewhere never reach detection
+    result = pipeline.run([IngestSource('drake', lambda: batch, {'keyword': 'drake'})])
+    assert result['total_new'] == 10
+    assert result['timings']['detect']['items'] == 10
+    assert all(f"s{i}" in known for i in range(30))
+
+    # Only rows past the high-water mark are read (the 10 stored here, then none)
+    assert known.catch_up() == 10
+    assert known.catch_up() == 0
+    other.add_video(make_video('late1', 'Late upload', 'drake'))
+    assert known.catch_up() == 1 and 'late1' in known
+    count = known.count
+    db.add_video(make_video('own1', 'Own upload', 'drake'))
+    known.catch_up()
+    assert known.count == count + 1  # own inserts are re-read but not recounted
+    print("[PASS] Catches up with other processes")
+
+
+if __name__ == "__main__":
+    test_known_video_filter()
+    test_rebuild_keeps_answers()
+    test_pipeline_skips_known_videos()
+    test_catches_up_with_other_processes()
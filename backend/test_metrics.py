@@ -0,0 +1,138 @@
+"""
+Test the /metrics registry: exposition format, upstream API tracking, ingest
+and quota instrumentation, and the Flask endpoint with per-route latency
+"""
+import os
+import tempfile
+
+import metrics
+from database_enhanced import Database
+from ingest import IngestPipeline, IngestSource
+from music_detector import MusicDetector
+from quota import QuotaLedger
+from test_ingest_pipeline import make_video
+
+
+def sample(text, line_prefix):
+    """Value of the exposition line starting with `line_prefix` (name + labels)"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_registry_format():
+    registry = metrics.Registry()
+    requests_total = registry.counter('demo_requests_total', 'Demo requests', ('route',))
+    latency = registry.histogram('demo_seconds', 'Demo latency', buckets=(0.1, 1.0)).labels()
+    requests_total.labels('/a').inc()
+    requests_total.labels('/a').inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5, count=3)
+    latency.observe(7)
+    registry.collector(lambda: [('demo_depth', 'gauge', 'Demo depth', [('', {'queue': 'x"y'}, 4)])])
+
+    def broken():
+        raise RuntimeError("collector down")
+    registry.collector(broken)
+
+    text = registry.render()
+    print(text)
+    assert '# TYPE demo_requests_total counter' in text
+    assert sample(text, 'demo_requests_total{route="/a"}') == 3
+    assert sample(text, 'demo_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'demo_seconds_bucket{le="1.0"}') == 4
+    assert sample(text, 'demo_seconds_bucket{le="+Inf"}') == 5
+    assert sample(text, 'demo_seconds_count') == 5
+    assert abs(sample(text, 'demo_seconds_sum') - 8.55) < 1e-9
+    assert sample(text, 'demo_depth{queue="x\\"y"}') == 4
+
+    # Known series exist (at zero) before the first event
+    text = metrics.REGISTRY.render()
+    assert sample(text, 'external_api_requests_total{api="musicbrainz"}') is not None
+    assert sample(text, 'ingest_videos_total{outcome="duplicate"}') is not None
+    print("[PASS] Registry format")
+
+
+def test_external_api_tracking():
+    api = metrics.ExternalApi('test-upstream')
+    assert api.call(FakeResponse, 200).status_code == 200
+    assert api.call(FakeResponse, 503).status_code == 503
+    try:
+        api.call(int, 'not a number')
+        raise AssertionError("expected the call's exception")
+    except ValueError:
+        pass
+    assert (api.calls.value, api.errors.value) == (3, 2)
+    assert sum(api.latency.counts) == 3
+    print("[PASS] External API tracking")
+
+
+def test_ingest_and_quota_metrics():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'metrics.db'))
+    pipeline = IngestPipeline(db, MusicDetector())
+    batch = [
+        make_video('m1', 'Drake - Take Care (Official Audio)', 'drake'),
+        make_video('m2', 'Drake Take Care reaction', 'drake'),
+        make_video('m2', 'Drake Take Care reaction', 'drake'),
+    ]
+
+    def counts():
+        return {outcome: metrics.INGEST_VIDEOS.labels(outcome).value for outcome in metrics.INGEST_OUTCOMES}
+
+    before = counts()
+    detected = metrics.DETECTOR_SECONDS.counts[:]
+    sweeps = sum(metrics.INGEST_SWEEP_VIDEOS.labels('stored').counts)
+    pipeline.run([IngestSource('drake', lambda: batch)])
+    pipeline.run([IngestSource('drake', lambda: batch)])
+    after = counts()
+
+    assert after['found'] - before['found'] == 6
+    assert after['stored'] - before['stored'] == 2
+    assert after['duplicate'] - before['duplicate'] == 4
+    assert sum(metrics.DETECTOR_SECONDS.counts) - sum(detected) == 2
+    assert sum(metrics.INGEST_SWEEP_VIDEOS.labels('stored').counts) - sweeps == 2
+    assert sum(metrics.INGEST_STAGE_LATENCY.labels('persist').counts) >= 1
+
+    units = metrics.QUOTA_UNITS.labels('search.list', 'true')
+    start = units.value
+    QuotaLedger(db).record('search.list', 'k1', label='drake')
+    assert units.value - start == 100
+    print("[PASS] Ingest and quota metrics")
+
+
+def test_metrics_endpoint():
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'app.db')
+    from app import app
+
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/api/artists').status_code == 200
+    client.get('/api/no-such-route')
+    client.delete('/api/keywords/clear')
+
+    response = client.get('/metrics')
+    text = response.get_data(as_text=True)
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert sample(text, 'http_request_duration_seconds_count{route="/api/artists",method="GET"}') == 3
+    assert sample(text, 'http_responses_total{route="/api/artists",method="GET",status="2xx"}') == 3
+    assert sample(text, 'http_responses_total{route="<unmatched>",method="GET",status="4xx"}') == 1
+    # Preallocated: routes not called yet are already exported
+    assert sample(text, 'http_request_duration_seconds_count{route="/api/smart-scan",method="POST"}') == 0
+    assert sample(text, 'db_query_duration_seconds_count{tag="keywords.clear"}') == 1
+    assert 'youtube_quota_remaining_units' in text
+    assert sample(text, 'email_queue_depth') == 0
+    print(f"/metrics: {len(text.splitlines())} lines")
+    print("[PASS] Metrics endpoint")
+
+
+if __name__ == "__main__":
+    test_registry_format()
+    test_external_api_tracking()
+    test_ingest_and_quota_metrics()
+    test_metrics_endpoint()
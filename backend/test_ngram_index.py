@@ -0,0 +1,115 @@
+"""
+Test the incremental n-gram index used for keyword suggestions
+The index must always match a full rebuild from the videos table
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from database_enhanced import Database
+from keyword_learning import KeywordLearning
+from models import Video
+
+
+def make_video(video_id, title, channel, status='Pending', risk=0, artist_id=1):
+    return Video(
+        id=None,
+        video_id=video_id,
+        title=title,
+        channel_name=channel,
+        channel_id=f"UC_{video_id}",
+        publish_date=datetime.now().isoformat(),
+        thumbnail_url='',
+        video_url=f"https://www.youtube.com/watch?v={video_id}",
+        matched_keyword='drake',
+        status=status,
+        priority='Medium',
+        artist_id=artist_id,
+        auto_flagged=False,
+        ai_risk_score=risk,
+        created_at=datetime.now().isoformat()
+    )
+
+
+def index_snapshot(db):
+    conn = db.get_connection()
+    rows = conn.execute("""
+        SELECT artist_id, source, ngram, count, risk_sum, flagged_count
+        FROM keyword_ngrams ORDER BY artist_id, source, ngram
+    """).fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+def test_extractor_drops_stop_word_bigrams():
+    learner = KeywordLearning.__new__(KeywordLearning)
+    patterns = learner.extract_patterns_from_title("Drake - Take Care (Full Album) 2011 leaked mp3 leaked")
+
+    print(f"Patterns: {patterns}")
+    assert 'take care' in patterns
+    assert 'leaked mp3' in patterns
+    assert 'care full' not in patterns      # "full" is a stop word
+    assert 'album 2011' not in patterns     # bare numbers are not phrases
+    assert patterns.count('leaked') == 1    # counted once per title
+
+
+def test_ngram_index_incremental():
+    db_path = os.path.join(tempfile.mkdtemp(), 'ngrams.db')
+    db = Database(db_path)
+    learner = KeywordLearning(db)
+    db.add_listener(learner)
+
+    first = db.add_video(make_video('v1', 'Drake Take Care leaked album', 'free music 24', 'Pending', 60))
+    db.add_video(make_video('v2', 'Drake Take Care full album mp3', 'albumuploads', 'Pending', 40))
+    db.add_video(make_video('v3', 'Adele Hello leaked', 'rare music', 'Pending', 80, artist_id=2))
+
+    suggestions = learner.suggest_keywords_from_videos(artist_id=1, limit=20)
+    print(f"Suggestions: {[(s['keyword'], s['frequency']) for s in suggestions]}")
+    top = {s['keyword']: s for s in suggestions}
+    assert top['take care']['frequency'] == 2
+    assert top['take care']['avg_risk_score'] == 50.0
+    assert len(top['take care']['examples']) == 2
+
+    # Status changes and deletes are applied incrementally
+    db.batch_update_videos([first], status='Flagged for Takedown')
+    flagged = learner.analyze_flagged_videos(artist_id=1)
+    assert flagged['total_analyzed'] == 1
+    assert ('leaked', 1) in flagged['common_title_patterns']
+
+    db.delete_video(first)
+    incremental = index_snapshot(db)
+    learner.rebuild_ngram_index(batch_size=1)  # paged rebuild must not lock itself out
+    assert incremental == index_snapshot(db)
+
+    # Global suggestions span all artists
+    assert 'leaked' in {s['keyword'] for s in learner.suggest_keywords_from_videos(limit=50)}
+
+    db.clear_all_videos()
+    assert index_snapshot(db) == []
+
+    print("[PASS] Incremental n-gram index")
+
+
+def test_example_ids_capped():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'examples.db'))
+    learner = KeywordLearning(db)
+    db.add_listener(learner)
+
+    # A single id, then batches whose own examples would overflow the merge
+    db.add_video(make_video('e0', 'Drake Take Care leaked', 'channel 0'))
+    for batch in range(3):
+        db.add_videos([make_video(f'e{batch}{i}', 'Drake Take Care leaked', f'channel {i}') for i in range(3)])
+
+    conn = db.get_connection()
+    rows = conn.execute("SELECT ngram, example_ids FROM keyword_ngrams WHERE source = 'title'").fetchall()
+    conn.close()
+    assert rows
+    for row in rows:
+        assert len(row['example_ids'].split(',')) == KeywordLearning.MAX_EXAMPLES, tuple(row)
+    print("[PASS] Example ids capped")
+
+
+if __name__ == "__main__":
+    test_extractor_drops_stop_word_bigrams()
+    test_ngram_index_incremental()
+    test_example_ids_capped()
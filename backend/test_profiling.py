@@ -0,0 +1,151 @@
+"""
+Test opt-in profiling: stack sampling, ingest pool threads, profiled jobs,
+and ?profile=1 on smart-scan with the admin download endpoint
+"""
+import os
+import tempfile
+import time
+
+from background_jobs import JobManager
+from database_enhanced import Database
+from ingest import INGEST_TASKS, IngestPipeline, IngestSource, ThreadExecutor
+from music_detector import MusicDetector
+from profiling import Profile, ProfileStore
+from test_ingest_pipeline import make_video
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(100))
+    return total
+
+
+def slow_fetch(batch):
+    time.sleep(0.1)
+    return batch
+
+
+def test_stack_sampling():
+    store = ProfileStore(Database(os.path.join(tempfile.mkdtemp(), 'profile.db')), max_profiles=2)
+    with Profile('busy', store, interval=0.002) as profile:
+        busy_loop(0.2)
+        profile.stages = {'detect': {'seconds': 0.15, 'batches': 1, 'items': 10}}
+
+    text = profile.collapsed()
+    print(text.splitlines()[0])
+    assert profile.samples > 20
+    for line in text.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+        # Stacks start at the frame that entered the profile
+        assert stack.startswith('test_profiling.py:test_stack_sampling')
+    assert 'test_profiling.py:busy_loop' in text
+    assert profile.top_functions()[0]['samples'] > 0
+
+    summary = profile.summary()
+    assert summary['stages']['detect']['seconds'] == 0.15
+    assert 0 < summary['stages']['other']['seconds'] < summary['seconds']
+    assert summary['download'] == f"/api/admin/profiles/{profile.id}"
+    # Stored with its stages and stacks for the other workers
+    assert store.get(profile.id) == summary and store.collapsed(profile.id) == text
+
+    # Bounded history, newest first
+    for name in ('second', 'third'):
+        with Profile(name, store, interval=0.01):
+            pass
+    assert [p['name'] for p in store.list_profiles()] == ['third', 'second']
+    assert store.get(profile.id) is None
+    print("[PASS] Stack sampling")
+
+
+def test_pool_threads_sampled():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'profile.db'))
+    executor = ThreadExecutor(workers=2)
+    pipeline = IngestPipeline(db, MusicDetector(), executors={'fetch': executor})
+    sources = [IngestSource(f'drake {i}', lambda i=i: slow_fetch([make_video(f'p{i}', 'Drake - Take Care', 'drake')]))
+               for i in range(4)]
+
+    with Profile('sweep', interval=0.005, roots=INGEST_TASKS) as profile:
+        results = pipeline.run(sources)
+    profile.stages = results['timings']
+    executor.shutdown()
+
+    text = profile.collapsed()
+    assert results['total_new'] == 4
+    assert '[ingest];ingest.py:_fetch_source;test_profiling.py:<lambda>;test_profiling.py:slow_fetch' in text
+    # The caller waits on the pool inside the fetch stage
+    assert 'ingest.py:run' in text
+    stages = profile.stage_breakdown()
+    assert set(stages) >= {'fetch', 'dedupe', 'detect', 'rules', 'persist', 'notify', 'other'}
+    assert stages['fetch']['seconds'] >= 0.15
+    print(f"fetch {stages['fetch']}, samples {profile.samples}")
+    print("[PASS] Pool threads sampled")
+
+
+def test_profiled_job():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'jobs.db'))
+    store = ProfileStore(db)
+    manager = JobManager(db, profiler=lambda name: Profile(name, store, interval=0.002))
+
+    def target(job):
+        busy_loop(0.05)
+        return {'timings': {'fetch': {'seconds': 0.01, 'batches': 1, 'items': 1}}}
+
+    plain = manager.start('plain', target)
+    profiled = manager.start('profiled', target, profile=True)
+    for job in (plain, profiled):
+        while job.is_active:
+            time.sleep(0.01)
+
+    assert plain.to_dict()['profile'] is None
+    summary = profiled.to_dict()['profile']
+    assert summary['name'] == 'profiled' and summary['stages']['fetch']['seconds'] == 0.01
+    assert 'test_profiling.py:busy_loop' in profiled.profile.collapsed()
+    # Other workers read the summary back from the jobs table and the stacks from the profiles table
+    other = JobManager(db)
+    deadline = time.time() + 5
+    while other.get(profiled.id).is_active and time.time() < deadline:
+        time.sleep(0.01)
+    assert other.get(profiled.id).to_dict()['profile']['id'] == summary['id']
+    other_store = ProfileStore(db)
+    assert other_store.get(summary['id']) == summary
+    assert other_store.collapsed(summary['id']) == profiled.profile.collapsed()
+    print("[PASS] Profiled job")
+
+
+def test_profile_endpoints():
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'app.db')
+    from app import app, services
+
+    services.db.add_videos([make_video(f's{i}', f'Drake - Song {i} (Official Audio)', 'freemusic')
+                            for i in range(50)])
+    client = app.test_client()
+
+    plain = client.post('/api/smart-scan', json={}).get_json()
+    assert 'profile' not in plain and set(plain['timings']) == {'load', 'detect', 'persist'}
+
+    scan = client.post('/api/smart-scan?profile=1', json={}).get_json()
+    summary = scan['profile']
+    assert summary['name'] == 'smart_scan' and set(summary['stages']) == {'load', 'detect', 'persist', 'other'}
+
+    listed = client.get('/api/admin/profiles').get_json()
+    assert summary['id'] in [p['id'] for p in listed]
+
+    response = client.get(summary['download'])
+    assert response.status_code == 200
+    assert 'attachment; filename=smart_scan_' in response.headers['Content-Disposition']
+    text = response.get_data(as_text=True)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in text.splitlines())
+    assert client.get(summary['download'] + '?format=json').get_json()['id'] == summary['id']
+    assert client.get('/api/admin/profiles/nope').status_code == 404
+    print(f"smart-scan profile: {summary['samples']} samples, {len(text.splitlines())} stacks")
+    print("[PASS] Profile endpoints")
+
+
+if __name__ == "__main__":
+    test_stack_sampling()
+    test_pool_threads_sampled()
+    test_profiled_job()
+    test_profile_endpoints()
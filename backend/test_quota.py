@@ -0,0 +1,100 @@
+"""
+Test the quota ledger, yield-ranked planning and quota booking in YouTubeService
+The YouTube client is faked so no API key is needed
+"""
+import os
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from googleapiclient.errors import HttpError
+
+from database_enhanced import Database
+from ingest import IngestPipeline, IngestSource
+from music_detector import MusicDetector
+from quota import QuotaLedger, QuotaPlanner, SOURCE_COSTS, key_fingerprint
+from test_ingest_pipeline import make_video
+from youtube_service import YouTubeService
+
+
+class FakeRequest:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def quota_error():
+    content = b'{"error": {"code": 403, "message": "quota", "errors": [{"reason": "quotaExceeded"}]}}'
+    return HttpError(SimpleNamespace(status=403, reason='Forbidden'), content)
+
+
+def test_quota_ledger_and_planner():
+    db_path = os.path.join(tempfile.mkdtemp(), 'quota.db')
+    db = Database(db_path)
+    ledger = QuotaLedger(db, daily_limit=450)
+
+    # Quota day follows Pacific time: 07:00 UTC is still the previous day there
+    assert QuotaLedger.quota_day(datetime(2024, 3, 2, 7, 0, tzinfo=timezone.utc)) == '2024-03-01'
+    assert QuotaLedger.quota_day(datetime(2024, 3, 2, 9, 0, tzinfo=timezone.utc)) == '2024-03-02'
+
+    # Calls through YouTubeService are booked per endpoint and key
+    key_id = key_fingerprint('secret-key')
+    assert 'secret' not in key_id
+    youtube = YouTubeService.from_clients({key_id: [None]}, quota_ledger=ledger)
+
+    youtube._execute(lambda client: FakeRequest({'items': []}), 'search.list', 'drake leak')
+    youtube._execute(lambda client: FakeRequest({'items': []}), 'videos.list', 'drake leak')
+    status = ledger.status()
+    assert status['used'] == 101 and status['remaining'] == 349
+    summary = ledger.summary()
+    assert summary['by_endpoint'][0] == {'endpoint': 'search.list', 'calls': 1, 'units': 100}
+    assert summary['by_key'] == [{'key_id': key_id, 'calls': 2, 'units': 101}]
+    assert summary['history'][0]['units'] == 101
+
+    # quotaExceeded from YouTube books the rest of the day; later calls are refused locally
+    try:
+        youtube._execute(lambda client: FakeRequest(error=quota_error()), 'search.list')
+        assert False, "expected HttpError"
+    except HttpError:
+        pass
+    assert ledger.remaining() == 0
+    try:
+        youtube._execute(lambda client: FakeRequest({'items': []}), 'videos.list')
+        assert False, "expected quota exception"
+    except Exception as e:
+        assert 'quota' in str(e)
+
+    # The pipeline records each source's outcome for yield ranking
+    pipeline = IngestPipeline(db, MusicDetector())
+    flagged = make_video('f1', 'Drake unreleased full album free download', 'drake leak')
+    pipeline.run([
+        IngestSource('drake leak', lambda: [flagged, make_video('f2', 'Drake leak', 'drake leak')]),
+        IngestSource('drake remix', lambda: [make_video('r1', 'Drake remix', 'drake remix')]),
+    ])
+    logs = {log['keyword']: log for log in map(dict, db.get_connection().execute(
+        "SELECT keyword, new_count, flagged_count FROM search_logs"))}
+    assert logs['drake leak']['new_count'] == 2 and logs['drake leak']['flagged_count'] == 1
+    assert logs['drake remix']['flagged_count'] == 0
+
+    # Planner: best yield first, never-searched sources are explored, the rest is deferred
+    planner = QuotaPlanner(db, ledger)
+    plan = planner.plan(['drake remix', 'new keyword', 'drake leak'], SOURCE_COSTS['keyword'], budget=250)
+    assert plan['run'] == ['drake leak', 'new keyword']
+    assert plan['deferred'] == ['drake remix']
+    assert plan['estimated_units'] == 200
+    assert plan['yields']['drake leak']['flagged'] == 1
+
+    # With the day's quota used up everything is deferred
+    assert planner.plan(['drake leak'], SOURCE_COSTS['keyword'])['run'] == []
+
+    print(f"Quota summary: {ledger.summary()['by_endpoint']}")
+    print("[PASS] Quota ledger and planner")
+
+
+if __name__ == "__main__":
+    test_quota_ledger_and_planner()
@@ -0,0 +1,64 @@
+"""
+Test the persistent scheduler's leader lock and run claims
+Two schedulers on the same database simulate two gunicorn workers
+"""
+import os
+import tempfile
+import time
+
+from database_enhanced import Database
+from scheduler_service import SchedulerService
+
+
+def test_single_leader_runs_each_sweep_once():
+    db_path = os.path.join(tempfile.mkdtemp(), 'scheduler.db')
+    db = Database(db_path)
+
+    runs = []
+
+    def sweep():
+        runs.append(time.time())
+        time.sleep(0.2)
+        return {'total_new': 0}
+
+    worker_a = SchedulerService(db)
+    worker_b = SchedulerService(db)
+    for worker in (worker_a, worker_b):
+        worker.register('keyword_sweep', sweep)
+
+    worker_a.schedule('keyword_sweep', interval_hours=24)
+
+    # Persisted: a fresh instance sees the schedule
+    assert SchedulerService(db).get_job('keyword_sweep')['interval_hours'] == 24
+
+    # Make the job due now
+    conn = db.get_connection()
+    conn.execute("UPDATE scheduled_jobs SET next_run = '2000-01-01T00:00:00'")
+    conn.commit()
+    conn.close()
+
+    # Only one worker holds the leader lock
+    assert worker_a.tick() == ['keyword_sweep']
+    assert worker_b.tick() == []
+
+    # The leader does not start an overlapping run while the first is in progress
+    assert worker_a.tick() == []
+    assert worker_a.get_job('keyword_sweep')['running']
+
+    time.sleep(0.4)
+    job = worker_a.get_job('keyword_sweep')
+    print(f"Job after run: {job}")
+    assert len(runs) == 1
+    assert job['last_status'] == 'success'
+    assert not job['running']
+    assert job['next_run'] > job['last_run']
+
+    # Leadership moves over once the leader releases it
+    worker_a.shutdown()
+    assert worker_b.acquire_leadership()
+
+    print("[PASS] Single leader, no overlapping sweeps")
+
+
+if __name__ == "__main__":
+    test_single_leader_runs_each_sweep_once()
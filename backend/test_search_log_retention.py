@@ -0,0 +1,81 @@
+"""
+Test search log retention: old raw logs rolled up into daily per-keyword rows,
+incremental reruns, the combined daily view, and yield planning over rollups
+"""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from database_enhanced import Database
+from quota import QuotaLedger, QuotaPlanner
+
+
+def add_log(db, keyword, when, success=True, results=10, new=2, flagged=1, artist_id=None):
+    db.add_search_log(keyword, results, success, None if success else 'quotaExceeded', artist_id,
+                      new_count=new if success else None, flagged_count=flagged if success else None)
+    conn = db.get_connection()
+    conn.execute("UPDATE search_logs SET timestamp = ? WHERE id = (SELECT MAX(id) FROM search_logs)",
+                 (when.isoformat(),))
+    conn.commit()
+    conn.close()
+
+
+def test_search_log_retention():
+    db_path = os.path.join(tempfile.mkdtemp(), 'logs.db')
+    db = Database(db_path)
+    artist_id = db.add_artist('Drake')
+    now = datetime.now()
+    old_day = (now - timedelta(days=40)).replace(hour=9)
+
+    add_log(db, 'drake leak', old_day, artist_id=artist_id)
+    add_log(db, 'drake leak', old_day + timedelta(hours=2), artist_id=artist_id, flagged=3)
+    add_log(db, 'drake leak', old_day + timedelta(hours=3), success=False, artist_id=artist_id)
+    add_log(db, 'drake remix', old_day, flagged=0)
+    add_log(db, 'drake leak', now - timedelta(days=1), artist_id=artist_id)
+
+    yields_before = QuotaPlanner(db, QuotaLedger(db)).source_yields(['drake leak', 'drake remix'], 100)
+    daily_before = db.get_search_log_daily(days=60)
+
+    result = db.rollup_search_logs(retention_days=30)
+    assert result['rolled_up'] == 4 and result['daily_rows'] == 2
+    assert [log.keyword for log in db.get_search_logs()] == ['drake leak']
+
+    leak = db.get_search_log_daily(days=60, keyword='drake leak', artist_id=artist_id)
+    assert len(leak) == 2
+    rolled = leak[1]
+    assert rolled['day'] == old_day.date().isoformat()
+    assert (rolled['runs'], rolled['successes'], rolled['errors']) == (3, 2, 1)
+    assert (rolled['measured_runs'], rolled['new_count'], rolled['flagged_count']) == (2, 4, 4)
+    assert rolled['artist_id'] == artist_id
+    assert db.get_search_log_daily(days=60, keyword='drake remix')[0]['artist_id'] is None
+
+    # The daily view and the planner see the same history before and after the rollup
+    assert db.get_search_log_daily(days=60) == daily_before
+    planner = QuotaPlanner(db, QuotaLedger(db))
+    assert planner.source_yields(['drake leak', 'drake remix'], 100) == yields_before
+
+    # Incremental: nothing new to roll up; a late row for a rolled-up day is added to it
+    assert db.rollup_search_logs(retention_days=30)['rolled_up'] == 0
+    add_log(db, 'drake remix', old_day + timedelta(hours=5), flagged=2)
+    db.rollup_search_logs(retention_days=30)
+    remix = db.get_search_log_daily(days=60, keyword='drake remix')[0]
+    assert remix['runs'] == 2 and remix['flagged_count'] == 2
+
+    # Latest-log reads walk the timestamp index instead of sorting the table
+    conn = db.get_connection()
+    plan = ' '.join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM search_logs ORDER BY timestamp DESC LIMIT 50"))
+    conn.close()
+    assert 'idx_search_logs_timestamp' in plan and 'TEMP B-TREE' not in plan
+
+    # Stats still know the last search once every raw log is rolled up
+    db.rollup_search_logs(retention_days=0, now=now + timedelta(seconds=1))
+    assert db.get_search_logs() == []
+    assert db.get_stats()['last_search'] == (now - timedelta(days=1)).isoformat()
+
+    print(f"Rollup: {result}")
+    print("[PASS] Search log retention")
+
+
+if __name__ == "__main__":
+    test_search_log_retention()
@@ -0,0 +1,59 @@
+"""
+Test the tuple -> JSON fast path against the model to_dict() output
+"""
+import json
+import os
+import tempfile
+
+from flask import Flask, jsonify
+
+from database_enhanced import Database
+from serialization import OrjsonProvider, table_payload
+from test_ingest_pipeline import make_video
+
+
+def test_fast_path_matches_models():
+    db_path = os.path.join(tempfile.mkdtemp(), 'serialization.db')
+    db = Database(db_path)
+    artist_id = db.add_artist('Drake')
+    videos = [make_video(f"v{i}", f"Drake Song {i}", 'drake') for i in range(5)]
+    videos[2].auto_flagged = True
+    videos[3].priority = 'Critical'
+    db.add_videos(videos)
+    db.add_keyword('drake leak', artist_id, auto_flag=True)
+    db.add_song('Take Care', 'Drake', artist_id)
+
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
+    with app.app_context():
+        # Records: identical to the old [model.to_dict()] payloads, in the same order
+        columns, rows = db.get_video_table({'artist_id': None})
+        fast = json.loads(jsonify(table_payload(columns, rows, bool_columns=('auto_flagged',))).get_data())
+        assert fast == [v.to_dict() for v in db.get_all_videos()]
+        assert fast[0]['priority'] == 'Critical'
+
+        columns, rows = db.get_keyword_table(artist_id)
+        assert table_payload(columns, rows, bool_columns=('active', 'auto_flag')) == \
+            [k.to_dict() for k in db.get_all_keywords(artist_id)]
+
+        columns, rows = db.get_song_table()
+        assert table_payload(columns, rows, bool_columns=('active', 'auto_flag')) == \
+            [s.to_dict() for s in db.get_all_songs()]
+
+        # Columns: one array per column
+        columns, rows = db.get_video_table()
+        payload = json.loads(jsonify(table_payload(columns, rows, 'columns', ('auto_flagged',))).get_data())
+        assert payload['count'] == 5
+        assert payload['columns'] == list(Database.VIDEO_COLUMNS)
+        assert payload['data']['auto_flagged'].count(True) == 1
+        assert payload['data']['video_id'] == [v['video_id'] for v in fast]
+
+        empty = table_payload(*db.get_video_table({'status': 'Reviewed'}), 'columns')
+        assert empty['count'] == 0 and empty['data']['title'] == []
+
+    print("[PASS] Fast JSON path matches models")
+
+
+if __name__ == "__main__":
+    test_fast_path_matches_models()
@@ -0,0 +1,85 @@
+"""
+Test lazy service construction
+Nothing is built until used, each service is built once, and derived
+indexes still see writes made before they were first used
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from services import Services
+from test_ingest_pipeline import make_video
+from test_ngram_index import index_snapshot
+
+
+def test_services_are_lazy_and_memoised():
+    db_path = os.path.join(tempfile.mkdtemp(), 'services.db')
+    services = Services({'DATABASE_PATH': db_path, 'YOUTUBE_API_KEY': ''})
+    assert services.status()['initialised'] == []
+
+    # Concurrent first access builds the database once
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(services.db)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(db) for db in seen}) == 1
+    assert services.status()['initialised'] == ['db']
+
+    # A write builds the listeners on demand, so the index is never missing videos
+    services.db.add_video(make_video('lazy1', 'Drake Take Care leaked', 'drake'))
+    assert 'lazy1' in services.known_videos
+    assert services.keyword_learner.suggest_keywords_from_videos(limit=50)
+    # ...and the write that built them (and their backfill) is counted once
+    built = index_snapshot(services.db)
+    services.keyword_learner.rebuild_ngram_index()
+    assert built == index_snapshot(services.db)
+    channel = services.channels.get_channel('UC_lazy1')
+    assert channel['total_videos'] == 1
+
+    # No API key: the YouTube client is simply absent
+    assert services.youtube_service is None
+    assert not services.api_configured
+
+    print(f"Init times: {services.init_times}")
+    print("[PASS] Lazy services")
+
+
+def test_importing_app_builds_nothing():
+    env = dict(os.environ, DATABASE_PATH=os.path.join(tempfile.mkdtemp(), 'import.db'))
+    output = subprocess.run(
+        [sys.executable, '-c', "import json, app; print(json.dumps(app.services.status()['initialised']))"],
+        env=env, capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    initialised = json.loads(output.stdout.strip().splitlines()[-1])
+    assert initialised == [], initialised
+    assert not os.path.exists(env['DATABASE_PATH'])
+    print("[PASS] Importing app builds nothing")
+
+
+def test_scheduler_built_from_plain_registrations():
+    services = Services({'DATABASE_PATH': os.path.join(tempfile.mkdtemp(), 'sched.db')})
+    services.scheduled_jobs.update({
+        'sweep': {'handler': lambda: None},
+        'rollup': {'handler': lambda: None, 'interval_hours': 24},
+        'vacuum': {'handler': lambda: None, 'interval_hours': 24, 'dialects': ('postgresql',)},
+    })
+    assert services.status()['initialised'] == []
+
+    scheduler = services.scheduler
+    assert sorted(scheduler.handlers) == ['rollup', 'sweep']
+    # Default schedules are created when the scheduler starts, not when it is built
+    assert scheduler.get_jobs() == []
+    scheduler.start()
+    scheduler.shutdown()
+    assert [(job['id'], job['interval_hours']) for job in scheduler.get_jobs()] == [('rollup', 24)]
+    print("[PASS] Scheduler built from plain registrations")
+
+
+if __name__ == "__main__":
+    test_services_are_lazy_and_memoised()
+    test_importing_app_builds_nothing()
+    test_scheduler_built_from_plain_registrations()
@@ -0,0 +1,288 @@
+"""
+Storage conformance: the same checks against every backend in storage.py
+
+SQLite always runs. PostgreSQL runs against TEST_POSTGRES_DSN (a postgresql:// URL) when set, otherwise
+an embedded server from the pgserver package; without either it is skipped.
+"""
+import gc
+import os
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+from datetime import datetime, timedelta
+
+from auto_update_service import AutoUpdateService
+from background_jobs import JobManager
+from channels import ChannelRegistry
+from database_enhanced import Database
+from http_cache import ResponseCache
+from keyword_learning import KeywordLearning
+from models import Video
+from profiling import Profile, ProfileStore
+from storage import Storage, create_database
+
+
+def video_title(video_id, keyword):
+    return f"{keyword} full album {video_id}"
+
+
+def make_video(video_id, keyword, channel, status='Pending', risk=0, artist_id=None, priority='Medium'):
+    return Video(
+        id=None,
+        video_id=video_id,
+        title=video_title(video_id, keyword),
+        channel_name=channel,
+        channel_id=f"UC_{channel}",
+        publish_date=datetime.now().isoformat(),
+        thumbnail_url='',
+        video_url=f"https://www.youtube.com/watch?v={video_id}",
+        matched_keyword=keyword,
+        status=status,
+        priority=priority,
+        artist_id=artist_id,
+        auto_flagged=status == 'Flagged for Takedown',
+        ai_risk_score=risk,
+        created_at=datetime.now().isoformat()
+    )
+
+
+def check_storage(db):
+    assert isinstance(db, Storage)
+    learner = KeywordLearning(db)
+    channels = ChannelRegistry(db)
+    db.add_listener(learner)
+    db.add_listener(channels)
+    cache = ResponseCache(db)
+
+    # Artists
+    drake = db.add_artist('Drake', email='drake@example.com')
+    adele = db.add_artist('Adele')
+    assert drake and adele and drake != adele
+    assert db.add_artist('Drake') is None
+    assert db.get_artist(drake).email == 'drake@example.com'
+    assert db.update_artist(adele, notes='UK', active=False)
+    assert db.get_artist(adele).notes == 'UK' and not db.get_artist(adele).active
+    assert [a.name for a in db.get_all_artists()] == ['Adele', 'Drake']
+
+    # Videos: row ids come back, existing video_ids are skipped
+    versions = cache.get_versions(('videos',))
+    stored = db.add_videos([
+        make_video('a1', 'drake leak', 'freemusic1', 'Flagged for Takedown', 80, drake, 'Critical'),
+        make_video('a2', 'drake leak', 'freemusic2', 'Pending', 20, drake),
+        make_video('a3', 'drake mp3', 'uploads99', 'Flagged for Takedown', 90, drake, 'High'),
+        make_video('b1', 'adele live', 'concerts', 'Reviewed', 10, adele, 'Low'),
+    ])
+    assert len(stored) == 4 and all(row_id for _, row_id in stored)
+    assert cache.get_versions(('videos',)) > versions
+    ids = {video.video_id: row_id for video, row_id in stored}
+    assert db.add_videos([make_video('a1', 'drake leak', 'freemusic1')]) == []
+    assert db.get_existing_video_ids(['a1', 'b1', 'zz']) == {'a1', 'b1'}
+
+    video = db.get_video_by_id(ids['a3'])
+    assert video.video_id == 'a3' and video.auto_flagged is True and video.ai_risk_score == 90
+    assert db.get_video_by_id(999999) is None
+    assert [v.video_id for v in db.get_all_videos()] == ['a1', 'a3', 'a2', 'b1']
+    assert [v.video_id for v in db.get_all_videos({'artist_id': drake, 'status': 'Pending'})] == ['a2']
+    assert {v.video_id for v in db.get_all_videos({'q': 'DRAKE mp3'})} == {'a3'}
+    columns, rows = db.get_video_table({'auto_flagged': True})
+    assert [dict(zip(columns, row))['video_id'] for row in rows] == ['a1', 'a3']
+
+    scan = db.get_video_scan_rows(adele)
+    assert [tuple(row) for row in scan] == [(ids['b1'], video_title('b1', 'adele live'), 'concerts', 'Reviewed')]
+    assert len(db.get_video_scan_rows()) == 4
+    assert db.batch_update_videos([ids['a2'], ids['b1']], status='Flagged for Takedown') == 2
+    assert db.get_video_by_id(ids['b1']).status == 'Flagged for Takedown'
+    assert db.get_stats()['total_videos'] == 4
+    assert db.get_stats(artist_id=drake)['total_videos'] == 3
+
+    # Listeners: n-grams, channel counters and the keyword report follow inserts and updates
+    assert channels.get_channel('UC_freemusic2')['flagged_videos'] == 1
+    assert [c['channel_id'] for c in channels.top_offenders(order='avg_risk')][:2] == ['UC_uploads99', 'UC_freemusic1']
+    suggestions = learner.suggest_keywords_from_videos()
+    assert suggestions and all(s['keyword'] for s in suggestions)
+    report = learner.get_all_keywords_performance()
+    assert {p['keyword'] for p in report} == {'drake leak', 'drake mp3', 'adele live'}
+
+    # Keywords
+    kw = db.add_keyword('drake leak', artist_id=drake, auto_flag=True, priority='High')
+    assert kw and db.add_keyword('drake leak', artist_id=drake) is None
+    result = db.bulk_add_keywords([
+        {'keyword': 'drake leak', 'artist_id': drake},
+        {'keyword': 'drake free download', 'artist_id': drake},
+        {'keyword': 'drake free download', 'artist_id': drake},
+        {'keyword': ''},
+    ])
+    assert result['added'] == 1 and result['duplicates'] == ['drake leak', 'drake free download']
+    assert len(result['errors']) == 1
+    assert sorted(db.get_active_keywords(drake)) == ['drake free download', 'drake leak']
+    assert db.update_keyword(kw, active=False)
+    assert db.get_active_keywords(drake) == ['drake free download']
+    assert len(db.get_keyword_table()[1]) == 2
+    assert db.delete_keyword(kw) and len(db.get_all_keywords()) == 1
+    db.add_keyword('adele live', artist_id=adele)
+    assert db.clear_keywords(artist_id=drake) == 1
+    assert [k.keyword for k in db.get_all_keywords()] == ['adele live']
+    assert db.clear_keywords() == 1 and db.get_all_keywords() == []
+
+    # Songs
+    song = db.add_song('Hotline Bling', 'Drake', artist_id=drake, duration_ms=267000)
+    assert song and db.add_song('Hotline Bling', 'Drake') is None
+    result = db.bulk_add_songs([
+        {'song_name': 'Hotline Bling', 'artist_name': 'Drake'},
+        {'song_name': "God's Plan", 'artist_name': 'Drake', 'artist_id': drake},
+    ])
+    assert result['added'] == 1 and result['skipped'] == 1
+    assert db.update_song(song, priority='Critical')
+    assert [s.priority for s in db.get_all_songs(drake) if s.song_name == 'Hotline Bling'] == ['Critical']
+    assert len(db.get_active_songs()) == 2 and len(db.get_song_table()[1]) == 2
+    assert db.delete_song(song) and len(db.get_all_songs()) == 1
+    assert db.clear_songs(artist_id=adele) == 0 and db.clear_songs() == 1
+
+    # Auto-flag rules
+    rule = db.add_auto_flag_rule('risky', {'min_risk_score': 70}, 'critical', 'High AI risk')
+    assert rule and db.add_auto_flag_rule('risky', {}, 'flag') is None
+    assert [r.name for r in db.get_active_auto_flag_rules()] == ['risky']
+    assert db.get_auto_flag_rule_by_name('risky').action == 'critical'
+    assert db.apply_auto_flag_rules(db.get_video_by_id(ids['a3']))[1] in ('Critical', 'High')
+    second = db.add_auto_flag_rule('quiet', {'min_risk_score': 99}, 'flag')
+    versions = cache.get_versions(('auto_flag_rules',))
+    assert db.set_auto_flag_rule_active(second, False)
+    assert cache.get_versions(('auto_flag_rules',)) > versions
+    assert not db.set_auto_flag_rule_active(999999, True)
+    assert [(r.name, r.active) for r in db.get_all_auto_flag_rules()] in (
+        [('quiet', False), ('risky', True)], [('risky', True), ('quiet', False)])
+    assert [r.name for r in db.get_active_auto_flag_rules()] == ['risky']
+    assert db.delete_auto_flag_rule(second) and not db.delete_auto_flag_rule(second)
+
+    # Search logs: raw rows, rollup of old ones, daily view over both
+    db.add_search_log('drake leak', 10, True, artist_id=drake, new_count=3, flagged_count=1)
+    db.add_search_log('drake leak', 0, False, error_message='quota', artist_id=drake)
+    logs = db.get_search_logs(artist_id=drake)
+    assert len(logs) == 2 and {log.success for log in logs} == {True, False}
+    rollup = db.rollup_search_logs(retention_days=7, now=datetime.now() + timedelta(days=8))
+    assert rollup['rolled_up'] == 2 and rollup['daily_rows'] == 1
+    db.add_search_log('drake leak', 5, True, artist_id=drake, new_count=1, flagged_count=0)
+    daily = db.get_search_log_daily(days=30, artist_id=drake)
+    assert len(daily) == 1
+    assert (daily[0]['runs'], daily[0]['errors'], daily[0]['new_count']) == (3, 1, 4)
+
+    # Upserts written once for both dialects
+    updater = AutoUpdateService(db)
+    assert updater.enable_auto_update(drake, 'daily')
+    assert updater.enable_auto_update(drake, 'weekly', 'musicbrainz')
+    assert updater.get_auto_update_config(drake)['frequency'] == 'weekly'
+
+    # Background jobs: one active job per name across managers (workers) sharing the database
+    worker_a, worker_b = JobManager(db), JobManager(db)
+    release = threading.Event()
+    job, started = worker_a.start_unique('sweep', lambda job: release.wait(5) and {'ok': True})
+    same, again = worker_b.start_unique('sweep', lambda job: None)
+    assert started and not again and same.id == job.id
+    release.set()
+    deadline = time.time() + 5
+    while worker_b.get(job.id).is_active and time.time() < deadline:
+        time.sleep(0.01)
+    assert worker_b.get(job.id).result == {'ok': True}
+
+    # Profiles: stacks stored for download from any worker
+    with Profile('conformance', ProfileStore(db), interval=0.005) as profile:
+        time.sleep(0.05)
+    stored = ProfileStore(db)
+    assert stored.get(profile.id)['name'] == 'conformance'
+    assert stored.collapsed(profile.id) == profile.collapsed()
+    assert [p['id'] for p in stored.list_profiles()] == [profile.id]
+
+    # Deletes
+    assert db.delete_videos([ids['a1'], ids['a2']]) == 2
+    assert [v.video_id for v in db.get_all_videos()] == ['a3', 'b1']
+    assert db.clear_all_videos() == 2 and db.get_all_videos() == []
+    assert db.delete_artist(adele) and db.get_artist(adele) is None
+
+    # Set-based methods record their timings
+    timings = db.get_query_timings()
+    assert timings['videos.insert']['calls'] == 2 and timings['videos.clear']['calls'] == 1
+    assert timings['keywords.clear']['calls'] == 2
+    assert all(entry['seconds'] >= entry['max_seconds'] > 0 for entry in timings.values())
+
+
+def check_fork_after_use(db):
+    """A process forked after the parent used the pool (gunicorn preload) opens its own connections"""
+    parent = db.add_artist('Forked Parent')
+    assert parent
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            child = db.add_artist('Forked Child')
+            names = {a.name for a in db.get_all_artists()}
+            # Dropping the inherited pool and closing our own must not touch the parent's sessions
+            gc.collect()
+            db.close()
+            code = 0 if child and {'Forked Parent', 'Forked Child'} <= names else 1
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    # The parent's pooled connections are still usable after the child is gone
+    assert {'Forked Parent', 'Forked Child'} <= {a.name for a in db.get_all_artists()}
+    assert db.delete_artist(parent)
+
+
+def test_sqlite_storage():
+    db = create_database('', os.path.join(tempfile.mkdtemp(), 'videos.db'))
+    assert isinstance(db, Database) and db.dialect == 'sqlite'
+    check_storage(db)
+    print("[PASS] Storage conformance (sqlite)")
+
+
+def postgres_server():
+    """(admin URL, server or None) or (None, None) when no PostgreSQL is available"""
+    if os.environ.get('TEST_POSTGRES_DSN'):
+        return os.environ['TEST_POSTGRES_DSN'], None
+    try:
+        import psycopg2  # noqa: F401
+        import pgserver
+    except ImportError:
+        return None, None
+    server = pgserver.get_server(tempfile.mkdtemp())
+    return server.get_uri(), server
+
+
+def test_postgres_storage():
+    admin_dsn, server = postgres_server()
+    if not admin_dsn:
+        print("[SKIP] Storage conformance (postgresql): set TEST_POSTGRES_DSN or install pgserver")
+        return
+
+    import psycopg2
+
+    name = f"conformance_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(admin_dsn)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE DATABASE {name}")
+    try:
+        db = create_database(urlunsplit(urlsplit(admin_dsn)._replace(path=f"/{name}")), pool_size=4)
+        try:
+            assert db.dialect == 'postgresql'
+            check_storage(db)
+            check_fork_after_use(db)
+        finally:
+            db.close()
+    finally:
+        admin.cursor().execute(f"DROP DATABASE {name} WITH (FORCE)")
+        admin.close()
+        if server is not None:
+            server.cleanup()
+    print("[PASS] Storage conformance (postgresql)")
+
+
+if __name__ == "__main__":
+    test_sqlite_storage()
+    test_postgres_storage()
@@ -0,0 +1,74 @@
+"""
+Test full-text video search (videos_fts): sync triggers, backfill, ranking and the LIKE fallback
+"""
+import os
+import tempfile
+
+from database_enhanced import Database
+from test_ingest_pipeline import make_video
+
+
+def titles(db, q, **filters):
+    return [v.title for v in db.get_all_videos(dict(filters, q=q))]
+
+
+def test_video_search():
+    db_path = os.path.join(tempfile.mkdtemp(), 'search.db')
+    db = Database(db_path)
+    assert db.fts_enabled
+
+    db.add_videos([
+        make_video('v1', 'Drake - Unreleased Leak (Official Audio)', 'drake'),
+        make_video('v2', 'Drake leaked snippet 2024', 'drake'),
+        make_video('v3', 'Official audio of something else', 'drake'),
+        make_video('v4', 'Taylor Swift leaks compilation', 'taylor'),
+    ])
+
+    # Prefix and phrase queries
+    assert set(titles(db, 'leak*')) == {
+        'Drake - Unreleased Leak (Official Audio)', 'Drake leaked snippet 2024', 'Taylor Swift leaks compilation'}
+    assert set(titles(db, '"official audio"')) == {
+        'Drake - Unreleased Leak (Official Audio)', 'Official audio of something else'}
+    assert titles(db, 'unreleased "official audio"') == ['Drake - Unreleased Leak (Official Audio)']
+
+    # FTS syntax in user input is treated as plain words
+    assert titles(db, 'snippet OR') == []
+    assert titles(db, 'NEAR( snippet') == []
+
+    # Search combines with the other filters; matched_keyword is indexed too
+    assert titles(db, 'leak*', keyword='taylor') == ['Taylor Swift leaks compilation']
+    assert len(titles(db, 'taylor')) == 1
+
+    # bm25 ranking: a title hit outranks a matched_keyword-only hit
+    ranked = titles(db, 'drake')
+    assert ranked[-1] == 'Official audio of something else'
+
+    # Triggers keep the index in sync with updates and deletes
+    conn = db.get_connection()
+    conn.execute("UPDATE videos SET title = 'Renamed upload' WHERE video_id = 'v2'")
+    conn.commit()
+    conn.close()
+    assert 'Drake leaked snippet 2024' not in titles(db, 'snippet')
+    assert titles(db, 'renamed') == ['Renamed upload']
+    db.delete_videos([v.id for v in db.get_all_videos({'q': 'renamed'})])
+    assert titles(db, 'renamed') == []
+
+    # Backfill: an existing database without the index is indexed on open
+    conn = db.get_connection()
+    conn.execute("DROP TABLE videos_fts")
+    for trigger in ('insert', 'delete', 'update'):
+        conn.execute(f"DROP TRIGGER videos_fts_{trigger}")
+    conn.commit()
+    conn.close()
+    reopened = Database(db_path)
+    assert len(titles(reopened, 'leak*')) == 2
+
+    # LIKE fallback gives the same matches (unranked) when FTS5 is unavailable
+    reopened.fts_enabled = False
+    assert set(titles(reopened, 'leak')) == set(titles(db, 'leak*'))
+
+    print("[PASS] Full-text video search")
+
+
+if __name__ == "__main__":
+    test_video_search()
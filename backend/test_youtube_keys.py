@@ -0,0 +1,125 @@
+"""
+Test the YouTube key pool: routing by remaining quota, failover on quotaExceeded,
+per-key concurrency and keys returning after the quota day resets
+The YouTube clients are faked so no API key is needed
+"""
+import os
+import tempfile
+import threading
+import time
+
+from database_enhanced import Database
+from quota import QuotaLedger
+from test_quota import FakeRequest, quota_error
+from youtube_service import YouTubeService
+
+
+class FakeClient:
+    """Stands in for one discovery client; counts calls and concurrent use"""
+
+    def __init__(self, key_id, stats, exhausted=False, delay=0):
+        self.key_id = key_id
+        self.stats = stats
+        self.exhausted = exhausted
+        self.delay = delay
+
+    def search(self):
+        return self
+
+    def list(self, **kwargs):
+        return self
+
+    def execute(self):
+        with self.stats['lock']:
+            self.stats['calls'].append(self.key_id)
+            self.stats['active'] += 1
+            self.stats['peak'] = max(self.stats['peak'], self.stats['active'])
+        try:
+            time.sleep(self.delay)
+            if self.exhausted:
+                raise quota_error()
+            return {'items': []}
+        finally:
+            with self.stats['lock']:
+                self.stats['active'] -= 1
+
+
+def new_stats():
+    return {'lock': threading.Lock(), 'calls': [], 'active': 0, 'peak': 0}
+
+
+def test_youtube_key_pool():
+    db_path = os.path.join(tempfile.mkdtemp(), 'keys.db')
+    db = Database(db_path)
+    ledger = QuotaLedger(db, daily_limit=300)
+    stats = new_stats()
+    clients = {
+        'key-a': [FakeClient('key-a', stats)],
+        'key-b': [FakeClient('key-b', stats)],
+    }
+    youtube = YouTubeService.from_clients(clients, quota_ledger=ledger)
+    search = lambda client: client.search().list(q='drake leak')
+
+    # The total budget is the sum over keys
+    assert ledger.remaining() == 600
+    assert ledger.status()['daily_limit'] == 600
+
+    # Calls go to the key with the most budget left, so spending alternates
+    for _ in range(4):
+        youtube._execute(search, 'search.list', 'drake leak')
+    assert stats['calls'] == ['key-a', 'key-b', 'key-a', 'key-b']
+    assert ledger.remaining_by_key() == {'key-a': 100, 'key-b': 100}
+
+    # quotaExceeded on one key (budgets tie, so key-a is tried first): retried on the other key
+    clients['key-a'][0].exhausted = True
+    stats['calls'].clear()
+    youtube._execute(search, 'search.list', 'drake leak')
+    assert stats['calls'] == ['key-a', 'key-b']
+    assert ledger.remaining_by_key() == {'key-a': 0, 'key-b': 0}
+    assert [key['exhausted'] for key in youtube.pool.status()] == [True, False]
+
+    # Every key spent: refused locally without calling YouTube
+    stats['calls'].clear()
+    try:
+        youtube._execute(search, 'search.list')
+        assert False, "expected quota exception"
+    except Exception as e:
+        assert 'quota exceeded on all 2' in str(e)
+    assert stats['calls'] == []
+
+    # A new quota day puts exhausted keys back in rotation
+    youtube.pool._exhausted = {'key-a': '2000-01-01'}
+    youtube.quota_ledger = youtube.pool.quota_ledger = None
+    clients['key-a'][0].exhausted = False
+    youtube._execute(search, 'search.list')
+    assert stats['calls'] == ['key-a']
+
+    # Concurrency: one client per concurrent call, never shared between threads
+    stats = new_stats()
+    youtube = YouTubeService.from_clients({
+        'key-a': [FakeClient('key-a', stats, delay=0.02) for _ in range(2)],
+        'key-b': [FakeClient('key-b', stats, delay=0.02) for _ in range(2)],
+    })
+    threads = [threading.Thread(target=youtube._execute, args=(search, 'search.list')) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(stats['calls']) == 12
+    assert stats['peak'] <= 4
+    assert {client['idle_clients'] for client in youtube.pool.status()} == {2}
+
+    # The last key to run out re-raises YouTube's own error
+    youtube = YouTubeService.from_clients({'key-c': [None]})
+    try:
+        youtube._execute(lambda client: FakeRequest(error=quota_error()), 'search.list')
+        assert False, "expected HttpError"
+    except Exception as e:
+        assert 'quotaExceeded' in str(e)
+
+    print(f"Peak concurrent calls: {stats['peak']}")
+    print("[PASS] YouTube key pool")
+
+
+if __name__ == "__main__":
+    test_youtube_key_pool()
@@ -7,10 +7,17 @@ No API keys required - bypasses Spotify restrictions completely.
 import requests
 import re
 import time
-from typing import List, Dict, Optional
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
 from urllib.parse import quote, urljoin
 from html.parser import HTMLParser
 
+from metrics import DEEZER_API
+
+
+# Flexible CSV column names for song imports, in order of preference
+SONG_NAME_COLUMNS = ['song_name', 'title', 'song', 'track', 'name', 'track_name', 'song_title']
+SONG_ARTIST_COLUMNS = ['artist_name', 'artist', 'performer', 'band']
+
 
 class SimpleHTMLTextExtractor(HTMLParser):
     """Simple HTML parser to extract text content"""
@@ -77,7 +84,8 @@ class WebScraperService:
         """
         try:
             self._rate_limit(0.3)
-            response = requests.get(
+            response = DEEZER_API.call(
+                requests.get,
                 f"{self.deezer_base}/search/artist",
                 params={"q": artist_name, "limit": 5},
                 headers={"User-Agent": self.headers["User-Agent"]},
@@ -141,7 +149,8 @@ class WebScraperService:
 
             # Step 2: Get top tracks (most popular songs)
             self._rate_limit(0.3)
-            top_response = requests.get(
+            top_response = DEEZER_API.call(
+                requests.get,
                 f"{self.deezer_base}/artist/{artist_id}/top",
                 params={"limit": 100},
                 headers={"User-Agent": self.headers["User-Agent"]},
@@ -161,7 +170,8 @@ class WebScraperService:
 
             # Step 3: Get all albums
             self._rate_limit(0.3)
-            albums_response = requests.get(
+            albums_response = DEEZER_API.call(
+                requests.get,
                 f"{self.deezer_base}/artist/{artist_id}/albums",
                 params={"limit": 100},
                 headers={"User-Agent": self.headers["User-Agent"]},
@@ -180,7 +190,8 @@ class WebScraperService:
 
                     # Get tracks for each album
                     self._rate_limit(0.3)
-                    tracks_response = requests.get(
+                    tracks_response = DEEZER_API.call(
+                        requests.get,
                         f"{self.deezer_base}/album/{album['id']}/tracks",
                         params={"limit": 100},
                         headers={"User-Agent": self.headers["User-Agent"]},
@@ -359,10 +370,36 @@ class WebScraperService:
     # CSV/EXCEL PARSER
     # =========================================================================
 
-    def parse_csv_songs(self, content: str, artist_name: str = None) -> Dict:
+    @staticmethod
+    def resolve_song_columns(header: List[str]) -> Tuple[List[int], List[int]]:
+        """
+        Song name and artist column indexes, resolved once per file from the header
+
+        Returns:
+            (name indexes in order of preference, ending with the first column as
+             the fallback; artist indexes in order of preference)
+        """
+        positions = {}
+        for index, column in enumerate(header):
+            positions.setdefault(str(column).lstrip('\ufeff').lower().strip(), index)
+
+        name_indexes = [positions[col] for col in SONG_NAME_COLUMNS if col in positions] + [0]
+        artist_indexes = [positions[col] for col in SONG_ARTIST_COLUMNS if col in positions]
+        return name_indexes, artist_indexes
+
+    @staticmethod
+    def song_key(song_name: str) -> str:
+        """Dedup key: case-folded, whitespace collapsed"""
+        return ' '.join(song_name.casefold().split())
+
+    def parse_csv_songs(self, content: Union[str, BinaryIO, Iterable[str]], artist_name: str = None) -> Dict:
         """
         Parse CSV content for song import.
         
+        content may be text, an iterable of lines, or a binary upload stream
+        (encoding sniffed). Columns are resolved once from the header and rows
+        are read by position.
+        
         Expected columns (flexible):
         - song_name / title / song / track / name
         - artist_name / artist (optional, uses provided artist_name as default)
@@ -370,56 +407,8 @@ class WebScraperService:
         Returns:
             dict with parsed songs
         """
-        import csv
-        import io
-
         try:
-            reader = csv.DictReader(io.StringIO(content))
-            songs = []
-            seen = set()
-
-            # Map flexible column names
-            name_columns = ['song_name', 'title', 'song', 'track', 'name', 'track_name', 'song_title']
-            artist_columns = ['artist_name', 'artist', 'performer', 'band']
-
-            for row in reader:
-                # Find the song name column
-                song_name = None
-                for col in name_columns:
-                    for key in row:
-                        if key.lower().strip() == col:
-                            song_name = row[key].strip()
-                            break
-                    if song_name:
-                        break
-
-                if not song_name:
-                    # Try first column as song name
-                    first_key = list(row.keys())[0] if row else None
-                    if first_key:
-                        song_name = row[first_key].strip()
-
-                if not song_name:
-                    continue
-
-                # Find artist name
-                song_artist = artist_name or ''
-                for col in artist_columns:
-                    for key in row:
-                        if key.lower().strip() == col:
-                            val = row[key].strip()
-                            if val:
-                                song_artist = val
-                            break
-
-                if song_name.lower() not in seen:
-                    seen.add(song_name.lower())
-                    songs.append({
-                        "name": song_name,
-                        "artist_name": song_artist,
-                        "duration_ms": None,
-                        "release_date": None
-                    })
+            songs = self._parse_csv_songs_rows(content, artist_name)
 
             return {
                 "success": True,
@@ -435,6 +424,64 @@ class WebScraperService:
                 "songs": []
             }
 
+    @staticmethod
+    def _song(name: str, artist_name: str) -> Dict:
+        return {
+            "name": name,
+            "artist_name": artist_name,
+            "duration_ms": None,
+            "release_date": None
+        }
+
+    def _parse_csv_songs_rows(self, content, artist_name: str = None) -> List[Dict]:
+        """Songs from CSV text, lines or a binary stream via csv.reader"""
+        import csv
+        import io
+        from bulk_import import iter_text_lines
+
+        if isinstance(content, str):
+            content = io.StringIO(content)
+        elif hasattr(content, 'read') and not isinstance(content, io.TextIOBase):
+            content = iter_text_lines(content)
+
+        reader = csv.reader(content)
+        header = next(reader, None)
+        if not header:
+            return []
+        name_indexes, artist_indexes = self.resolve_song_columns(header)
+
+        songs = []
+        seen = set()
+        default_artist = artist_name or ''
+        song_key = self.song_key
+
+        for row in reader:
+            width = len(row)
+
+            # First non-empty name column (the first column as the fallback)
+            song_name = ''
+            for index in name_indexes:
+                if index < width:
+                    song_name = row[index].strip()
+                    if song_name:
+                        break
+            if not song_name:
+                continue
+
+            song_artist = default_artist
+            for index in artist_indexes:
+                if index < width and row[index].strip():
+                    song_artist = row[index].strip()
+                    break
+
+            # First occurrence of each normalised name is kept
+            key = song_key(song_name)
+            if key not in seen:
+                seen.add(key)
+                songs.append(self._song(song_name, song_artist))
+
+        return songs
+
 
 # Example usage / test
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+"""
+WSGI entry point
+
+    gunicorn -c gunicorn.conf.py wsgi:app     (Linux / Docker)
+    python wsgi.py                            (waitress, e.g. on Windows)
+
+Under waitress the app runs in one process, so the scheduler starts in-process
+(start_runtime) and is shut down on exit.
+"""
+
+import os
+
+from app import app, start_runtime  # noqa: F401
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    start_runtime()
+    serve(
+        app,
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', 5000)),
+        threads=int(os.getenv('WAITRESS_THREADS', 8))
+    )
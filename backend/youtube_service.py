@@ -1,24 +1,166 @@
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 from models import Video
+from metrics import YOUTUBE_API
+from quota import QUOTA_COSTS, QuotaLedger, key_fingerprint
 import os
+import threading
+
+
+class YouTubeKeyPool:
+    """
+    API keys, each with its own discovery clients and daily quota
+    
+    Each call goes to the key with the most budget left. A key that answers
+    quotaExceeded is out of rotation until the quota day resets (midnight
+    Pacific). Every key has one client per concurrent call it may serve
+    (googleapiclient clients are not thread-safe), so callers wait for a free
+    client instead of sharing one.
+    """
+    
+    def __init__(self, clients: Dict[str, List], quota_ledger=None):
+        self.quota_ledger = quota_ledger
+        self.key_ids = list(clients)
+        self._idle = {key_id: list(key_clients) for key_id, key_clients in clients.items()}
+        self._exhausted = {}  # key_id -> quota day it ran out on
+        self._available = threading.Condition()
+        if quota_ledger is not None:
+            quota_ledger.track_keys(self.key_ids)
+    
+    def _budgets(self, units: int) -> List[str]:
+        """Keys that can afford `units`, most remaining budget first"""
+        today = QuotaLedger.quota_day()
+        for key_id, day in list(self._exhausted.items()):
+            if day != today:
+                del self._exhausted[key_id]
+        
+        key_ids = [key_id for key_id in self.key_ids if key_id not in self._exhausted]
+        if self.quota_ledger is None:
+            return key_ids
+        
+        remaining = self.quota_ledger.remaining_by_key()
+        key_ids = [key_id for key_id in key_ids if remaining[key_id] >= units]
+        return sorted(key_ids, key=lambda key_id: -remaining[key_id])
+    
+    def has_budget(self, units: int = 1) -> bool:
+        with self._available:
+            return bool(self._budgets(units))
+    
+    def acquire(self, units: int = 1):
+        """(key_id, client) of the best key with a free client; waits while all are busy"""
+        with self._available:
+            while True:
+                key_ids = self._budgets(units)
+                if not key_ids:
+                    resets = QuotaLedger.resets_at()
+                    raise Exception(f"YouTube API quota exceeded on all {len(self.key_ids)} API key(s) "
+                                    f"(resets {resets}). Please wait or add another API key.")
+                for key_id in key_ids:
+                    if self._idle[key_id]:
+                        return key_id, self._idle[key_id].pop()
+                self._available.wait()
+    
+    def release(self, key_id: str, client):
+        with self._available:
+            self._idle[key_id].append(client)
+            self._available.notify()
+    
+    def exhaust(self, key_id: str):
+        """Take a key out of rotation until the next quota day"""
+        with self._available:
+            self._exhausted[key_id] = QuotaLedger.quota_day()
+            self._available.notify_all()
+        if self.quota_ledger is not None:
+            self.quota_ledger.mark_exhausted(key_id)
+    
+    def status(self) -> List[Dict]:
+        with self._available:
+            return [{
+                'key_id': key_id,
+                'exhausted': key_id in self._exhausted,
+                'idle_clients': len(self._idle[key_id])
+            } for key_id in self.key_ids]
+
 
 class YouTubeService:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    def __init__(self, api_key: Union[str, List[str]], quota_ledger=None, concurrency: int = 1):
+        # One key or several (a YouTubeKeyPool rotates between them)
+        api_keys = [api_key] if isinstance(api_key, str) else list(api_key)
+        self.api_keys = list(dict.fromkeys(key.strip() for key in api_keys
+                                           if key and key.strip() and key != "your_youtube_api_key_here"))
+        self.api_key = self.api_keys[0] if self.api_keys else ''
         self.youtube = None
+        # Every API call is booked in the ledger (QuotaLedger) when one is given
+        self.quota_ledger = quota_ledger
+        self.concurrency = max(1, concurrency)
+        self.pool = None
         self._initialize_service()
     
+    @classmethod
+    def from_clients(cls, clients: Dict[str, List], quota_ledger=None) -> 'YouTubeService':
+        """Service over prebuilt clients ({key_id: [client, ...]}), e.g. fakes in tests"""
+        service = cls.__new__(cls)
+        service.api_keys = []
+        service.api_key = ''
+        service.quota_ledger = quota_ledger
+        service.concurrency = max(len(key_clients) for key_clients in clients.values())
+        service.pool = YouTubeKeyPool(clients, quota_ledger)
+        service.youtube = next(iter(clients.values()))[0]
+        return service
+    
     def _initialize_service(self):
-        if not self.api_key or self.api_key == "your_youtube_api_key_here":
+        if not self.api_keys:
             raise ValueError("YouTube API key is not configured. Please set YOUTUBE_API_KEY in .env file")
         
+        # Imported here: googleapiclient.discovery is slow to import and only
+        # needed once a key is configured
+        from googleapiclient.discovery import build
+        
         try:
-            self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+            # static_discovery uses the discovery document bundled with
+            # google-api-python-client, so building the client needs no network
+            clients = {
+                key_fingerprint(api_key): [
+                    build('youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False)
+                    for _ in range(self.concurrency)
+                ]
+                for api_key in self.api_keys
+            }
         except Exception as e:
             raise ValueError(f"Failed to initialize YouTube service: {str(e)}")
+        
+        self.pool = YouTubeKeyPool(clients, self.quota_ledger)
+        self.youtube = next(iter(clients.values()))[0]
+    
+    def _execute(self, build_request, endpoint: str, label: str = None):
+        """
+        Build the request on a pooled key's client, execute it and book its quota cost
+        
+        quotaExceeded takes the key out of rotation and retries on the next one;
+        the error is raised once no key has budget left.
+        """
+        units = QUOTA_COSTS.get(endpoint, 1)
+        
+        while True:
+            key_id, client = self.pool.acquire(units)
+            try:
+                response = YOUTUBE_API.call(build_request(client).execute)
+            except HttpError as e:
+                if 'quotaExceeded' in str(e):
+                    self.pool.exhaust(key_id)
+                    if self.pool.has_budget(units):
+                        continue
+                elif self.quota_ledger is not None:
+                    # Failed requests are still charged
+                    self.quota_ledger.record(endpoint, key_id, units, label, success=False)
+                raise
+            finally:
+                self.pool.release(key_id, client)
+            
+            if self.quota_ledger is not None:
+                self.quota_ledger.record(endpoint, key_id, units, label)
+            return response
     
     def search_videos(self, keyword: str, max_results: int = 50) -> List[Video]:
         """
@@ -31,13 +173,13 @@ class YouTubeService:
         
         try:
             # Search for videos
-            search_response = self.youtube.search().list(
+            search_response = self._execute(lambda youtube: youtube.search().list(
                 q=keyword,
                 part='id,snippet',
                 maxResults=min(max_results, 50),  # YouTube API limit per request
                 type='video',
                 order='date'
-            ).execute()
+            ), 'search.list', keyword)
             
             for item in search_response.get('items', []):
                 video_id = item['id']['videoId']
@@ -60,7 +202,8 @@ class YouTubeService:
                     ai_risk_score=0,
                     ai_risk_level=None,
                     ai_reason=None,
-                    created_at=datetime.now().isoformat()
+                    created_at=datetime.now().isoformat(),
+                    description=snippet.get('description', '')
                 )
                 
                 videos.append(video)
@@ -78,15 +221,107 @@ class YouTubeService:
         except Exception as e:
             raise Exception(f"Error searching YouTube: {str(e)}")
     
+    @staticmethod
+    def uploads_playlist_id(channel_id: str) -> str:
+        """A channel's uploads playlist: UCxxxx -> UUxxxx (no API call needed)"""
+        if channel_id.startswith('UC'):
+            return 'UU' + channel_id[2:]
+        return channel_id
+    
+    def get_channel_uploads(self, channel_id: str, matched_keyword: str, since_video_id: str = None,
+                            since_published: str = None, max_pages: int = 1) -> tuple:
+        """
+        Newest uploads of a channel via its uploads playlist (playlistItems.list, 1 quota unit
+        per page of 50 - vs 100 for search.list)
+        
+        Pages newest-first and stops at the last item seen by the previous poll
+        (since_video_id, or anything published at/before since_published).
+        
+        Returns:
+            (videos, cursor, pages) - cursor is {'video_id', 'published'} of the newest
+            item seen (None when the playlist is empty)
+        """
+        if not self.youtube:
+            raise ValueError("YouTube service not initialized")
+        
+        videos = []
+        cursor = None
+        pages = 0
+        page_token = None
+        
+        try:
+            while pages < max_pages:
+                response = self._execute(lambda youtube: youtube.playlistItems().list(
+                    playlistId=self.uploads_playlist_id(channel_id),
+                    part='snippet,contentDetails',
+                    maxResults=50,
+                    pageToken=page_token
+                ), 'playlistItems.list', matched_keyword)
+                pages += 1
+                
+                reached_seen = False
+                for item in response.get('items', []):
+                    details = item.get('contentDetails', {})
+                    snippet = item['snippet']
+                    video_id = details.get('videoId') or snippet['resourceId']['videoId']
+                    published = details.get('videoPublishedAt') or snippet['publishedAt']
+                    
+                    if video_id == since_video_id or (since_published and published <= since_published):
+                        reached_seen = True
+                        break
+                    if cursor is None:
+                        cursor = {'video_id': video_id, 'published': published}
+                    
+                    # Private/deleted uploads have no thumbnails and nothing to review
+                    thumbnails = snippet.get('thumbnails', {})
+                    if not thumbnails:
+                        continue
+                    
+                    videos.append(Video(
+                        id=None,
+                        video_id=video_id,
+                        title=snippet['title'],
+                        channel_name=snippet.get('videoOwnerChannelTitle') or snippet['channelTitle'],
+                        channel_id=snippet.get('videoOwnerChannelId') or channel_id,
+                        publish_date=published,
+                        thumbnail_url=(thumbnails.get('medium') or thumbnails.get('default'))['url'],
+                        video_url=f"https://www.youtube.com/watch?v={video_id}",
+                        matched_keyword=matched_keyword,
+                        status='Pending',
+                        priority='Medium',
+                        artist_id=None,
+                        auto_flagged=False,
+                        ai_risk_score=0,
+                        ai_risk_level=None,
+                        ai_reason=None,
+                        created_at=datetime.now().isoformat(),
+                        description=snippet.get('description', '')
+                    ))
+                
+                page_token = response.get('nextPageToken')
+                if reached_seen or not page_token:
+                    break
+            
+            return videos, cursor, pages
+        
+        except HttpError as e:
+            error_msg = str(e)
+            if 'quotaExceeded' in error_msg:
+                raise Exception("YouTube API quota exceeded. Please wait or use a different API key.")
+            elif 'playlistNotFound' in error_msg:
+                raise Exception(f"Uploads playlist not found for channel {channel_id}")
+            else:
+                raise Exception(f"YouTube API error: {error_msg}")
+    
     def get_video_details(self, video_id: str) -> Optional[Dict]:
         """
         Get detailed information about a specific video
         """
         try:
-            response = self.youtube.videos().list(
+            response = self._execute(lambda youtube: youtube.videos().list(
                 part='snippet,statistics,contentDetails',
                 id=video_id
-            ).execute()
+            ), 'videos.list')
             
             if response['items']:
                 return response['items'][0]
@@ -128,14 +363,14 @@ class YouTubeService:
         
         try:
             # Search for videos
-            search_response = self.youtube.search().list(
+            search_response = self._execute(lambda youtube: youtube.search().list(
                 q=search_query,
                 part='id,snippet',
                 maxResults=min(max_results, 50),
                 type='video',
                 order='relevance',
                 videoDuration='medium'  # Excludes shorts (>4 min, <20 min)
-            ).execute()
+            ), 'search.list', matched_identifier)
             
             # Collect video IDs for batch details request
             for item in search_response.get('items', []):
@@ -145,10 +380,10 @@ class YouTubeService:
                 return []
             
             # Get video details including duration in batch
-            details_response = self.youtube.videos().list(
+            details_response = self._execute(lambda youtube: youtube.videos().list(
                 part='snippet,contentDetails',
                 id=','.join(video_ids)
-            ).execute()
+            ), 'videos.list', matched_identifier)
             
             # Parse durations and create video objects with quality scoring
             for item in details_response.get('items', []):
@@ -249,7 +484,9 @@ class YouTubeService:
                     ai_risk_score=0,
                     ai_risk_level=None,
                     ai_reason=None,
-                    created_at=datetime.now().isoformat()
+                    created_at=datetime.now().isoformat(),
+                    description=snippet.get('description', ''),
+                    duration=video_duration_sec
                 )
                 
                 # Calculate match quality score (0-100, higher is better)
@@ -264,9 +501,7 @@ class YouTubeService:
                 if score < 50:  # Minimum acceptable match quality (was 30)
                     continue
                 
-                # Store metadata for sorting
-                video._duration_sec = video_duration_sec
-                video._match_score = score
+                video.match_score = score
                 
                 # Set priority based on match score
                 if score >= 90:
@@ -292,17 +527,10 @@ class YouTubeService:
                 
                 videos.sort(key=lambda v: (
                     -priority_rank.get(v.priority, 0),  # Priority first (Critical/High at top)
-                    -v._match_score,  # Then by match score (highest first)
-                    abs(v._duration_sec - original_duration_sec) if original_duration_sec else 0  # Then by duration accuracy
+                    -v.match_score,  # Then by match score (highest first)
+                    abs(v.duration - original_duration_sec) if original_duration_sec else 0  # Then by duration accuracy
                 ))
             
-            # Clean up temp attributes
-            for video in videos:
-                if hasattr(video, '_duration_sec'):
-                    delattr(video, '_duration_sec')
-                if hasattr(video, '_match_score'):
-                    delattr(video, '_match_score')
-            
             return videos
         
         except HttpError as e:
@@ -516,11 +744,11 @@ class YouTubeService:
         Test if the API key is valid
         """
         try:
-            self.youtube.search().list(
+            self._execute(lambda youtube: youtube.search().list(
                 q='test',
                 part='id',
                 maxResults=1
-            ).execute()
+            ), 'search.list', 'api key check')
             return True
         except:
             return False
@@ -89,8 +89,19 @@ function AutoUpdateManager({ apiConfigured }) {
     
     setLoading(true)
     try {
+      // Runs as a background job - poll until it finishes
       const response = await axios.post('/api/auto-update/run-all')
-      const results = response.data.results
+      let job = response.data.job
+      while (job.status === 'pending' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 2000))
+        job = (await axios.get(`/api/jobs/${job.id}`)).data
+      }
+      
+      if (job.status === 'failed') {
+        throw new Error(job.error)
+      }
+      
+      const results = job.result.results
       
       const summary = results.map(r => 
         r.success 